@@ -0,0 +1,40 @@
+"""record_changes: per-record position in the /records/changes feed
+
+Revision ID: 5e1f0c2a9b73
+Revises: a0b1c2d3e4f5
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "5e1f0c2a9b73"
+down_revision = "a0b1c2d3e4f5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "record_changes",
+        sa.Column("record_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("seq", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("record_id"),
+    )
+    # Existing records enter the feed at seq 0, ahead of every later change
+    # (data versions start at 1).
+    op.execute(
+        "INSERT INTO record_changes (record_id, user_id, seq) "
+        "SELECT id, user_id, 0 FROM health_records"
+    )
+    op.create_index(
+        "idx_record_changes_user_seq", "record_changes", ["user_id", "seq", "record_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_record_changes_user_seq", table_name="record_changes")
+    op.drop_table("record_changes")
@@ -0,0 +1,126 @@
+"""encounter_links: the encounter graph projection behind /records/{id}/linked
+
+Backfilled here from ``health_records``: the plain columns in SQL, then the
+provider/preview ``summary`` in batches, by decrypting each linked record's
+FHIR resource (``encounter_graph.summarize``, as the app does at commit).
+
+``record_id`` refers to a health record. Once ``health_records`` is hash
+partitioned (``scripts/partition_health_records.py``), ``id`` alone is no
+longer unique, so the key is ``(record_id, user_id)`` -> ``(id, user_id)``;
+before that it is a plain key on ``record_id``, which the partition switch
+replaces with its delete trigger like the other referencing tables. Either
+way deleting a record deletes its row.
+
+Revision ID: 7a3c9e1f2b64
+Revises: c2d3e4f5a6b7
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+from app.models.encrypted_types import EncryptedJSON
+from app.services.encounter_graph import summarize
+
+revision = "7a3c9e1f2b64"
+down_revision = "c2d3e4f5a6b7"
+branch_labels = None
+depends_on = None
+
+_BATCH = 1000
+
+
+def _fill_summaries(conn: sa.Connection) -> None:
+    links = sa.table(
+        "encounter_links",
+        sa.column("record_id"), sa.column("user_id"), sa.column("summary", EncryptedJSON()),
+    )
+    records = sa.table(
+        "health_records",
+        sa.column("id"), sa.column("user_id"), sa.column("record_type"),
+        sa.column("fhir_resource", EncryptedJSON()),
+    )
+    page = (
+        sa.select(links.c.user_id, links.c.record_id, records.c.record_type,
+                  records.c.fhir_resource)
+        .join(records, sa.and_(records.c.id == links.c.record_id,
+                               records.c.user_id == links.c.user_id))
+        .order_by(links.c.user_id, links.c.record_id)
+        .limit(_BATCH)
+    )
+    fill = (
+        links.update()
+        .where(links.c.user_id == sa.bindparam("uid"), links.c.record_id == sa.bindparam("rid"))
+        .values(summary=sa.bindparam("summary", type_=EncryptedJSON()))
+    )
+    last = None
+    while True:
+        query = page if last is None else page.where(
+            sa.tuple_(links.c.user_id, links.c.record_id) > sa.tuple_(*last)
+        )
+        rows = conn.execute(query).all()
+        if not rows:
+            return
+        values = [
+            {"uid": r.user_id, "rid": r.record_id, "summary": summary}
+            for r in rows
+            if (summary := summarize(r.fhir_resource, r.record_type)) is not None
+        ]
+        if values:
+            conn.execute(fill, values)
+        last = (rows[-1].user_id, rows[-1].record_id)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    partitioned = conn.scalar(
+        sa.text("SELECT relkind = 'p' FROM pg_class WHERE oid = 'health_records'::regclass")
+    )
+    if partitioned:
+        record_key = sa.ForeignKeyConstraint(
+            ["record_id", "user_id"], ["health_records.id", "health_records.user_id"],
+            ondelete="CASCADE",
+        )
+    else:
+        record_key = sa.ForeignKeyConstraint(
+            ["record_id"], ["health_records.id"], ondelete="CASCADE"
+        )
+    op.create_table(
+        "encounter_links",
+        sa.Column("record_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("encounter_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("record_type", sa.Text(), nullable=False),
+        sa.Column("display_text", sa.Text(), nullable=False),
+        sa.Column("code_display", sa.Text(), nullable=True),
+        sa.Column("category", postgresql.ARRAY(sa.Text()), nullable=True),
+        sa.Column("effective_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("summary", sa.LargeBinary(), nullable=True),
+        record_key,
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("record_id"),
+    )
+    op.execute(
+        "INSERT INTO encounter_links (record_id, user_id, encounter_id, record_type, "
+        "display_text, code_display, category, effective_date) "
+        "SELECT r.id, r.user_id, "
+        "CASE WHEN e.is_duplicate AND e.merged_into_id IS NOT NULL "
+        "THEN e.merged_into_id ELSE e.id END, "
+        "r.record_type, r.display_text, r.code_display, r.category, r.effective_date "
+        "FROM health_records r JOIN health_records e "
+        "ON e.id = r.linked_encounter_id AND e.user_id = r.user_id "
+        "WHERE r.deleted_at IS NULL AND r.is_duplicate IS FALSE"
+    )
+    _fill_summaries(conn)
+    op.create_index(
+        "idx_encounter_links_encounter",
+        "encounter_links",
+        ["user_id", "encounter_id", sa.text("effective_date DESC"), "record_id"],
+        postgresql_include=["record_type"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_encounter_links_encounter", table_name="encounter_links")
+    op.drop_table("encounter_links")
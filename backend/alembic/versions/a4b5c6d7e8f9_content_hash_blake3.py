@@ -0,0 +1,30 @@
+"""health_records: content_hash_blake3 (v2 content hash)
+
+Nullable and unindexed: written next to ``content_hash`` (v1, sha256) when
+``CONTENT_HASH_BLAKE3`` is enabled and filled for older rows by
+``scripts/backfill_content_hash_blake3.py``. See
+``app/services/ingestion/content_hash.py`` for the migration plan.
+
+Revision ID: a4b5c6d7e8f9
+Revises: f3a4b5c6d7e8
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "a4b5c6d7e8f9"
+down_revision = "f3a4b5c6d7e8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "health_records",
+        sa.Column("content_hash_blake3", sa.Text(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("health_records", "content_hash_blake3")
@@ -0,0 +1,59 @@
+"""record_minhashes: MinHash/LSH near-duplicate index
+
+One row per signed health record with its MinHash signature, plus one
+``record_minhash_bands`` row per LSH band holding the bucket key, indexed
+``(band_key, record_id)`` so upload dedup can look up near-duplicate
+candidates instead of loading the patient's whole record set. Starts empty;
+rows are filled lazily per patient by
+``app.services.dedup.minhash_index.refresh_patient_index``.
+
+Revision ID: b5c6d7e8f9a0
+Revises: a4b5c6d7e8f9
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "b5c6d7e8f9a0"
+down_revision = "a4b5c6d7e8f9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "record_minhashes",
+        sa.Column(
+            "record_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("health_records.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("patient_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("record_version", sa.Integer(), nullable=False),
+        sa.Column("signature", sa.LargeBinary(), nullable=False),
+    )
+    op.create_table(
+        "record_minhash_bands",
+        sa.Column(
+            "record_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("record_minhashes.record_id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("band", sa.SmallInteger(), primary_key=True),
+        sa.Column("band_key", sa.BigInteger(), nullable=False),
+    )
+    op.create_index(
+        "idx_record_minhash_bands_key",
+        "record_minhash_bands",
+        ["band_key", "record_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_record_minhash_bands_key", table_name="record_minhash_bands")
+    op.drop_table("record_minhash_bands")
+    op.drop_table("record_minhashes")
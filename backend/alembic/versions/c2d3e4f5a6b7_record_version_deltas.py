@@ -0,0 +1,34 @@
+"""record_versions.delta: compacted snapshots stored as encrypted diffs
+
+Revision ID: c2d3e4f5a6b7
+Revises: 5e1f0c2a9b73
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "c2d3e4f5a6b7"
+down_revision = "5e1f0c2a9b73"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("record_versions", sa.Column("delta", sa.LargeBinary(), nullable=True))
+    op.alter_column(
+        "record_versions", "fhir_resource",
+        existing_type=postgresql.JSONB(), nullable=True,
+    )
+
+
+def downgrade() -> None:
+    # Compacted snapshots have no full copy; run the compaction's inverse
+    # (or drop them) before downgrading.
+    op.execute("DELETE FROM record_versions WHERE fhir_resource IS NULL")
+    op.alter_column(
+        "record_versions", "fhir_resource",
+        existing_type=postgresql.JSONB(), nullable=False,
+    )
+    op.drop_column("record_versions", "delta")
@@ -0,0 +1,36 @@
+"""record_versions.user_id: partition key for hash partitioning
+
+``scripts/partition_health_records.py`` partitions ``health_records`` and
+``record_versions`` by ``HASH (user_id)``; version rows carry their record's
+owner so the same key works for both. Nullable and not backfilled here: the
+partitioning copy takes ``user_id`` from the parent record for older rows.
+
+Revision ID: c6d7e8f9a0b1
+Revises: b5c6d7e8f9a0
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "c6d7e8f9a0b1"
+down_revision = "b5c6d7e8f9a0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "record_versions",
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id"),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("record_versions", "user_id")
@@ -0,0 +1,30 @@
+"""uploaded_files.ingest_checkpoint: resume point of structured ingest jobs
+
+Structured uploads are ingested by a worker instead of inside the upload
+request. Each committed batch also records how far the parser got (bundle
+entry, or Epic table plus row), so a job whose worker died resumes there.
+
+Revision ID: d7e8f9a0b1c2
+Revises: c6d7e8f9a0b1
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "d7e8f9a0b1c2"
+down_revision = "c6d7e8f9a0b1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "uploaded_files",
+        sa.Column("ingest_checkpoint", postgresql.JSONB(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("uploaded_files", "ingest_checkpoint")
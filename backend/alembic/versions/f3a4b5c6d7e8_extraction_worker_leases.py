@@ -0,0 +1,45 @@
+"""uploaded_files: extraction-worker lease columns + claim index
+
+The extraction worker claims files in batches under a lease (``lease_owner`` +
+``lease_expires_at``) renewed by heartbeat, replacing the periodic stuck-file
+sweep: a file whose lease lapsed is simply claimable again. The partial index
+serves the claim query (oldest claimable unstructured files first) without
+scanning terminal rows.
+
+Revision ID: f3a4b5c6d7e8
+Revises: e5f6a7b8c9d0
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "f3a4b5c6d7e8"
+down_revision = "e5f6a7b8c9d0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "uploaded_files",
+        sa.Column("lease_owner", sa.Text(), nullable=True),
+    )
+    op.add_column(
+        "uploaded_files",
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_uploaded_files_extraction_queue
+        ON uploaded_files (created_at)
+        WHERE file_category = 'unstructured'
+          AND ingestion_status IN ('pending_extraction', 'processing')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_uploaded_files_extraction_queue")
+    op.drop_column("uploaded_files", "lease_expires_at")
+    op.drop_column("uploaded_files", "lease_owner")
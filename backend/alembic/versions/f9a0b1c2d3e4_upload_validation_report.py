@@ -0,0 +1,30 @@
+"""uploaded_files.validation_report: structural FHIR drift per upload
+
+The FHIR validation engine samples, caches and optionally defers its
+checks; what it checked and the drift it found in one upload is kept with
+the upload.
+
+Revision ID: f9a0b1c2d3e4
+Revises: e8f9a0b1c2d3
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "f9a0b1c2d3e4"
+down_revision = "e8f9a0b1c2d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "uploaded_files",
+        sa.Column("validation_report", postgresql.JSONB(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("uploaded_files", "validation_report")
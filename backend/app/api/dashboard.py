@@ -13,6 +13,8 @@ from app.middleware.encryption import decrypt_field
 from app.models.patient import Patient
 from app.models.record import HealthRecord
 from app.models.uploaded_file import UploadedFile
+from app.services.data_version import check_etag, not_modified
+from app.utils.json_response import FastJSONResponse
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
@@ -24,6 +26,18 @@ async def get_overview(
     db: AsyncSession = Depends(get_db),
 ):
     """Dashboard summary data with real counts."""
+    etag, unchanged = await check_etag(db, user_id, request)
+    if unchanged:
+        await log_audit_event(
+            db,
+            user_id=user_id,
+            action="dashboard.overview",
+            resource_type="dashboard",
+            ip_address=request.client.host if request.client else None,
+            details={"not_modified": True},
+        )
+        return not_modified(etag)
+
     base_filter = [
         HealthRecord.user_id == user_id,
         HealthRecord.deleted_at.is_(None),
@@ -96,7 +110,7 @@ async def get_overview(
         ip_address=request.client.host if request.client else None,
     )
 
-    return {
+    return FastJSONResponse({
         "total_records": total_records,
         "total_patients": total_patients,
         "total_uploads": total_uploads,
@@ -104,7 +118,7 @@ async def get_overview(
         "recent_records": recent_items,
         "date_range_start": date_row[0].isoformat() if date_row[0] else None,
         "date_range_end": date_row[1].isoformat() if date_row[1] else None,
-    }
+    }, headers={"ETag": etag})
 
 
 @router.get("/labs")
@@ -172,7 +186,7 @@ async def get_labs_dashboard(
         ip_address=request.client.host if request.client else None,
     )
 
-    return {"items": items, "total": total, "page": page, "page_size": page_size}
+    return FastJSONResponse({"items": items, "total": total, "page": page, "page_size": page_size})
 
 
 @router.get("/sources")
@@ -206,7 +220,7 @@ async def get_sources(
         ip_address=request.client.host if request.client else None,
     )
 
-    return {"items": items, "total": len(items)}
+    return FastJSONResponse({"items": items, "total": len(items)})
 
 
 @router.get("/patients")
@@ -229,7 +243,7 @@ async def get_patients(
         ip_address=request.client.host if request.client else None,
     )
 
-    return {
+    return FastJSONResponse({
         "items": [
             {
                 "id": str(p.id),
@@ -241,7 +255,7 @@ async def get_patients(
             for p in patients
         ],
         "total": len(patients),
-    }
+    })
 
 
 def _safe_decrypt(value: bytes | None) -> str | None:
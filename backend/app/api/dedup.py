@@ -18,9 +18,11 @@ from app.schemas.dedup import (
     DismissRequest,
     MergeRequest,
     UndoBulkRequest,
+    UndoClusterRequest,
     UndoMergeRequest,
 )
-from app.services.dedup.detector import _apply_merge
+from app.services.dedup.bulk_resolution import Resolution, resolve_candidates
+from app.services.dedup.clustering import cluster_patient_merges, undo_cluster
 
 router = APIRouter(prefix="/dedup", tags=["dedup"])
 
@@ -236,20 +238,28 @@ async def merge_records(
         else candidate.record_a_id
     )
 
-    # Mark secondary as duplicate
-    sec_result = await db.execute(
-        select(HealthRecord).where(
-            HealthRecord.id == secondary_id,
-            HealthRecord.user_id == user_id,
-        )
-    )
-    secondary = sec_result.scalar_one_or_none()
-    if secondary:
-        _apply_merge(secondary, primary_id)
-
     candidate.status = "merged"
     candidate.resolved_by = user_id
     candidate.resolved_at = datetime.now(timezone.utc)
+    await db.flush()
+
+    # The confirmed pair joins the patient's duplicate clusters; the chosen
+    # primary is the canonical record of the (possibly larger) cluster.
+    patient_id = (await db.execute(
+        select(HealthRecord.patient_id).where(
+            HealthRecord.id == candidate.record_a_id, HealthRecord.user_id == user_id,
+        )
+    )).scalar_one()
+    clustered = await cluster_patient_merges(
+        db, user_id, patient_id, agent=f"user/{user_id}", preferred={primary_id}
+    )
+    if candidate.id in clustered.conflicts:
+        await db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Merging would join records previously dismissed as distinct",
+        )
+    primary_id = clustered.canonical.get(secondary_id, primary_id)
     await db.commit()
 
     await log_audit_event(
@@ -357,14 +367,17 @@ async def resolve_bulk(
     When ``candidate_ids`` is supplied those candidates are acted on (only the
     pending, user-owned ones); otherwise every pending candidate scoring in
     ``[score_min, score_max)`` is acted on. Merge folds ``record_b`` into
-    ``record_a``; dismiss marks the pair dismissed. One commit for the batch.
+    ``record_a``; dismiss marks the pair dismissed. Resolved set-based
+    (``app.services.dedup.bulk_resolution``), one commit for the batch; merges
+    that would join records previously dismissed as distinct stay pending and
+    are not counted.
     """
     from sqlalchemy import func
     from sqlalchemy.orm import aliased
 
     RecordA = aliased(HealthRecord)
     query = (
-        select(DedupCandidate)
+        select(DedupCandidate.id)
         .join(RecordA, DedupCandidate.record_a_id == RecordA.id)
         .where(
             RecordA.user_id == user_id,
@@ -386,28 +399,11 @@ async def resolve_bulk(
                 func.round(DedupCandidate.similarity_score * 100) < round(body.score_max * 100)
             )
 
-    result = await db.execute(query)
-    candidates = result.scalars().all()
-
-    now = datetime.now(timezone.utc)
-    count = 0
-    for candidate in candidates:
-        if body.action == "merge":
-            sec_result = await db.execute(
-                select(HealthRecord).where(
-                    HealthRecord.id == candidate.record_b_id,
-                    HealthRecord.user_id == user_id,
-                )
-            )
-            secondary = sec_result.scalar_one_or_none()
-            if secondary is not None:
-                _apply_merge(secondary, candidate.record_a_id)
-            candidate.status = "merged"
-        else:  # dismiss (action validated to merge|dismiss by the schema)
-            candidate.status = "dismissed"
-        candidate.resolved_by = user_id
-        candidate.resolved_at = now
-        count += 1
+    candidate_ids = (await db.execute(query)).scalars().all()
+    outcome = await resolve_candidates(
+        db, user_id, [Resolution(candidate_id, body.action) for candidate_id in candidate_ids]
+    )
+    count = outcome.merged if body.action == "merge" else outcome.dismissed
 
     await db.commit()
 
@@ -423,41 +419,50 @@ async def resolve_bulk(
     return {"action": body.action, "count": count}
 
 
-async def _reverse_merge(
+async def _reverse_merges(
     db: AsyncSession,
-    candidate: DedupCandidate,
+    candidates: list[DedupCandidate],
     user_id: UUID,
     now: datetime,
 ) -> None:
-    """Reverse a merged candidate in place (caller commits).
+    """Reverse merged candidates in place (caller commits).
 
-    Restores the archived record (clears ``is_duplicate``/``merged_into_id``)
-    and marks the candidate ``dismissed``. Unmerge is a deliberate "these are
-    NOT duplicates" override, so the pair must not boomerang back into the
-    pending review queue — it is dismissed, not returned to pending. The
-    reversal stays attributed to the acting user.
+    Marks each candidate ``dismissed`` and re-clusters the affected patients
+    with the pairs' records released: a record is restored to active unless
+    other merged pairs still tie it into a cluster (which may then elect a
+    new canonical). Unmerge is a deliberate "these are NOT duplicates"
+    override, so the pair must not boomerang back into the pending review
+    queue — it is dismissed, not returned to pending, and from then on keeps
+    the two records out of the same cluster. The reversal stays attributed to
+    the acting user.
 
     Args:
         db: Active async session (not committed here).
-        candidate: The merged candidate being reversed.
+        candidates: The merged candidates being reversed.
         user_id: The owner performing the reversal.
         now: Timestamp to record as ``resolved_at``.
     """
+    for candidate in candidates:
+        candidate.status = "dismissed"
+        candidate.resolved_by = user_id
+        candidate.resolved_at = now
+        candidate.auto_resolved = False
+    await db.flush()
+
+    record_ids = {c.record_a_id for c in candidates} | {c.record_b_id for c in candidates}
+    released: dict[UUID, set[UUID]] = {}
     rec_result = await db.execute(
-        select(HealthRecord).where(
-            HealthRecord.id.in_([candidate.record_a_id, candidate.record_b_id]),
+        select(HealthRecord.id, HealthRecord.patient_id).where(
+            HealthRecord.id.in_(record_ids),
             HealthRecord.user_id == user_id,
         )
     )
-    for record in rec_result.scalars().all():
-        if record.is_duplicate or record.merged_into_id is not None:
-            record.is_duplicate = False
-            record.merged_into_id = None
-
-    candidate.status = "dismissed"
-    candidate.resolved_by = user_id
-    candidate.resolved_at = now
-    candidate.auto_resolved = False
+    for record_id, patient_id in rec_result.all():
+        released.setdefault(patient_id, set()).add(record_id)
+    for patient_id, ids in released.items():
+        await cluster_patient_merges(
+            db, user_id, patient_id, agent=f"user/{user_id}", released=ids
+        )
 
 
 @router.get("/merges")
@@ -585,7 +590,7 @@ async def undo_merge_candidate(
 
     Loads the user-owned merged candidate, restores whichever record was
     archived, and dismisses the pair (so it does not return to the pending
-    review queue). See ``_reverse_merge``.
+    review queue). See ``_reverse_merges``.
     """
     from sqlalchemy.orm import aliased
 
@@ -603,7 +608,7 @@ async def undo_merge_candidate(
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
 
-    await _reverse_merge(db, candidate, user_id, datetime.now(timezone.utc))
+    await _reverse_merges(db, [candidate], user_id, datetime.now(timezone.utc))
     await db.commit()
 
     await log_audit_event(
@@ -646,9 +651,7 @@ async def undo_bulk(
     )
     candidates = result.scalars().all()
 
-    now = datetime.now(timezone.utc)
-    for candidate in candidates:
-        await _reverse_merge(db, candidate, user_id, now)
+    await _reverse_merges(db, list(candidates), user_id, datetime.now(timezone.utc))
     count = len(candidates)
     await db.commit()
 
@@ -662,3 +665,34 @@ async def undo_bulk(
     )
 
     return {"count": count}
+
+
+@router.post("/undo-cluster")
+async def undo_cluster_merge(
+    body: UndoClusterRequest,
+    request: Request,
+    user_id: UUID = Depends(get_authenticated_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Split a whole duplicate cluster back into separate active records.
+
+    ``record_id`` may be the canonical record or any record archived into it.
+    Every merged pair inside the cluster is dismissed and every member is
+    restored. Returns the number of records restored.
+    """
+    result = await undo_cluster(db, user_id, body.record_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Record not found")
+    await db.commit()
+
+    await log_audit_event(
+        db,
+        user_id=user_id,
+        action="dedup.undo_cluster",
+        resource_type="dedup",
+        resource_id=body.record_id,
+        ip_address=request.client.host if request.client else None,
+        details={"restored": result.restored},
+    )
+
+    return {"status": "dismissed", "restored": result.restored}
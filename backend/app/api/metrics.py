@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_db
+from app.models.uploaded_file import UploadedFile
+from app.utils import metrics
+
+# Mounted at the app root (not under /api/v1): /metrics is the path scrapers
+# default to. It reports operational counters only — no PHI, no per-user data.
+router = APIRouter(tags=["metrics"])
+
+_bearer = HTTPBearer(auto_error=False)
+
+# Statuses an upload passes through on each job queue
+# (app.services.extraction.job_queue): file category -> gauge, statuses.
+_QUEUES = {
+    "unstructured": (metrics.EXTRACTION_QUEUE, ("pending_extraction", "processing")),
+    "structured": (metrics.INGEST_QUEUE, ("pending", "processing")),
+}
+
+
+def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer),
+) -> None:
+    """Gate on ``METRICS_TOKEN``; unset hides the endpoint entirely (404)."""
+    expected = settings.metrics_token
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    supplied = credentials.credentials if credentials else ""
+    if not hmac.compare_digest(supplied.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+async def _collect(db: AsyncSession) -> None:
+    """Refresh the scrape-time gauges (pool, queue depth, in-flight jobs)."""
+    from app.database import engine
+    from app.services.extraction.job_control import running_job_count
+
+    pool = engine.pool
+    for state, reader in (
+        ("size", "size"),
+        ("checked_out", "checkedout"),
+        ("checked_in", "checkedin"),
+        ("overflow", "overflow"),
+    ):
+        fn = getattr(pool, reader, None)
+        if fn is not None:
+            metrics.DB_POOL.set(fn(), state=state)
+
+    # The queues are the uploaded_files table, shared by every worker process.
+    rows = await db.execute(
+        select(UploadedFile.file_category, UploadedFile.ingestion_status, func.count())
+        .where(
+            UploadedFile.file_category.in_(_QUEUES),
+            UploadedFile.ingestion_status.in_(
+                {s for _, statuses in _QUEUES.values() for s in statuses}
+            ),
+        )
+        .group_by(UploadedFile.file_category, UploadedFile.ingestion_status)
+    )
+    depth = {(category, s): n for category, s, n in rows.all()}
+    for category, (gauge, statuses) in _QUEUES.items():
+        for queue_status in statuses:
+            gauge.set(depth.get((category, queue_status), 0), status=queue_status)
+
+    metrics.EXTRACTION_INFLIGHT.set(running_job_count())
+
+
+@router.get("/metrics", dependencies=[Depends(require_metrics_token)])
+async def scrape_metrics(db: AsyncSession = Depends(get_db)) -> PlainTextResponse:
+    """Prometheus text exposition of this process's pipeline metrics."""
+    await _collect(db)
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
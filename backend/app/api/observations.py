@@ -13,6 +13,7 @@ from app.middleware.audit import log_audit_event
 from app.models.record import HealthRecord
 from app.services.utils.source_label import source_label
 from app.services.utils.unit_normalization import normalize_value
+from app.utils.json_response import FastJSONResponse
 
 router = APIRouter(prefix="/observations", tags=["observations"])
 
@@ -184,4 +185,4 @@ async def observations_by_code(
         details={"code_count": len(items)},
     )
 
-    return {"items": items, "total": len(items)}
+    return FastJSONResponse({"items": items, "total": len(items)})
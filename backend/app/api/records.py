@@ -4,7 +4,7 @@ import hashlib
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func, select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,11 +12,12 @@ from app.database import get_db
 from app.dependencies import get_authenticated_user_id
 from app.middleware.audit import log_audit_event
 from app.models.record import HealthRecord
-from app.schemas.records import HealthRecordResponse, RecordListResponse
+from app.schemas.records import HealthRecordResponse, RecordListResponse, VisitSummary
 from app.schemas.timeline import TimelineEvent
-from app.services.timeline_preview import build_timeline_preview
-from app.services.timeline_service import extract_provider_display
+from app.services import change_feed, encounter_graph
+from app.services.data_version import check_etag, not_modified
 from app.services.utils.source_label import source_label
+from app.utils.json_response import FastJSONResponse
 
 router = APIRouter(prefix="/records", tags=["records"])
 
@@ -267,12 +268,54 @@ async def export_records(
         details={"format": format, "count": len(records)},
     )
 
-    return JSONResponse(
+    return FastJSONResponse(
         content=bundle,
         headers={"Content-Disposition": 'attachment; filename="medtimeline-fhir-bundle.json"'},
     )
 
 
+@router.get("/changes")
+async def record_changes(
+    request: Request,
+    since: str | None = Query(None, description="Continuation token; omit for everything"),
+    limit: int = Query(change_feed.DEFAULT_LIMIT, ge=1, le=change_feed.MAX_LIMIT),
+    user_id: UUID = Depends(get_authenticated_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Records changed since ``since``, in order, as newline-delimited JSON.
+
+    Each line is an ``upsert`` (with the FHIR resource) or a ``delete``
+    tombstone and carries the token to resume after it. ``X-Change-Token`` is
+    the token to pass next; ``X-More-Changes`` says whether to call again now.
+    See ``app.services.change_feed``.
+
+    Declared before /{record_id} so the literal path isn't captured as a UUID.
+    """
+    try:
+        token = change_feed.ChangeToken.decode(since) if since else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid change token")
+
+    entries, more = await change_feed.read_changes(db, user_id, token, limit)
+
+    await log_audit_event(
+        db,
+        user_id=user_id,
+        action="records.changes",
+        resource_type="health_record",
+        ip_address=request.client.host if request.client else None,
+        details={"since": since, "count": len(entries)},
+    )
+
+    headers = {"X-More-Changes": "true" if more else "false"}
+    next_token = entries[-1]["token"] if entries else since
+    if next_token:
+        headers["X-Change-Token"] = next_token
+    return StreamingResponse(
+        change_feed.ndjson(entries), media_type="application/x-ndjson", headers=headers
+    )
+
+
 @router.get("/recent")
 async def recent_records(
     request: Request,
@@ -336,6 +379,18 @@ async def record_stats(
 
     Declared before /{record_id} so the literal path isn't captured as a UUID.
     """
+    etag, unchanged = await check_etag(db, user_id, request)
+    if unchanged:
+        await log_audit_event(
+            db,
+            user_id=user_id,
+            action="records.stats",
+            resource_type="health_record",
+            ip_address=request.client.host if request.client else None,
+            details={"not_modified": True},
+        )
+        return not_modified(etag)
+
     base_filter = [
         HealthRecord.user_id == user_id,
         HealthRecord.deleted_at.is_(None),
@@ -361,12 +416,12 @@ async def record_stats(
         details={"total": total or 0},
     )
 
-    return {
+    return FastJSONResponse({
         "total": total or 0,
         "first_date": first_date.isoformat() if first_date else None,
         "last_date": last_date.isoformat() if last_date else None,
         "source_count": source_count or 0,
-    }
+    }, headers={"ETag": etag})
 
 
 @router.get("/{record_id}", response_model=HealthRecordResponse)
@@ -408,6 +463,21 @@ async def get_record_fhir(
     db: AsyncSession = Depends(get_db),
 ):
     """Return the record's raw FHIR resource as JSON, for single-record export."""
+    # The ETag covers the path, so it can only match after a 200 for this very
+    # record at the current version — no need to re-check ownership or deletion.
+    etag, unchanged = await check_etag(db, user_id, request)
+    if unchanged:
+        await log_audit_event(
+            db,
+            user_id=user_id,
+            action="records.fhir_export",
+            resource_type="health_record",
+            resource_id=record_id,
+            ip_address=request.client.host if request.client else None,
+            details={"not_modified": True},
+        )
+        return not_modified(etag)
+
     result = await db.execute(
         select(HealthRecord).where(
             HealthRecord.id == record_id,
@@ -429,10 +499,11 @@ async def get_record_fhir(
         ip_address=request.client.host if request.client else None,
     )
 
-    return JSONResponse(
+    return FastJSONResponse(
         content=record.fhir_resource,
         headers={
-            "Content-Disposition": f'attachment; filename="record-{record_id}.json"'
+            "Content-Disposition": f'attachment; filename="record-{record_id}.json"',
+            "ETag": etag,
         },
     )
 
@@ -448,21 +519,13 @@ async def get_linked_records(
 
     Returns sibling records (conditions, meds, labs, …) carrying
     ``linked_encounter_id == record_id`` — everything extracted from the same
-    note/visit. User-scoped; excludes soft-deleted + duplicate rows. Returned in
-    the timeline-event shape (with scalar previews) so the UI renders them as rich
-    rows. ``id`` is appended to the sort for stable ordering across NULL/tied dates.
+    note/visit, including visits merged into this one. User-scoped; excludes
+    soft-deleted + duplicate rows. Returned in the timeline-event shape (with
+    scalar previews) so the UI renders them as rich rows. ``id`` is appended to
+    the sort for stable ordering across NULL/tied dates. Served from the
+    encounter graph projection (``app.services.encounter_graph``).
     """
-    result = await db.execute(
-        select(HealthRecord)
-        .where(
-            HealthRecord.linked_encounter_id == record_id,
-            HealthRecord.user_id == user_id,
-            HealthRecord.deleted_at.is_(None),
-            HealthRecord.is_duplicate.is_(False),
-        )
-        .order_by(HealthRecord.effective_date.desc(), HealthRecord.id)
-    )
-    records = result.scalars().all()
+    links = await encounter_graph.linked_records(db, user_id, record_id)
 
     await log_audit_event(
         db,
@@ -475,19 +538,41 @@ async def get_linked_records(
 
     return [
         TimelineEvent(
-            id=r.id,
-            record_type=r.record_type,
-            display_text=r.display_text,
-            effective_date=r.effective_date,
-            code_display=r.code_display,
-            category=r.category,
-            provider=extract_provider_display(r.fhir_resource, r.record_type),
-            preview=build_timeline_preview(r.fhir_resource, r.record_type),
+            id=link.record_id,
+            record_type=link.record_type,
+            display_text=link.display_text,
+            effective_date=link.effective_date,
+            code_display=link.code_display,
+            category=link.category,
+            **(link.summary or {}),
         )
-        for r in records
+        for link in links
     ]
 
 
+@router.get("/{record_id}/linked/summary", response_model=VisitSummary)
+async def get_visit_summary(
+    record_id: UUID,
+    request: Request,
+    user_id: UUID = Depends(get_authenticated_user_id),
+    db: AsyncSession = Depends(get_db),
+) -> VisitSummary:
+    """How many records of each type are linked to this visit — the counts of
+    ``/{record_id}/linked`` without loading the records."""
+    by_type = await encounter_graph.visit_counts(db, user_id, record_id)
+
+    await log_audit_event(
+        db,
+        user_id=user_id,
+        action="records.visit_summary",
+        resource_type="health_record",
+        resource_id=record_id,
+        ip_address=request.client.host if request.client else None,
+    )
+
+    return VisitSummary(encounter_id=record_id, total=sum(by_type.values()), by_type=by_type)
+
+
 @router.delete("/{record_id}", status_code=204)
 async def delete_record(
     record_id: UUID,
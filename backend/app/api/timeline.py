@@ -11,8 +11,10 @@ from app.dependencies import get_authenticated_user_id
 from app.middleware.audit import log_audit_event
 from app.models.record import HealthRecord
 from app.schemas.timeline import TimelineEvent, TimelineResponse, TimelineStats
+from app.services.data_version import check_etag, not_modified
 from app.services.timeline_preview import build_timeline_preview
 from app.services.timeline_service import extract_provider_display
+from app.utils.json_response import FastJSONResponse
 
 router = APIRouter(prefix="/timeline", tags=["timeline"])
 
@@ -24,8 +26,20 @@ async def get_timeline(
     limit: int = Query(200, ge=1, le=1000),
     user_id: UUID = Depends(get_authenticated_user_id),
     db: AsyncSession = Depends(get_db),
-) -> TimelineResponse:
+) -> FastJSONResponse:
     """Timeline data ordered by date, filterable by type."""
+    etag, unchanged = await check_etag(db, user_id, request)
+    if unchanged:
+        await log_audit_event(
+            db,
+            user_id=user_id,
+            action="timeline.view",
+            resource_type="timeline",
+            ip_address=request.client.host if request.client else None,
+            details={"record_type": record_type, "not_modified": True},
+        )
+        return not_modified(etag)
+
     filters = [
         HealthRecord.user_id == user_id,
         HealthRecord.deleted_at.is_(None),
@@ -74,7 +88,9 @@ async def get_timeline(
         details={"record_type": record_type, "total": total},
     )
 
-    return TimelineResponse(events=events, total=total)
+    return FastJSONResponse(
+        TimelineResponse(events=events, total=total), headers={"ETag": etag}
+    )
 
 
 @router.get("/stats", response_model=TimelineStats)
@@ -1,20 +1,43 @@
 from __future__ import annotations
 
 import asyncio
-import hashlib
 import logging
 import shutil
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, UploadFile, status
-from sqlalchemy import select, text
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Request,
+    UploadFile,
+    status,
+)
+from sqlalchemy import insert, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.database import async_session_factory
-from app.utils.file_utils import EncryptedFileWriter
+from app.models.upload_session import UploadSession
+from app.services import upload_session_service as upload_sessions
+from app.services.data_version import mark_records_changed
+from app.services.extraction.job_control import (
+    ExtractionCancelled,
+    JobControl,
+    ProgressReporter,
+    get_job,
+    publish_cancel,
+    register_job,
+    request_cancel,
+    unregister_job,
+)
+from app.services.extraction.job_queue import notify_extraction_queued
+from app.utils.file_utils import PipelinedUploadWriter
+from app.utils.metrics import RECORDS_WRITTEN, UPLOADS, stage_timer
 
 # Per-event-loop semaphore caches.
 #
@@ -29,11 +52,9 @@ from app.utils.file_utils import EncryptedFileWriter
 # while still capping concurrency at the configured limits.
 _gemini_semaphores: dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
 
-# Extraction semaphore to limit concurrent file extractions (layer above Gemini semaphore)
-_extraction_semaphores: dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
-
-# Worker task reference
+# Worker task references
 _worker_task: asyncio.Task | None = None
+_ingest_worker_task: asyncio.Task | None = None
 
 
 def _prune_closed_loops(cache: dict[asyncio.AbstractEventLoop, asyncio.Semaphore]) -> None:
@@ -58,165 +79,42 @@ def _get_gemini_semaphore() -> asyncio.Semaphore:
     return sem
 
 
-def _get_extraction_semaphore() -> asyncio.Semaphore:
-    """Return the file-extraction semaphore bound to the running event loop."""
-    loop = asyncio.get_running_loop()
-    sem = _extraction_semaphores.get(loop)
-    if sem is None:
-        _prune_closed_loops(_extraction_semaphores)
-        sem = asyncio.Semaphore(settings.extraction_concurrency)
-        _extraction_semaphores[loop] = sem
-    return sem
-
-
 async def _extraction_worker() -> None:
-    """DB-polling background worker: claim pending files and process them.
+    """Embedded extraction worker: the API-process instance of ``app.worker``.
 
-    Uses a rolling window approach: claims one file at a time, acquires a
-    semaphore slot, then fires off processing without waiting. This keeps all
-    extraction slots busy instead of blocking on the slowest file in a batch.
+    Claims pending files in batches under a lease and keeps up to
+    ``extraction_concurrency`` extractions in flight, waking on NOTIFY when a
+    file is queued. Dedicated ``python -m app.worker`` processes run the same
+    loop and can share the queue with it.
     """
-    sem = _get_extraction_semaphore()
-    poll_interval = 2
-    stuck_check_interval = 60
-    last_stuck_check = datetime.now(timezone.utc)
-
-    logger.info("Extraction worker started (concurrency=%d, poll=%ds)", settings.extraction_concurrency, poll_interval)
-
-    while True:
-        try:
-            now = datetime.now(timezone.utc)
-            if (now - last_stuck_check).total_seconds() >= stuck_check_interval:
-                await _recover_stuck_files()
-                last_stuck_check = now
-
-            # Claim one file at a time for rolling window
-            claimed = await _claim_pending_files(1)
-            if not claimed:
-                await asyncio.sleep(poll_interval)
-                continue
-
-            upload_id, file_path, user_id = claimed[0]
-            logger.info("Claimed file %s for extraction", upload_id)
-
-            # Block until a slot opens, then fire-and-forget
-            await sem.acquire()
-            asyncio.create_task(
-                _process_and_release(sem, upload_id, Path(file_path), user_id)
-            )
+    from app.worker import ExtractionWorker
 
-        except Exception:
-            logger.exception("Extraction worker encountered an error, recovering")
-            await asyncio.sleep(5)
+    await ExtractionWorker(
+        processor=_process_unstructured, session_factory=async_session_factory
+    ).run()
 
 
-async def _claim_pending_files(batch_size: int) -> list[tuple[str, str, str]]:
-    """Claim pending extraction files using SELECT FOR UPDATE SKIP LOCKED."""
-    async with async_session_factory() as db:
-        try:
-            result = await db.execute(
-                text(
-                    "SELECT id, storage_path, user_id FROM uploaded_files "
-                    "WHERE ingestion_status = 'pending_extraction' "
-                    "AND file_category = 'unstructured' "
-                    "ORDER BY created_at ASC "
-                    "LIMIT :batch_size "
-                    "FOR UPDATE SKIP LOCKED"
-                ),
-                {"batch_size": batch_size},
-            )
-            rows = result.fetchall()
-
-            if not rows:
-                return []
-
-            # Mark claimed files as processing
-            ids = [row[0] for row in rows]
-            now = datetime.now(timezone.utc)
-            await db.execute(
-                text(
-                    "UPDATE uploaded_files "
-                    "SET ingestion_status = 'processing', "
-                    "processing_started_at = :now "
-                    "WHERE id = ANY(:ids)"
-                ),
-                {"now": now, "ids": ids},
-            )
-            await db.commit()
-
-            return [(str(row[0]), row[1], str(row[2])) for row in rows]
-
-        except Exception as e:
-            logger.exception("Failed to claim pending files: %s", e)
-            await db.rollback()
-            return []
+def start_extraction_worker() -> None:
+    """Start the embedded extraction worker. Called from main.py lifespan."""
+    global _worker_task
+    if _worker_task is None or _worker_task.done():
+        _worker_task = asyncio.create_task(_extraction_worker())
 
 
-async def _recover_stuck_files() -> None:
-    """Reset files stuck in 'processing' beyond the timeout.
+def start_ingest_worker() -> None:
+    """Start the embedded ingest worker for queued structured uploads.
 
-    Increments retry_count. After max retries, marks as 'failed'.
+    Called from main.py lifespan.
     """
-    timeout = timedelta(minutes=settings.extraction_timeout_minutes)
-    cutoff = datetime.now(timezone.utc) - timeout
-    max_retries = settings.extraction_max_retries
+    global _ingest_worker_task
+    if _ingest_worker_task is None or _ingest_worker_task.done():
+        from app.worker import IngestWorker
 
-    async with async_session_factory() as db:
-        try:
-            # Reset retriable files back to pending
-            await db.execute(
-                text(
-                    "UPDATE uploaded_files "
-                    "SET ingestion_status = 'pending_extraction', "
-                    "processing_started_at = NULL, "
-                    "retry_count = COALESCE(retry_count, 0) + 1 "
-                    "WHERE ingestion_status = 'processing' "
-                    "AND file_category = 'unstructured' "
-                    "AND processing_started_at < :cutoff "
-                    "AND COALESCE(retry_count, 0) < :max_retries"
-                ),
-                {"cutoff": cutoff, "max_retries": max_retries},
-            )
-
-            # Mark files that exceeded max retries as failed
-            await db.execute(
-                text(
-                    "UPDATE uploaded_files "
-                    "SET ingestion_status = 'failed', "
-                    "ingestion_errors = '[{\"error\": \"Processing timed out after maximum retries.\", \"error_type\": \"TimeoutError\"}]'::jsonb, "
-                    "processing_completed_at = :now "
-                    "WHERE ingestion_status = 'processing' "
-                    "AND file_category = 'unstructured' "
-                    "AND processing_started_at < :cutoff "
-                    "AND COALESCE(retry_count, 0) >= :max_retries"
-                ),
-                {"cutoff": cutoff, "max_retries": max_retries, "now": datetime.now(timezone.utc)},
-            )
-
-            await db.commit()
-        except Exception:
-            logger.exception("Failed to recover stuck files")
-            await db.rollback()
-
-
-async def _process_and_release(
-    sem: asyncio.Semaphore, upload_id: UUID | str, file_path: Path, user_id: UUID | str
-) -> None:
-    """Process one file then release the semaphore."""
-    try:
-        uid = UUID(str(upload_id)) if not isinstance(upload_id, UUID) else upload_id
-        uid_user = UUID(str(user_id)) if not isinstance(user_id, UUID) else user_id
-        await _process_unstructured(uid, file_path, uid_user)
-    finally:
-        sem.release()
+        _ingest_worker_task = asyncio.create_task(
+            IngestWorker(session_factory=async_session_factory).run()
+        )
 
 
-def start_extraction_worker() -> None:
-    """Start the DB-polling extraction worker. Called from main.py lifespan."""
-    global _worker_task
-    if _worker_task is None or _worker_task.done():
-        _worker_task = asyncio.create_task(_extraction_worker())
-
 from app.database import get_db
 from app.dependencies import get_authenticated_user_id
 from app.services.extraction.section_parser import parse_sections, split_large_section
@@ -235,6 +133,8 @@ from app.schemas.upload import (
     UnstructuredUploadResponse,
     UploadHistoryResponse,
     UploadResponse,
+    UploadSessionCreate,
+    UploadSessionResponse,
     UploadStatusResponse,
 )
 
@@ -314,15 +214,19 @@ async def _stream_upload_to_disk(
     CRYPTO-02: when ``encrypt`` is True (default) the file is written as a framed
     AES-256-GCM blob — each plaintext chunk is encrypted into its own frame as it
     streams, so the bytes at rest never carry plaintext PHI and the whole file is
-    never buffered in memory. Structured uploads (FHIR JSON / ZIP / Epic / CDA)
-    pass ``encrypt=False`` because their ingest read path streams the file in
-    plaintext immediately after upload (it is owned by the ingestion coordinator);
-    the operator migration script encrypts those archives at rest after ingest.
+    never buffered in memory. ``encrypt=False`` writes the bytes verbatim.
+
+    The chunks go through a :class:`PipelinedUploadWriter`: frames are encrypted
+    in parallel on a thread pool while the plaintext hash and the (coalesced,
+    in-order) disk writes run on a writer thread, so reading the body, hashing,
+    encrypting and writing overlap instead of running one after another on the
+    event loop.
 
     The size cap and the magic-byte header are always computed on PLAINTEXT bytes
     read from the body, independent of encryption. The returned ``hash`` is the
     SHA-256 of the plaintext, so deduplication-by-hash stays deterministic
-    regardless of the random per-frame nonces.
+    regardless of the random per-frame nonces — callers pass it on rather than
+    re-reading the file to hash it.
 
     Returns ``(bytes_written, header, plaintext_sha256_hex)`` where ``header`` is
     the first chunk's leading plaintext bytes, so callers can validate magic
@@ -332,32 +236,29 @@ async def _stream_upload_to_disk(
 
     total = 0
     header = b""
-    hasher = hashlib.sha256()
     try:
         with open(file_path, "wb") as f:
-            writer = EncryptedFileWriter(f) if encrypt else None
-            while True:
-                chunk = await file.read(UPLOAD_CHUNK_SIZE)
-                if not chunk:
-                    break
-                if not header:
-                    header = chunk[:16]
-                total += len(chunk)
-                if total > max_bytes:
-                    raise HTTPException(status_code=413, detail=detail)
-                hasher.update(chunk)
-                if writer is not None:
-                    writer.write_chunk(chunk)
-                else:
-                    f.write(chunk)
-            if writer is not None:
-                writer.finalize()  # write the header even for an empty body
+            writer = PipelinedUploadWriter(f, encrypt=encrypt)
+            try:
+                while True:
+                    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if not header:
+                        header = chunk[:16]
+                    total += len(chunk)
+                    if total > max_bytes:
+                        raise HTTPException(status_code=413, detail=detail)
+                    await writer.write_chunk(chunk)
+                await writer.finalize()  # writes the header even for an empty body
+            finally:
+                writer.close()
     except BaseException:
         # Drop any partial file on rejection/error so a too-large upload leaves
         # nothing behind on disk.
         file_path.unlink(missing_ok=True)
         raise
-    return total, header, hasher.hexdigest()
+    return total, header, writer.hexdigest()
 
 
 def _validate_magic_bytes(content: bytes, ext: str) -> bool:
@@ -425,6 +326,18 @@ def _collect_entities(results: list, total_chunks: int) -> tuple[list, int]:
     return entities, failed
 
 
+async def _reject_zip_bomb(file_path: Path) -> None:
+    """413 (and drop the stored file) for a ZIP whose central directory
+    already breaks the zip-bomb caps; the ingest job enforces the rest."""
+    from app.services.ingestion.coordinator import check_zip_upload
+
+    try:
+        await asyncio.to_thread(check_zip_upload, file_path)
+    except HTTPException:
+        file_path.unlink(missing_ok=True)
+        raise
+
+
 # --- Endpoints ---
 
 
@@ -445,23 +358,28 @@ async def upload_file(
 
     file_path = _safe_file_path(upload_dir, user_id, file.filename)
     # CRYPTO-02 (issue #54): structured uploads (FHIR JSON / ZIP) are encrypted at
-    # rest as they stream. The ingestion coordinator stream-decrypts the file to a
-    # temp plaintext copy at the ingest entry (bounded memory; W9 caps preserved),
-    # so the bytes at rest never carry plaintext PHI.
-    await _stream_upload_to_disk(
+    # rest as they stream. The ingestion coordinator reads them through a
+    # decrypting view (bounded memory; W9 caps preserved; no plaintext temp), so
+    # the bytes at rest never carry plaintext PHI.
+    file_size, _header, file_hash = await _stream_upload_to_disk(
         file, file_path, settings.max_file_size_mb * 1024 * 1024, request=request,
         encrypt=True,
     )
 
-    # Run ingestion synchronously for now (small files)
-    from app.services.ingestion.coordinator import ingest_file
+    await _reject_zip_bomb(file_path)
+
+    # Ingestion runs as a job on an ingest worker (``app.worker``); poll
+    # ``GET /upload/{id}/status`` for progress and the final counts.
+    from app.services.ingestion.coordinator import queue_ingest
 
-    result = await ingest_file(
+    upload = await queue_ingest(
         db=db,
         user_id=user_id,
         file_path=file_path,
         original_filename=file.filename,
         mime_type=file.content_type or "application/octet-stream",
+        file_hash=file_hash,
+        file_size=file_size,
     )
 
     await log_audit_event(
@@ -469,16 +387,12 @@ async def upload_file(
         user_id=user_id,
         action="file.upload",
         resource_type="uploaded_file",
-        resource_id=UUID(result["upload_id"]),
-        details={"filename": file.filename, "records": result["records_inserted"]},
+        resource_id=upload.id,
+        details={"filename": file.filename},
     )
 
     return UploadResponse(
-        upload_id=result["upload_id"],
-        status=result["status"],
-        records_inserted=result["records_inserted"],
-        errors=result.get("errors", []),
-        unstructured_uploads=result.get("unstructured_uploads", []),
+        upload_id=str(upload.id), status=upload.ingestion_status, records_inserted=0
     )
 
 
@@ -500,10 +414,10 @@ async def upload_epic_export(
     # buffering up to 5 GB into RAM, rejecting early on Content-Length.
     file_path = _safe_file_path(upload_dir, user_id, file.filename)
     # CRYPTO-02 (issue #54): the Epic EHI ZIP is encrypted at rest as it streams.
-    # The coordinator stream-decrypts it to a temp plaintext copy at the ingest
-    # entry (bounded memory under the 5 GB ceiling; W9 zip-bomb caps run on the
-    # decrypted temp), so the bytes at rest never carry plaintext PHI.
-    await _stream_upload_to_disk(
+    # The coordinator reads it through a decrypting view (bounded memory under
+    # the 5 GB ceiling; W9 zip-bomb caps run on the decrypted bytes; no
+    # plaintext temp), so the bytes at rest never carry plaintext PHI.
+    file_size, _header, file_hash = await _stream_upload_to_disk(
         file,
         file_path,
         settings.max_epic_export_size_mb * 1024 * 1024,
@@ -511,25 +425,226 @@ async def upload_epic_export(
         detail=f"Epic export too large. Maximum size: {settings.max_epic_export_size_mb}MB",
         encrypt=True,
     )
+    await _reject_zip_bomb(file_path)
 
-    from app.services.ingestion.coordinator import ingest_file
+    from app.services.ingestion.coordinator import queue_ingest
 
-    result = await ingest_file(
+    upload = await queue_ingest(
         db=db,
         user_id=user_id,
         file_path=file_path,
         original_filename=file.filename,
         mime_type=file.content_type or "application/zip",
+        file_hash=file_hash,
+        file_size=file_size,
     )
 
     return UploadResponse(
-        upload_id=result["upload_id"],
-        status=result["status"],
-        records_inserted=result["records_inserted"],
-        errors=result.get("errors", []),
+        upload_id=str(upload.id), status=upload.ingestion_status, records_inserted=0
+    )
+
+
+# --- Chunked, resumable uploads (app.services.upload_session_service) ---
+
+
+def _session_response(session: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        session_id=str(session.id),
+        status=session.status,
+        total_size=session.total_size,
+        chunk_size=session.chunk_size,
+        chunk_count=upload_sessions.chunk_count(session),
+        received_chunks=upload_sessions.received_indexes(session),
+        received_ranges=upload_sessions.received_ranges(session),
+        expires_at=session.expires_at,
+        upload_id=str(session.upload_id) if session.upload_id else None,
     )
 
 
+async def _get_upload_session(
+    db: AsyncSession, session_id: UUID, user_id: UUID, *, for_update: bool = False
+) -> UploadSession:
+    stmt = select(UploadSession).where(
+        UploadSession.id == session_id, UploadSession.user_id == user_id
+    )
+    if for_update:
+        stmt = stmt.with_for_update()
+    session = (await db.execute(stmt)).scalar_one_or_none()
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if session.status == "open" and session.expires_at < datetime.now(timezone.utc):
+        raise HTTPException(status_code=410, detail="Upload session expired")
+    return session
+
+
+@router.post(
+    "/sessions", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED
+)
+async def create_upload_session(
+    body: UploadSessionCreate,
+    user_id: UUID = Depends(get_authenticated_user_id),
+    db: AsyncSession = Depends(get_db),
+) -> UploadSessionResponse:
+    """Open a resumable upload of ``body.size`` bytes, sent in numbered chunks."""
+    max_mb = (
+        settings.max_epic_export_size_mb if body.kind == "epic_export"
+        else settings.max_file_size_mb
+    )
+    if body.size > max_mb * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"File too large. Maximum size: {max_mb}MB")
+    chunk_size = body.chunk_size or settings.upload_session_chunk_mb * 1024 * 1024
+    if not upload_sessions.MIN_CHUNK_BYTES <= chunk_size <= upload_sessions.MAX_CHUNK_BYTES:
+        raise HTTPException(status_code=400, detail="Invalid chunk_size")
+    if -(-body.size // chunk_size) > upload_sessions.MAX_CHUNKS:
+        raise HTTPException(status_code=400, detail="Too many chunks; use a larger chunk_size")
+
+    session = UploadSession(
+        user_id=user_id,
+        filename=body.filename,
+        mime_type=body.mime_type,
+        kind=body.kind,
+        total_size=body.size,
+        chunk_size=chunk_size,
+        received={},
+        status="open",
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=settings.upload_session_ttl_hours),
+    )
+    db.add(session)
+    await db.commit()
+    await db.refresh(session)
+    return _session_response(session)
+
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    session_id: UUID,
+    user_id: UUID = Depends(get_authenticated_user_id),
+    db: AsyncSession = Depends(get_db),
+) -> UploadSessionResponse:
+    """Which chunks / byte ranges have arrived, so a client resumes with the rest."""
+    return _session_response(await _get_upload_session(db, session_id, user_id))
+
+
+@router.put("/sessions/{session_id}/chunks/{index}", response_model=UploadSessionResponse)
+async def put_upload_chunk(
+    session_id: UUID,
+    index: int,
+    request: Request,
+    x_chunk_sha256: str = Header(..., min_length=64, max_length=64),
+    user_id: UUID = Depends(get_authenticated_user_id),
+    db: AsyncSession = Depends(get_db),
+) -> UploadSessionResponse:
+    """Store chunk ``index`` (the raw request body); ``X-Chunk-SHA256`` is the
+    hex SHA-256 of its bytes. Re-sending a chunk replaces it."""
+    session = await _get_upload_session(db, session_id, user_id)
+    if session.status != "open":
+        raise HTTPException(status_code=409, detail="Upload session already finalized")
+    if 0 <= index < upload_sessions.chunk_count(session):
+        _reject_if_content_length_exceeds(
+            request, upload_sessions.expected_chunk_size(session, index),
+            "Chunk larger than expected",
+        )
+    try:
+        await upload_sessions.store_chunk(
+            db, session, index, request.stream(), x_chunk_sha256
+        )
+    except upload_sessions.ChunkIndexOutOfRange as e:
+        raise HTTPException(status_code=416, detail=str(e))
+    except upload_sessions.ChunkTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except upload_sessions.ChunkRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _session_response(session)
+
+
+@router.post(
+    "/sessions/{session_id}/finalize",
+    response_model=UploadResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def finalize_upload_session(
+    session_id: UUID,
+    user_id: UUID = Depends(get_authenticated_user_id),
+    db: AsyncSession = Depends(get_db),
+) -> UploadResponse:
+    """Assemble the chunks and queue the file for ingestion, as POST /upload does.
+
+    Finalizing again returns the same upload.
+    """
+    session = await _get_upload_session(db, session_id, user_id, for_update=True)
+    if session.status == "finalized":
+        if session.upload_id is None:
+            # Set in the finalizing transaction, so only cleared (SET NULL)
+            # when the uploaded file was deleted.
+            raise HTTPException(status_code=409, detail="Uploaded file was deleted")
+        upload = await db.get(UploadedFile, session.upload_id)
+        return UploadResponse(
+            upload_id=str(session.upload_id),
+            status=upload.ingestion_status if upload else "deleted",
+            records_inserted=upload.record_count if upload else 0,
+        )
+    missing = upload_sessions.missing_indexes(session)
+    if missing:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Upload incomplete", "missing_chunks": missing[:100]},
+        )
+
+    upload_dir = Path(settings.upload_dir)
+    file_path = _safe_file_path(upload_dir, user_id, session.filename)
+    try:
+        file_size, file_hash = await asyncio.to_thread(
+            upload_sessions.assemble, session, file_path
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    await _reject_zip_bomb(file_path)
+
+    from app.services.ingestion.coordinator import queue_ingest
+
+    # Committed in one transaction with the queued upload: a concurrent
+    # finalize stops here, and a finalized session always has its upload_id.
+    session.status = "finalized"
+    upload = await queue_ingest(
+        db=db,
+        user_id=user_id,
+        file_path=file_path,
+        original_filename=session.filename,
+        mime_type=session.mime_type,
+        file_hash=file_hash,
+        file_size=file_size,
+        commit=False,
+    )
+    session.upload_id = upload.id
+    await db.commit()
+    upload_sessions.discard_chunks(session.id)
+
+    await log_audit_event(
+        db,
+        user_id=user_id,
+        action="file.upload",
+        resource_type="uploaded_file",
+        resource_id=upload.id,
+        details={"filename": session.filename, "upload_session": str(session.id)},
+    )
+    return UploadResponse(
+        upload_id=str(upload.id), status=upload.ingestion_status, records_inserted=0
+    )
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload_session(
+    session_id: UUID,
+    user_id: UUID = Depends(get_authenticated_user_id),
+    db: AsyncSession = Depends(get_db),
+) -> None:
+    """Abandon a session and delete its stored chunks."""
+    session = await _get_upload_session(db, session_id, user_id)
+    upload_sessions.discard_chunks(session.id)
+    await db.delete(session)
+    await db.commit()
+
+
 @router.get("/pending-extraction")
 async def get_pending_extractions(
     statuses: str | None = None,
@@ -654,9 +769,11 @@ async def cancel_extraction(
     """Request cancellation of in-flight / queued extractions.
 
     Sets ``cancel_requested`` on the user's own files that are still
-    cancellable (queued or processing). The DB-polling worker checks the flag
-    between stages and aborts cleanly, marking the file ``cancelled``. Files
-    that are already terminal (or not owned) are returned in ``skipped``.
+    cancellable (queued or processing) and pushes the cancel to the running
+    extraction — directly when it runs in this process, via ``NOTIFY
+    extraction_cancel`` when it runs in a standalone worker — so it aborts
+    mid-stage and marks the file ``cancelled``. Files that are already
+    terminal (or not owned) are returned in ``skipped``.
     """
     parsed: dict[str, UUID] = {}
     for raw in body.upload_ids:
@@ -677,6 +794,7 @@ async def cancel_extraction(
         owned = {u.id: u for u in result.scalars().all()}
 
     cancelled: list[str] = []
+    cancelled_uuids: list[UUID] = []
     skipped: list[str] = []
     for raw in body.upload_ids:
         uid = parsed.get(raw)
@@ -684,11 +802,16 @@ async def cancel_extraction(
         if upload is not None and upload.ingestion_status in _CANCELLABLE_STATUSES:
             upload.cancel_requested = True
             cancelled.append(raw)
+            cancelled_uuids.append(uid)
         else:
             skipped.append(raw)
 
     if cancelled:
+        await publish_cancel(db, cancelled_uuids)
         await db.commit()
+        # The flag is durable now; wake any extraction running in this process.
+        for uid in cancelled_uuids:
+            request_cancel(uid)
 
     await log_audit_event(
         db,
@@ -727,13 +850,12 @@ async def trigger_extraction(
     failed = []
 
     # A 'processing' file is only re-triggerable when it's genuinely STUCK (no
-    # live worker): processing longer than the stuck-recovery timeout, or with
-    # no start time. Re-triggering an ACTIVELY processing file resets it to
+    # live worker): no unexpired worker lease, and processing longer than the
+    # stuck-recovery timeout or with no start time. Re-triggering an ACTIVELY processing file resets it to
     # pending_extraction, letting the worker re-claim it for a second concurrent
     # extraction pass (wasted Gemini calls, possible duplicate records).
-    stale_cutoff = datetime.now(timezone.utc) - timedelta(
-        minutes=settings.extraction_timeout_minutes
-    )
+    now = datetime.now(timezone.utc)
+    stale_cutoff = now - timedelta(minutes=settings.extraction_timeout_minutes)
 
     for uid in upload_ids:
         upload = uploads.get(uid)
@@ -744,13 +866,14 @@ async def trigger_extraction(
         status_ = upload.ingestion_status
         if status_ == "processing":
             started = upload.processing_started_at
-            if started is not None and started > stale_cutoff:
+            leased = upload.lease_expires_at is not None and upload.lease_expires_at > now
+            if leased or (started is not None and started > stale_cutoff):
                 # Actively processing — skip to avoid a duplicate concurrent pass.
                 failed.append({"upload_id": str(uid), "status": "processing"})
                 continue
             upload.ingestion_status = "pending_extraction"
         elif status_ in ("pending_extraction", "failed", "awaiting_confirmation"):
-            # The DB-polling worker picks up pending_extraction automatically.
+            # The extraction worker picks up pending_extraction automatically.
             if status_ in ("failed", "awaiting_confirmation"):
                 upload.ingestion_status = "pending_extraction"
         else:
@@ -759,6 +882,7 @@ async def trigger_extraction(
         triggered.append(upload)
 
     if triggered:
+        await notify_extraction_queued(db)
         await db.commit()
 
     await log_audit_event(
@@ -785,7 +909,15 @@ async def get_upload_status(
     user_id: UUID = Depends(get_authenticated_user_id),
     db: AsyncSession = Depends(get_db),
 ) -> UploadStatusResponse:
-    """Get ingestion job status."""
+    """Get ingestion job status.
+
+    While the extraction runs in this process its live progress is served from
+    the job registry, so polling doesn't contend with the pipeline's writes.
+    """
+    job = get_job(upload_id)
+    if job is not None and job.user_id == user_id:
+        return UploadStatusResponse(**job.status_fields())
+
     result = await db.execute(
         select(UploadedFile).where(
             UploadedFile.id == upload_id,
@@ -809,6 +941,7 @@ async def get_upload_status(
         progress_stage=upload.progress_stage,
         progress_detail=upload.progress_detail,
         notices=upload.notices or [],
+        validation_report=upload.validation_report,
     )
 
 
@@ -937,17 +1070,31 @@ async def _ensure_patient(db: AsyncSession, user_id: UUID) -> Patient:
     return patient
 
 
-async def _is_cancel_requested(db: AsyncSession, upload_id: UUID) -> bool:
-    """Re-read the ``cancel_requested`` flag from the DB (read-committed).
+async def _is_cancel_requested(
+    db: AsyncSession, upload_id: UUID, job: JobControl | None = None
+) -> bool:
+    """Stage-boundary cancel check: the job's pushed cancel event, else the DB flag.
 
     The cancel endpoint commits the flag on a different connection, so the
     worker must re-query rather than trust its (possibly stale) in-memory row.
+    The in-process event short-circuits that read when the cancel was pushed.
     """
+    if job is not None and job.cancelled.is_set():
+        return True
     row = await db.execute(
         text("SELECT cancel_requested FROM uploaded_files WHERE id = :id"),
         {"id": upload_id},
     )
-    return bool(row.scalar())
+    requested = bool(row.scalar())
+    if requested and job is not None:
+        job.cancelled.set()
+    return requested
+
+
+def _job_for(upload: UploadedFile) -> JobControl:
+    """The registered control for ``upload``'s extraction, or a private one when
+    an engine helper is driven directly (it then only sees DB-flag cancels)."""
+    return get_job(upload.id) or JobControl(upload.id, upload.user_id)
 
 
 async def _mark_cancelled(db: AsyncSession, upload: UploadedFile) -> None:
@@ -975,9 +1122,10 @@ async def _run_gemini_extraction_engine(db, upload, upload_id, user_id, text, se
     """Default engine: scrub → Gemini section parse → per-section LangExtract.
 
     Returns ``(all_entities, parsed_doc)`` or ``(None, None)`` if the upload was
-    cancelled mid-run (the file is already marked cancelled). This is the exact
-    pre-WS-A behavior, lifted verbatim into a helper so the engine branch can
-    select it without changing the default path.
+    cancelled mid-run (the file is already marked cancelled). The chunk tasks
+    are awaited together with the job's cancel event (:class:`JobControl`), so a
+    cancel aborts in-flight LLM calls at once; section progress goes through
+    :class:`ProgressReporter`, which coalesces the ``uploaded_files`` writes.
     """
     from app.services.ai.llm import load_llm_config
     from app.services.extraction.entity_extractor import extract_entities_async
@@ -986,6 +1134,9 @@ async def _run_gemini_extraction_engine(db, upload, upload_id, user_id, text, se
     from app.models.patient import Patient
     from app.services.extraction.section_parser import ParsedDocument, ParsedSection, SectionType
 
+    job = _job_for(upload)
+    progress = ProgressReporter(db, upload, job)
+
     # Resolve the user's LLM config once for this run (provider routing/creds for
     # both section parsing and per-section entity extraction). Falls back to .env.
     config = await load_llm_config(db, user_id)
@@ -996,9 +1147,10 @@ async def _run_gemini_extraction_engine(db, upload, upload_id, user_id, text, se
     patients = (
         await db.execute(select(Patient).where(Patient.user_id == user_id))
     ).scalars().all()
-    scrubbed_text, _deident_report = await scrub_phi_async(
-        text, **patient_scrub_args(list(patients))
-    )
+    with stage_timer("unstructured", "scrub_phi"):
+        scrubbed_text, _deident_report = await scrub_phi_async(
+            text, **patient_scrub_args(list(patients))
+        )
 
     # Step 3: Section parsing (skip Gemini call for small docs)
     if len(scrubbed_text) < settings.small_doc_threshold:
@@ -1015,10 +1167,11 @@ async def _run_gemini_extraction_engine(db, upload, upload_id, user_id, text, se
             facility=None,
         )
     else:
-        async with sem:
-            parsed_doc = await parse_sections(
-                scrubbed_text, settings.gemini_api_key, config=config
-            )
+        with stage_timer("unstructured", "parse_sections"):
+            async with sem:
+                parsed_doc = await job.run(
+                    parse_sections(scrubbed_text, settings.gemini_api_key, config=config)
+                )
 
     upload.extraction_sections = {
         "sections": [
@@ -1035,7 +1188,7 @@ async def _run_gemini_extraction_engine(db, upload, upload_id, user_id, text, se
     }
     await db.commit()
 
-    if await _is_cancel_requested(db, upload_id):
+    if await _is_cancel_requested(db, upload_id, job):
         await _mark_cancelled(db, upload)
         return None, None
 
@@ -1059,9 +1212,9 @@ async def _run_gemini_extraction_engine(db, upload, upload_id, user_id, text, se
         extraction_tasks.append((current_batch, current_section))
 
     section_total = len(extraction_tasks)
-    upload.progress_stage = "extracting_entities"
-    upload.progress_detail = {"section_index": 0, "section_total": section_total}
-    await db.commit()
+    await progress.set_stage(
+        "extracting_entities", {"section_index": 0, "section_total": section_total}
+    )
 
     section_sem = asyncio.Semaphore(settings.section_extraction_concurrency)
 
@@ -1077,25 +1230,40 @@ async def _run_gemini_extraction_engine(db, upload, upload_id, user_id, text, se
         asyncio.create_task(extract_chunk(chunk, stype))
         for chunk, stype in extraction_tasks
     ]
+    order = {t: i for i, t in enumerate(tasks)}
     results: list = []
     done_count = 0
-    for fut in asyncio.as_completed(tasks):
+    pending = set(tasks)
+    # Wait on the chunks AND the job's cancel event, so a pushed cancel aborts
+    # the in-flight chunks at once instead of after the next chunk completes.
+    cancel_wait = asyncio.ensure_future(job.cancelled.wait())
+    with stage_timer("unstructured", "extract_entities"):
         try:
-            results.append(await fut)
-        except asyncio.CancelledError:
-            pass
-        except Exception as exc:  # surfaced to _collect_entities as a failure
-            results.append(exc)
-        done_count += 1
-        upload.progress_detail = {"section_index": done_count, "section_total": section_total}
-        await db.commit()
-        if await _is_cancel_requested(db, upload_id):
-            for t in tasks:
-                if not t.done():
-                    t.cancel()
-            await asyncio.gather(*tasks, return_exceptions=True)
-            await _mark_cancelled(db, upload)
-            return None, None
+            while pending and not job.cancelled.is_set():
+                done, _ = await asyncio.wait(
+                    pending | {cancel_wait}, return_when=asyncio.FIRST_COMPLETED
+                )
+                for fut in sorted(done - {cancel_wait}, key=order.__getitem__):
+                    pending.discard(fut)
+                    try:
+                        results.append(fut.result())
+                    except asyncio.CancelledError:
+                        pass
+                    except Exception as exc:  # surfaced to _collect_entities as a failure
+                        results.append(exc)
+                    done_count += 1
+                if not job.cancelled.is_set():
+                    # Coalesced: reaches the DB at most once per interval / step.
+                    await progress.advance(done_count, section_total)
+        finally:
+            cancel_wait.cancel()
+    if job.cancelled.is_set():
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await _mark_cancelled(db, upload)
+        return None, None
 
     collected, failed_chunks = _collect_entities(results, len(extraction_tasks))
     all_entities.extend(collected)
@@ -1164,6 +1332,9 @@ async def _run_local_extraction_engine(db, upload, upload_id, user_id, text, eng
     from app.services.extraction.section_parser import ParsedDocument
     from app.models.patient import Patient
 
+    job = _job_for(upload)
+    progress = ProgressReporter(db, upload, job)
+
     # Resolve the user's LLM config once; used by the hybrid Gemini escalation
     # path below. Falls back to .env when the user has no saved rows.
     config = await load_llm_config(db, user_id)
@@ -1176,9 +1347,10 @@ async def _run_local_extraction_engine(db, upload, upload_id, user_id, text, eng
         # Rule 2: de-identify before any Gemini call. Only escalated section text
         # is sent; the bulk local path is never scrubbed (it stays on-device).
         # Offload the CPU-bound scrub so the event loop stays responsive (D3).
-        scrubbed, _rep = await scrub_phi_async(
-            section_text, **patient_scrub_args(list(patients))
-        )
+        with stage_timer("unstructured", "scrub_phi"):
+            scrubbed, _rep = await scrub_phi_async(
+                section_text, **patient_scrub_args(list(patients))
+            )
         out: list = []
         for chunk in split_large_section(scrubbed):
             async with sem:
@@ -1189,20 +1361,21 @@ async def _run_local_extraction_engine(db, upload, upload_id, user_id, text, eng
                 out.extend(res.entities)
         return validate_entities(out)
 
-    upload.progress_stage = "extracting_entities"
-    upload.progress_detail = {"section_index": 0, "section_total": 0}
-    await db.commit()
-
-    result = await run_clinical_extraction(
-        text,
-        engine=engine,
-        ner=get_local_ner(),
-        context=get_clinical_context(),
-        gemini_section_extract=_gemini_section_extract,
-        confidence_threshold=settings.extraction_local_confidence_threshold,
-    )
+    await progress.set_stage("extracting_entities", {"section_index": 0, "section_total": 0})
+
+    with stage_timer("unstructured", "extract_entities"):
+        result = await job.run(
+            run_clinical_extraction(
+                text,
+                engine=engine,
+                ner=get_local_ner(),
+                context=get_clinical_context(),
+                gemini_section_extract=_gemini_section_extract,
+                confidence_threshold=settings.extraction_local_confidence_threshold,
+            )
+        )
 
-    if await _is_cancel_requested(db, upload_id):
+    if await _is_cancel_requested(db, upload_id, job):
         await _mark_cancelled(db, upload)
         return None
 
@@ -1211,8 +1384,7 @@ async def _run_local_extraction_engine(db, upload, upload_id, user_id, text, eng
     # the local pass is near-instant, so we publish the total once sections are
     # processed — never leave it at 0, which reads as "no progress").
     _n_sections = max(len(result.sections), 1)
-    upload.progress_detail = {"section_index": _n_sections, "section_total": _n_sections}
-    await db.commit()
+    await progress.advance(_n_sections, _n_sections)
 
     parsed_doc = ParsedDocument(
         sections=result.sections,
@@ -1283,6 +1455,137 @@ def _prefer_document_date(built_records, document_date) -> None:
         record_dict["effective_date"] = document_date
 
 
+# A&P cross-reference type by the referenced record's entity class.
+_AP_REFERENCE_TYPES = {
+    "medication": "prescribes",
+    "condition": "addresses",
+    "lab_result": "supports",
+    "vital": "supports",
+    "procedure": "addresses",
+    "allergy": "addresses",
+    "imaging_result": "supports",
+    "family_history": "supports",
+    "social_history": "supports",
+}
+
+
+def _plan_extracted_rows(built_records) -> tuple[list[dict], list[dict]]:
+    """Lay out the ``health_records`` + ``record_cross_references`` rows for one
+    document without touching the DB (pure CPU).
+
+    Record ids are assigned client-side, so the encounter link and the A&P
+    cross-references are known up front — no flush is needed to learn them.
+    Semantics match the per-row ORM path: every record except the (last)
+    encounter links to it, and each A&P record references every non-A&P,
+    non-encounter record, typed via :data:`_AP_REFERENCE_TYPES`.
+    """
+    record_rows: list[dict] = []
+    classes: list[str] = []
+    encounter_id = None
+    for entity, record_dict in built_records:
+        if record_dict is None:
+            continue
+        row = dict(record_dict)
+        row.setdefault("id", uuid4())
+        row["source_section"] = entity.attributes.get("_source_section")
+        record_rows.append(row)
+        classes.append(entity.entity_class)
+        if entity.entity_class == "encounter":
+            encounter_id = row["id"]
+
+    for row in record_rows:
+        row["linked_encounter_id"] = encounter_id if row["id"] != encounter_id else None
+
+    ap_ids = [row["id"] for row, cls in zip(record_rows, classes) if cls == "assessment_plan"]
+    targets = [
+        (row["id"], _AP_REFERENCE_TYPES.get(cls, "addresses"))
+        for row, cls in zip(record_rows, classes)
+        if cls not in ("assessment_plan", "encounter")
+    ]
+    xref_rows = [
+        {"document_record_id": ap_id, "referenced_record_id": ref_id, "reference_type": ref_type}
+        for ap_id in ap_ids
+        for ref_id, ref_type in targets
+    ]
+    return record_rows, xref_rows
+
+
+async def _persist_extracted_bulk(db: AsyncSession, built_records) -> int:
+    """Set-based persistence: one bulk INSERT for the records, one for the links.
+
+    Records go through SQLAlchemy's bulk ``insert(HealthRecord)`` (a single
+    pipelined executemany on asyncpg; every row still needs its own
+    ``EncryptedJSON`` bind). The A&P cross-references — up to A&P × records
+    rows, plain ids — are sent as three arrays and expanded server-side by one
+    ``INSERT ... SELECT unnest(...)``.
+    """
+    record_rows, xref_rows = _plan_extracted_rows(built_records)
+    if record_rows:
+        # The encounter goes first so every other row's linked_encounter_id FK
+        # resolves (the sort is stable, input order is kept otherwise).
+        record_rows.sort(key=lambda row: row["linked_encounter_id"] is not None)
+        await db.execute(insert(HealthRecord), record_rows)
+        for row in record_rows:
+            mark_records_changed(db, row["user_id"], (row["id"],))
+    if xref_rows:
+        await db.execute(
+            text(
+                "INSERT INTO record_cross_references "
+                "(document_record_id, referenced_record_id, reference_type) "
+                "SELECT * FROM unnest("
+                "CAST(:documents AS uuid[]), CAST(:referenced AS uuid[]), "
+                "CAST(:types AS text[]))"
+            ),
+            {
+                "documents": [x["document_record_id"] for x in xref_rows],
+                "referenced": [x["referenced_record_id"] for x in xref_rows],
+                "types": [x["reference_type"] for x in xref_rows],
+            },
+        )
+    return len(record_rows)
+
+
+async def _persist_extracted_orm(db: AsyncSession, built_records) -> int:
+    """Per-row ORM persistence (the pre-bulk path, kept behind
+    ``EXTRACTION_BULK_INSERT=false`` as a fallback)."""
+    encounter_id = None
+    created_records = []
+    for entity, record_dict in built_records:
+        if record_dict is None:
+            continue
+        record_dict["source_section"] = entity.attributes.get("_source_section")
+        record = HealthRecord(**record_dict)
+        db.add(record)
+        created_records.append((record, entity))
+
+        if entity.entity_class == "encounter":
+            await db.flush()
+            encounter_id = record.id
+
+    if encounter_id:
+        for record, _ in created_records:
+            if record.id != encounter_id:
+                record.linked_encounter_id = encounter_id
+
+    ap_records = [(r, e) for r, e in created_records if e.entity_class == "assessment_plan"]
+    non_ap_records = [(r, e) for r, e in created_records if e.entity_class != "assessment_plan"]
+    if ap_records and non_ap_records:
+        from app.models.cross_reference import RecordCrossReference
+        await db.flush()
+        for ap_record, _ in ap_records:
+            for other_record, other_entity in non_ap_records:
+                if other_entity.entity_class in ("encounter",):
+                    continue
+                ref_type = _AP_REFERENCE_TYPES.get(other_entity.entity_class, "addresses")
+                xref = RecordCrossReference(
+                    document_record_id=ap_record.id,
+                    referenced_record_id=other_record.id,
+                    reference_type=ref_type,
+                )
+                db.add(xref)
+    return len(created_records)
+
+
 async def _autoconfirm_and_finish(
     db, upload, upload_id, user_id, unique_entities, parsed_doc, original_text=None
 ):
@@ -1290,7 +1593,8 @@ async def _autoconfirm_and_finish(
 
     Shared across engines: ensures a patient exists, maps entities → FHIR records,
     links the encounter, builds A&P cross-references, then kicks off the dedup
-    scan. Lifted verbatim from the prior inline tail.
+    scan. Records and links are written in bulk (:func:`_persist_extracted_bulk`)
+    unless ``EXTRACTION_BULK_INSERT`` is off.
     """
     from app.services.extraction.entity_to_fhir import (
         _find_date_in_text,
@@ -1316,17 +1620,15 @@ async def _autoconfirm_and_finish(
         if replaced:
             logger.info("Re-extraction replaced %d prior records for %s", replaced, upload_id)
 
-        encounter_id = None
-        created_records = []
-
         # Map all entities → FHIR record dicts off the event loop (CPU-bound:
         # terminology lookups + FHIR build + hashing + validation). The DB adds
         # below stay on the loop thread — the AsyncSession is not thread-safe.
-        built_records = await asyncio.to_thread(
-            _build_record_dicts,
-            unique_entities, user_id, patient.id, upload_id,
-            document_date, document_provider,
-        )
+        with stage_timer("unstructured", "map_fhir"):
+            built_records = await asyncio.to_thread(
+                _build_record_dicts,
+                unique_entities, user_id, patient.id, upload_id,
+                document_date, document_provider,
+            )
 
         # A1: replace the de-identified (year-only) entity dates with the real
         # document date recovered from the original text (eligible records only).
@@ -1338,59 +1640,24 @@ async def _autoconfirm_and_finish(
         # across documents (that is the separate services/dedup pipeline).
         built_records = dedup_within_document(built_records)
 
-        for entity, record_dict in built_records:
-            if record_dict is None:
-                continue
-            record_dict["source_section"] = entity.attributes.get("_source_section")
-            record = HealthRecord(**record_dict)
-            db.add(record)
-            created_records.append((record, entity))
-
-            if entity.entity_class == "encounter":
-                await db.flush()
-                encounter_id = record.id
-
-        if encounter_id:
-            for record, _ in created_records:
-                if record.id != encounter_id:
-                    record.linked_encounter_id = encounter_id
-
-        ap_records = [(r, e) for r, e in created_records if e.entity_class == "assessment_plan"]
-        non_ap_records = [(r, e) for r, e in created_records if e.entity_class != "assessment_plan"]
-        if ap_records and non_ap_records:
-            from app.models.cross_reference import RecordCrossReference
-            await db.flush()
-            for ap_record, _ in ap_records:
-                for other_record, other_entity in non_ap_records:
-                    if other_entity.entity_class in ("encounter",):
-                        continue
-                    ref_type = {
-                        "medication": "prescribes",
-                        "condition": "addresses",
-                        "lab_result": "supports",
-                        "vital": "supports",
-                        "procedure": "addresses",
-                        "allergy": "addresses",
-                        "imaging_result": "supports",
-                        "family_history": "supports",
-                        "social_history": "supports",
-                    }.get(other_entity.entity_class, "addresses")
-                    xref = RecordCrossReference(
-                        document_record_id=ap_record.id,
-                        referenced_record_id=other_record.id,
-                        reference_type=ref_type,
-                    )
-                    db.add(xref)
+        with stage_timer("unstructured", "db_write"):
+            if settings.extraction_bulk_insert:
+                record_count = await _persist_extracted_bulk(db, built_records)
+            else:
+                record_count = await _persist_extracted_orm(db, built_records)
 
-        await db.commit()
+            await db.commit()
+        RECORDS_WRITTEN.inc(record_count, pipeline="unstructured", action="inserted")
 
         upload.ingestion_status = "dedup_scanning"
-        upload.record_count = len(created_records)
+        upload.record_count = record_count
         upload.progress_stage = None
         await db.commit()
 
         from app.services.ingestion.coordinator import _run_dedup_background
-        asyncio.create_task(_run_dedup_background(upload_id, patient.id, user_id))
+        asyncio.create_task(
+            _run_dedup_background(upload_id, patient.id, user_id, pipeline="unstructured")
+        )
     else:
         upload.ingestion_status = "awaiting_confirmation"
 
@@ -1408,10 +1675,12 @@ async def _process_unstructured(upload_id: UUID, file_path: Path, user_id: UUID)
     (escalating hard sections to Gemini in ``hybrid``). The downstream
     validate → dedup → auto-confirm tail is shared across engines.
 
-    Cooperative cancel: ``cancel_requested`` is checked at the start and between
-    stages; when set the file is marked ``cancelled`` (terminal) and no further
-    work is done. Section-level progress is written to ``progress_stage`` /
-    ``progress_detail`` as the pipeline advances.
+    Cancel: the run registers a ``JobControl`` whose cancel event is pushed by
+    the cancel endpoint (or a NOTIFY from another process) and aborts whatever
+    stage is in flight; ``cancel_requested`` is also checked at the start and
+    between stages. Either way the file is marked ``cancelled`` (terminal) and
+    no further work is done. Section-level progress is written (coalesced) to
+    ``progress_stage`` / ``progress_detail`` as the pipeline advances.
     """
     from app.services.extraction.text_extractor import extract_text, detect_file_type as _detect_file_type
     from app.services.extraction.text_extractor import FileType as _FileType
@@ -1430,6 +1699,8 @@ async def _process_unstructured(upload_id: UUID, file_path: Path, user_id: UUID)
             await _mark_cancelled(db, upload)
             return
 
+        # Early returns inside the try are all cancellations.
+        outcome = "cancelled"
         try:
             from app.services.extraction.entity_validator import (
                 normalize_entity_text,
@@ -1438,9 +1709,9 @@ async def _process_unstructured(upload_id: UUID, file_path: Path, user_id: UUID)
 
             upload.processing_started_at = datetime.now(timezone.utc)
             upload.ingestion_status = "processing"
-            upload.progress_stage = "extracting_text"
-            upload.progress_detail = None
-            await db.commit()
+            job = register_job(upload)
+            progress = ProgressReporter(db, upload, job)
+            await progress.set_stage("extracting_text", None)
 
             sem = _get_gemini_semaphore()
 
@@ -1454,15 +1725,16 @@ async def _process_unstructured(upload_id: UUID, file_path: Path, user_id: UUID)
             # can be surfaced to the user as a durable per-file notice.
             ocr_trace: list = []
             file_type_enum = _detect_file_type(file_path)
-            if file_type_enum == _FileType.RTF:
-                extracted_text, file_type = await extract_text(
-                    file_path, settings.gemini_api_key, config=config, trace=ocr_trace
-                )
-            else:
-                async with sem:
-                    extracted_text, file_type = await extract_text(
+            with stage_timer("unstructured", "extract_text"):
+                if file_type_enum == _FileType.RTF:
+                    extracted_text, file_type = await job.run(extract_text(
                         file_path, settings.gemini_api_key, config=config, trace=ocr_trace
-                    )
+                    ))
+                else:
+                    async with sem:
+                        extracted_text, file_type = await job.run(extract_text(
+                            file_path, settings.gemini_api_key, config=config, trace=ocr_trace
+                        ))
             text = extracted_text
             upload.extracted_text = text
             # Surface any OCR provider refusal/fallback as a durable notice
@@ -1475,10 +1747,9 @@ async def _process_unstructured(upload_id: UUID, file_path: Path, user_id: UUID)
                     upload.notices = (upload.notices or []) + [_notice]
             except Exception:  # noqa: BLE001 - notices are best-effort
                 logger.debug("failed to record OCR notice", exc_info=True)
-            upload.progress_stage = "scrubbing_phi"
-            await db.commit()
+            await progress.set_stage("scrubbing_phi")
 
-            if await _is_cancel_requested(db, upload_id):
+            if await _is_cancel_requested(db, upload_id, job):
                 await _mark_cancelled(db, upload)
                 return
 
@@ -1517,7 +1788,6 @@ async def _process_unstructured(upload_id: UUID, file_path: Path, user_id: UUID)
                     seen.add(key)
                     unique_entities.append(entity)
 
-            upload.progress_stage = "mapping_fhir"
             upload.extraction_entities = [
                 {
                     "entity_class": e.entity_class,
@@ -1529,15 +1799,21 @@ async def _process_unstructured(upload_id: UUID, file_path: Path, user_id: UUID)
                 }
                 for e in unique_entities
             ]
-            await db.commit()
+            await progress.set_stage("mapping_fhir")
+            # Past the last cancellable await: from here on the status endpoint
+            # reads the row again (auto-confirm sets the terminal status).
+            unregister_job(upload_id)
             await _autoconfirm_and_finish(
                 db, upload, upload_id, user_id, unique_entities, parsed_doc,
                 original_text=text,
             )
+            outcome = "ok"
             return
 
-
+        except ExtractionCancelled:
+            await _mark_cancelled(db, upload)
         except Exception as e:
+            outcome = "failed"
             # H4: Log full error internally, expose only error type to client
             logger.error("Unstructured processing failed for %s: %s", upload_id, e, exc_info=True)
             error_type = type(e).__name__
@@ -1567,6 +1843,13 @@ async def _process_unstructured(upload_id: UUID, file_path: Path, user_id: UUID)
             except Exception:
                 logger.exception("Failed to record extraction failure for %s", upload_id)
                 await db.rollback()
+        finally:
+            unregister_job(upload_id)
+            UPLOADS.inc(
+                pipeline="unstructured",
+                file_type=_detect_file_type(file_path).value,
+                outcome=outcome,
+            )
 
 
 @router.post(
@@ -1631,6 +1914,8 @@ async def upload_unstructured(
             "duplicate_of": str(prior.id),
             "record_count": prior.record_count or 0,
         }
+    else:
+        await notify_extraction_queued(db)
     db.add(upload_record)
     await db.commit()
     await db.refresh(upload_record)
@@ -1644,7 +1929,7 @@ async def upload_unstructured(
         details={"filename": file.filename, "file_type": ext},
     )
 
-    # Worker will pick up the file automatically via DB polling (duplicate_file rows are skipped)
+    # The NOTIFY wakes an extraction worker on commit (duplicate_file rows are skipped)
 
     from app.services.extraction.text_extractor import detect_file_type
     file_type = detect_file_type(file_path)
@@ -1674,6 +1959,7 @@ async def upload_unstructured_batch(
     upload_dir.mkdir(parents=True, exist_ok=True)
 
     results = []
+    queued = 0
     for file in files:
         if not file.filename:
             continue
@@ -1718,6 +2004,8 @@ async def upload_unstructured_batch(
             }
         db.add(upload_record)
         await db.flush()
+        if not prior:
+            queued += 1
 
         await log_audit_event(
             db,
@@ -1735,9 +2023,11 @@ async def upload_unstructured_batch(
             file_type=file_type.value,
         ))
 
+    if queued:
+        await notify_extraction_queued(db)
     await db.commit()
 
-    # Worker will pick up files automatically via DB polling (duplicate_file rows are skipped)
+    # The NOTIFY wakes an extraction worker on commit (duplicate_file rows are skipped)
 
     return BatchUploadResponse(uploads=results, total=len(results))
 
@@ -1892,6 +2182,7 @@ async def get_upload_review(
 ):
     """Get dedup review data for an upload."""
     from app.models.deduplication import DedupCandidate
+    from app.services.dedup.bulk_resolution import load_records
 
     result = await db.execute(
         select(UploadedFile).where(
@@ -1911,12 +2202,21 @@ async def get_upload_review(
     )
     candidates = candidates_result.scalars().all()
 
+    records = await load_records(
+        db,
+        {c.record_a_id for c in candidates} | {c.record_b_id for c in candidates},
+        HealthRecord.display_text,
+        HealthRecord.record_type,
+        HealthRecord.fhir_resource,
+        user_id=user_id,
+    )
+
     auto_merged = []
     needs_review: dict[str, list] = {}
 
     for c in candidates:
-        rec_a = await db.get(HealthRecord, c.record_a_id)
-        rec_b = await db.get(HealthRecord, c.record_b_id)
+        rec_a = records.get(c.record_a_id)
+        rec_b = records.get(c.record_b_id)
         if not rec_a or not rec_b:
             continue
 
@@ -1977,11 +2277,16 @@ async def resolve_review(
     user_id: UUID = Depends(get_authenticated_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    """Bulk resolve dedup candidates for an upload."""
+    """Bulk resolve dedup candidates for an upload.
+
+    Set-based (``app.services.dedup.bulk_resolution``): the candidates and
+    records are loaded with one query per chunk, and records, statuses and
+    Provenance are written with multi-row statements.
+    """
+    from sqlalchemy import func
+
     from app.models.deduplication import DedupCandidate
-    from app.models.provenance import Provenance
-    from app.services.dedup.field_merger import apply_field_update
-    from app.services.ingestion.content_hash import content_hash
+    from app.services.dedup.bulk_resolution import Resolution, resolve_candidates
 
     result = await db.execute(
         select(UploadedFile).where(
@@ -1993,82 +2298,23 @@ async def resolve_review(
     if not upload:
         raise HTTPException(status_code=404, detail="Upload not found")
 
-    resolutions = body.get("resolutions", [])
-    resolved_count = 0
-
-    for resolution in resolutions:
-        candidate_id = UUID(resolution["candidate_id"])
-        action = resolution["action"]
-        field_overrides = resolution.get("field_overrides")
-
-        candidate = await db.get(DedupCandidate, candidate_id)
-        if not candidate or candidate.source_upload_id != upload_id:
-            continue
-
-        rec_a = await db.get(HealthRecord, candidate.record_a_id)
-        rec_b = await db.get(HealthRecord, candidate.record_b_id)
-        if not rec_a or not rec_b:
-            continue
-
-        now = datetime.now(timezone.utc)
-
-        if action == "merge":
-            rec_b.is_duplicate = True
-            rec_b.merged_into_id = rec_a.id
-            rec_b.merge_metadata = {
-                "merged_from": str(rec_b.id),
-                "merged_at": now.isoformat(),
-                "merge_type": "duplicate",
-                "source_upload_id": str(upload_id),
-            }
-            candidate.status = "merged"
-            candidate.resolved_by = user_id
-            candidate.resolved_at = now
-            db.add(Provenance(
-                record_id=rec_a.id,
-                action="merge",
-                agent=f"user/{user_id}",
-                source_file_id=upload_id,
-                details={"merged_record_id": str(rec_b.id), "action": "merge"},
-            ))
-
-        elif action == "update":
-            merge_result = apply_field_update(rec_a, rec_b, field_overrides)
-            rec_a.fhir_resource = merge_result["updated_resource"]
-            rec_a.content_hash = content_hash(rec_a.fhir_resource)
-            rec_a.display_text = merge_result["display_text"]
-            rec_a.merge_metadata = merge_result["merge_metadata"]
-            rec_b.is_duplicate = True
-            rec_b.merged_into_id = rec_a.id
-            candidate.status = "merged"
-            candidate.resolved_by = user_id
-            candidate.resolved_at = now
-            db.add(Provenance(
-                record_id=rec_a.id,
-                action="field_update",
-                agent=f"user/{user_id}",
-                source_file_id=upload_id,
-                details={
-                    "merged_record_id": str(rec_b.id),
-                    "fields_updated": merge_result["merge_metadata"].get("fields_updated", []),
-                },
-            ))
-
-        elif action in ("dismiss", "keep_both"):
-            candidate.status = "dismissed"
-            candidate.resolved_by = user_id
-            candidate.resolved_at = now
-
-        resolved_count += 1
+    resolutions = [
+        Resolution(
+            candidate_id=UUID(resolution["candidate_id"]),
+            action=resolution["action"],
+            field_overrides=resolution.get("field_overrides"),
+        )
+        for resolution in body.get("resolutions", [])
+    ]
+    outcome = await resolve_candidates(db, user_id, resolutions, upload_id=upload_id)
 
     # Check if all candidates are resolved
-    pending_result = await db.execute(
-        select(DedupCandidate).where(
+    remaining = await db.scalar(
+        select(func.count()).select_from(DedupCandidate).where(
             DedupCandidate.source_upload_id == upload_id,
             DedupCandidate.status == "pending",
         )
     )
-    remaining = pending_result.scalars().all()
     if not remaining:
         upload.ingestion_status = "completed"
 
@@ -2080,10 +2326,10 @@ async def resolve_review(
         action="upload.review.resolve",
         resource_type="uploaded_file",
         resource_id=upload_id,
-        details={"resolutions_count": resolved_count},
+        details={"resolutions_count": outcome.resolved},
     )
 
-    return {"resolved": resolved_count, "remaining": len(remaining)}
+    return {"resolved": outcome.resolved, "remaining": remaining}
 
 
 @router.post("/{upload_id}/review/undo-merge")
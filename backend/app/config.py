@@ -174,6 +174,25 @@ class Settings(BaseSettings):
     section_extraction_concurrency: int = 10
     extraction_timeout_minutes: int = 10
     extraction_max_retries: int = 3
+    # Extraction workers (app/worker.py). The API process runs one embedded
+    # worker; set false when dedicated ``python -m app.worker`` processes run
+    # instead. Workers claim up to ``extraction_claim_batch_size`` files per
+    # transaction under a lease renewed every third of ``extraction_lease_seconds``
+    # — a crashed worker's files are re-claimed once the lease lapses. Workers
+    # wake on NOTIFY; the poll interval is only the safety net.
+    extraction_worker_embedded: bool = True
+    extraction_claim_batch_size: int = 5
+    extraction_lease_seconds: int = 120
+    extraction_poll_interval_seconds: int = 30
+    # Section-progress writes are coalesced: at most one UPDATE per interval or
+    # per step of sections completed (the final section is always written).
+    # Status polls for an in-flight job are served from memory in between.
+    extraction_progress_interval_seconds: float = 2.0
+    extraction_progress_step_percent: float = 10.0
+    # Persist auto-confirmed extraction records + A&P cross-references with
+    # bulk INSERTs (ids assigned client-side, no flushes). False restores the
+    # per-row ORM path.
+    extraction_bulk_insert: bool = True
     small_doc_threshold: int = 3000
 
     # PHI scrubbing: NER pass for free-text person names (providers, family,
@@ -182,6 +201,9 @@ class Settings(BaseSettings):
     # spaCy model is unavailable, so it never blocks a de-identification call.
     phi_ner_enabled: bool = True
     phi_ner_spacy_model: str = "en_core_web_md"
+    # Preload the NER models and terminology indexes in a background thread at
+    # startup (GET /api/v1/health/ready is 503 until done). False: load on first use.
+    startup_warmup: bool = True
 
     # --- OSS adoption (flag-gated; see docs/oss-adoption-design.md) ---
     # WS-A clinical NLP engine (default "hybrid"). "hybrid" = on-device medspaCy +
@@ -201,6 +223,39 @@ class Settings(BaseSettings):
     # WS-D FHIR structural validation. "off" | "log" (drift signal, never blocks
     # ingestion; default) | "strict" (never applied to AI-built partial resources).
     fhir_validation: str = "log"
+    # Which resources it checks: "all" | "sample" (a FHIR_VALIDATION_SAMPLE_RATE
+    # share) | "first-n-per-type" (the first FHIR_VALIDATION_FIRST_N of each
+    # resourceType per upload). A resource shaped like one already found valid
+    # is not re-validated unless FHIR_VALIDATION_SHAPE_CACHE=false.
+    fhir_validation_sampling: str = "all"
+    fhir_validation_sample_rate: float = 0.05
+    fhir_validation_first_n: int = 20
+    fhir_validation_shape_cache: bool = True
+    # Validate on a background thread pool instead of on the ingest path; the
+    # drift is collected into the upload's validation_report either way.
+    fhir_validation_async: bool = False
+    # Also write a BLAKE3 content hash (v2) next to the SHA-256 one (v1); see
+    # app/services/ingestion/content_hash.py for the rollout. Needs the
+    # ``fast-hash`` extra; silently stays v1-only without it.
+    content_hash_blake3: bool = False
+    # Upload dedup: also pair near-duplicate free text via the MinHash/LSH index
+    # (record_minhashes) and load only candidate records instead of the patient's
+    # whole record set. Off = exact code / 50-char text-prefix bucketing only.
+    dedup_minhash_lsh: bool = True
+    # Bulk dedup resolution (review screens, /dedup/resolve-bulk) loads and
+    # writes candidates in chunks of this size, logging progress per chunk.
+    dedup_bulk_chunk_size: int = 1000
+    # Record version retention (app/services/ingestion/version_retention.py):
+    # a record keeps its newest KEEP_LAST snapshots and all younger than
+    # DAILY_AFTER_DAYS, then one per day, and past WEEKLY_AFTER_DAYS one per
+    # week. Older kept snapshots are stored as encrypted diffs. The API runs
+    # the compaction every INTERVAL_MINUTES (0 = only via the script), BATCH
+    # records per transaction.
+    version_retention_keep_last: int = 10
+    version_retention_daily_after_days: int = 7
+    version_retention_weekly_after_days: int = 90
+    version_compaction_batch: int = 200
+    version_compaction_interval_minutes: int = 360
 
     # Redis
     redis_url: str = "redis://localhost:6379/0"
@@ -211,7 +266,24 @@ class Settings(BaseSettings):
     max_file_size_mb: int = 500
     max_epic_export_size_mb: int = 5000
     ingestion_batch_size: int = 100
+    # Structured uploads are ingested by an ingest worker (app/worker.py) with
+    # the extraction workers' lease settings; the API embeds one unless false.
+    ingestion_worker_embedded: bool = True
     ingestion_worker_concurrency: int = 1
+    # Chunked uploads (POST /upload/sessions): default chunk size, and how long
+    # an unfinished session (and its stored chunks) is kept.
+    upload_session_chunk_mb: int = 8
+    upload_session_ttl_hours: int = 24
+    # Processes converting CDA documents of an XDM package, and mapping the
+    # FHIR bundles of a ZIP, in parallel; 0 = CPU count (capped at 4), 1 = a
+    # thread in the API process.
+    cda_conversion_workers: int = 0
+    # Read uploaded ZIP members in place instead of extracting the archive to
+    # temp_extract_dir first (same zip-bomb caps, enforced while reading).
+    zip_streaming_ingest: bool = True
+    # Threads encrypting upload frames concurrently (AES-GCM releases the GIL);
+    # 0 = CPU count (capped at 8).
+    upload_encrypt_workers: int = 0
 
     # Rate limiting
     login_rate_limit: int = 30
@@ -227,6 +299,9 @@ class Settings(BaseSettings):
     # in production by TrustedHostMiddleware. Default "*" is permissive (dev/
     # loopback); set explicitly to the deployment hostname(s) in production.
     allowed_hosts: str = "*"
+    # Bearer token a Prometheus scraper must send to GET /metrics. Empty (the
+    # default) disables the endpoint (404) rather than exposing it unauthenticated.
+    metrics_token: str = ""
 
 
 settings = Settings()
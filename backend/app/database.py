@@ -26,3 +26,7 @@ async def get_db() -> AsyncSession:
             yield session
         finally:
             await session.close()
+
+
+# Session hooks that bump a user's data version when their records change.
+import app.services.data_version  # noqa: E402,F401
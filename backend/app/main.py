@@ -6,13 +6,14 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
 
+from app.api.metrics import router as metrics_router
 from app.api.router import api_router
 from app.config import settings
 from app.database import async_session_factory
 from app.middleware.audit import AuditMiddleware
 from app.middleware.security_headers import SecurityHeadersMiddleware
+from app.utils.json_response import FastJSONResponse
 
 
 def resolve_log_level(log_level: str, is_production: bool) -> int:
@@ -59,60 +60,19 @@ def build_cors_config(cors_origins: str) -> tuple[list[str], bool]:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup/shutdown lifecycle handler."""
-    # A1: Recover files stuck in 'processing' from previous crash/restart
-    try:
-        async with async_session_factory() as db:
-            result = await db.execute(text(
-                "UPDATE uploaded_files SET ingestion_status = 'pending_extraction', "
-                "processing_started_at = NULL "
-                "WHERE ingestion_status = 'processing' AND file_category = 'unstructured'"
-            ))
-            if result.rowcount:
-                logger.info("Recovered %d stuck files to pending_extraction on startup", result.rowcount)
-            await db.commit()
-    except Exception:
-        logger.exception("Failed to recover stuck files on startup")
+    # A1: files left 'processing' by a crash/restart need no startup sweep — their
+    # worker lease lapses and the next claim (from any worker) picks them up. A
+    # blanket reset here would also yank files that live standalone workers hold.
 
-    # Warm-load the spaCy PHI-NER model at boot (memory free, no GIL contention)
-    # so name redaction is a reliable cached singleton — not a first-load that
-    # can fail under concurrent extraction and silently disable de-identification.
-    if settings.phi_ner_enabled:
-        try:
-            from app.services.ai.phi_ner import warm_load_ner
-
-            if warm_load_ner():
-                logger.info("PHI-NER spaCy model warm-loaded (%s)", settings.phi_ner_spacy_model)
-            else:
-                logger.warning(
-                    "PHI-NER spaCy model %s NOT available at startup; name "
-                    "redaction will retry per-call", settings.phi_ner_spacy_model
-                )
-        except Exception:
-            logger.exception("PHI-NER warm-load raised at startup")
-
-    # WS-A: warm-load the local clinical-NLP models (scispaCy NER + medspaCy
-    # ConText/sectionizer) only when the local/hybrid engine is selected, so the
-    # default Gemini path never pays the model-load cost. Fail-open, non-latching
-    # like PHI-NER: a missing model degrades the local path gracefully (the
-    # orchestrator falls back / escalates) and never blocks startup.
-    if (settings.extraction_engine or "gemini").lower() in ("local", "hybrid"):
-        try:
-            from app.services.extraction.clinical_context import warm_load_clinical_context
-            from app.services.extraction.local_ner import warm_load_local_ner
-
-            ner_ok = warm_load_local_ner()
-            ctx_ok = warm_load_clinical_context()
-            logger.info(
-                "WS-A local extraction engine=%s warm-load: scispaCy NER=%s, medspaCy=%s",
-                settings.extraction_engine, ner_ok, ctx_ok,
-            )
-            if not (ner_ok and ctx_ok):
-                logger.warning(
-                    "Local extraction models not fully available at startup; "
-                    "the local path will retry per-call and hybrid escalates to Gemini"
-                )
-        except Exception:
-            logger.exception("WS-A local-engine warm-load raised at startup")
+    # Warm-load the spaCy PHI-NER model, the WS-A local clinical-NLP models
+    # (local/hybrid engine only) and the terminology indexes in a background
+    # thread, so name redaction is a cached singleton — not a first-load that can
+    # fail under concurrent extraction — without holding up boot for them.
+    # /api/v1/health/ready answers 503 until it finishes. Fail-open, non-latching:
+    # a missing model degrades its path gracefully and is retried per call.
+    from app.services.warmup import start_warmup
+
+    start_warmup()
 
     # Kick off a NON-BLOCKING, staleness-gated RxNorm medication-index refresh.
     # Fire-and-forget background task: it returns immediately, runs the (rare)
@@ -138,17 +98,54 @@ async def lifespan(app: FastAPI):
                     logger.info("Purged %d expired revoked tokens on startup", removed)
         except Exception:
             logger.exception("Failed to purge expired revoked tokens on startup")
+        # Same for abandoned chunked-upload sessions and their stored chunks.
+        try:
+            from app.services.upload_session_service import purge_expired_sessions
+
+            async with async_session_factory() as db:
+                removed = await purge_expired_sessions(db)
+                if removed:
+                    logger.info("Purged %d expired upload sessions on startup", removed)
+        except Exception:
+            logger.exception("Failed to purge expired upload sessions on startup")
 
     purge_task = asyncio.create_task(_purge_revoked_tokens())
     _background_tasks.add(purge_task)
     purge_task.add_done_callback(_background_tasks.discard)
 
-    # Start the extraction worker
-    from app.api.upload import start_extraction_worker
-    start_extraction_worker()
+    # Record version retention: thin out and delta-encode old record_versions
+    # snapshots periodically. Each pass commits per batch and skips records
+    # being written, so it never holds up ingestion; a failed pass is retried
+    # at the next interval.
+    async def _compact_record_versions() -> None:
+        from app.services.ingestion.version_retention import compact_versions
+
+        while True:
+            await asyncio.sleep(settings.version_compaction_interval_minutes * 60)
+            try:
+                stats = await compact_versions(async_session_factory)
+                logger.info("Record version compaction: %s", stats)
+            except Exception:
+                logger.exception("Record version compaction failed")
+
+    compaction_task = None
+    if settings.version_compaction_interval_minutes > 0:
+        compaction_task = asyncio.create_task(_compact_record_versions())
+        _background_tasks.add(compaction_task)
+        compaction_task.add_done_callback(_background_tasks.discard)
+
+    # Start the embedded extraction worker (disable when running dedicated
+    # ``python -m app.worker`` processes).
+    if settings.extraction_worker_embedded:
+        from app.api.upload import start_extraction_worker
+        start_extraction_worker()
+    # Likewise the embedded ingest worker for queued structured uploads.
+    if settings.ingestion_worker_embedded:
+        from app.api.upload import start_ingest_worker
+        start_ingest_worker()
 
     import sys
-    if any("--reload" in arg for arg in sys.argv):
+    if settings.extraction_worker_embedded and any("--reload" in arg for arg in sys.argv):
         logger.warning(
             "Server started with --reload: extraction worker may restart on file changes. "
             "Use without --reload for stable extraction processing."
@@ -157,6 +154,13 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    if compaction_task is not None:
+        compaction_task.cancel()
+
+    from app.services.ingestion.cda_engine import shutdown_cda_pool
+
+    shutdown_cda_pool()
+
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
@@ -170,6 +174,8 @@ def create_app() -> FastAPI:
         docs_url="/api/docs" if settings.app_env == "development" else None,
         redoc_url="/api/redoc" if settings.app_env == "development" else None,
         lifespan=lifespan,
+        # orjson rendering for every JSON response (app/utils/json_response.py).
+        default_response_class=FastJSONResponse,
     )
 
     # Request-level audit safety net (W16): a generic api.access row for every
@@ -190,7 +196,14 @@ def create_app() -> FastAPI:
         allow_origins=cors_origins,
         allow_credentials=cors_allow_credentials,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        allow_headers=["Authorization", "Content-Type", "Accept"],
+        allow_headers=[
+            "Authorization", "Content-Type", "Accept", "If-None-Match",
+            # Chunked uploads (app.services.upload_session_service).
+            "X-Chunk-SHA256",
+        ],
+        # Conditional GETs (app.services.data_version): the client revalidates
+        # with the ETag it was sent. The change feed's continuation headers.
+        expose_headers=["ETag", "X-Change-Token", "X-More-Changes"],
     )
 
     # Transport security (W19 / CRYPTO-04). PRODUCTION ONLY — gated on
@@ -218,11 +231,20 @@ def create_app() -> FastAPI:
             logger.warning(ssl_warning)
 
     app.include_router(api_router)
+    app.include_router(metrics_router)
 
     @app.get("/api/v1/health")
     async def health_check():
         return {"status": "healthy", "version": "0.1.0"}
 
+    @app.get("/api/v1/health/ready")
+    async def readiness_check():
+        # Liveness stays /health; this gates traffic on the startup warm-up.
+        from app.services.warmup import readiness
+
+        state = readiness()
+        return FastJSONResponse(state, status_code=200 if state["ready"] else 503)
+
     return app
 
 
@@ -4,7 +4,11 @@ from app.models.user import User
 from app.models.patient import Patient
 from app.models.record import HealthRecord
 from app.models.record_version import RecordVersion
+from app.models.record_change import RecordChange
+from app.models.encounter_link import EncounterLink
+from app.models.record_minhash import RecordMinHash, RecordMinHashBand
 from app.models.uploaded_file import UploadedFile
+from app.models.upload_session import UploadSession
 from app.models.ai_summary import AISummaryPrompt
 from app.models.deduplication import DedupCandidate
 from app.models.provenance import Provenance
@@ -13,13 +17,19 @@ from app.models.token_blacklist import RevokedToken
 from app.models.cross_reference import RecordCrossReference
 from app.models.summary_item import SummaryItem
 from app.models.llm_settings import LLMProviderConfig, UserLLMPreferences
+from app.models.user_data_version import UserDataVersion
 
 __all__ = [
     "User",
     "Patient",
     "HealthRecord",
     "RecordVersion",
+    "RecordChange",
+    "EncounterLink",
+    "RecordMinHash",
+    "RecordMinHashBand",
     "UploadedFile",
+    "UploadSession",
     "AISummaryPrompt",
     "DedupCandidate",
     "Provenance",
@@ -29,4 +39,5 @@ __all__ = [
     "SummaryItem",
     "LLMProviderConfig",
     "UserLLMPreferences",
+    "UserDataVersion",
 ]
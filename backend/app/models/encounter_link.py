@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.models.encrypted_types import EncryptedJSON
+
+
+class EncounterLink(Base):
+    """One live record linked to a visit: the encounter graph projection.
+
+    Mirrors ``health_records.linked_encounter_id`` for records that are
+    neither soft-deleted nor merged away, with ``encounter_id`` resolved to
+    the surviving encounter when the linked one was merged into another.
+    Carries what a "From this visit" row and the visit's per-type counts
+    need, so neither reads ``health_records``. Maintained at commit by
+    ``app.services.encounter_graph``.
+    """
+
+    __tablename__ = "encounter_links"
+
+    # The key to health_records is left to the migration: it depends on
+    # whether the table is hash partitioned, where ``id`` alone is not unique.
+    record_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    encounter_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    record_type: Mapped[str] = mapped_column(Text, nullable=False)
+    display_text: Mapped[str] = mapped_column(Text, nullable=False)
+    code_display: Mapped[str | None] = mapped_column(Text, nullable=True)
+    category: Mapped[list[str] | None] = mapped_column(ARRAY(Text), nullable=True)
+    effective_date: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Provider and timeline preview, taken from the (encrypted) FHIR resource
+    # and encrypted the same way; NULL when the resource has neither.
+    summary: Mapped[dict | None] = mapped_column(EncryptedJSON, nullable=True)
+
+    __table_args__ = (
+        # The linked list in display order; record_type is included so the
+        # per-type counts are an index-only scan.
+        Index(
+            "idx_encounter_links_encounter",
+            "user_id", "encounter_id", effective_date.desc(), "record_id",
+            postgresql_include=["record_type"],
+        ),
+    )
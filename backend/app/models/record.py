@@ -64,6 +64,8 @@ class HealthRecord(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     external_id: Mapped[str | None] = mapped_column(Text, nullable=True)
     source_system: Mapped[str | None] = mapped_column(Text, nullable=True)
     content_hash: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # v2 (BLAKE3) digest of the same canonical bytes; NULL until written/backfilled.
+    content_hash_blake3: Mapped[str | None] = mapped_column(Text, nullable=True)
     version: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
     deleted_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True
@@ -75,6 +77,11 @@ class HealthRecord(Base, UUIDPrimaryKeyMixin, TimestampMixin):
         Index("idx_health_records_patient_date", "patient_id", effective_date.desc()),
         Index("idx_health_records_type", "record_type"),
         Index("idx_health_records_code", "code_system", "code_value"),
+        Index(
+            "ix_health_records_linked_encounter",
+            "linked_encounter_id",
+            postgresql_where=linked_encounter_id.isnot(None),
+        ),
     )
 
 
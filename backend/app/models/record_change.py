@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import BigInteger, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class RecordChange(Base):
+    """The latest change to one health record, for the ``/records/changes`` feed.
+
+    ``seq`` is the owner's data version (:class:`UserDataVersion`) of the
+    transaction that last inserted, updated, merged or deleted the record;
+    written at commit by ``app.services.data_version``. No foreign key to
+    ``health_records``: the row outlives a hard-deleted record, so the feed
+    can still send its tombstone.
+    """
+
+    __tablename__ = "record_changes"
+
+    record_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index("idx_record_changes_user_seq", "user_id", "seq", "record_id"),
+    )
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import BigInteger, ForeignKey, Index, Integer, LargeBinary, SmallInteger
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class RecordMinHash(Base):
+    """MinHash signature of one health record.
+
+    Written by ``app.services.dedup.minhash_index``; its LSH bucket keys live in
+    :class:`RecordMinHashBand`.
+    """
+
+    __tablename__ = "record_minhashes"
+
+    record_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("health_records.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    patient_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    # health_records.version the signature was computed from (staleness check).
+    record_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    signature: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+
+class RecordMinHashBand(Base):
+    """One LSH bucket of a record: band number -> bucket key.
+
+    ``(band_key, record_id)`` is a covering B-tree, so looking up the records
+    in a set of buckets is an index-only scan.
+    """
+
+    __tablename__ = "record_minhash_bands"
+
+    record_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("record_minhashes.record_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    band: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    band_key: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index("idx_record_minhash_bands_key", "band_key", "record_id"),
+    )
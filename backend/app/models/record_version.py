@@ -9,6 +9,7 @@ from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 
 from app.models.base import Base
+from app.models.encrypted_types import EncryptedJSON
 
 
 class RecordVersion(Base):
@@ -23,8 +24,18 @@ class RecordVersion(Base):
         nullable=False,
         index=True,
     )
+    # Owner of the record: the hash partition key once
+    # scripts/partition_health_records.py has run. NULL on rows written
+    # before the column existed (the migration copy fills it in).
+    user_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=True
+    )
     version: Mapped[int] = mapped_column(Integer, nullable=False)
-    fhir_resource: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    # A snapshot holds either the full resource or, once compacted
+    # (app.services.ingestion.version_retention), an encrypted diff that turns
+    # the next newer snapshot of the record into this one.
+    fhir_resource: Mapped[dict | None] = mapped_column(JSONB(none_as_null=True), nullable=True)
+    delta: Mapped[dict | None] = mapped_column(EncryptedJSON, nullable=True)
     content_hash: Mapped[str | None] = mapped_column(Text, nullable=True)
     changed_fields: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     source_file_id: Mapped[uuid.UUID | None] = mapped_column(
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin, UUIDPrimaryKeyMixin
+
+
+class UploadSession(Base, UUIDPrimaryKeyMixin, TimestampMixin):
+    """A chunked, resumable upload in progress (``app.services.upload_session_service``).
+
+    Chunks are stored encrypted under ``<upload_dir>/sessions/<id>/`` as they
+    arrive; finalizing assembles them into one upload and queues its ingest.
+    """
+
+    __tablename__ = "upload_sessions"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    filename: Mapped[str] = mapped_column(Text, nullable=False)
+    mime_type: Mapped[str] = mapped_column(Text, nullable=False)
+    # "upload" (POST /upload) or "epic_export" — picks the size ceiling.
+    kind: Mapped[str] = mapped_column(Text, nullable=False, default="upload")
+    total_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    chunk_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Chunk index (as a string key) -> plaintext SHA-256 of the stored chunk.
+    received: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default="{}")
+    status: Mapped[str] = mapped_column(Text, nullable=False, default="open")
+    upload_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("uploaded_files.id", ondelete="SET NULL"), nullable=True
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -47,6 +47,18 @@ class UploadedFile(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     document_metadata: Mapped[dict | None] = mapped_column(EncryptedJSON, nullable=True)
     dedup_summary: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     retry_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Extraction-worker lease (see services/extraction/job_queue.py): which worker
+    # holds the file and until when. A lapsed lease makes the file claimable again.
+    lease_owner: Mapped[str | None] = mapped_column(Text, nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Structured ingest resume point (services/ingestion/checkpoint.py), written
+    # in the same transaction as each committed batch of records.
+    ingest_checkpoint: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # Structural FHIR drift found while ingesting (services/ingestion/
+    # fhir_validation.py): what was checked, sampled out, and the problems.
+    validation_report: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     deleted_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
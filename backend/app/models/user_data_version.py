@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import BigInteger, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class UserDataVersion(Base):
+    """A per-user counter of changes to the data the read endpoints serve.
+
+    Bumped in the same transaction as every write to a user's records (see
+    ``app.services.data_version``); the ETags of the timeline, dashboard and
+    record reads are derived from it. A user with no row is at version 0.
+    """
+
+    __tablename__ = "user_data_versions"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    version: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
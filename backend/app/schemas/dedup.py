@@ -86,6 +86,12 @@ class UndoMergeRequest(BaseModel):
     candidate_id: UUID
 
 
+class UndoClusterRequest(BaseModel):
+    """Split the duplicate cluster containing ``record_id`` (canonical or archived)."""
+
+    record_id: UUID
+
+
 class UndoBulkRequest(BaseModel):
     """Bulk-undo a set of merged candidates by id.
 
@@ -32,3 +32,11 @@ class RecordListResponse(BaseModel):
     total: int
     page: int
     page_size: int
+
+
+class VisitSummary(BaseModel):
+    """Records linked to a visit, counted per record type."""
+
+    encounter_id: UUID
+    total: int
+    by_type: dict[str, int]
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class UploadResponse(BaseModel):
@@ -14,6 +14,29 @@ class UploadResponse(BaseModel):
     unstructured_uploads: list[dict] = []
 
 
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1)
+    size: int = Field(..., gt=0)
+    mime_type: str = "application/octet-stream"
+    # "epic_export" gets the Epic export size ceiling, as POST /upload/epic-export.
+    kind: Literal["upload", "epic_export"] = "upload"
+    # Defaults to UPLOAD_SESSION_CHUNK_MB.
+    chunk_size: int | None = None
+
+
+class UploadSessionResponse(BaseModel):
+    session_id: str
+    status: str
+    total_size: int
+    chunk_size: int
+    chunk_count: int
+    received_chunks: list[int]
+    # Received plaintext as merged [start, end) byte ranges.
+    received_ranges: list[list[int]]
+    expires_at: datetime
+    upload_id: str | None = None
+
+
 class UploadStatusResponse(BaseModel):
     upload_id: str
     filename: str
@@ -29,6 +52,8 @@ class UploadStatusResponse(BaseModel):
     progress_detail: dict | None = None
     # Durable per-file notices (e.g. an OCR provider refusal + fallback).
     notices: list[Any] = []
+    # Structural FHIR drift found while ingesting (structured uploads).
+    validation_report: dict | None = None
 
 
 class UploadHistoryItem(BaseModel):
@@ -7,9 +7,9 @@ from app.services.ai.llm.types import (
     LLMUsage, ReasoningConfig, TextPart, as_parts,
 )
 
-# Imported last: the registry pulls in the provider modules (which depend on
-# base/types above), so this must follow the base/types imports to avoid a
-# circular import at package init.
+# Imported last: the registry depends on base/types above, so this must follow
+# them to avoid a circular import at package init. The provider modules (and
+# their SDKs) are imported lazily by the registry when a provider is built.
 from app.services.ai.llm.config import (  # noqa: E402
     LLMConfig, ProviderCreds, load_llm_config,
 )
@@ -1,14 +1,48 @@
 from __future__ import annotations
+import functools
+import time
 from abc import ABC, abstractmethod
 from app.services.ai.llm.types import Capabilities, LLMRequest, LLMResponse
 
 
+def _instrumented(complete):
+    """Wrap a provider's ``complete`` with latency / token / error metrics."""
+    from app.utils.metrics import observe_llm_call
+
+    @functools.wraps(complete)
+    async def wrapper(self: "LLMProvider", request: LLMRequest) -> LLMResponse:
+        model = request.model or getattr(self, "_model_default", "")
+        start = time.perf_counter()
+        try:
+            response = await complete(self, request)
+        except BaseException as exc:
+            observe_llm_call(self.name, model, time.perf_counter() - start, error=exc)
+            raise
+        observe_llm_call(self.name, model, time.perf_counter() - start, usage=response.usage)
+        return response
+
+    wrapper._instrumented = True
+    return wrapper
+
+
 class LLMProvider(ABC):
-    """Provider-agnostic LLM interface. Implementations normalize one SDK."""
+    """Provider-agnostic LLM interface. Implementations normalize one SDK.
+
+    Every concrete ``complete`` is wrapped at class creation so each call is
+    recorded in ``app.utils.metrics`` (latency, ``LLMUsage`` tokens, error
+    class) without the providers doing anything.
+    """
 
     name: str = "base"
     capabilities: Capabilities = Capabilities()
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        complete = cls.__dict__.get("complete")
+        if complete is not None and not getattr(complete, "__isabstractmethod__", False) \
+                and not getattr(complete, "_instrumented", False):
+            cls.complete = _instrumented(complete)
+
     @abstractmethod
     async def complete(self, request: LLMRequest) -> LLMResponse:
         """Run a unary completion and return a normalized response.
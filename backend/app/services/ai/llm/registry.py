@@ -3,11 +3,8 @@ from __future__ import annotations
 import hashlib
 
 from app.config import settings
-from app.services.ai.llm.anthropic import AnthropicProvider
 from app.services.ai.llm.base import LLMProvider
 from app.services.ai.llm.config import LLMConfig, ProviderCreds, load_llm_config
-from app.services.ai.llm.gemini import GeminiProvider
-from app.services.ai.llm.openai_compat import OpenAICompatProvider
 from app.services.ai.llm.types import LLMBadRequestError
 
 __all__ = [
@@ -78,8 +75,16 @@ def _build(name: str, config: LLMConfig | None = None) -> LLMProvider:
     Raises:
         LLMBadRequestError: If the provider name is unknown.
     """
+    # Provider SDKs (google-genai, anthropic, openai) take seconds to import, so
+    # they load with the first provider built rather than with the app.
     cfg = config or LLMConfig.from_settings()
     creds = _creds(name, cfg)
+    if name in ("gemini", "vertex"):
+        from app.services.ai.llm.gemini import GeminiProvider
+    elif name == "anthropic":
+        from app.services.ai.llm.anthropic import AnthropicProvider
+    elif name in _OPENAI_FAMILY:
+        from app.services.ai.llm.openai_compat import OpenAICompatProvider
     if name == "gemini":
         return GeminiProvider(api_key=creds.api_key,
                               model_default=creds.model or settings.gemini_model)
@@ -22,6 +22,7 @@ patient's own identifiers and structured PHI still happened upstream.
 from __future__ import annotations
 
 import logging
+import threading
 
 from app.config import settings
 
@@ -62,6 +63,7 @@ _NAME = "[NAME]"
 
 _nlp = None
 _warned = False
+_load_lock = threading.Lock()
 
 
 def _get_nlp():
@@ -72,36 +74,41 @@ def _get_nlp():
     (e.g. memory pressure while a PDF was being OCR'd concurrently) silently
     disabled name redaction for the entire life of the worker — a PHI hazard.
     Now each call re-attempts the load until it succeeds; we only log the
-    warning once to avoid spam.
+    warning once to avoid spam. A call made while another thread (the startup
+    warm-up) is loading waits for that load instead of starting a second one.
     """
     global _nlp, _warned
     if _nlp is not None:
         return _nlp
-    try:
-        import spacy
-
-        _nlp = spacy.load(settings.phi_ner_spacy_model)
-        _warned = False
-        return _nlp
-    except Exception:  # noqa: BLE001 - missing model must not break scrubbing
-        if not _warned:
-            logger.warning(
-                "spaCy model %r unavailable; skipping NER name redaction this "
-                "call (will retry; structured + known-identifier scrubbing still "
-                "applied)",
-                settings.phi_ner_spacy_model,
-                exc_info=True,
-            )
-            _warned = True
-        return None
+    with _load_lock:
+        if _nlp is not None:
+            return _nlp
+        try:
+            import spacy
+
+            _nlp = spacy.load(settings.phi_ner_spacy_model)
+            _warned = False
+            return _nlp
+        except Exception:  # noqa: BLE001 - missing model must not break scrubbing
+            if not _warned:
+                logger.warning(
+                    "spaCy model %r unavailable; skipping NER name redaction this "
+                    "call (will retry; structured + known-identifier scrubbing still "
+                    "applied)",
+                    settings.phi_ner_spacy_model,
+                    exc_info=True,
+                )
+                _warned = True
+            return None
 
 
 def warm_load_ner() -> bool:
     """Eagerly load the spaCy model (call at app startup, before heavy work).
 
-    Loading once at boot — when memory is free and nothing competes for the GIL
+    Loading once at boot — when memory is free and little competes for the GIL
     — makes the steady-state NER path a cached singleton and avoids first-load
     failures during concurrent extraction. Returns True if the model is ready.
+    Runs in the background warm-up thread (``app.services.warmup``).
     """
     return _get_nlp() is not None
 
@@ -0,0 +1,106 @@
+"""Incremental export: the per-user change feed behind ``GET /records/changes``.
+
+``/records/export`` only produces the full history, so a downstream system
+syncing from us had to re-pull and diff everything on every run. The feed
+sends just what changed since a continuation token instead.
+
+Every transaction that inserts, updates (a new :class:`RecordVersion`
+included), merges, un-merges or deletes a user's records bumps the user's
+data version and enters each of those records in ``record_changes`` with it
+as ``seq`` (``app.services.data_version``). A user's sequence numbers become
+visible in commit order, so reading ``record_changes`` in ``(seq,
+record_id)`` order past a token never skips a change that commits later.
+
+Each entry carries the record's state as of the read, not a diff:
+
+* ``upsert`` — the record is in the export; ``resource`` is its FHIR resource.
+* ``delete`` — a tombstone: the record was soft-deleted, merged into another
+  record, or no longer exists.
+
+A record changed again is moved to its new position, so applying the entries
+in order to a replica keyed by ``id`` converges to ``/records/export``.
+Tokens are ``<seq>.<record id>``; every entry has its own, so a client can
+resume after the last entry it applied.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import and_, case, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.record import HealthRecord
+from app.models.record_change import RecordChange
+from app.utils.json_response import dumps
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 5000
+
+
+@dataclass(frozen=True)
+class ChangeToken:
+    """Position in a user's change feed: just after this entry."""
+
+    seq: int
+    record_id: UUID
+
+    def encode(self) -> str:
+        return f"{self.seq}.{self.record_id.hex}"
+
+    @classmethod
+    def decode(cls, token: str) -> ChangeToken:
+        """Parse a token from :meth:`encode`; ``ValueError`` if malformed."""
+        seq, sep, record_id = token.partition(".")
+        if not sep or not seq.isdigit():
+            raise ValueError(f"Invalid change token: {token!r}")
+        return cls(int(seq), UUID(hex=record_id))
+
+
+async def read_changes(
+    db: AsyncSession,
+    user_id: UUID,
+    since: ChangeToken | None = None,
+    limit: int = DEFAULT_LIMIT,
+) -> tuple[list[dict], bool]:
+    """The user's next ``limit`` entries after ``since``, and whether more follow."""
+    # Tombstones select no resource, so only live records are decrypted.
+    live = and_(HealthRecord.deleted_at.is_(None), HealthRecord.is_duplicate.is_(False))
+    query = (
+        select(
+            RecordChange.seq,
+            RecordChange.record_id,
+            case((live, HealthRecord.fhir_resource)).label("resource"),
+        )
+        .outerjoin(HealthRecord, and_(
+            HealthRecord.id == RecordChange.record_id,
+            HealthRecord.user_id == RecordChange.user_id,
+        ))
+        .where(RecordChange.user_id == user_id)
+        .order_by(RecordChange.seq, RecordChange.record_id)
+        .limit(limit + 1)
+    )
+    if since is not None:
+        query = query.where(
+            tuple_(RecordChange.seq, RecordChange.record_id) > tuple_(since.seq, since.record_id)
+        )
+    rows = (await db.execute(query)).all()
+
+    entries = []
+    for row in rows[:limit]:
+        entry = {
+            "token": ChangeToken(row.seq, row.record_id).encode(),
+            "id": str(row.record_id),
+            "op": "delete" if row.resource is None else "upsert",
+        }
+        if row.resource is not None:
+            entry["resource"] = row.resource
+        entries.append(entry)
+    return entries, len(rows) > limit
+
+
+def ndjson(entries: list[dict]) -> Iterator[bytes]:
+    """Render entries as newline-delimited JSON, one line at a time."""
+    for entry in entries:
+        yield dumps(entry) + b"\n"
@@ -0,0 +1,187 @@
+"""Per-user data version and the conditional GETs built on it.
+
+The frontend re-fetches ``/timeline``, ``/dashboard/overview``,
+``/records/stats`` and ``/records/{id}/fhir`` on every navigation, and each
+call re-ran aggregates and decrypted rows although nothing had changed since
+the last upload. Every write to a user's records now bumps that user's
+counter in ``user_data_versions`` in the same transaction, and those reads
+answer with a weak ETag derived from it. A request whose ``If-None-Match``
+still matches gets a 304 after one primary-key lookup, before
+``health_records`` is touched.
+
+The same counter is the sequence of the ``/records/changes`` feed
+(``app.services.change_feed``): each record written in the transaction gets
+the new version in ``record_changes``. The same marks keep the encounter
+graph projection (``app.services.encounter_graph``) up to date.
+
+Writes are noticed in two ways:
+
+* ORM writes are automatic: a session ``after_flush`` hook marks every new,
+  changed or deleted :class:`HealthRecord` (and the record of every new
+  :class:`RecordVersion`), and the owner of every new or deleted
+  :class:`UploadedFile`/:class:`Patient` (counted by the overview).
+* Statement-level writes (bulk ``insert``/``update`` through
+  ``session.execute``, raw SQL) call :func:`mark_records_changed` explicitly.
+
+The marked counters are bumped in ``before_commit`` — the transaction's last
+statements, in user order — so the row lock is held only for the commit and
+two writers can never deadlock on it. A second writer for the same user
+waits on that lock until the first commits, so a user's sequence numbers
+become visible in order. Rolling the transaction back drops the marks.
+
+An ETag is an HMAC over the user, version, path and query string, keyed by
+the server secret, so a client holds a matching one only if the server sent it
+that exact response for that user at that version; a 304 therefore reveals
+nothing and needs no ownership re-check. Responses stay ``no-store`` (no PHI
+in browser caches): the frontend keeps bodies in memory and revalidates.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+from collections.abc import Iterable
+from uuid import UUID
+
+from fastapi import Request, Response
+from sqlalchemy import BigInteger, bindparam, event, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.patient import Patient
+from app.models.record import HealthRecord
+from app.models.record_change import RecordChange
+from app.models.record_version import RecordVersion
+from app.models.uploaded_file import UploadedFile
+from app.models.user_data_version import UserDataVersion
+from app.services.encounter_graph import refresh_links
+
+_PENDING = "data_version_users"
+
+
+def _pending(db: AsyncSession | Session) -> dict[UUID, set[UUID]]:
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    return session.info.setdefault(_PENDING, {})
+
+
+def _uuid(value: UUID | str) -> UUID:
+    # Ids are sometimes assigned as strings; the column type converts them on
+    # write, so one record must not be marked twice under two spellings.
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+def mark_data_changed(db: AsyncSession | Session, *user_ids: UUID) -> None:
+    """Bump these users' data versions when ``db``'s transaction commits."""
+    pending = _pending(db)
+    for user_id in user_ids:
+        if user_id is not None:
+            pending.setdefault(_uuid(user_id), set())
+
+
+def mark_records_changed(
+    db: AsyncSession | Session, user_id: UUID, record_ids: Iterable[UUID]
+) -> None:
+    """Bump ``user_id``'s data version and enter these records in the change
+    feed when ``db``'s transaction commits."""
+    _pending(db).setdefault(_uuid(user_id), set()).update(map(_uuid, record_ids))
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed_writes(session: Session, _flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, HealthRecord):
+            mark_records_changed(session, obj.user_id, (obj.id,))
+        elif isinstance(obj, RecordVersion) and obj in session.new and obj.user_id:
+            mark_records_changed(session, obj.user_id, (obj.record_id,))
+        elif isinstance(obj, (UploadedFile, Patient)) and obj not in session.dirty:
+            mark_data_changed(session, obj.user_id)
+
+
+# Each record changed in the transaction gets the owner's new version;
+# ``:change_ids`` is a set, so no row is upserted twice by one statement.
+_RECORD_CHANGES = (
+    insert(RecordChange)
+    .from_select(
+        ["record_id", "user_id", "seq"],
+        select(
+            func.unnest(bindparam("change_ids", type_=ARRAY(PG_UUID))),
+            bindparam("change_user", type_=PG_UUID),
+            bindparam("change_seq", type_=BigInteger),
+        ),
+    )
+)
+_RECORD_CHANGES = _RECORD_CHANGES.on_conflict_do_update(
+    index_elements=[RecordChange.record_id],
+    set_={"seq": _RECORD_CHANGES.excluded.seq, "user_id": _RECORD_CHANGES.excluded.user_id},
+)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_on_commit(session: Session) -> None:
+    # commit() flushes only after this hook; flush now so its writes are marked.
+    session.flush()
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    users = sorted(pending, key=str)
+    stmt = insert(UserDataVersion).values([{"user_id": u, "version": 1} for u in users])
+    versions = dict(session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserDataVersion.user_id],
+            set_={"version": UserDataVersion.version + 1},
+        ).returning(UserDataVersion.user_id, UserDataVersion.version)
+    ).all())
+    for user_id in users:
+        if pending[user_id]:
+            session.connection().execute(_RECORD_CHANGES, {
+                "change_ids": list(pending[user_id]),
+                "change_user": user_id,
+                "change_seq": versions[user_id],
+            })
+            refresh_links(session, user_id, pending[user_id])
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_marks(session: Session, previous_transaction) -> None:
+    # Only the outermost transaction's rollback discards its writes; a rolled
+    # back savepoint keeps the marks (an extra bump is harmless, a lost one not).
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+async def get_data_version(db: AsyncSession, user_id: UUID) -> int:
+    version = await db.scalar(
+        select(UserDataVersion.version).where(UserDataVersion.user_id == user_id)
+    )
+    return version or 0
+
+
+def _etag(user_id: UUID, version: int, request: Request) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    message = f"{user_id}|{version}|{request.url.path}|{query}".encode()
+    digest = hmac.new(settings.jwt_secret_key.encode(), message, hashlib.sha256)
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+async def check_etag(db: AsyncSession, user_id: UUID, request: Request) -> tuple[str, bool]:
+    """``(etag, not_modified)`` for this user's current data and this request."""
+    etag = _etag(user_id, await get_data_version(db, user_id), request)
+    return etag, _matches(request.headers.get("if-none-match"), etag)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
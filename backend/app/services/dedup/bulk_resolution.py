@@ -0,0 +1,338 @@
+"""Set-based resolution of dedup candidates.
+
+Review screens resolve hundreds or thousands of suggestions at once. Doing it
+one candidate at a time — ``db.get`` per candidate and per record, a field
+merge, an UPDATE per row and a Provenance INSERT per merge — takes minutes
+and holds the transaction open all along. :func:`resolve_candidates` loads
+a chunk's candidates and records with one query each, applies the
+resolutions to in-memory state in order (so several resolutions touching one
+record compose exactly as they would one by one), and writes records,
+candidate statuses and Provenance with one multi-row statement per kind.
+Merged pairs are then folded into the patient's duplicate clusters
+(``app.services.dedup.clustering``). Merges that would join records
+dismissed as distinct are found before anything is written and sent back to
+review untouched.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import UUID
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.config import settings
+from app.models.deduplication import DedupCandidate
+from app.models.provenance import Provenance
+from app.models.record import HealthRecord
+from app.services.data_version import mark_records_changed
+from app.services.dedup.clustering import (
+    _id_in,
+    candidate_edges,
+    cluster_patient_merges,
+    plan_clusters,
+)
+from app.services.dedup.field_merger import apply_field_update
+from app.services.ingestion.content_hash import content_digests
+
+logger = logging.getLogger(__name__)
+
+MERGE_ACTIONS = ("merge", "update")
+DISMISS_ACTIONS = ("dismiss", "keep_both")
+
+
+@dataclass(frozen=True)
+class Resolution:
+    """One reviewer decision: ``merge``, ``update`` (field-level merge),
+    ``dismiss`` or ``keep_both``; other actions are counted but change nothing."""
+
+    candidate_id: UUID
+    action: str
+    field_overrides: list[str] | None = None
+
+
+@dataclass
+class BulkResolution:
+    """Outcome of :func:`resolve_candidates`."""
+
+    resolved: int = 0
+    merged: int = 0
+    dismissed: int = 0
+    # Merged candidates sent back to review, unapplied, because they would
+    # join records dismissed as distinct.
+    conflicts: list[UUID] = field(default_factory=list)
+
+
+async def load_records(
+    db: AsyncSession, ids: Iterable[UUID], *columns, user_id: UUID | None = None
+) -> dict[UUID, object]:
+    """Rows of ``columns`` (``HealthRecord.id`` is always included) for ``ids``,
+    in one query, keyed by record id."""
+    ids = set(ids)
+    if not ids:
+        return {}
+    query = select(HealthRecord.id, *columns).where(_id_in(HealthRecord.id, ids, "record_ids"))
+    if user_id is not None:
+        query = query.where(HealthRecord.user_id == user_id)
+    return {row.id: row for row in await db.execute(query)}
+
+
+async def resolve_candidates(
+    db: AsyncSession,
+    user_id: UUID,
+    resolutions: Sequence[Resolution],
+    *,
+    upload_id: UUID | None = None,
+    chunk_size: int | None = None,
+    progress_callback: Callable[[int, int], None] | None = None,
+) -> BulkResolution:
+    """Apply ``resolutions`` in order with a handful of statements per chunk.
+
+    Candidates are scoped to ``user_id`` (and to ``upload_id`` when given);
+    unknown ids, and candidates whose records are gone, are skipped. Merge
+    archives ``record_b`` into ``record_a``; update first merges the chosen
+    fields of ``record_b`` into ``record_a`` (see
+    :func:`~app.services.dedup.field_merger.apply_field_update`). Progress is
+    logged per chunk of ``chunk_size`` (default
+    ``settings.dedup_bulk_chunk_size``) and passed to ``progress_callback(done,
+    total)``. A merge that clustering would reject (see
+    :func:`~app.services.dedup.clustering.plan_clusters`) is not applied: its
+    candidate goes back to ``pending`` and is listed in ``conflicts``. Does
+    not commit.
+    """
+    chunk_size = chunk_size or settings.dedup_bulk_chunk_size
+    result = BulkResolution()
+    result.conflicts = await _merge_conflicts(db, user_id, upload_id, resolutions)
+    if result.conflicts:
+        await db.execute(
+            update(DedupCandidate)
+            .where(_id_in(DedupCandidate.id, result.conflicts, "conflict_ids"))
+            .values(status="pending", auto_resolved=False, resolved_by=None, resolved_at=None)
+        )
+    skipped = set(result.conflicts)
+    preferred: dict[UUID, set[UUID]] = {}
+    released: dict[UUID, set[UUID]] = {}
+    total = len(resolutions)
+    for start in range(0, total, chunk_size):
+        chunk = resolutions[start:start + chunk_size]
+        await _resolve_chunk(db, user_id, upload_id, chunk, result, preferred, released, skipped)
+        done = start + len(chunk)
+        if total > chunk_size:
+            logger.info("Resolved %d/%d dedup candidates", done, total)
+        if progress_callback is not None:
+            try:
+                progress_callback(done, total)
+            except Exception:  # progress is best-effort, never fail the batch
+                logger.debug("progress_callback raised; ignoring", exc_info=True)
+
+    for patient_id, primaries in preferred.items():
+        await cluster_patient_merges(
+            db, user_id, patient_id, agent=f"user/{user_id}", source_file_id=upload_id,
+            preferred=primaries, released=released.get(patient_id, ()),
+        )
+    return result
+
+
+async def _merge_conflicts(
+    db: AsyncSession,
+    user_id: UUID,
+    upload_id: UUID | None,
+    resolutions: Sequence[Resolution],
+) -> list[UUID]:
+    """Candidates the batch would merge that clustering would reject.
+
+    Plans each affected patient's clusters as they will stand after the
+    batch: the stored merged/dismissed edges with the batch's final decision
+    per candidate laid over them. Candidates rejected by that plan are exactly
+    the ones ``cluster_patient_merges`` would send back to review afterwards.
+    """
+    final: dict[UUID, str] = {}
+    for resolution in resolutions:
+        if resolution.action in MERGE_ACTIONS:
+            final[resolution.candidate_id] = "merged"
+        elif resolution.action in DISMISS_ACTIONS:
+            final[resolution.candidate_id] = "dismissed"
+    if "merged" not in final.values():
+        return []
+
+    query = candidate_edges(user_id)
+    batch_query = query.where(_id_in(DedupCandidate.id, final, "candidate_ids"))
+    if upload_id is not None:
+        batch_query = batch_query.where(DedupCandidate.source_upload_id == upload_id)
+    batch = {
+        row.id: SimpleNamespace(**{**row._mapping, "status": final[row.id]})
+        for row in await db.execute(batch_query)
+    }
+    patients = {e.patient_id for e in batch.values() if e.status == "merged"}
+    if not patients:
+        return []
+    stored = await db.execute(query.where(
+        _id_in(query.selected_columns.patient_id, patients, "patient_ids"),
+        DedupCandidate.status.in_(("merged", "dismissed")),
+    ))
+    edges = {row.id: row for row in stored} | batch
+    record_ids = {e.record_a_id for e in edges.values()} | {e.record_b_id for e in edges.values()}
+    live = set((await db.execute(
+        select(HealthRecord.id).where(
+            _id_in(HealthRecord.id, record_ids, "record_ids"),
+            HealthRecord.user_id == user_id,
+            HealthRecord.deleted_at.is_(None),
+        )
+    )).scalars())
+
+    rejected: set[UUID] = set()
+    for patient_id in patients:
+        _members, conflicts = plan_clusters(
+            (e for e in edges.values() if e.patient_id == patient_id), live
+        )
+        rejected.update(conflicts)
+    return [c for c, status in final.items() if status == "merged" and c in batch and c in rejected]
+
+
+async def _resolve_chunk(
+    db: AsyncSession,
+    user_id: UUID,
+    upload_id: UUID | None,
+    chunk: Sequence[Resolution],
+    result: BulkResolution,
+    preferred: dict[UUID, set[UUID]],
+    released: dict[UUID, set[UUID]],
+    skipped: set[UUID],
+) -> None:
+    RecordA = aliased(HealthRecord)
+    query = (
+        select(
+            DedupCandidate.id,
+            DedupCandidate.record_a_id,
+            DedupCandidate.record_b_id,
+            DedupCandidate.source_upload_id,
+        )
+        .join(RecordA, DedupCandidate.record_a_id == RecordA.id)
+        .where(
+            _id_in(DedupCandidate.id, {r.candidate_id for r in chunk}, "candidate_ids"),
+            RecordA.user_id == user_id,
+        )
+    )
+    if upload_id is not None:
+        query = query.where(DedupCandidate.source_upload_id == upload_id)
+    candidates = {row.id: row for row in await db.execute(query)}
+
+    # Resources are only decrypted when a field-level merge needs them.
+    columns = [HealthRecord.patient_id, HealthRecord.fhir_resource_type]
+    if any(r.action == "update" for r in chunk):
+        columns.append(HealthRecord.fhir_resource)
+    records = await load_records(
+        db,
+        {c.record_a_id for c in candidates.values()} | {c.record_b_id for c in candidates.values()},
+        *columns,
+        user_id=user_id,
+    )
+
+    now = datetime.now(timezone.utc)
+    resources: dict[UUID, SimpleNamespace] = {}
+    record_values: dict[UUID, dict] = {}
+    statuses: dict[UUID, str] = {}
+    provenance: list[dict] = []
+
+    def working(record_id: UUID) -> SimpleNamespace:
+        # The record as earlier resolutions of this batch left it.
+        if record_id not in resources:
+            row = records[record_id]
+            resources[record_id] = SimpleNamespace(
+                id=record_id,
+                fhir_resource_type=row.fhir_resource_type,
+                fhir_resource=row.fhir_resource,
+            )
+        return resources[record_id]
+
+    for resolution in chunk:
+        candidate = candidates.get(resolution.candidate_id)
+        if candidate is None:
+            continue
+        a_id, b_id = candidate.record_a_id, candidate.record_b_id
+        if a_id not in records or b_id not in records:
+            continue
+        source_upload = candidate.source_upload_id
+
+        if resolution.action in MERGE_ACTIONS and candidate.id in skipped:
+            pass  # conflicts with a dismissed pair: left pending, nothing written
+        elif resolution.action in MERGE_ACTIONS:
+            if resolution.action == "merge":
+                record_values.setdefault(b_id, {}).update(
+                    is_duplicate=True,
+                    merged_into_id=a_id,
+                    merge_metadata={
+                        "merged_from": str(b_id),
+                        "merged_at": now.isoformat(),
+                        "merge_type": "duplicate",
+                        "source_upload_id": str(source_upload) if source_upload else None,
+                    },
+                )
+                details = {"merged_record_id": str(b_id), "action": "merge"}
+            else:
+                primary = working(a_id)
+                merge_result = apply_field_update(
+                    primary, working(b_id), resolution.field_overrides
+                )
+                primary.fhir_resource = merge_result["updated_resource"]
+                digests = content_digests(primary.fhir_resource)
+                record_values.setdefault(a_id, {}).update(
+                    fhir_resource=primary.fhir_resource,
+                    content_hash=digests.sha256,
+                    content_hash_blake3=digests.blake3,
+                    display_text=merge_result["display_text"],
+                    merge_metadata=merge_result["merge_metadata"],
+                )
+                record_values.setdefault(b_id, {}).update(is_duplicate=True, merged_into_id=a_id)
+                details = {
+                    "merged_record_id": str(b_id),
+                    "fields_updated": merge_result["merge_metadata"].get("fields_updated", []),
+                }
+            statuses[candidate.id] = "merged"
+            provenance.append({
+                "record_id": a_id,
+                "action": "merge" if resolution.action == "merge" else "field_update",
+                "agent": f"user/{user_id}",
+                "source_file_id": source_upload,
+                "details": details,
+            })
+            patient_id = records[a_id].patient_id
+            preferred.setdefault(patient_id, set()).add(a_id)
+            released.setdefault(patient_id, set()).add(b_id)
+        elif resolution.action in DISMISS_ACTIONS:
+            statuses[candidate.id] = "dismissed"
+        result.resolved += 1
+
+    # One executemany per distinct column set (ORM bulk UPDATE by primary key).
+    # The owner filter keeps each row on one partition of a partitioned table;
+    # records were read as columns, so there are no loaded objects to sync.
+    by_columns: dict[tuple, list[dict]] = {}
+    for record_id, values in record_values.items():
+        by_columns.setdefault(tuple(sorted(values)), []).append({"id": record_id, **values})
+    for rows in by_columns.values():
+        await db.execute(
+            update(HealthRecord).where(HealthRecord.user_id == user_id)
+            .execution_options(synchronize_session=None),
+            rows,
+        )
+    if record_values:
+        mark_records_changed(db, user_id, record_values)
+
+    for status in ("merged", "dismissed"):
+        ids = [c for c, s in statuses.items() if s == status]
+        if ids:
+            await db.execute(
+                update(DedupCandidate)
+                .where(_id_in(DedupCandidate.id, ids, "candidate_ids"))
+                .values(status=status, resolved_by=user_id, resolved_at=now)
+            )
+    result.merged += sum(1 for s in statuses.values() if s == "merged")
+    result.dismissed += sum(1 for s in statuses.values() if s == "dismissed")
+
+    if provenance:
+        await db.execute(insert(Provenance), provenance)
@@ -0,0 +1,431 @@
+"""Transitive duplicate clustering with canonical record election.
+
+Merging pair by pair is order-dependent: with A≈B and B≈C, folding B into A
+and then C into B leaves C pointing at an archived record, and the survivor
+of a chain depends on which pair happened to be processed first. This stage
+treats every merged candidate of a patient (auto-merged or user-confirmed) as
+an edge, finds the connected components with union-find, elects one
+canonical record per component and points every other member at it.
+
+Dismissed candidates are "these are NOT duplicates" decisions, so they act as
+cannot-link constraints: a merged edge that would put both records of a
+dismissed pair into one cluster is not applied and goes back to review.
+
+All clusters that are not already in their target state are written with
+one statement: an ``UPDATE … FROM unnest(…) RETURNING`` of the members in a
+CTE feeding the ``INSERT`` of their Provenance rows.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Collection, Hashable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import (
+    Integer,
+    Text,
+    any_,
+    bindparam,
+    case,
+    cast,
+    column,
+    false,
+    func,
+    insert,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.deduplication import DedupCandidate
+from app.models.provenance import Provenance
+from app.models.record import HealthRecord
+from app.services.data_version import mark_records_changed
+
+logger = logging.getLogger(__name__)
+
+# Canonical election: structured exports outrank CDA documents, which outrank
+# facts extracted from free text; unknown formats rank last.
+SOURCE_PRIORITY = {"fhir_r4": 3, "epic_ehi": 3, "cda_r2": 2, "ai_extracted": 1}
+
+# Columns counted for "completeness" — plain columns only, so electing a
+# canonical never has to decrypt ``fhir_resource``.
+_COMPLETENESS_FIELDS = (
+    "code_system", "code_value", "code_display", "effective_date",
+    "effective_date_end", "status", "category", "source_section", "linked_encounter_id",
+)
+
+
+def _id_in(column, ids, name: str):
+    # One array parameter instead of an expanding IN: a patient's merge
+    # history can outgrow the driver's parameter limit.
+    return column == any_(bindparam(name, list(ids), type_=ARRAY(PG_UUID)))
+
+
+_RECORD_COLUMNS = (
+    HealthRecord.id,
+    HealthRecord.source_format,
+    HealthRecord.is_duplicate,
+    HealthRecord.merged_into_id,
+    HealthRecord.created_at,
+    HealthRecord.updated_at,
+    *(getattr(HealthRecord, name) for name in _COMPLETENESS_FIELDS),
+)
+
+
+class UnionFind:
+    """Disjoint sets with path halving and union by size."""
+
+    def __init__(self) -> None:
+        self._parent: dict[Hashable, Hashable] = {}
+        self._size: dict[Hashable, int] = {}
+
+    def find(self, item: Hashable) -> Hashable:
+        if item not in self._parent:
+            self._parent[item] = item
+            self._size[item] = 1
+            return item
+        while self._parent[item] != item:
+            self._parent[item] = self._parent[self._parent[item]]
+            item = self._parent[item]
+        return item
+
+    def union(self, a: Hashable, b: Hashable) -> Hashable:
+        """Join the sets of ``a`` and ``b``; returns the new root."""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size.pop(root_b)
+        return root_a
+
+
+def canonical_rank(record, *, current_canonical: bool = False) -> tuple:
+    """Sort key for canonical election; the highest key wins.
+
+    Source priority, then (ties only) the record that already is the
+    cluster's survivor — so re-clustering does not flip survivors between
+    equally good records — then completeness, then recency. The id makes the
+    order total, so the election is deterministic.
+    """
+    completeness = sum(
+        getattr(record, name, None) not in (None, "", []) for name in _COMPLETENESS_FIELDS
+    )
+    recency = getattr(record, "updated_at", None) or getattr(record, "created_at", None)
+    return (
+        SOURCE_PRIORITY.get(record.source_format, 0),
+        current_canonical,
+        completeness,
+        recency or datetime.min.replace(tzinfo=timezone.utc),
+        str(record.id),
+    )
+
+
+def elect_canonical(records: Iterable, preferred: Iterable[UUID] = ()):
+    """The record a cluster folds into.
+
+    ``preferred`` ids (a user's explicit choice of primary) win outright; among
+    the rest, a record other members already point at counts as the current
+    survivor for :func:`canonical_rank`.
+    """
+    records = list(records)
+    preferred = set(preferred)
+    pointed_at = {r.merged_into_id for r in records if r.merged_into_id}
+    return max(
+        records,
+        key=lambda r: (
+            r.id in preferred,
+            canonical_rank(r, current_canonical=r.id in pointed_at and not r.is_duplicate),
+        ),
+    )
+
+
+def candidate_edges(user_id: UUID):
+    """Candidates of the user's records as clustering edges (scoped through
+    ``record_a``, whose patient is the edge's patient); add filters to taste."""
+    RecordA = aliased(HealthRecord)
+    return (
+        select(
+            DedupCandidate.id,
+            DedupCandidate.record_a_id,
+            DedupCandidate.record_b_id,
+            DedupCandidate.status,
+            DedupCandidate.auto_resolved,
+            DedupCandidate.similarity_score,
+            RecordA.patient_id,
+        )
+        .join(RecordA, DedupCandidate.record_a_id == RecordA.id)
+        .where(RecordA.user_id == user_id)
+    )
+
+
+def plan_clusters(
+    edges: Iterable, live: Collection[UUID]
+) -> tuple[dict[Hashable, set[UUID]], list[UUID]]:
+    """Union the merged ``edges`` into clusters under cannot-link constraints.
+
+    ``edges`` are candidate rows (see :func:`candidate_edges`); dismissed ones
+    are the constraints, and merged ones with an endpoint outside ``live``
+    are ignored. Returns the clusters (root -> member ids) and the merged
+    candidates left out because they would join a dismissed pair. Pure, so a
+    caller can find conflicts before writing anything.
+    """
+    edges = list(edges)
+    cannot_link: dict[UUID, set[UUID]] = {}
+    for e in edges:
+        if e.status == "dismissed":
+            cannot_link.setdefault(e.record_a_id, set()).add(e.record_b_id)
+            cannot_link.setdefault(e.record_b_id, set()).add(e.record_a_id)
+
+    # User confirmations first, then the most confident auto-merges: when two
+    # edges conflict, the weaker one is the one sent back to review.
+    merged_edges = sorted(
+        (e for e in edges if e.status == "merged"),
+        key=lambda e: (e.auto_resolved, -e.similarity_score, str(e.id)),
+    )
+    forest = UnionFind()
+    members: dict[Hashable, set[UUID]] = {}
+    conflicts: list[UUID] = []
+    for e in merged_edges:
+        if e.record_a_id not in live or e.record_b_id not in live:
+            continue
+        root_a, root_b = forest.find(e.record_a_id), forest.find(e.record_b_id)
+        if root_a == root_b:
+            continue
+        group_a = members.get(root_a, {root_a})
+        group_b = members.get(root_b, {root_b})
+        small, large = sorted((group_a, group_b), key=len)
+        if any(cannot_link.get(r, set()) & large for r in small):
+            conflicts.append(e.id)
+            continue
+        members.pop(root_a, None)
+        members.pop(root_b, None)
+        members[forest.union(root_a, root_b)] = group_a | group_b
+    return members, conflicts
+
+
+@dataclass
+class ClusterResult:
+    """What one clustering pass changed."""
+
+    clusters: int = 0  # clusters written (already-consistent ones are skipped)
+    merged: int = 0  # records (re)pointed at a canonical
+    restored: int = 0  # released records left on their own and un-archived
+    conflicts: list[UUID] = field(default_factory=list)  # merged candidates sent back to review
+    canonical: dict[UUID, UUID] = field(default_factory=dict)  # member id -> canonical id
+
+
+async def cluster_patient_merges(
+    db: AsyncSession,
+    user_id: UUID,
+    patient_id: UUID,
+    *,
+    agent: str = "system/auto-merge",
+    source_file_id: UUID | None = None,
+    preferred: Iterable[UUID] = (),
+    released: Iterable[UUID] = (),
+) -> ClusterResult:
+    """Re-derive the patient's duplicate clusters from merged candidates.
+
+    Call after candidate statuses change (auto-merges saved, a merge
+    confirmed, a merge undone). ``preferred`` ids win the election of their
+    cluster; ``released`` ids are records whose merge edge was just removed
+    and that are un-archived if no cluster claims them any more. Does not
+    commit.
+    """
+    query = candidate_edges(user_id)
+    edges = (await db.execute(query.where(
+        query.selected_columns.patient_id == patient_id,
+        DedupCandidate.status.in_(("merged", "dismissed")),
+    ))).all()
+    merged_edges = [e for e in edges if e.status == "merged"]
+    released = set(released)
+    member_ids = {e.record_a_id for e in merged_edges} | {e.record_b_id for e in merged_edges}
+    if not member_ids and not released:
+        return ClusterResult()
+
+    rows = (await db.execute(
+        select(*_RECORD_COLUMNS).where(
+            _id_in(HealthRecord.id, member_ids | released, "record_ids"),
+            HealthRecord.user_id == user_id,
+            HealthRecord.deleted_at.is_(None),
+        )
+    )).all()
+    records = {r.id: r for r in rows}
+
+    members, conflicts = plan_clusters(edges, records)
+    result = ClusterResult(conflicts=conflicts)
+    if result.conflicts:
+        await db.execute(
+            update(DedupCandidate)
+            .where(_id_in(DedupCandidate.id, result.conflicts, "conflict_ids"))
+            .values(status="pending", auto_resolved=False, resolved_by=None, resolved_at=None)
+        )
+
+    preferred = set(preferred)
+    writes: dict[str, list] = {"member_ids": [], "canonical_ids": [], "cluster_sizes": []}
+    for group in members.values():
+        cluster = [records[i] for i in group]
+        canonical = elect_canonical(cluster, preferred)
+        for r in cluster:
+            result.canonical[r.id] = canonical.id
+        changed = [
+            r.id for r in cluster
+            if (r.id == canonical.id and (r.is_duplicate or r.merged_into_id is not None))
+            or (r.id != canonical.id and (not r.is_duplicate or r.merged_into_id != canonical.id))
+        ]
+        if not changed:
+            continue
+        writes["member_ids"] += changed
+        writes["canonical_ids"] += [canonical.id] * len(changed)
+        writes["cluster_sizes"] += [len(cluster)] * len(changed)
+        result.clusters += 1
+        result.merged += sum(1 for i in changed if i != canonical.id)
+
+    if writes["member_ids"]:
+        # Through the session, parameters on an ORM INSERT are taken as rows to
+        # bulk-insert; the prebuilt statement runs on the session's connection.
+        conn = await db.connection()
+        await conn.execute(_MERGE_CLUSTERS, {
+            **writes,
+            "owner_id": user_id,
+            "merge_agent": agent,
+            "upload_id": source_file_id,
+            "merged_at": datetime.now(timezone.utc).isoformat(),
+        })
+        mark_records_changed(db, user_id, writes["member_ids"])
+
+    restore = [
+        i for i in released
+        if i in records and i not in result.canonical
+        and (records[i].is_duplicate or records[i].merged_into_id is not None)
+    ]
+    if restore:
+        await db.execute(
+            update(HealthRecord)
+            .where(
+                _id_in(HealthRecord.id, restore, "restore_ids"), HealthRecord.user_id == user_id
+            )
+            .values(is_duplicate=False, merged_into_id=None, merge_metadata=None)
+        )
+        mark_records_changed(db, user_id, restore)
+        result.restored = len(restore)
+
+    logger.info(
+        "Patient %s: %d clusters written, %d records merged, %d restored, %d conflicts",
+        patient_id, result.clusters, result.merged, result.restored, len(result.conflicts),
+    )
+    return result
+
+
+def _merge_statement():
+    """Every changed cluster's merge in one statement.
+
+    ``:member_ids``, ``:canonical_ids`` and ``:cluster_sizes`` are parallel
+    arrays, one entry per record to (re)write: each member is archived into
+    its canonical record (the canonical itself, when listed, is un-archived)
+    and a Provenance row is inserted per newly archived member. ``:owner_id``
+    keeps the UPDATE on one partition when health_records is hash-partitioned
+    by user (``scripts/partition_health_records.py``). Built once
+    with bound parameters: constructing the CTE per call costs more than
+    executing it.
+    """
+    targets = func.unnest(
+        bindparam("member_ids", type_=ARRAY(PG_UUID)),
+        bindparam("canonical_ids", type_=ARRAY(PG_UUID)),
+        bindparam("cluster_sizes", type_=ARRAY(Integer)),
+    ).table_valued(
+        column("id", PG_UUID), column("canonical_id", PG_UUID), column("cluster_size", Integer),
+    ).render_derived(name="targets")
+    agent = bindparam("merge_agent", type_=Text)
+    upload_id = bindparam("upload_id", type_=PG_UUID)
+    is_canonical = HealthRecord.id == targets.c.canonical_id
+    merged = (
+        update(HealthRecord)
+        .where(
+            HealthRecord.id == targets.c.id,
+            HealthRecord.user_id == bindparam("owner_id", type_=PG_UUID),
+        )
+        .values(
+            is_duplicate=case((is_canonical, false()), else_=True),
+            merged_into_id=case((is_canonical, None), else_=targets.c.canonical_id),
+            merge_metadata=case(
+                (is_canonical, None),
+                else_=func.jsonb_build_object(
+                    "merged_from", cast(HealthRecord.id, Text),
+                    "merged_into", cast(targets.c.canonical_id, Text),
+                    "merged_at", bindparam("merged_at", type_=Text),
+                    "merge_type", "duplicate",
+                    "cluster_size", targets.c.cluster_size,
+                    "source_upload_id", cast(upload_id, Text),
+                    "agent", agent,
+                ),
+            ),
+        )
+        .returning(HealthRecord.id, targets.c.canonical_id, targets.c.cluster_size)
+        .cte("merged")
+    )
+    return insert(Provenance).from_select(
+        ["id", "record_id", "action", "agent", "source_file_id", "details"],
+        select(
+            func.gen_random_uuid(),
+            merged.c.canonical_id,
+            literal("merge"),
+            agent,
+            upload_id,
+            func.jsonb_build_object(
+                "merged_record_id", cast(merged.c.id, Text),
+                "cluster_size", merged.c.cluster_size,
+                "classification", "duplicate",
+            ),
+        ).where(merged.c.id != merged.c.canonical_id),
+    )
+
+
+_MERGE_CLUSTERS = _merge_statement()
+
+
+async def undo_cluster(db: AsyncSession, user_id: UUID, record_id: UUID) -> ClusterResult | None:
+    """Split the cluster containing ``record_id`` back into separate records.
+
+    Every merged candidate inside the cluster is dismissed (an unmerge is a
+    "these are NOT duplicates" decision) and every member is un-archived.
+    Returns ``None`` when the record is not the user's. Does not commit.
+    """
+    record = (await db.execute(
+        select(HealthRecord.id, HealthRecord.patient_id, HealthRecord.merged_into_id).where(
+            HealthRecord.id == record_id, HealthRecord.user_id == user_id,
+        )
+    )).one_or_none()
+    if record is None:
+        return None
+    canonical_id = record.merged_into_id or record.id
+    member_ids = set((await db.execute(
+        select(HealthRecord.id).where(
+            HealthRecord.user_id == user_id, HealthRecord.merged_into_id == canonical_id,
+        )
+    )).scalars().all()) | {canonical_id}
+
+    await db.execute(
+        update(DedupCandidate)
+        .where(
+            DedupCandidate.status == "merged",
+            DedupCandidate.record_a_id.in_(member_ids),
+            DedupCandidate.record_b_id.in_(member_ids),
+        )
+        .values(
+            status="dismissed",
+            auto_resolved=False,
+            resolved_by=user_id,
+            resolved_at=datetime.now(timezone.utc),
+        )
+    )
+    return await cluster_patient_merges(db, user_id, record.patient_id, released=member_ids)
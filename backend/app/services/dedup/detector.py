@@ -5,11 +5,15 @@ from datetime import datetime, timezone
 from uuid import UUID, uuid4
 
 from rapidfuzz import fuzz
-from sqlalchemy import select
+from sqlalchemy import and_, any_, bindparam, func, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.deduplication import DedupCandidate
 from app.models.record import HealthRecord
+from app.services.dedup.clustering import canonical_rank, cluster_patient_merges
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +22,11 @@ logger = logging.getLogger(__name__)
 AUTO_MERGE_THRESHOLD = 0.95
 
 
+def _bucket_key(record: HealthRecord) -> tuple:
+    """Exact bucketing key: record type + code, else the first 50 chars of text."""
+    return (record.record_type, (record.code_value or (record.display_text or "")[:50].lower()))
+
+
 def _apply_merge(secondary: HealthRecord, primary_id: UUID) -> None:
     """Mark ``secondary`` as a duplicate folded into ``primary_id``.
 
@@ -43,9 +52,11 @@ async def detect_duplicates(
     bucket-scoped pairs, batch existence checks via an in-memory set,
     and bulk inserts for new candidates.
 
-    Pairs scoring at or above ``AUTO_MERGE_THRESHOLD`` are merged automatically
-    (the earlier-ordered record is the primary) and recorded as resolved
-    candidates; pairs in the 0.70–0.95 band are queued as pending for review.
+    Pairs scoring at or above ``AUTO_MERGE_THRESHOLD`` are recorded as resolved
+    (merged) candidates — ``record_a`` is the pair's better canonical by
+    ``canonical_rank`` — and then applied by transitive clustering, so a chain
+    of duplicates folds into one canonical record; pairs in the 0.70–0.95 band
+    are queued as pending for review.
 
     Returns:
         A dict ``{"candidates_found": <pending count>, "auto_merged": <count>}``.
@@ -78,8 +89,7 @@ async def detect_duplicates(
     # Group records by type + code/text key for bucket-based comparison
     buckets: dict[tuple, list[HealthRecord]] = {}
     for r in records:
-        key = (r.record_type, (r.code_value or (r.display_text or "")[:50].lower()))
-        buckets.setdefault(key, []).append(r)
+        buckets.setdefault(_bucket_key(r), []).append(r)
 
     new_candidates: list[dict] = []
     pending_count = 0
@@ -91,10 +101,6 @@ async def detect_duplicates(
             continue
         for i, a in enumerate(bucket):
             for b in bucket[i + 1 :]:
-                # A record already folded into another (this run's auto-merges)
-                # must not chain into further pairs.
-                if a.is_duplicate or b.is_duplicate:
-                    continue
                 score, reasons = _compare_records(a, b)
                 if score < 0.7:
                     continue
@@ -109,8 +115,8 @@ async def detect_duplicates(
                     "match_reasons": reasons,
                 }
                 if score >= AUTO_MERGE_THRESHOLD:
-                    # The earlier-ordered record (a) is the surviving primary.
-                    _apply_merge(b, a.id)
+                    if canonical_rank(b) > canonical_rank(a):
+                        candidate["record_a_id"], candidate["record_b_id"] = b.id, a.id
                     candidate.update({
                         "status": "merged",
                         "resolved_by": user_id,
@@ -138,6 +144,12 @@ async def detect_duplicates(
         for i in range(0, len(new_candidates), 100):
             batch = new_candidates[i : i + 100]
             await db.execute(insert(DedupCandidate), batch)
+        if auto_merged_count:
+            clustered = await cluster_patient_merges(
+                db, user_id, patient_id, agent="system/scan"
+            )
+            auto_merged_count -= len(clustered.conflicts)
+            pending_count += len(clustered.conflicts)
         await db.commit()
 
     logger.info(
@@ -156,6 +168,10 @@ async def detect_upload_duplicates(
     """Detect duplicates scoped to a specific upload.
 
     Compares records from this upload against all other records for the patient.
+    Pairs come from exact bucketing (same code, else same 50-char text prefix)
+    and, with ``DEDUP_MINHASH_LSH`` on, from the MinHash/LSH near-duplicate
+    index — in which case only the candidate records are loaded, not the
+    patient's whole record set.
     Returns (auto_merged, needs_llm_review) — two lists of candidate dicts.
     auto_merged: score >= 0.95
     needs_llm_review: score 0.6–0.95
@@ -177,18 +193,9 @@ async def detect_upload_duplicates(
     if not new_records:
         return [], []
 
-    # Fetch existing records (from other uploads)
-    existing_result = await db.execute(
-        select(HealthRecord)
-        .where(
-            HealthRecord.user_id == user_id,
-            HealthRecord.patient_id == patient_id,
-            HealthRecord.source_file_id != upload_id,
-            HealthRecord.deleted_at.is_(None),
-            HealthRecord.is_duplicate.is_(False),
-        )
+    existing_records, near_pairs = await _load_upload_candidates(
+        db, upload_id, patient_id, user_id, new_records
     )
-    existing_records = existing_result.scalars().all()
 
     if not existing_records:
         return [], []
@@ -204,16 +211,21 @@ async def detect_upload_duplicates(
 
     # Build lookup by (record_type, code/text) for existing records
     existing_buckets: dict[tuple, list[HealthRecord]] = {}
+    existing_by_id = {r.id: r for r in existing_records}
     for r in existing_records:
-        key = (r.record_type, (r.code_value or (r.display_text or "")[:50].lower()))
-        existing_buckets.setdefault(key, []).append(r)
+        existing_buckets.setdefault(_bucket_key(r), []).append(r)
 
     auto_merged: list[dict] = []
     needs_llm_review: list[dict] = []
 
     for new_rec in new_records:
-        key = (new_rec.record_type, (new_rec.code_value or (new_rec.display_text or "")[:50].lower()))
-        bucket = existing_buckets.get(key, [])
+        bucket = existing_buckets.get(_bucket_key(new_rec), [])
+        near = near_pairs.get(new_rec.id)
+        if near:
+            in_bucket = {r.id for r in bucket}
+            bucket = bucket + [
+                existing_by_id[i] for i in sorted(near - in_bucket) if i in existing_by_id
+            ]
 
         for existing_rec in bucket:
             if (new_rec.id, existing_rec.id) in existing_pairs:
@@ -249,6 +261,57 @@ async def detect_upload_duplicates(
     return auto_merged, needs_llm_review
 
 
+async def _load_upload_candidates(
+    db: AsyncSession,
+    upload_id: UUID,
+    patient_id: UUID,
+    user_id: UUID,
+    new_records: list[HealthRecord],
+) -> tuple[list[HealthRecord], dict[UUID, set[UUID]]]:
+    """Existing records (other uploads) that may pair with ``new_records``.
+
+    Returns ``(existing_records, near_pairs)`` where ``near_pairs`` maps a new
+    record id to the existing ids sharing an LSH bucket with it. With
+    ``DEDUP_MINHASH_LSH`` off this is every active record of the patient and no
+    near pairs (the original full load).
+    """
+    existing_filter = (
+        HealthRecord.user_id == user_id,
+        HealthRecord.patient_id == patient_id,
+        HealthRecord.source_file_id != upload_id,
+        HealthRecord.deleted_at.is_(None),
+        HealthRecord.is_duplicate.is_(False),
+    )
+    near_pairs: dict[UUID, set[UUID]] = {}
+    if settings.dedup_minhash_lsh:
+        from app.services.dedup.minhash_index import (
+            refresh_patient_index,
+            upload_candidate_pairs,
+        )
+
+        await refresh_patient_index(db, user_id, patient_id)
+        for new_id, existing_id in await upload_candidate_pairs(
+            db, upload_id, patient_id, user_id
+        ):
+            near_pairs.setdefault(new_id, set()).add(existing_id)
+        # Only what can pair: an exact bucket key of a new record, or an LSH hit.
+        codes = {r.code_value for r in new_records if r.code_value}
+        prefixes = {(r.display_text or "")[:50].lower() for r in new_records if not r.code_value}
+        near_ids = set().union(*near_pairs.values())
+        existing_filter += (or_(
+            HealthRecord.code_value.in_(codes),
+            and_(
+                or_(HealthRecord.code_value.is_(None), HealthRecord.code_value == ""),
+                func.lower(func.left(HealthRecord.display_text, 50)).in_(prefixes),
+            ),
+            # Bound as one array: near-hit sets can outgrow the parameter limit.
+            HealthRecord.id == any_(bindparam("near_ids", list(near_ids), type_=ARRAY(PG_UUID))),
+        ),)
+    existing_result = await db.execute(select(HealthRecord).where(*existing_filter))
+    existing_records = existing_result.scalars().all()
+    return list(existing_records), near_pairs
+
+
 def _compare_records(a: HealthRecord, b: HealthRecord) -> tuple[float, dict]:
     """Compare two records for similarity.
 
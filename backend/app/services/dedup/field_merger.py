@@ -4,7 +4,7 @@ import copy
 import logging
 from datetime import datetime, timezone
 
-from app.services.ingestion.content_hash import content_hash
+from app.services.ingestion.content_hash import content_digests
 from app.services.ingestion.fhir_parser import build_display_text
 
 logger = logging.getLogger(__name__)
@@ -101,5 +101,7 @@ def revert_field_update(record) -> None:
             resource[field] = copy.deepcopy(old_value)
 
     record.fhir_resource = resource
-    record.content_hash = content_hash(record.fhir_resource)
+    digests = content_digests(record.fhir_resource)
+    record.content_hash = digests.sha256
+    record.content_hash_blake3 = digests.blake3
     record.merge_metadata = None
@@ -0,0 +1,253 @@
+"""MinHash / LSH near-duplicate index over health records.
+
+Exact bucketing in :mod:`app.services.dedup.detector` only pairs records that
+share a ``code_value`` or the first 50 characters of ``display_text``, so
+free-text variants from different documents ("Essential hypertension" vs
+"Hypertension, essential (primary)") never meet. This index closes that gap.
+
+Each record gets a MinHash signature over character trigrams of its
+normalized display tokens plus its code (``record_minhashes.signature``). The
+signature is cut into ``BANDS`` bands of ``ROWS`` rows and every band is hashed
+— together with the patient and record type — into one 64-bit bucket key
+(``record_minhash_bands``, B-tree on ``(band_key, record_id)``). Two records
+whose token sets have Jaccard similarity ``J`` share at least one bucket with
+probability ``1 - (1 - J**ROWS) ** BANDS`` (about 0.99 at J=0.7, 0.88 at 0.6,
+0.64 at 0.5, 0.12 at 0.3), and looking an upload's buckets up is one
+index-only scan, not a scan of the patient's records. LSH only *generates*
+candidates; every pair is still scored by ``_compare_records``.
+
+The index is maintained lazily: :func:`refresh_patient_index` signs records
+that have no row yet or whose ``version`` moved on since they were signed, so
+older data is backfilled on a patient's first dedup run after the migration.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import struct
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from functools import lru_cache
+from uuid import UUID
+
+from sqlalchemy import BigInteger, any_, bindparam, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.record import HealthRecord
+from app.models.record_minhash import RecordMinHash, RecordMinHashBand
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_SIG_STRUCT = struct.Struct(f">{NUM_PERM}I")
+_EMPTY = (0xFFFFFFFF,) * NUM_PERM
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Words that carry no identity in a clinical display string.
+_STOPWORDS = frozenset({"a", "an", "and", "by", "for", "in", "of", "on", "or", "the", "to", "with"})
+_SIGN_BATCH = 500
+
+
+def _stable_hash(value: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "big")
+
+
+def shingles(
+    display_text: str | None,
+    code_system: str | None = None,
+    code_value: str | None = None,
+    code_display: str | None = None,
+) -> set[str]:
+    """Character trigrams of the normalized display tokens, plus the code.
+
+    Trigrams are taken per token (with boundary spaces), so token order does
+    not matter and small spelling or inflection differences still overlap.
+    ``code_display`` contributes its tokens too (often identical, which adds
+    nothing); ``code_system|code_value`` is one whole shingle.
+    """
+    grams: set[str] = set()
+    for text in (display_text, code_display):
+        for token in _TOKEN_RE.findall((text or "").lower()):
+            if token in _STOPWORDS:
+                continue
+            padded = f" {token} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    if code_value:
+        grams.add(f"code:{code_system or ''}|{code_value}")
+    return grams
+
+
+@lru_cache(maxsize=65536)
+def _gram_hashes(gram: str) -> tuple[int, ...]:
+    # NUM_PERM independent 32-bit hashes from one SHAKE-128 squeeze: a fresh
+    # hash function per "permutation", and trigrams repeat across records,
+    # so the cache makes signing mostly a C-level min over cached rows.
+    return _SIG_STRUCT.unpack(hashlib.shake_128(gram.encode()).digest(_SIG_STRUCT.size))
+
+
+def signature(grams: Iterable[str]) -> tuple[int, ...]:
+    """``NUM_PERM``-value MinHash signature of a shingle set."""
+    rows = [_gram_hashes(g) for g in grams]
+    if not rows:
+        return _EMPTY
+    return tuple(map(min, zip(*rows)))
+
+
+def record_signature(record) -> tuple[int, ...]:
+    """Signature of a :class:`HealthRecord` (or any object with its fields)."""
+    return signature(shingles(
+        record.display_text, record.code_system, record.code_value, record.code_display,
+    ))
+
+
+def band_keys(sig: Sequence[int], patient_id: UUID, record_type: str) -> list[int]:
+    """One signed 64-bit bucket key per band, scoped to patient + record type."""
+    scope = patient_id.bytes + record_type.encode()
+    packed = _SIG_STRUCT.pack(*sig)
+    width = len(packed) // BANDS
+    keys = []
+    for band in range(BANDS):
+        raw = _stable_hash(scope + bytes([band]) + packed[band * width:(band + 1) * width])
+        keys.append(raw - (1 << 64) if raw >= 1 << 63 else raw)  # fit BIGINT
+    return keys
+
+
+def estimate_jaccard(a: Sequence[int], b: Sequence[int]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def pack_signature(sig: Sequence[int]) -> bytes:
+    return _SIG_STRUCT.pack(*sig)
+
+
+def unpack_signature(raw: bytes) -> tuple[int, ...]:
+    return _SIG_STRUCT.unpack(raw)
+
+
+def lsh_pairs(records: Sequence, patient_id: UUID) -> set[tuple[int, int]]:
+    """In-memory LSH candidate pairs (index pairs ``i < j``) for ``records``.
+
+    The same banding the database index uses; for evaluation and tests.
+    """
+    buckets: dict[int, list[int]] = defaultdict(list)
+    for i, record in enumerate(records):
+        for key in band_keys(record_signature(record), patient_id, record.record_type):
+            buckets[key].append(i)
+    pairs: set[tuple[int, int]] = set()
+    for members in buckets.values():
+        for x, i in enumerate(members):
+            for j in members[x + 1:]:
+                pairs.add((min(i, j), max(i, j)))
+    return pairs
+
+
+async def refresh_patient_index(db: AsyncSession, user_id: UUID, patient_id: UUID) -> int:
+    """Sign every active record of the patient that is unsigned or stale.
+
+    Returns the number of records (re)signed. Does not commit.
+    """
+    result = await db.execute(
+        select(
+            HealthRecord.id,
+            HealthRecord.record_type,
+            HealthRecord.display_text,
+            HealthRecord.code_system,
+            HealthRecord.code_value,
+            HealthRecord.code_display,
+            HealthRecord.version,
+        )
+        .outerjoin(RecordMinHash, RecordMinHash.record_id == HealthRecord.id)
+        .where(
+            HealthRecord.user_id == user_id,
+            HealthRecord.patient_id == patient_id,
+            HealthRecord.deleted_at.is_(None),
+            or_(
+                RecordMinHash.record_id.is_(None),
+                RecordMinHash.record_version != HealthRecord.version,
+            ),
+        )
+    )
+    rows = result.all()
+    for start in range(0, len(rows), _SIGN_BATCH):
+        signed, bands = [], []
+        for row in rows[start:start + _SIGN_BATCH]:
+            sig = record_signature(row)
+            signed.append({
+                "record_id": row.id,
+                "patient_id": patient_id,
+                "record_version": row.version,
+                "signature": pack_signature(sig),
+            })
+            bands.extend(
+                {"record_id": row.id, "band": band, "band_key": key}
+                for band, key in enumerate(band_keys(sig, patient_id, row.record_type))
+            )
+        # executemany form: SQLAlchemy batches these as multi-row VALUES
+        # without compiling one statement per 8k-parameter batch.
+        stmt = pg_insert(RecordMinHash)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[RecordMinHash.record_id],
+            set_={
+                "record_version": stmt.excluded.record_version,
+                "signature": stmt.excluded.signature,
+            },
+        ), signed)
+        stmt = pg_insert(RecordMinHashBand)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[RecordMinHashBand.record_id, RecordMinHashBand.band],
+            set_={"band_key": stmt.excluded.band_key},
+        ), bands)
+    return len(rows)
+
+
+async def upload_candidate_pairs(
+    db: AsyncSession, upload_id: UUID, patient_id: UUID, user_id: UUID
+) -> set[tuple[UUID, UUID]]:
+    """``(new_record_id, existing_record_id)`` pairs sharing an LSH bucket.
+
+    New records are the upload's active ones (signed by
+    :func:`refresh_patient_index`). Existing ids are any other signed records
+    of the patient in those buckets — bucket keys are patient-scoped, but
+    deleted or merged records are not filtered here; the caller loads the
+    records it compares with its own filters.
+    """
+    result = await db.execute(
+        select(
+            RecordMinHashBand.band_key,
+            HealthRecord.id,
+            HealthRecord.deleted_at.is_(None) & HealthRecord.is_duplicate.is_(False),
+        )
+        .outerjoin(RecordMinHashBand, RecordMinHashBand.record_id == HealthRecord.id)
+        .where(
+            HealthRecord.user_id == user_id,
+            HealthRecord.patient_id == patient_id,
+            HealthRecord.source_file_id == upload_id,
+        )
+    )
+    upload_ids: set[UUID] = set()
+    new_by_key: dict[int, list[UUID]] = defaultdict(list)
+    for key, record_id, active in result.all():
+        upload_ids.add(record_id)
+        if active and key is not None:
+            new_by_key[key].append(record_id)
+    if not new_by_key:
+        return set()
+
+    # Two plain queries instead of a self-join: the second is one index-only
+    # scan of (band_key, record_id) for all of the upload's buckets at once.
+    result = await db.execute(
+        select(RecordMinHashBand.band_key, RecordMinHashBand.record_id).where(
+            RecordMinHashBand.band_key == any_(
+                bindparam("band_keys", list(new_by_key), type_=ARRAY(BigInteger))
+            )
+        )
+    )
+    pairs: set[tuple[UUID, UUID]] = set()
+    for key, existing_id in result.all():
+        if existing_id in upload_ids:
+            continue
+        for new_id in new_by_key[key]:
+            pairs.add((new_id, existing_id))
+    return pairs
@@ -2,17 +2,17 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
 from uuid import UUID
 
-from sqlalchemy import insert, update
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.models.deduplication import DedupCandidate
-from app.models.provenance import Provenance
 from app.models.record import HealthRecord
 from app.services.ai.llm import LLMConfig, load_llm_config
+from app.services.dedup.bulk_resolution import load_records
+from app.services.dedup.clustering import ClusterResult, cluster_patient_merges
 from app.services.dedup.detector import detect_upload_duplicates
 from app.services.dedup.llm_judge import judge_candidates_batch, JudgmentResult
 
@@ -52,6 +52,10 @@ async def run_upload_dedup(
     3. LLM judge on fuzzy matches (score 0.6–0.95)
     4. Auto-resolve based on LLM output
     5. Return summary
+
+    Auto-merges are applied by transitive clustering over the patient's merged
+    pairs (``app.services.dedup.clustering``); a merge that conflicts with a
+    dismissed pair is counted as needing review instead.
     """
     summary = DedupSummary()
 
@@ -76,8 +80,11 @@ async def run_upload_dedup(
             c["llm_explanation"] = "Exact match (heuristic score >= 0.95)"
             c["status"] = "merged"
         await _save_candidates(db, auto_merged_candidates)
-        await _apply_auto_merges(db, auto_merged_candidates, upload_id, user_id)
+        clustered = await _apply_auto_merges(
+            db, auto_merged_candidates, upload_id, user_id, patient_id
+        )
         summary.auto_merged = len(auto_merged_candidates)
+        _count_conflicts(summary, auto_merged_candidates, clustered)
 
     # Step 3: LLM judge on fuzzy matches
     if needs_llm_candidates:
@@ -111,21 +118,26 @@ async def run_upload_dedup(
         all_llm = llm_auto_merge + llm_dismissed + llm_needs_review
         await _save_candidates(db, all_llm)
 
+        summary.dismissed = len(llm_dismissed)
+        summary.needs_review += len(llm_needs_review)
+
         # Apply auto-merges from LLM duplicates
         if llm_auto_merge:
-            await _apply_auto_merges(db, llm_auto_merge, upload_id, user_id)
+            clustered = await _apply_auto_merges(
+                db, llm_auto_merge, upload_id, user_id, patient_id
+            )
             summary.auto_merged += len(llm_auto_merge)
-
-        summary.dismissed = len(llm_dismissed)
-        summary.needs_review = len(llm_needs_review)
+            _count_conflicts(summary, llm_auto_merge, clustered)
 
     summary.total_candidates = summary.auto_merged + summary.needs_review + summary.dismissed
 
-    # Build by_type counts from all candidates
+    # Build by_type counts from all candidates (record type of record_a)
     all_candidates = auto_merged_candidates + needs_llm_candidates
+    records = await load_records(
+        db, {c["record_a_id"] for c in all_candidates}, HealthRecord.record_type
+    )
     for c in all_candidates:
-        # Look up record type from record_a
-        rec = await db.get(HealthRecord, c["record_a_id"])
+        rec = records.get(c["record_a_id"])
         if rec:
             rtype = rec.record_type
             summary.by_type[rtype] = summary.by_type.get(rtype, 0) + 1
@@ -149,38 +161,32 @@ async def _apply_auto_merges(
     candidates: list[dict],
     upload_id: UUID,
     user_id: UUID,
+    patient_id: UUID,
+) -> ClusterResult:
+    """Apply saved auto-merge candidates by re-clustering the patient.
+
+    ``candidates`` are already stored with ``status="merged"``; clustering
+    folds them, together with every earlier merge of the patient, into one
+    canonical record per cluster and writes the Provenance.
+    """
+    result = await cluster_patient_merges(
+        db, user_id, patient_id, agent="system/auto-merge", source_file_id=upload_id
+    )
+    await db.flush()
+    return result
+
+
+def _count_conflicts(
+    summary: DedupSummary, candidates: list[dict], clustered: ClusterResult
 ) -> None:
-    """Auto-merge: mark secondary records as duplicates, create provenance."""
+    """Count auto-merges that clustering sent back to review as needing review."""
+    conflicts = set(clustered.conflicts)
     for c in candidates:
-        # record_a is existing (primary), record_b is new (secondary)
-        await db.execute(
-            update(HealthRecord)
-            .where(HealthRecord.id == c["record_b_id"])
-            .values(
-                is_duplicate=True,
-                merged_into_id=c["record_a_id"],
-                merge_metadata={
-                    "merged_from": str(c["record_b_id"]),
-                    "merged_at": datetime.now(timezone.utc).isoformat(),
-                    "merge_type": "duplicate",
-                    "source_upload_id": str(upload_id),
-                    "auto_resolved": True,
-                },
-            )
-        )
-        # Create provenance
-        db.add(Provenance(
-            record_id=c["record_a_id"],
-            action="merge",
-            agent="system/auto-merge",
-            source_file_id=upload_id,
-            details={
-                "merged_record_id": str(c["record_b_id"]),
-                "similarity_score": c["similarity_score"],
-                "classification": c.get("llm_classification", "duplicate"),
-            },
-        ))
-    await db.flush()
+        if c["id"] in conflicts:
+            c["status"] = "pending"
+            c["auto_resolved"] = False
+            summary.auto_merged -= 1
+            summary.needs_review += 1
 
 
 async def _run_llm_judge(
@@ -193,10 +199,16 @@ async def _run_llm_judge(
     ``config`` carries the per-user resolved routing/credentials, threaded into
     the batch judge (``None`` => global ``.env``).
     """
+    records = await load_records(
+        db,
+        {c["record_a_id"] for c in candidates} | {c["record_b_id"] for c in candidates},
+        HealthRecord.record_type,
+        HealthRecord.fhir_resource,
+    )
     pairs = []
     for c in candidates:
-        rec_a = await db.get(HealthRecord, c["record_a_id"])
-        rec_b = await db.get(HealthRecord, c["record_b_id"])
+        rec_a = records.get(c["record_a_id"])
+        rec_b = records.get(c["record_b_id"])
         if rec_a and rec_b:
             pairs.append((
                 rec_a.fhir_resource or {},
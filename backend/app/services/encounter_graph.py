@@ -0,0 +1,227 @@
+"""The encounter graph projection (``encounter_links``).
+
+``GET /records/{id}/linked`` used to select every record with
+``linked_encounter_id == id`` from ``health_records`` and decrypt each one's
+full FHIR resource to build its timeline row — on every open of a visit,
+for visits with hundreds of linked labs and notes. The projection keeps one
+small row per live linked record instead (:class:`EncounterLink`), indexed
+for that query, so the linked list and the visit's per-type counts
+(:func:`visit_counts`) never touch ``health_records``.
+
+It is maintained at commit, from the records ``app.services.data_version``
+marks as changed in the transaction (ORM writes automatically,
+statement-level writes explicitly), by :func:`refresh_links`:
+
+* A changed record's row is rebuilt: present while it is live (not deleted,
+  not merged away) and linked, with its provider and preview computed once,
+  here, instead of on every read.
+* The children of a changed encounter are re-pointed: a link to an encounter
+  that was merged into another resolves to the surviving encounter, and
+  back when the merge is undone.
+
+:func:`check_links` compares the projection with ``health_records`` and
+lists the records that disagree; ``scripts/check_encounter_links.py`` runs
+it and can repair them.
+"""
+from __future__ import annotations
+
+from collections.abc import Collection
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from sqlalchemy import and_, any_, bindparam, case, delete, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.encounter_link import EncounterLink
+from app.models.record import HealthRecord
+from app.services.timeline_preview import build_timeline_preview
+from app.services.timeline_service import extract_provider_display
+
+_records = HealthRecord.__table__
+_links = EncounterLink.__table__
+
+_COLUMNS = ("record_type", "display_text", "code_display", "category", "effective_date")
+
+
+def _any(column, ids: Collection[UUID], name: str):
+    return column == any_(bindparam(name, list(ids), type_=ARRAY(PG_UUID)))
+
+
+def _live(record):
+    return and_(
+        record.c.deleted_at.is_(None),
+        record.c.is_duplicate.is_(False),
+        record.c.linked_encounter_id.isnot(None),
+    )
+
+
+def _surviving(encounter):
+    """The encounter a link resolves to: the one a merged encounter folded into."""
+    return case(
+        (and_(encounter.c.is_duplicate, encounter.c.merged_into_id.isnot(None)),
+         encounter.c.merged_into_id),
+        else_=encounter.c.id,
+    )
+
+
+def summarize(fhir_resource: dict | None, record_type: str) -> dict | None:
+    """The provider and preview of a linked row, or ``None`` if it has neither."""
+    provider = extract_provider_display(fhir_resource, record_type)
+    preview = build_timeline_preview(fhir_resource, record_type)
+    if provider is None and preview is None:
+        return None
+    return {"provider": provider, "preview": preview.model_dump() if preview else None}
+
+
+def refresh_links(session: Session, user_id: UUID, record_ids: Collection[UUID]) -> None:
+    """Bring the projection up to date for records changed in this transaction.
+
+    Runs in the transaction (``before_commit``) on ``session``'s connection.
+    """
+    conn = session.connection()
+    record, encounter = _records.alias("record"), _records.alias("encounter")
+    rows = conn.execute(
+        select(record.c.id, record.c.linked_encounter_id, record.c.fhir_resource,
+               *(record.c[name] for name in _COLUMNS))
+        .where(record.c.user_id == user_id, _any(record.c.id, record_ids, "link_ids"),
+               _live(record))
+    ).all()
+
+    # FOR SHARE: a merge of one of these encounters committing concurrently
+    # either waits for this transaction (and then re-points what it adds) or
+    # is seen here.
+    surviving = dict(conn.execute(
+        select(encounter.c.id, _surviving(encounter))
+        .where(encounter.c.user_id == user_id,
+               _any(encounter.c.id, {r.linked_encounter_id for r in rows}, "encounter_ids"))
+        .with_for_update(read=True)
+    ).all()) if rows else {}
+
+    conn.execute(delete(_links).where(
+        _links.c.user_id == user_id, _any(_links.c.record_id, record_ids, "link_ids")
+    ))
+    values = [
+        {
+            "record_id": r.id,
+            "user_id": user_id,
+            "encounter_id": surviving[r.linked_encounter_id],
+            **{name: r._mapping[name] for name in _COLUMNS},
+            "summary": summarize(r.fhir_resource, r.record_type),
+        }
+        for r in rows
+        if r.linked_encounter_id in surviving
+    ]
+    if values:
+        stmt = insert(EncounterLink)
+        conn.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[EncounterLink.record_id],
+                set_={c: stmt.excluded[c] for c in ("encounter_id", *_COLUMNS, "summary")},
+            ),
+            values,
+        )
+
+    # Children of changed encounters that did not change themselves.
+    child = _records.alias("child")
+    conn.execute(
+        update(_links)
+        .where(
+            _links.c.user_id == user_id,
+            _links.c.record_id == child.c.id,
+            child.c.user_id == user_id,
+            child.c.linked_encounter_id == encounter.c.id,
+            encounter.c.user_id == user_id,
+            _any(encounter.c.id, record_ids, "encounter_ids"),
+            _links.c.encounter_id.is_distinct_from(_surviving(encounter)),
+        )
+        .values(encounter_id=_surviving(encounter))
+    )
+
+
+async def linked_records(db: AsyncSession, user_id: UUID, encounter_id: UUID) -> list[EncounterLink]:
+    """The encounter's linked records, newest first."""
+    result = await db.execute(
+        select(EncounterLink)
+        .where(EncounterLink.user_id == user_id, EncounterLink.encounter_id == encounter_id)
+        .order_by(EncounterLink.effective_date.desc(), EncounterLink.record_id)
+    )
+    return list(result.scalars().all())
+
+
+async def visit_counts(db: AsyncSession, user_id: UUID, encounter_id: UUID) -> dict[str, int]:
+    """Linked records per record type."""
+    result = await db.execute(
+        select(EncounterLink.record_type, func.count())
+        .where(EncounterLink.user_id == user_id, EncounterLink.encounter_id == encounter_id)
+        .group_by(EncounterLink.record_type)
+        .order_by(EncounterLink.record_type)
+    )
+    return dict(result.all())
+
+
+# --------------------------------------------------------------------------- #
+# Consistency check
+# --------------------------------------------------------------------------- #
+
+
+@dataclass
+class LinkDrift:
+    """Records on which the projection and ``health_records`` disagree."""
+
+    missing: list[UUID] = field(default_factory=list)  # expected row absent or different
+    stale: list[UUID] = field(default_factory=list)  # row present that should not be, or different
+    summaries: list[UUID] = field(default_factory=list)  # provider/preview out of date
+
+    @property
+    def record_ids(self) -> set[UUID]:
+        return {*self.missing, *self.stale, *self.summaries}
+
+    def __bool__(self) -> bool:
+        return bool(self.missing or self.stale or self.summaries)
+
+
+async def check_links(
+    db: AsyncSession, user_id: UUID, *, summaries: bool = False
+) -> LinkDrift:
+    """Compare a user's projection with what ``health_records`` implies.
+
+    The plain columns are compared in SQL. ``summaries=True`` also decrypts
+    every linked record and its row to compare provider and preview.
+    """
+    record, encounter = _records.alias("record"), _records.alias("encounter")
+    expected = (
+        select(record.c.id, _surviving(encounter), *(record.c[name] for name in _COLUMNS))
+        .join(encounter, and_(
+            encounter.c.id == record.c.linked_encounter_id, encounter.c.user_id == user_id
+        ))
+        .where(record.c.user_id == user_id, _live(record))
+    )
+    actual = (
+        select(_links.c.record_id, _links.c.encounter_id, *(_links.c[name] for name in _COLUMNS))
+        .where(_links.c.user_id == user_id)
+    )
+    drift = LinkDrift(
+        missing=list((await db.execute(select(expected.except_(actual).subquery().c[0]))).scalars()),
+        stale=list((await db.execute(select(actual.except_(expected).subquery().c[0]))).scalars()),
+    )
+    if summaries:
+        rows = await db.execute(
+            select(_links.c.record_id, _links.c.summary, record.c.record_type, record.c.fhir_resource)
+            .join(record, and_(record.c.id == _links.c.record_id, record.c.user_id == user_id))
+            .where(_links.c.user_id == user_id)
+        )
+        drift.summaries = [
+            r.record_id for r in rows
+            if r.summary != summarize(r.fhir_resource, r.record_type)
+        ]
+    return drift
+
+
+async def repair_links(db: AsyncSession, user_id: UUID, record_ids: Collection[UUID]) -> None:
+    """Rebuild the rows of these records (and re-point their children)."""
+    if record_ids:
+        await db.run_sync(lambda session: refresh_links(session, user_id, record_ids))
+
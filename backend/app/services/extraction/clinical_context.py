@@ -29,6 +29,7 @@ because an optional component is unavailable.
 from __future__ import annotations
 
 import logging
+import threading
 from dataclasses import dataclass
 
 from app.services.extraction.entity_extractor import ExtractedEntity
@@ -89,30 +90,35 @@ class ClinicalContext:
     def __init__(self) -> None:
         self._nlp = None
         self._warned = False
+        self._lock = threading.Lock()
 
     def _load(self):
         if self._nlp is not None:
             return self._nlp
-        try:
-            import medspacy  # noqa: F401 - importing registers the spaCy factories
-            import spacy
-
-            nlp = spacy.blank("en")
-            nlp.add_pipe("sentencizer")  # ConText scopes modifiers by sentence
-            nlp.add_pipe("medspacy_context")
-            nlp.add_pipe("medspacy_sectionizer")
-            self._nlp = nlp
-            self._warned = False
-            return nlp
-        except Exception:  # noqa: BLE001 - missing medspaCy must not break extraction
-            if not self._warned:
-                logger.warning(
-                    "medspaCy unavailable; clinical-context stage disabled this "
-                    "call (sections collapse to OTHER, no assertions; will retry)",
-                    exc_info=True,
-                )
-                self._warned = True
-            return None
+        # One build at a time: a call racing the startup warm-up waits for it.
+        with self._lock:
+            if self._nlp is not None:
+                return self._nlp
+            try:
+                import medspacy  # noqa: F401 - importing registers the spaCy factories
+                import spacy
+
+                nlp = spacy.blank("en")
+                nlp.add_pipe("sentencizer")  # ConText scopes modifiers by sentence
+                nlp.add_pipe("medspacy_context")
+                nlp.add_pipe("medspacy_sectionizer")
+                self._nlp = nlp
+                self._warned = False
+                return nlp
+            except Exception:  # noqa: BLE001 - missing medspaCy must not break extraction
+                if not self._warned:
+                    logger.warning(
+                        "medspaCy unavailable; clinical-context stage disabled this "
+                        "call (sections collapse to OTHER, no assertions; will retry)",
+                        exc_info=True,
+                    )
+                    self._warned = True
+                return None
 
     @property
     def available(self) -> bool:
@@ -10,7 +10,7 @@ from xml.sax.saxutils import escape as _xml_escape
 from app.services.extraction import terminology
 from app.services.extraction.entity_extractor import ExtractedEntity
 from app.services.extraction.terminology import parse_dosage  # re-exported for callers/tests
-from app.services.ingestion.content_hash import content_hash
+from app.services.ingestion.content_hash import content_digests
 from app.services.ingestion.fhir_validation import validate_and_log_fhir
 from app.utils.date_utils import parse_datetime
 
@@ -231,6 +231,7 @@ def entity_to_health_record_dict(
     display_text = _build_display_text(entity)
 
     effective_date = _extract_effective_date(entity, document_date)
+    digests = content_digests(fhir_resource)
 
     return {
         "id": uuid4(),
@@ -239,7 +240,8 @@ def entity_to_health_record_dict(
         "record_type": record_type,
         "fhir_resource_type": fhir_resource_type,
         "fhir_resource": fhir_resource,
-        "content_hash": content_hash(fhir_resource),
+        "content_hash": digests.sha256,
+        "content_hash_blake3": digests.blake3,
         "source_format": "ai_extracted",
         "source_file_id": source_file_id,
         "effective_date": effective_date,
@@ -0,0 +1,242 @@
+"""Job control for in-flight unstructured extractions: push cancel + live progress.
+
+Every extraction running in this process registers a :class:`JobControl`. The
+cancel endpoint (and, for jobs running in another worker process, a
+``NOTIFY extraction_cancel`` delivered to that worker's LISTEN connection) sets
+the job's ``cancelled`` event, which wakes whatever the pipeline is awaiting so
+it aborts immediately — no per-chunk ``SELECT cancel_requested`` round trips.
+
+The durable ``cancel_requested`` column is still written by the endpoint and
+still checked at stage boundaries and on every progress write, so a missed
+notification only delays a cancel until the next write; it is never lost.
+
+:class:`ProgressReporter` coalesces section-progress writes to at most one per
+``extraction_progress_interval_seconds`` or per ``extraction_progress_step_percent``
+of sections, while keeping the latest value on the job for the status endpoint
+to serve without touching the (hot, frequently polled) ``uploaded_files`` row.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Awaitable, TypeVar
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import settings
+
+# Postgres LISTEN/NOTIFY channel carrying upload ids to cancel.
+CANCEL_CHANNEL = "extraction_cancel"
+
+T = TypeVar("T")
+
+# ``ProgressReporter.set_stage`` default: keep the current section detail.
+_UNCHANGED = object()
+
+
+class ExtractionCancelled(Exception):
+    """Raised out of :meth:`JobControl.run` when the job is cancelled mid-await."""
+
+
+class JobControl:
+    """Cancel signal + live status snapshot for one in-flight extraction."""
+
+    def __init__(self, upload_id: UUID, user_id: UUID) -> None:
+        self.upload_id = upload_id
+        self.user_id = user_id
+        self.cancelled = asyncio.Event()
+        self.progress_stage: str | None = None
+        self.progress_detail: dict | None = None
+        self.filename: str | None = None
+        self.total_file_count = 1
+        self.ingestion_progress: dict = {}
+        self.notices: list = []
+        self.processing_started_at: datetime | None = None
+
+    def capture(self, upload) -> None:
+        """Copy the status fields the status endpoint serves from ``upload``."""
+        self.filename = upload.filename
+        self.total_file_count = upload.total_file_count or 1
+        self.ingestion_progress = upload.ingestion_progress or {}
+        self.notices = list(upload.notices or [])
+        self.processing_started_at = upload.processing_started_at
+        self.progress_stage = upload.progress_stage
+        self.progress_detail = upload.progress_detail
+
+    def status_fields(self) -> dict:
+        """``UploadStatusResponse`` fields for the in-flight extraction."""
+        return {
+            "upload_id": str(self.upload_id),
+            "filename": self.filename,
+            "ingestion_status": "processing",
+            "record_count": 0,
+            "total_file_count": self.total_file_count,
+            "ingestion_progress": self.ingestion_progress,
+            "ingestion_errors": [],
+            "processing_started_at": self.processing_started_at,
+            "processing_completed_at": None,
+            "progress_stage": self.progress_stage,
+            "progress_detail": self.progress_detail,
+            "notices": self.notices,
+        }
+
+    async def run(self, aw: Awaitable[T]) -> T:
+        """Await ``aw``, aborting it the moment the job is cancelled.
+
+        Raises :class:`ExtractionCancelled` (after cancelling ``aw``) if the
+        cancel event fires first.
+        """
+        task = asyncio.ensure_future(aw)
+        if self.cancelled.is_set():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise ExtractionCancelled(str(self.upload_id))
+        waiter = asyncio.ensure_future(self.cancelled.wait())
+        try:
+            await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        if task.done():
+            return task.result()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        raise ExtractionCancelled(str(self.upload_id))
+
+
+# In-process registry of running extractions, keyed by upload id.
+_jobs: dict[UUID, JobControl] = {}
+
+
+def register_job(upload) -> JobControl:
+    """Register (or return the existing) control for ``upload``'s extraction."""
+    job = _jobs.get(upload.id)
+    if job is None:
+        job = JobControl(upload.id, upload.user_id)
+        _jobs[upload.id] = job
+    job.capture(upload)
+    return job
+
+
+def unregister_job(upload_id: UUID) -> None:
+    _jobs.pop(upload_id, None)
+
+
+def get_job(upload_id: UUID) -> JobControl | None:
+    return _jobs.get(upload_id)
+
+
+def running_job_count() -> int:
+    """Extractions currently registered in this process."""
+    return len(_jobs)
+
+
+def request_cancel(upload_id: UUID | str) -> bool:
+    """Wake the in-process extraction for ``upload_id``; False if none runs here."""
+    try:
+        uid = upload_id if isinstance(upload_id, UUID) else UUID(str(upload_id))
+    except ValueError:
+        return False
+    job = _jobs.get(uid)
+    if job is None:
+        return False
+    job.cancelled.set()
+    return True
+
+
+def on_cancel_notification(_conn, _pid, _channel, payload: str) -> None:
+    """asyncpg listener callback for :data:`CANCEL_CHANNEL`."""
+    request_cancel(payload)
+
+
+async def publish_cancel(db: AsyncSession, upload_ids: list[UUID]) -> None:
+    """Queue cancel notifications for other worker processes; sent on commit."""
+    if not upload_ids:
+        return
+    await db.execute(
+        text("SELECT pg_notify(:channel, uid) FROM unnest(CAST(:ids AS text[])) AS uid"),
+        {"channel": CANCEL_CHANNEL, "ids": [str(u) for u in upload_ids]},
+    )
+
+
+class ProgressReporter:
+    """Write extraction progress for one upload, coalescing section updates.
+
+    Stage transitions are few and always written. Section progress is mirrored
+    to the job on every call but only reaches the DB when due, and each such
+    write reads back ``cancel_requested`` so a cancel whose notification was
+    missed is still picked up.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        upload,
+        job: JobControl,
+        *,
+        min_interval: float | None = None,
+        min_step_percent: float | None = None,
+    ) -> None:
+        self.db = db
+        self.upload = upload
+        self.job = job
+        self.min_interval = (
+            settings.extraction_progress_interval_seconds if min_interval is None else min_interval
+        )
+        self.min_step_percent = (
+            settings.extraction_progress_step_percent
+            if min_step_percent is None
+            else min_step_percent
+        )
+        self._last_write = float("-inf")
+        self._last_percent = float("-inf")
+
+    async def set_stage(self, stage: str | None, detail=_UNCHANGED) -> None:
+        """Set the stage (and optionally the detail), committing it together with
+        any other pending changes on the upload."""
+        self.upload.progress_stage = stage
+        if detail is not _UNCHANGED:
+            self.upload.progress_detail = detail
+        await self.db.commit()
+        self.job.capture(self.upload)
+        self._mark_written(self.upload.progress_detail)
+
+    async def advance(self, index: int, total: int) -> None:
+        """Record ``index`` of ``total`` sections done; persisted only when due."""
+        detail = {"section_index": index, "section_total": total}
+        self.job.progress_detail = detail
+        percent = 100.0 * index / total if total else 100.0
+        due = (
+            index >= total
+            or time.monotonic() - self._last_write >= self.min_interval
+            or percent - self._last_percent >= self.min_step_percent
+        )
+        if due:
+            await self._write_detail(detail)
+
+    async def _write_detail(self, detail: dict) -> None:
+        result = await self.db.execute(
+            text(
+                "UPDATE uploaded_files SET progress_detail = CAST(:detail AS jsonb) "
+                "WHERE id = :id RETURNING cancel_requested"
+            ),
+            {"detail": json.dumps(detail), "id": self.upload.id},
+        )
+        cancel_requested = bool(result.scalar())
+        await self.db.commit()
+        # Keep the ORM copy in sync without marking it dirty (no second UPDATE).
+        set_committed_value(self.upload, "progress_detail", detail)
+        self._mark_written(detail)
+        if cancel_requested:
+            self.job.cancelled.set()
+
+    def _mark_written(self, detail: dict | None) -> None:
+        self._last_write = time.monotonic()
+        if detail and detail.get("section_total"):
+            self._last_percent = 100.0 * detail["section_index"] / detail["section_total"]
+        else:
+            self._last_percent = 0.0
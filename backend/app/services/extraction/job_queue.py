@@ -0,0 +1,228 @@
+"""Lease-based claim queue for unstructured extraction jobs.
+
+``uploaded_files`` rows in ``pending_extraction`` ARE the queue. A worker claims
+up to N of them in one transaction (``FOR UPDATE SKIP LOCKED``, so concurrent
+workers — in the API process or standalone ``python -m app.worker`` processes —
+never claim the same row) and stamps each with a lease: ``lease_owner`` plus a
+``lease_expires_at`` deadline. While a job runs its worker renews the lease on
+a heartbeat. A worker that dies stops heartbeating, its lease lapses, and the
+next claim picks the file up again (counting a retry) — this replaces the old
+periodic stuck-file sweep, which could only detect a dead worker after the full
+``extraction_timeout_minutes`` had elapsed. That timeout still bounds a job on
+a live worker: ``app.worker`` cancels it and releases the lease, and the next
+claim retries it the same way.
+
+Structured uploads (FHIR, Epic, ZIP) queue the same way as ``pending`` rows of
+``file_category = 'structured'``, claimed with :func:`claim_ingest_jobs`; a
+re-claimed ingest resumes from its checkpoint
+(``app.services.ingestion.checkpoint``).
+
+Producers call :func:`notify_extraction_queued` / :func:`notify_ingest_queued`
+in the same transaction that queues a file. Postgres delivers the ``NOTIFY`` on
+commit, waking listening workers immediately instead of on their next poll.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Postgres LISTEN/NOTIFY channels that wake extraction / ingest workers.
+EXTRACTION_CHANNEL = "extraction_jobs"
+INGEST_CHANNEL = "ingest_jobs"
+
+_LEASE_EXHAUSTED_ERRORS = (
+    '[{"error": "Processing timed out after maximum retries.", '
+    '"error_type": "TimeoutError"}]'
+)
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    """One file claimed for extraction under a lease."""
+
+    upload_id: UUID
+    storage_path: str
+    user_id: UUID
+
+
+async def notify_extraction_queued(db: AsyncSession) -> None:
+    """Queue a wake-up for listening workers; delivered when ``db`` commits.
+
+    A rolled-back transaction drops the notification along with the rows, so a
+    worker is never woken for a file that was not actually queued.
+    """
+    await db.execute(
+        text("SELECT pg_notify(:channel, '')"), {"channel": EXTRACTION_CHANNEL}
+    )
+
+
+async def notify_ingest_queued(db: AsyncSession) -> None:
+    """Like :func:`notify_extraction_queued`, for queued structured uploads."""
+    await db.execute(text("SELECT pg_notify(:channel, '')"), {"channel": INGEST_CHANNEL})
+
+
+async def claim_extraction_jobs(
+    session_factory: async_sessionmaker,
+    owner: str,
+    limit: int,
+    *,
+    lease_seconds: int,
+    max_retries: int,
+) -> list[ClaimedJob]:
+    """Claim up to ``limit`` files in one transaction and lease them to ``owner``.
+
+    Claimable rows are queued files plus ``processing`` files whose lease has
+    lapsed (or that predate leases and have none). Re-claiming a lapsed lease
+    counts as a retry; lapsed files that already used ``max_retries`` are
+    failed in the same transaction rather than retried forever.
+    """
+    return await _claim_jobs(
+        session_factory, owner, limit, "unstructured", "pending_extraction",
+        lease_seconds=lease_seconds, max_retries=max_retries,
+    )
+
+
+async def claim_ingest_jobs(
+    session_factory: async_sessionmaker,
+    owner: str,
+    limit: int,
+    *,
+    lease_seconds: int,
+    max_retries: int,
+) -> list[ClaimedJob]:
+    """Claim queued structured uploads, as :func:`claim_extraction_jobs` does."""
+    return await _claim_jobs(
+        session_factory, owner, limit, "structured", "pending",
+        lease_seconds=lease_seconds, max_retries=max_retries,
+    )
+
+
+async def _claim_jobs(
+    session_factory: async_sessionmaker,
+    owner: str,
+    limit: int,
+    category: str,
+    queued_status: str,
+    *,
+    lease_seconds: int,
+    max_retries: int,
+) -> list[ClaimedJob]:
+    if limit <= 0:
+        return []
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        try:
+            await db.execute(
+                text(
+                    "UPDATE uploaded_files "
+                    "SET ingestion_status = 'failed', "
+                    "ingestion_errors = CAST(:errors AS jsonb), "
+                    "progress_stage = NULL, "
+                    "lease_owner = NULL, lease_expires_at = NULL, "
+                    "processing_completed_at = :now "
+                    "WHERE ingestion_status = 'processing' "
+                    "AND file_category = :category "
+                    "AND (lease_expires_at IS NULL OR lease_expires_at < :now) "
+                    "AND COALESCE(retry_count, 0) >= :max_retries"
+                ),
+                {
+                    "errors": _LEASE_EXHAUSTED_ERRORS,
+                    "now": now,
+                    "max_retries": max_retries,
+                    "category": category,
+                },
+            )
+            result = await db.execute(
+                text(
+                    "WITH claimable AS ("
+                    "  SELECT id FROM uploaded_files "
+                    "  WHERE file_category = :category "
+                    "  AND (ingestion_status = :queued_status "
+                    "       OR (ingestion_status = 'processing' "
+                    "           AND (lease_expires_at IS NULL OR lease_expires_at < :now))) "
+                    "  ORDER BY created_at ASC "
+                    "  LIMIT :limit "
+                    "  FOR UPDATE SKIP LOCKED"
+                    ") "
+                    "UPDATE uploaded_files AS u "
+                    "SET retry_count = COALESCE(u.retry_count, 0) "
+                    "      + CASE WHEN u.ingestion_status = 'processing' THEN 1 ELSE 0 END, "
+                    "ingestion_status = 'processing', "
+                    "processing_started_at = :now, "
+                    "lease_owner = :owner, "
+                    "lease_expires_at = :expires "
+                    "FROM claimable WHERE u.id = claimable.id "
+                    "RETURNING u.id, u.storage_path, u.user_id, u.created_at"
+                ),
+                {
+                    "now": now,
+                    "limit": limit,
+                    "category": category,
+                    "queued_status": queued_status,
+                    "owner": owner,
+                    "expires": now + timedelta(seconds=lease_seconds),
+                },
+            )
+            rows = sorted(result.fetchall(), key=lambda r: r[3])
+            await db.commit()
+        except Exception:
+            logger.exception("Failed to claim %s jobs", category)
+            await db.rollback()
+            return []
+    return [ClaimedJob(upload_id=r[0], storage_path=r[1], user_id=r[2]) for r in rows]
+
+
+async def renew_leases(
+    session_factory: async_sessionmaker,
+    owner: str,
+    upload_ids: list[UUID],
+    *,
+    lease_seconds: int,
+) -> int:
+    """Heartbeat: push the lease deadline out for jobs ``owner`` still holds.
+
+    Only rows still ``processing`` under this owner are touched, so a job that
+    already finished (or was re-claimed elsewhere after a lapse) is left alone.
+    Returns the number of leases renewed.
+    """
+    if not upload_ids:
+        return 0
+    async with session_factory() as db:
+        result = await db.execute(
+            text(
+                "UPDATE uploaded_files SET lease_expires_at = :expires "
+                "WHERE id = ANY(:ids) AND lease_owner = :owner "
+                "AND ingestion_status = 'processing'"
+            ),
+            {
+                "expires": datetime.now(timezone.utc) + timedelta(seconds=lease_seconds),
+                "ids": list(upload_ids),
+                "owner": owner,
+            },
+        )
+        await db.commit()
+        return result.rowcount or 0
+
+
+async def release_leases(
+    session_factory: async_sessionmaker, owner: str, upload_ids: list[UUID]
+) -> None:
+    """Clear ``owner``'s lease on finished jobs (whatever their final status)."""
+    if not upload_ids:
+        return
+    async with session_factory() as db:
+        await db.execute(
+            text(
+                "UPDATE uploaded_files SET lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE id = ANY(:ids) AND lease_owner = :owner"
+            ),
+            {"ids": list(upload_ids), "owner": owner},
+        )
+        await db.commit()
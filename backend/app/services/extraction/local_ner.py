@@ -30,6 +30,7 @@ Gemini escalation path in ``hybrid`` mode.
 from __future__ import annotations
 
 import logging
+import threading
 from dataclasses import dataclass
 from typing import Protocol, runtime_checkable
 
@@ -124,26 +125,31 @@ class ScispacyNer:
         self._model_name = model_name or DEFAULT_LOCAL_NER_MODEL
         self._nlp = None
         self._warned = False
+        self._lock = threading.Lock()
 
     def _load(self):
         if self._nlp is not None:
             return self._nlp
-        try:
-            import spacy
-
-            self._nlp = spacy.load(self._model_name)
-            self._warned = False
-            return self._nlp
-        except Exception:  # noqa: BLE001 - missing model must not break extraction
-            if not self._warned:
-                logger.warning(
-                    "scispaCy model %r unavailable; local NER disabled this call "
-                    "(will retry; Gemini path unaffected)",
-                    self._model_name,
-                    exc_info=True,
-                )
-                self._warned = True
-            return None
+        # One load at a time: a call racing the startup warm-up waits for it.
+        with self._lock:
+            if self._nlp is not None:
+                return self._nlp
+            try:
+                import spacy
+
+                self._nlp = spacy.load(self._model_name)
+                self._warned = False
+                return self._nlp
+            except Exception:  # noqa: BLE001 - missing model must not break extraction
+                if not self._warned:
+                    logger.warning(
+                        "scispaCy model %r unavailable; local NER disabled this call "
+                        "(will retry; Gemini path unaffected)",
+                        self._model_name,
+                        exc_info=True,
+                    )
+                    self._warned = True
+                return None
 
     @property
     def available(self) -> bool:
@@ -222,6 +222,14 @@ def _load_index(category: str) -> dict[str, Coding]:
     return index
 
 
+def warm_load_indexes() -> bool:
+    """Load every category index now (startup warm-up) instead of on first lookup.
+
+    Returns True when all of them loaded non-empty.
+    """
+    return all([_load_index(category) for category in _INDEX_FILES])
+
+
 # --- Live medication-index refresh (RxNorm) --------------------------------
 # A periodic *bulk* refresh — NOT a per-lookup network call. Ingestion stays
 # fully offline; this only rebuilds the medications index occasionally so RxNorm
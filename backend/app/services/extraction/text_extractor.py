@@ -11,7 +11,7 @@ import pdfplumber
 from striprtf.striprtf import rtf_to_text
 
 from app.config import settings
-from app.utils.file_utils import decrypt_file
+from app.utils.file_utils import decrypt_file, open_decrypted
 
 if TYPE_CHECKING:
     from app.services.ai.llm.config import LLMConfig
@@ -55,10 +55,10 @@ def extract_text_from_pdf_local(file_path: Path) -> tuple[str, float]:
     """
     page_texts: list[str] = []
     total_chars = 0
-    # CRYPTO-02: decrypt the at-rest file (legacy plaintext passes through), then
-    # hand pdfplumber the bytes via BytesIO so it never reads ciphertext off disk.
-    pdf_bytes = decrypt_file(file_path)
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+    # CRYPTO-02: pdfplumber reads a seekable decrypting view of the at-rest file
+    # (legacy plaintext passes through), so the whole plaintext is never held in
+    # memory and never touches disk.
+    with open_decrypted(file_path) as f, pdfplumber.open(f) as pdf:
         page_count = len(pdf.pages) or 1
         for page in pdf.pages:
             parts = [page.extract_text() or ""]
@@ -0,0 +1,96 @@
+"""Parallel FHIR bundle mapping for ZIP uploads.
+
+A patient-portal export is often dozens of independent FHIR bundles, and
+mapping one (JSON decoding, the reference-name index, ``map_fhir_resource``
+per entry) is pure-Python CPU work that used to run bundle after bundle on the
+event loop. :func:`iter_bundle_mappings` maps several bundles at once, off the
+loop — in the CDA conversion pool (``cda_engine``) when more than one worker
+is configured, else on threads — and yields them in archive order as soon as
+each one (and every one before it) is done.
+
+Writing stays with the caller, on the job's one session and in that same
+order, so the records, stats, ``files_detail`` and checkpoint of an upload
+are identical to a sequential run; dedup runs once after the whole upload.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any
+
+from app.services.ingestion.cda_engine import conversion_workers, run_in_conversion_pool
+from app.services.ingestion.fhir_parser import MappedBundle, map_bundle
+from app.services.ingestion.zip_members import MemberBytes
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BundleMapping:
+    """Outcome of one job: ``bundle`` is None when there was nothing to map."""
+
+    source: Any
+    bundle: MappedBundle | None
+    error: BaseException | None = None
+
+
+async def iter_bundle_mappings(
+    jobs: Iterable[tuple[Any, MemberBytes | BaseException | None]],
+    *,
+    workers: int | None = None,
+) -> AsyncIterator[BundleMapping]:
+    """Map ``(source, payload)`` jobs concurrently, yielding in job order.
+
+    ``payload`` is the bundle read into memory, None for a source the caller
+    ingests itself (a bundle too large to load whole, or one a resumed job has
+    already finished), or the exception reading it raised. ``jobs`` is
+    consumed lazily and at most ``2 * workers`` bundles are in flight, which
+    bounds memory for archives with hundreds of them. A mapping that raises
+    is yielded with ``error`` set.
+    """
+    workers = workers or conversion_workers()
+    loop = asyncio.get_running_loop()
+    pending: deque[tuple[Any, asyncio.Future]] = deque()
+    job_iter = iter(jobs)
+
+    def submit() -> bool:
+        job = next(job_iter, None)
+        if job is None:
+            return False
+        source, payload = job
+        if isinstance(payload, MemberBytes):
+            if workers > 1:
+                future = run_in_conversion_pool(workers, map_bundle, payload)
+            else:
+                future = asyncio.ensure_future(asyncio.to_thread(map_bundle, payload))
+        else:
+            future = loop.create_future()
+            if payload is None:
+                future.set_result(None)
+            else:
+                future.set_exception(payload)
+        pending.append((source, future))
+        return True
+
+    try:
+        while len(pending) < 2 * workers and submit():
+            pass
+        while pending:
+            source, future = pending.popleft()
+            try:
+                bundle = await future
+            except BrokenProcessPool as exc:
+                logger.error("Conversion pool died mapping bundle %s", source)
+                yield BundleMapping(source, None, exc)
+            except Exception as exc:
+                yield BundleMapping(source, None, exc)
+            else:
+                yield BundleMapping(source, bundle)
+            submit()
+    finally:
+        for _source, future in pending:
+            future.cancel()
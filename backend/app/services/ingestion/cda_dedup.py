@@ -46,6 +46,79 @@ def _build_dedup_key(record: dict) -> tuple[str, str, str, str]:
     )
 
 
+class CrossDocumentDeduplicator:
+    """Incremental form of :func:`deduplicate_across_documents`.
+
+    Documents are fed one at a time with :meth:`add` (in manifest order, so the
+    first occurrence of a record wins exactly as in the batch function) while
+    later documents are still being converted; :meth:`finish` returns the
+    same ``(unique records, stats)`` pair.
+    """
+
+    def __init__(self) -> None:
+        self.stats = CdaDedupStats()
+        self._seen: dict[tuple[str, str, str, str], dict] = {}
+        self._unique: list[dict] = []
+
+    def add(self, records: list[dict]) -> None:
+        """Fold one document's parsed records into the running result."""
+        stats = self.stats
+        for record in records:
+            stats.total_parsed += 1
+
+            # Track per-document counts
+            source_doc = (
+                record.get("fhir_resource", {})
+                .get("_extraction_metadata", {})
+                .get("source_document", "unknown")
+            )
+            stats.records_per_document[source_doc] = (
+                stats.records_per_document.get(source_doc, 0) + 1
+            )
+
+            key = _build_dedup_key(record)
+
+            if key in self._seen:
+                # Duplicate — append source document to existing record's provenance
+                existing = self._seen[key]
+                metadata = existing["fhir_resource"].setdefault(
+                    "_extraction_metadata", {}
+                )
+                source_docs = metadata.setdefault("source_documents", [])
+                if source_doc not in source_docs:
+                    source_docs.append(source_doc)
+                stats.duplicates_collapsed += 1
+                logger.debug(
+                    "Collapsed duplicate record: type=%s code=%s from %s",
+                    record.get("record_type"),
+                    record.get("code_value"),
+                    source_doc,
+                )
+            else:
+                # New record — initialize source_documents list
+                metadata = record.get("fhir_resource", {}).setdefault(
+                    "_extraction_metadata", {}
+                )
+                metadata.setdefault("source_documents", [source_doc])
+                self._seen[key] = record
+                self._unique.append(record)
+
+    def finish(self) -> tuple[list[dict], CdaDedupStats]:
+        """Return the unique records (first-seen order) and final statistics."""
+        stats = self.stats
+        stats.unique_records = len(self._unique)
+
+        if stats.duplicates_collapsed > 0:
+            logger.info(
+                "Cross-document dedup: %d parsed, %d unique, %d collapsed",
+                stats.total_parsed,
+                stats.unique_records,
+                stats.duplicates_collapsed,
+            )
+
+        return self._unique, stats
+
+
 def deduplicate_across_documents(
     records: list[dict],
 ) -> tuple[list[dict], CdaDedupStats]:
@@ -62,58 +135,6 @@ def deduplicate_across_documents(
     Returns:
         Tuple of (unique records list, dedup statistics).
     """
-    stats = CdaDedupStats()
-    seen: dict[tuple[str, str, str, str], dict] = {}
-    unique_records: list[dict] = []
-
-    for record in records:
-        stats.total_parsed += 1
-
-        # Track per-document counts
-        source_doc = (
-            record.get("fhir_resource", {})
-            .get("_extraction_metadata", {})
-            .get("source_document", "unknown")
-        )
-        stats.records_per_document[source_doc] = (
-            stats.records_per_document.get(source_doc, 0) + 1
-        )
-
-        key = _build_dedup_key(record)
-
-        if key in seen:
-            # Duplicate — append source document to existing record's provenance
-            existing = seen[key]
-            metadata = existing["fhir_resource"].setdefault(
-                "_extraction_metadata", {}
-            )
-            source_docs = metadata.setdefault("source_documents", [])
-            if source_doc not in source_docs:
-                source_docs.append(source_doc)
-            stats.duplicates_collapsed += 1
-            logger.debug(
-                "Collapsed duplicate record: type=%s code=%s from %s",
-                record.get("record_type"),
-                record.get("code_value"),
-                source_doc,
-            )
-        else:
-            # New record — initialize source_documents list
-            metadata = record.get("fhir_resource", {}).setdefault(
-                "_extraction_metadata", {}
-            )
-            metadata.setdefault("source_documents", [source_doc])
-            seen[key] = record
-            unique_records.append(record)
-
-    stats.unique_records = len(unique_records)
-
-    if stats.duplicates_collapsed > 0:
-        logger.info(
-            "Cross-document dedup: %d parsed, %d unique, %d collapsed",
-            stats.total_parsed,
-            stats.unique_records,
-            stats.duplicates_collapsed,
-        )
-
-    return unique_records, stats
+    deduper = CrossDocumentDeduplicator()
+    deduper.add(records)
+    return deduper.finish()
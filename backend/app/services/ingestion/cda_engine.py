@@ -0,0 +1,180 @@
+"""Parallel CDA conversion for XDM packages.
+
+CDA -> FHIR rendering is pure-Python and CPU-bound (tens of ms per document),
+so converting an XDM package inline on the event loop blocks the API for as
+long as the whole package takes. :func:`iter_cda_conversions` runs the
+per-document conversion off the loop — in a process pool when more than one
+worker is configured, else on threads — with a bounded number of documents in
+flight, and yields results in manifest order as soon as each one (and every
+one before it) is done. Callers fold each result into
+:class:`~app.services.ingestion.cda_dedup.CrossDocumentDeduplicator` while
+later documents are still converting; manifest order keeps the dedup result
+identical to the sequential path.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import pickle
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+from app.services.ingestion.cda_parser import parse_cda_document
+from app.services.ingestion.zip_members import MemberBytes
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for the auto-sized pool (``CDA_CONVERSION_WORKERS=0``): beyond
+# this the inserter, not conversion, is the bottleneck.
+_AUTO_MAX_WORKERS = 4
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+
+
+@dataclass
+class CdaConversion:
+    """Outcome of converting one manifest document."""
+
+    path: Path | MemberBytes
+    manifest_doc: Any
+    records: list[dict]
+    error: BaseException | None = None
+
+
+def conversion_workers() -> int:
+    """Effective worker count: the setting, or CPU count (capped) when 0."""
+    configured = settings.cda_conversion_workers
+    if configured > 0:
+        return configured
+    return max(1, min(_AUTO_MAX_WORKERS, os.cpu_count() or 1))
+
+
+def conversion_pool(workers: int) -> ProcessPoolExecutor:
+    """The shared conversion pool (also maps FHIR bundles, ``bundle_engine``)."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        # spawn, not fork: the API process holds an event loop, DB connections
+        # and threads that a forked child must not inherit.
+        _pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_cda_pool() -> None:
+    """Stop the conversion pool (application shutdown)."""
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_workers = None, 0
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop ``pool`` if it is still the shared one, so the next call builds a
+    fresh pool. A pool that was already replaced is left alone: shutting down
+    the shared pool here would cancel other callers' work on a healthy one."""
+    global _pool, _pool_workers
+    if _pool is pool:
+        pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_workers = None, 0
+
+
+async def _pool_result(pool: ProcessPoolExecutor, future: asyncio.Future) -> Any:
+    try:
+        return await future
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    except asyncio.CancelledError:
+        if asyncio.current_task().cancelling():
+            raise
+    # Not cancelled by our caller: the pool was shut down under this job
+    # (replaced after another job broke it, resized, or app shutdown).
+    raise BrokenProcessPool("conversion pool was shut down")
+
+
+def run_in_conversion_pool(workers: int, fn: Callable, *args: Any) -> asyncio.Future:
+    """Run ``fn(*args)`` in the shared conversion pool.
+
+    The returned future raises :class:`BrokenProcessPool` if the pool dies or
+    is shut down under the job (never a stray ``CancelledError``); a broken
+    pool is discarded so later jobs get a new one.
+    """
+    pool = conversion_pool(workers)
+    future = asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    return asyncio.ensure_future(_pool_result(pool, future))
+
+
+def _picklable(fn: Callable) -> bool:
+    try:
+        pickle.dumps(fn)
+    except Exception:
+        return False
+    return True
+
+
+async def iter_cda_conversions(
+    jobs: Iterable[tuple[Path | MemberBytes, Any]],
+    convert: Callable[[Path | MemberBytes, Any], list[dict]] = parse_cda_document,
+    *,
+    workers: int | None = None,
+) -> AsyncIterator[CdaConversion]:
+    """Convert ``(path, manifest_doc)`` jobs concurrently, yielding in order.
+
+    ``path`` may be a :class:`MemberBytes` read from an uploaded ZIP; ``jobs``
+    is consumed lazily, so a generator reading members keeps at most the
+    in-flight documents in memory.
+
+    At most ``2 * workers`` documents are in flight, bounding memory for
+    packages with hundreds of documents. A conversion that raises is yielded
+    with ``error`` set instead of aborting the package. ``convert`` must be a
+    module-level function to run in the process pool; anything else (e.g. a
+    test stand-in) runs on threads.
+    """
+    workers = workers or conversion_workers()
+    use_pool = workers > 1 and _picklable(convert)
+    pending: deque[tuple[Path | MemberBytes, Any, asyncio.Future]] = deque()
+    job_iter = iter(jobs)
+
+    def submit() -> bool:
+        job = next(job_iter, None)
+        if job is None:
+            return False
+        path, doc = job
+        if use_pool:
+            future = run_in_conversion_pool(workers, convert, path, doc)
+        else:
+            future = asyncio.ensure_future(asyncio.to_thread(convert, path, doc))
+        pending.append((path, doc, future))
+        return True
+
+    try:
+        while len(pending) < 2 * workers and submit():
+            pass
+        while pending:
+            path, doc, future = pending.popleft()
+            try:
+                records = await future
+            except BrokenProcessPool as exc:
+                logger.error("CDA conversion pool died converting %s", path.name)
+                yield CdaConversion(path, doc, [], exc)
+            except Exception as exc:
+                yield CdaConversion(path, doc, [], exc)
+            else:
+                yield CdaConversion(path, doc, records)
+            submit()
+    finally:
+        for _path, _doc, future in pending:
+            future.cancel()
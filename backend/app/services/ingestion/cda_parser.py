@@ -8,6 +8,8 @@ from __future__ import annotations
 
 import hashlib
 import logging
+import re
+import threading
 from pathlib import Path
 from typing import Any
 
@@ -23,6 +25,7 @@ from app.services.ingestion.fhir_parser import (
     extract_status,
     resolve_encounter_references,
 )
+from app.services.ingestion.zip_members import MemberBytes, open_binary
 
 logger = logging.getLogger(__name__)
 
@@ -39,29 +42,68 @@ CDA_TEMPLATES = [
     "ProcedureNote",
 ]
 
+# C-CDA R2.1 document-level templateIds -> converter template. The header also
+# carries the US Realm Header (…22.1.1), which names no document type.
+_TEMPLATE_BY_ID = {
+    "2.16.840.1.113883.10.20.22.1.2": "CCD",
+    "2.16.840.1.113883.10.20.22.1.4": "ConsultationNote",
+    "2.16.840.1.113883.10.20.22.1.8": "DischargeSummary",
+    "2.16.840.1.113883.10.20.22.1.9": "ProgressNote",
+    "2.16.840.1.113883.10.20.22.1.14": "ReferralNote",
+    "2.16.840.1.113883.10.20.22.1.13": "TransferSummary",
+    "2.16.840.1.113883.10.20.22.1.3": "HistoryandPhysical",
+    "2.16.840.1.113883.10.20.22.1.7": "OperativeNote",
+    "2.16.840.1.113883.10.20.22.1.6": "ProcedureNote",
+}
+# LOINC document-type codes (ClinicalDocument/code), for headers without a
+# recognised templateId.
+_TEMPLATE_BY_LOINC = {
+    "34133-9": "CCD",
+    "11488-4": "ConsultationNote",
+    "18842-5": "DischargeSummary",
+    "11506-3": "ProgressNote",
+    "57133-1": "ReferralNote",
+    "18761-7": "TransferSummary",
+    "34117-2": "HistoryandPhysical",
+    "11504-8": "OperativeNote",
+    "28570-0": "ProcedureNote",
+}
+_HEADER_END_RE = re.compile(r"<(?:\w+:)?(?:recordTarget|component)\b")
+_TEMPLATE_ID_RE = re.compile(r"<(?:\w+:)?templateId\b[^>]*?\broot=\"([^\"]+)\"")
+_DOC_CODE_RE = re.compile(r"<(?:\w+:)?code\b[^>]*?\bcode=\"([^\"]+)\"")
+
+# One renderer per thread: it caches compiled templates, which makes every
+# render after the first several times cheaper than a fresh renderer.
+_renderers = threading.local()
+
 # Resource types produced by the converter that are not clinical data.
 _SKIP_RESOURCE_TYPES = {"Patient", "Practitioner", "Organization", "Composition"}
 
 
 def parse_cda_document(
-    file_path: Path,
+    file_path: Path | MemberBytes,
     manifest_doc: Any | None = None,
 ) -> list[dict]:
     """Parse a CDA XML document and return mapped FHIR record dicts.
 
     Args:
-        file_path: Path to the CDA XML file.
+        file_path: Path to the CDA XML file, or a ZIP member already read
+            into memory.
         manifest_doc: Optional XDMDocument with hash for integrity check.
 
     Returns:
         List of record dicts suitable for bulk_insert_records, or [] on error.
     """
-    if not file_path.exists():
+    if isinstance(file_path, Path) and not file_path.exists():
         logger.warning("CDA file not found: %s", file_path)
         return []
 
     try:
-        raw_bytes = file_path.read_bytes()
+        if isinstance(file_path, Path):
+            with open_binary(file_path) as f:  # decrypts an encrypted upload
+                raw_bytes = f.read()
+        else:
+            raw_bytes = file_path.read_bytes()
     except OSError as exc:
         logger.error("Failed to read CDA file %s: %s", file_path, exc)
         return []
@@ -157,13 +199,43 @@ def parse_cda_document(
     return records
 
 
-def _render_cda_to_fhir(xml_content: str, filename: str = "<unknown>") -> dict | None:
-    """Try CDA templates in order and return the first successful FHIR Bundle."""
-    from fhir_converter.renderers import CcdaRenderer
+def detect_cda_template(xml_content: str) -> str | None:
+    """Pick the converter template from the document header, or None.
+
+    Only the header (everything before ``recordTarget``/``component``) is
+    scanned: a document-level ``templateId`` wins, else the first ``code``
+    (the LOINC document type).
+    """
+    match = _HEADER_END_RE.search(xml_content)
+    header = xml_content[: match.start()] if match else xml_content[:8192]
+    for root in _TEMPLATE_ID_RE.findall(header):
+        if root in _TEMPLATE_BY_ID:
+            return _TEMPLATE_BY_ID[root]
+    code = _DOC_CODE_RE.search(header)
+    if code is not None:
+        return _TEMPLATE_BY_LOINC.get(code.group(1))
+    return None
 
-    renderer = CcdaRenderer()
 
-    for template in CDA_TEMPLATES:
+def _renderer():
+    renderer = getattr(_renderers, "renderer", None)
+    if renderer is None:
+        from fhir_converter.renderers import CcdaRenderer
+
+        renderer = _renderers.renderer = CcdaRenderer()
+    return renderer
+
+
+def _render_cda_to_fhir(xml_content: str, filename: str = "<unknown>") -> dict | None:
+    """Render with the detected template, falling back to trying CDA_TEMPLATES
+    in order; return the first FHIR Bundle that has entries."""
+    renderer = _renderer()
+    detected = detect_cda_template(xml_content)
+    templates = CDA_TEMPLATES
+    if detected is not None:
+        templates = [detected, *(t for t in CDA_TEMPLATES if t != detected)]
+
+    for template in templates:
         try:
             result = renderer.render_to_fhir(template, xml_content)
             if result and result.get("entry"):
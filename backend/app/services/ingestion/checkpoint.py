@@ -0,0 +1,111 @@
+"""Resume points for structured ingest jobs.
+
+A structured upload is ingested by a worker (``app.worker``) in batches, each
+committed on its own. With every batch the parser also writes where it got to
+into ``uploaded_files.ingest_checkpoint`` — in the same transaction, so the
+checkpoint never runs ahead of or behind the committed records. A worker that
+dies mid-ingest loses its lease; the next claim reads the checkpoint and each
+parser skips what was already committed instead of starting over.
+
+The checkpoint is keyed by *source*: one FHIR bundle (or ZIP member), one Epic
+export, the unstructured files of a ZIP. Per source it holds the position —
+the number of bundle entries consumed, or the Epic table plus row index — and
+the parser's running stats, so a resumed run reports the same totals as a
+clean one. Finished sources keep only their final stats.
+
+CDA and XDM documents are converted as a whole before any record is written,
+so they carry no checkpoint: a resumed job re-runs them, and the idempotent
+inserter leaves the already committed records unchanged.
+"""
+from __future__ import annotations
+
+import copy
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.uploaded_file import UploadedFile
+from app.services.ingestion.idempotent_inserter import idempotent_insert_records
+
+
+class IngestCheckpoint:
+    """The job's ``ingest_checkpoint`` state, read on claim and saved per batch."""
+
+    def __init__(self, upload_id: UUID, state: dict | None = None) -> None:
+        self.upload_id = upload_id
+        state = state or {}
+        self._done: dict[str, dict] = dict(state.get("done", {}))
+        self._current: dict | None = state.get("current")
+
+    @property
+    def resuming(self) -> bool:
+        return bool(self._done or self._current)
+
+    def completed(self, source: str) -> dict | None:
+        """Final stats of ``source`` if an earlier run finished it."""
+        stats = self._done.get(source)
+        return copy.deepcopy(stats) if stats is not None else None
+
+    def resume(self, source: str) -> tuple[Any, dict] | None:
+        """``(position, stats)`` saved for a partly ingested ``source``."""
+        current = self._current
+        if current is None or current["source"] != source:
+            return None
+        return copy.deepcopy(current["position"]), copy.deepcopy(current["stats"])
+
+    async def save(self, db: AsyncSession, source: str, position: Any, stats: dict) -> None:
+        """Record progress on ``source``; committed with the caller's batch."""
+        self._current = {"source": source, "position": position, "stats": copy.deepcopy(stats)}
+        await self._write(db)
+
+    async def finish(self, db: AsyncSession, source: str, stats: dict) -> None:
+        """Mark ``source`` done; committed with the caller's last batch."""
+        self._done[source] = copy.deepcopy(stats)
+        self._current = None
+        await self._write(db)
+
+    def to_dict(self) -> dict:
+        return {"done": self._done, "current": self._current}
+
+    async def _write(self, db: AsyncSession) -> None:
+        await db.execute(
+            update(UploadedFile)
+            .where(UploadedFile.id == self.upload_id)
+            .values(ingest_checkpoint=self.to_dict())
+            .execution_options(synchronize_session=False)
+        )
+
+
+class BatchWriter:
+    """Inserts a parser's batches into ``stats``, committing each together with
+    the checkpoint of ``source`` (when the parser runs as a job)."""
+
+    def __init__(
+        self, db: AsyncSession, stats: dict, checkpoint: IngestCheckpoint | None, source: str
+    ) -> None:
+        self.db = db
+        self.stats = stats
+        self.checkpoint = checkpoint
+        self.source = source
+
+    async def write(self, batch: list[dict], position: Any) -> int:
+        """Insert and commit ``batch`` (emptied); ``position`` is where to resume,
+        or None once the source is finished. Returns the rows inserted."""
+        stats = self.stats
+        inserted = 0
+        if batch:
+            result = await idempotent_insert_records(self.db, batch)
+            inserted = result["inserted"]
+            stats["records_inserted"] += inserted
+            stats["records_updated"] = stats.get("records_updated", 0) + result["updated"]
+            stats["records_unchanged"] = stats.get("records_unchanged", 0) + result["unchanged"]
+            batch.clear()
+        if self.checkpoint is not None:
+            if position is None:
+                await self.checkpoint.finish(self.db, self.source, stats)
+            else:
+                await self.checkpoint.save(self.db, self.source, position, stats)
+        await self.db.commit()
+        return inserted
@@ -4,18 +4,80 @@ Produces a stable sha256 over the clinically meaningful content of a FHIR
 resource, ignoring volatile fields (server timestamps, ingestion metadata,
 rendered narrative) so that re-ingesting the same record yields the same hash
 while a genuine clinical change yields a different one.
+
+Encoding: the canonical bytes are produced by ``orjson`` (``OPT_SORT_KEYS``),
+which is byte-identical to the original
+``json.dumps(sort_keys=True, separators=(",", ":"), ensure_ascii=False)`` for
+every JSON document except a few float spellings (exponents, tiny magnitudes),
+non-finite floats and non-string keys. Output that could contain one of those
+is re-encoded with ``json`` (see :func:`_needs_json_fallback`), so stored
+hashes never change.
+
+Hash versions — migration plan:
+
+* **v1** ``sha256`` of the canonical bytes → ``health_records.content_hash``.
+  Every row has it; it is what the identity gate compares today.
+* **v2** ``blake3`` of the *same* canonical bytes →
+  ``health_records.content_hash_blake3``, written alongside v1 when
+  ``CONTENT_HASH_BLAKE3`` is on and the ``fast-hash`` extra is installed.
+
+Rollout: (1) enable v2 writes; (2) backfill v2 for existing rows
+(``python -m scripts.backfill_content_hash_blake3``); :func:`hashes_match`
+already prefers v2 whenever both sides carry it and falls back to v1, so
+mixed tables stay comparable throughout; (3) once no live row lacks v2, v1
+writes can stop — v1 stays readable for rows and ``record_versions``
+snapshots written before.
 """
 from __future__ import annotations
 
 import hashlib
 import json
+import re
+from dataclasses import dataclass
 from typing import Any
 
+import orjson
+
+from app.config import settings
+
+try:  # optional: the ``fast-hash`` extra
+    import blake3 as _blake3
+except ImportError:  # pragma: no cover - exercised when the extra is absent
+    _blake3 = None
+
+HASH_VERSION_SHA256 = 1
+HASH_VERSION_BLAKE3 = 2
+
 # Top-level keys removed entirely before hashing.
 _NOISE_KEYS = frozenset({"_extraction_metadata", "text"})
 # Keys removed from the `meta` object before hashing.
 _META_NOISE_KEYS = frozenset({"lastUpdated", "versionId", "source"})
 
+# Types orjson would serialize but ``json.dumps`` rejects are passed to
+# ``default`` (which raises), so they fall back to json and fail the same way.
+_ORJSON_OPTS = (
+    orjson.OPT_SORT_KEYS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_PASSTHROUGH_SUBCLASS
+)
+
+# Where orjson's spelling can differ from json's, as a value token (after
+# ``:``, ``,`` or ``[`` in compact output): float exponents (``1e16`` vs
+# ``1e+16``), sub-1e-4 floats written out in full (``0.00005``), 16+ character
+# floats json writes with an exponent, and ``null`` (orjson's rendering of
+# NaN/Infinity). Anchoring on the token start keeps the scan cheap over dates
+# and identifiers; a false hit inside a string just costs a re-encode.
+_JSON_FALLBACK_RE = re.compile(rb"[:,\[](?:-?(?:0\.0000|\d[\d.]{15}|\d[\d.]*[eE])|null)")
+
+
+@dataclass(frozen=True)
+class ContentDigests:
+    """v1 (sha256) and, when enabled, v2 (blake3) hashes of one resource."""
+
+    sha256: str
+    blake3: str | None = None
+
 
 def canonicalize(resource: dict[str, Any]) -> dict[str, Any]:
     """Return a copy of `resource` with volatile/noise fields removed."""
@@ -32,10 +94,71 @@ def canonicalize(resource: dict[str, Any]) -> dict[str, Any]:
     return out
 
 
-def content_hash(resource: dict[str, Any]) -> str:
-    """Stable hex sha256 of a resource's canonical clinical content."""
-    canonical = canonicalize(resource)
-    encoded = json.dumps(
+def _needs_canonicalizing(resource: dict[str, Any]) -> bool:
+    if not _NOISE_KEYS.isdisjoint(resource):
+        return True
+    meta = resource.get("meta")
+    return isinstance(meta, dict) and (not meta or not _META_NOISE_KEYS.isdisjoint(meta))
+
+
+def _json_encode(canonical: dict[str, Any]) -> bytes:
+    return json.dumps(
         canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False
     ).encode("utf-8")
-    return hashlib.sha256(encoded).hexdigest()
+
+
+def _needs_json_fallback(encoded: bytes) -> bool:
+    return _JSON_FALLBACK_RE.search(encoded) is not None
+
+
+def _raise_unsupported(obj: Any) -> Any:
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def canonical_bytes(resource: dict[str, Any]) -> bytes:
+    """The exact bytes v1/v2 hash: canonical content as compact sorted JSON.
+
+    Canonicalization is fused with encoding: a resource with nothing to strip
+    (the common case for FHIR bundles) is encoded as-is, without a copy.
+    """
+    canonical = canonicalize(resource) if _needs_canonicalizing(resource) else resource
+    try:
+        encoded = orjson.dumps(canonical, default=_raise_unsupported, option=_ORJSON_OPTS)
+    except TypeError:  # orjson.JSONEncodeError: big ints, non-str keys, ...
+        return _json_encode(canonical)
+    if _needs_json_fallback(encoded):
+        return _json_encode(canonical)
+    return encoded
+
+
+def content_hash(resource: dict[str, Any]) -> str:
+    """Stable hex sha256 of a resource's canonical clinical content."""
+    return hashlib.sha256(canonical_bytes(resource)).hexdigest()
+
+
+def blake3_enabled() -> bool:
+    return settings.content_hash_blake3 and _blake3 is not None
+
+
+def content_digests(resource: dict[str, Any]) -> ContentDigests:
+    """v1 + (when enabled) v2 digests, encoding the resource once."""
+    encoded = canonical_bytes(resource)
+    sha = hashlib.sha256(encoded).hexdigest()
+    if blake3_enabled():
+        return ContentDigests(sha, _blake3.blake3(encoded).hexdigest())
+    return ContentDigests(sha)
+
+
+def hashes_match(
+    old_sha256: str | None, old_blake3: str | None, new: ContentDigests | None
+) -> bool:
+    """Compare a stored row's hashes with freshly computed digests.
+
+    Uses v2 when both sides have it, else v1 — so rows written before v2 (or
+    with it disabled) remain comparable with rows written after.
+    """
+    if new is None:
+        return old_sha256 is None
+    if old_blake3 is not None and new.blake3 is not None:
+        return old_blake3 == new.blake3
+    return old_sha256 == new.sha256
@@ -3,23 +3,38 @@ from __future__ import annotations
 import asyncio
 import hashlib
 import logging
+import posixpath
 import shutil
 import zipfile
-from datetime import datetime, timezone
+from collections.abc import Iterator, Mapping
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from uuid import UUID, uuid4
 
 from fastapi import HTTPException
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.config import settings
 from app.models.patient import Patient
 from app.models.uploaded_file import UploadedFile
-from app.services.ingestion.cda_dedup import deduplicate_across_documents
+from app.services.extraction.job_queue import (
+    notify_extraction_queued,
+    notify_ingest_queued,
+    renew_leases,
+)
+from app.services.ingestion.bundle_engine import iter_bundle_mappings
+from app.services.ingestion.cda_dedup import CrossDocumentDeduplicator
+from app.services.ingestion.cda_engine import iter_cda_conversions
 from app.services.ingestion.cda_parser import parse_cda_document
+from app.services.ingestion.checkpoint import IngestCheckpoint
 from app.services.ingestion.epic_parser import parse_epic_export
-from app.services.ingestion.fhir_parser import parse_fhir_bundle
+from app.services.ingestion.fhir_parser import (
+    STREAMING_BUNDLE_BYTES,
+    MappedBundle,
+    parse_fhir_bundle,
+)
+from app.services.ingestion.fhir_validation import validation_scope
 from app.services.ingestion.idempotent_inserter import idempotent_insert_records
 from app.services.ingestion.patient_demographics import (
     backfill_patient_demographics,
@@ -27,7 +42,18 @@ from app.services.ingestion.patient_demographics import (
     extract_fhir_demographics,
 )
 from app.services.ingestion.xdm_parser import parse_xdm_metadata
-from app.utils.file_utils import decrypt_file_to, is_encrypted_file
+from app.services.ingestion.zip_members import (
+    MemberBytes,
+    ZipBudget,
+    ZipMember,
+    list_zip_members,
+    open_binary,
+    open_text,
+    source_name,
+    source_size,
+)
+from app.utils.file_utils import EncryptedFileWriter
+from app.utils.metrics import UPLOADS, stage_timer
 
 logger = logging.getLogger(__name__)
 
@@ -61,18 +87,12 @@ def _zip_safe_target(temp_dir: Path, member_name: str) -> Path | None:
     return target
 
 
-def _safe_extract_zip(zf: zipfile.ZipFile, temp_dir: Path) -> None:
-    """Extract a zip member-by-member with zip-bomb defenses (SEC-DOS-02).
+def _check_zip_declared(infos: list[zipfile.ZipInfo]) -> None:
+    """Reject on the declared header totals (SEC-DOS-02), before any inflation.
 
-    Replaces ``zf.extractall`` (which has no decompression cap). First rejects up
-    front on the declared totals — member count, per-member size, per-member
-    compression ratio, and the summed uncompressed size — then extracts each
-    member streaming its bytes and re-checking the byte budget against the actual
-    decompressed output (header sizes can be forged). Raises ``HTTPException``
-    (413/400) on any breach so the upload endpoint returns a clean rejection.
+    Member count, per-member size, per-member compression ratio and the summed
+    uncompressed size. Raises ``HTTPException`` (413/400) on any breach.
     """
-    infos = [i for i in zf.infolist() if not i.is_dir()]
-
     if len(infos) > _ZIP_MAX_ENTRIES:
         raise HTTPException(
             status_code=400,
@@ -95,6 +115,36 @@ def _safe_extract_zip(zf: zipfile.ZipFile, temp_dir: Path) -> None:
             status_code=413, detail="ZIP uncompressed size exceeds the allowed budget"
         )
 
+
+def check_zip_upload(file_path: Path) -> None:
+    """Apply the declared-total caps to an uploaded ZIP before it is queued.
+
+    Reads only the central directory, so the upload endpoints can answer 413
+    instead of accepting a bomb that would only fail in its ingest job. Other
+    files, and ZIPs too corrupt to list, are left to the job.
+    """
+    if detect_file_type(file_path) != "zip":
+        return
+    try:
+        with open_binary(file_path) as raw, zipfile.ZipFile(raw, "r") as zf:
+            infos = [i for i in zf.infolist() if not i.is_dir()]
+    except zipfile.BadZipFile:
+        return
+    _check_zip_declared(infos)
+
+
+def _safe_extract_zip(zf: zipfile.ZipFile, temp_dir: Path) -> None:
+    """Extract a zip member-by-member with zip-bomb defenses (SEC-DOS-02).
+
+    Replaces ``zf.extractall`` (which has no decompression cap). First rejects up
+    front on the declared totals (:func:`_check_zip_declared`), then extracts each
+    member streaming its bytes and re-checking the byte budget against the actual
+    decompressed output (header sizes can be forged). Raises ``HTTPException``
+    (413/400) on any breach so the upload endpoint returns a clean rejection.
+    """
+    infos = [i for i in zf.infolist() if not i.is_dir()]
+    _check_zip_declared(infos)
+
     # Stream each member, enforcing the REAL decompressed byte budget — the
     # declared sizes above can lie, so count actual bytes as we write.
     extracted_total = 0
@@ -121,7 +171,7 @@ def _safe_extract_zip(zf: zipfile.ZipFile, temp_dir: Path) -> None:
                 dst.write(chunk)
 
 
-def _find_patient_resource_streaming(file_path: Path) -> dict | None:
+def _find_patient_resource_streaming(file_path: Path | ZipMember) -> dict | None:
     """Locate the first Patient resource in a FHIR bundle by streaming (ijson).
 
     SEC-INJ-03: avoids ``json.load``-ing the entire (up to 500MB) bundle into RAM
@@ -132,13 +182,15 @@ def _find_patient_resource_streaming(file_path: Path) -> dict | None:
     import ijson
 
     try:
-        with open(file_path, "rb") as f:
+        with open_binary(file_path) as f:
             for entry in ijson.items(f, "entry.item"):
                 if not isinstance(entry, dict):
                     continue
                 resource = entry.get("resource")
                 if isinstance(resource, dict) and resource.get("resourceType") == "Patient":
                     return resource
+    except HTTPException:
+        raise  # zip-bomb budget breach on a ZIP member: reject, don't fail open
     except Exception as e:  # noqa: BLE001 - fail-open; never block ingestion
         logger.warning("Streaming Patient lookup failed for %s: %s", file_path, e)
     return None
@@ -181,10 +233,10 @@ async def get_or_create_patient(
 
 
 def compute_file_hash(file_path: Path) -> str:
-    """Compute SHA-256 hash of a file."""
+    """Compute SHA-256 hash of a file's plaintext (decrypting an encrypted upload)."""
     sha256 = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
+    with open_binary(file_path) as f:
+        for chunk in iter(lambda: f.read(_ZIP_EXTRACT_CHUNK), b""):
             sha256.update(chunk)
     return sha256.hexdigest()
 
@@ -192,10 +244,10 @@ def compute_file_hash(file_path: Path) -> str:
 def _is_cda_xml(file_path: Path) -> bool:
     """Check if an XML file is a CDA ClinicalDocument."""
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
+        with open_text(file_path) as f:
             header = f.read(500)
             return "ClinicalDocument" in header
-    except (OSError, UnicodeDecodeError):
+    except (OSError, UnicodeDecodeError, ValueError):
         return False
 
 
@@ -238,124 +290,280 @@ async def ingest_file(
     file_path: Path,
     original_filename: str,
     mime_type: str = "application/octet-stream",
+    *,
+    file_hash: str | None = None,
+    file_size: int | None = None,
+    session_factory: async_sessionmaker | None = None,
 ) -> dict:
-    """Main ingestion entry point. Detects file type and routes to appropriate parser."""
-    # CRYPTO-02 (issue #54): structured uploads are encrypted at rest in the
-    # framed AES-256-GCM format. The streaming parsers (ijson, member-by-member
-    # zip extraction with the W9 caps) need PLAINTEXT input, so an encrypted
-    # source is stream-decrypted ONCE to a temp file here and ALL downstream
-    # logic (detect_file_type, compute_file_hash, the _ingest_* dispatch) runs on
-    # that temp ``work_path``. ``decrypt_file_to`` streams frame-by-frame, so a
-    # multi-GB file decrypts with bounded memory (the W9 OOM guarantee is kept).
-    # ``storage_path`` stays the ORIGINAL encrypted path so future reads decrypt
-    # again; the temp is unlinked in the ``finally`` even on error. Legacy
-    # plaintext files and directory uploads skip the temp entirely.
-    work_path = file_path
-    temp_decrypted: Path | None = None
-    if file_path.is_file() and is_encrypted_file(file_path):
-        temp_dir = Path(settings.temp_extract_dir)
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        # Preserve the original suffix so detect_file_type routes correctly.
-        temp_decrypted = temp_dir / f"decrypt_{uuid4().hex}{file_path.suffix}"
-        decrypt_file_to(file_path, temp_decrypted)
-        work_path = temp_decrypted
+    """Main ingestion entry point. Detects file type and routes to appropriate parser.
 
+    Runs the whole ingest in the caller's task (scripts, tests); the upload
+    endpoints queue a job instead (:func:`queue_ingest`).
+    ``file_hash`` / ``file_size`` are the plaintext SHA-256 and size when the
+    caller already has them (the upload endpoints compute both while writing
+    the file), saving a full re-read of the upload.
+    """
+    if session_factory is None:
+        from app.database import async_session_factory as session_factory
+
+    upload = _new_upload(
+        user_id, file_path, original_filename, mime_type, file_hash=file_hash, file_size=file_size
+    )
+    now = datetime.now(timezone.utc)
+    lease_seconds = settings.extraction_lease_seconds
+    upload.ingestion_status = "processing"
+    upload.processing_started_at = now
+    # Held like a worker's lease, and renewed the same way, so ingest workers
+    # leave the row alone; if this process dies it lapses and a worker
+    # resumes from the checkpoint.
+    upload.lease_owner = _INLINE_LEASE_OWNER
+    upload.lease_expires_at = now + timedelta(seconds=lease_seconds)
+    upload_id = upload.id
+    db.add(upload)
+    await db.commit()
+    await db.refresh(upload)
+
+    heartbeat = asyncio.create_task(_hold_lease(session_factory, upload_id, lease_seconds))
     try:
-        file_type = detect_file_type(work_path)
-        # Hash + size are computed on the PLAINTEXT work_path so the dedup hash is
-        # stable across re-uploads despite the random per-frame encryption nonces.
-        file_hash = compute_file_hash(work_path) if work_path.is_file() else "directory"
-        file_size = work_path.stat().st_size if work_path.is_file() else 0
-
-        # Create upload record — storage_path is the ORIGINAL (encrypted) path.
-        upload = UploadedFile(
-            id=uuid4(),
-            user_id=user_id,
-            filename=original_filename,
-            mime_type=mime_type,
-            file_size_bytes=file_size,
-            file_hash=file_hash,
-            storage_path=str(file_path),
-            ingestion_status="processing",
-            processing_started_at=datetime.now(timezone.utc),
+        result, patient_id = await _run_ingest(
+            db, upload, file_path, IngestCheckpoint(upload_id)
         )
-        db.add(upload)
+    finally:
+        heartbeat.cancel()
+    asyncio.create_task(
+        _run_dedup_background(upload_id, patient_id, user_id)
+    )
+    return result
+
+
+_INLINE_LEASE_OWNER = "inline"
+
+
+async def _hold_lease(
+    session_factory: async_sessionmaker, upload_id: UUID, lease_seconds: int
+) -> None:
+    """Renew an inline ingest's lease until cancelled, like a worker's heartbeat."""
+    while True:
+        await asyncio.sleep(max(lease_seconds / 3, 1))
+        try:
+            await renew_leases(
+                session_factory, _INLINE_LEASE_OWNER, [upload_id], lease_seconds=lease_seconds
+            )
+        except Exception:
+            logger.warning("Lease heartbeat failed for inline ingest %s", upload_id, exc_info=True)
+
+
+async def queue_ingest(
+    db: AsyncSession,
+    user_id: UUID,
+    file_path: Path,
+    original_filename: str,
+    mime_type: str = "application/octet-stream",
+    *,
+    file_hash: str | None = None,
+    file_size: int | None = None,
+    commit: bool = True,
+) -> UploadedFile:
+    """Record a structured upload as a queued ingest job and commit.
+
+    An ingest worker (``app.worker``) claims it and runs
+    :func:`run_ingest_job`; the commit's ``NOTIFY`` wakes one immediately.
+    With ``commit=False`` the job is only added to ``db``: the caller's commit
+    queues it, together with whatever else that transaction writes.
+    """
+    upload = _new_upload(
+        user_id, file_path, original_filename, mime_type, file_hash=file_hash, file_size=file_size
+    )
+    db.add(upload)
+    await notify_ingest_queued(db)
+    if commit:
         await db.commit()
         await db.refresh(upload)
+    else:
+        await db.flush()  # so rows added after it can reference the upload
+    return upload
 
-        patient = await get_or_create_patient(db, user_id)
 
+async def run_ingest_job(
+    upload_id: UUID,
+    file_path: Path,
+    user_id: UUID,
+    *,
+    session_factory: async_sessionmaker | None = None,
+) -> None:
+    """Ingest a claimed upload, resuming from its checkpoint, then run dedup.
+
+    Every committed batch carries the parser's position
+    (:class:`~app.services.ingestion.checkpoint.IngestCheckpoint`), so a job
+    whose worker died is re-claimed once its lease lapses and continues from
+    the last committed batch rather than from the start.
+    """
+    if session_factory is None:
+        from app.database import async_session_factory as session_factory
+
+    async with session_factory() as db:
+        upload = await db.get(UploadedFile, upload_id)
+        if upload is None or upload.ingestion_status != "processing":
+            logger.warning("Ingest job %s is not processing; skipping", upload_id)
+            return
+        checkpoint = IngestCheckpoint(upload.id, upload.ingest_checkpoint)
+        if checkpoint.resuming:
+            logger.info("Resuming ingest of %s from its checkpoint", upload_id)
         try:
+            _result, patient_id = await _run_ingest(db, upload, file_path, checkpoint)
+        except Exception:
+            return  # recorded on the upload as failed
+    await _run_dedup_background(upload_id, patient_id, user_id, session_factory=session_factory)
+
+
+def _new_upload(
+    user_id: UUID,
+    file_path: Path,
+    original_filename: str,
+    mime_type: str,
+    *,
+    file_hash: str | None,
+    file_size: int | None,
+) -> UploadedFile:
+    """A ``pending`` structured upload row for ``file_path``."""
+    # CRYPTO-02 (issue #54): structured uploads are encrypted at rest in the
+    # framed AES-256-GCM format. Every reader below (file-type sniffing, the
+    # hash, ijson, csv, lxml, zipfile) opens the source through
+    # ``open_binary`` / ``open_text``, which decrypt MTENC1 frames on demand
+    # (``file_utils.DecryptingReader``): memory stays at a few frames and no
+    # plaintext temp file is ever written. Legacy plaintext files and
+    # directory uploads are read as-is. ``storage_path`` is the ORIGINAL
+    # encrypted path, so future reads decrypt again.
+    # Hash + size are computed on the PLAINTEXT so the dedup hash is stable
+    # across re-uploads despite the random per-frame encryption nonces.
+    if not file_path.is_file():
+        file_hash, file_size = "directory", 0
+    else:
+        if file_hash is None:
+            with stage_timer("structured", "hash"):
+                file_hash = compute_file_hash(file_path)
+        if file_size is None:
+            file_size = source_size(file_path)
+
+    return UploadedFile(
+        id=uuid4(),
+        user_id=user_id,
+        filename=original_filename,
+        mime_type=mime_type,
+        file_size_bytes=file_size,
+        file_hash=file_hash,
+        storage_path=str(file_path),
+        ingestion_status="pending",
+        file_category="structured",
+    )
+
+
+async def _run_ingest(
+    db: AsyncSession,
+    upload: UploadedFile,
+    file_path: Path,
+    checkpoint: IngestCheckpoint | None = None,
+) -> tuple[dict, UUID]:
+    """Parse and write ``upload``, leaving it ``dedup_scanning``.
+
+    Returns the endpoint-style result and the patient id. On error the upload
+    is marked ``failed`` and the exception re-raised.
+    """
+    user_id, upload_id = upload.user_id, upload.id
+    file_type = "unknown"
+
+    try:
+        file_type = detect_file_type(file_path)
+        patient = await get_or_create_patient(db, user_id)
+        # "parse" spans parsing AND the batched record writes; the inserter
+        # times its own share as "db_write".
+        with stage_timer("structured", "parse"), validation_scope() as validation:
             if file_type == "fhir_r4":
-                stats = await _ingest_fhir(db, user_id, patient.id, upload.id, work_path)
+                stats = await _ingest_fhir(
+                    db, user_id, patient.id, upload_id, file_path, checkpoint, source="bundle"
+                )
             elif file_type == "epic_ehi":
-                stats = await _ingest_epic_dir(db, user_id, patient.id, upload.id, work_path)
+                stats = await _ingest_epic_dir(
+                    db, user_id, patient.id, upload_id, file_path, checkpoint
+                )
             elif file_type == "zip":
-                stats = await _ingest_zip(db, user_id, patient.id, upload.id, work_path)
+                stats = await _ingest_zip(db, user_id, patient.id, upload_id, file_path, checkpoint)
             elif file_type == "cda_xml":
-                stats = await _ingest_cda_standalone(db, user_id, patient.id, upload.id, work_path)
+                stats = await _ingest_cda_standalone(db, user_id, patient.id, upload_id, file_path)
             else:
                 raise ValueError(f"Unsupported file type: {file_type}")
+            upload.validation_report = await validation.areport()
+
+        # Set initial completion stats before dedup
+        upload.record_count = stats.get("records_inserted", 0)
+        upload.ingestion_errors = stats.get("errors", [])
+        upload.ingestion_progress = {
+            "total_entries": stats.get("total_entries", 0),
+            "records_inserted": stats.get("records_inserted", 0),
+            "records_skipped": stats.get("records_skipped", 0),
+            "records_updated": stats.get("records_updated", 0),
+            "records_unchanged": stats.get("records_unchanged", 0),
+        }
+        if "files_detail" in stats:
+            upload.ingestion_progress["files_detail"] = stats["files_detail"]
+        if stats.get("unstructured_files"):
+            # A ZIP's documents queued for extraction; the job runs after the
+            # 202, so clients find them here via GET /upload/{id}/status.
+            upload.ingestion_progress["unstructured_uploads"] = stats["unstructured_files"]
+
+        # Dedup runs after this returns, so the records are visible first
+        upload.ingestion_status = "dedup_scanning"
+        await db.commit()
+        UPLOADS.inc(pipeline="structured", file_type=file_type, outcome="ok")
 
-            # Set initial completion stats before dedup
-            upload.record_count = stats.get("records_inserted", 0)
-            upload.ingestion_errors = stats.get("errors", [])
-            upload.ingestion_progress = {
-                "total_entries": stats.get("total_entries", 0),
-                "records_inserted": stats.get("records_inserted", 0),
-                "records_skipped": stats.get("records_skipped", 0),
-                "records_updated": stats.get("records_updated", 0),
-                "records_unchanged": stats.get("records_unchanged", 0),
-            }
-
-            # Run dedup scan in background so the upload endpoint returns immediately
-            upload.ingestion_status = "dedup_scanning"
-            await db.commit()
-
-            asyncio.create_task(
-                _run_dedup_background(upload.id, patient.id, user_id)
-            )
-
-            return {
-                "upload_id": str(upload.id),
-                "status": "dedup_scanning",
-                "records_inserted": stats.get("records_inserted", 0),
-                "errors": stats.get("errors", []),
-                "unstructured_uploads": stats.get("unstructured_files", []),
-            }
+        return {
+            "upload_id": str(upload_id),
+            "status": "dedup_scanning",
+            "records_inserted": stats.get("records_inserted", 0),
+            "errors": stats.get("errors", []),
+            "unstructured_uploads": stats.get("unstructured_files", []),
+        }, patient.id
 
-        except Exception as e:
-            logger.error("Ingestion failed for %s: %s", original_filename, e)
-            upload.ingestion_status = "failed"
-            upload.ingestion_errors = [{"error": str(e)}]
-            upload.processing_completed_at = datetime.now(timezone.utc)
-            await db.commit()
-            raise
-    finally:
-        # Always drop the decrypted temp (it carries plaintext PHI), even on error.
-        if temp_decrypted is not None:
-            temp_decrypted.unlink(missing_ok=True)
+    except Exception as e:
+        logger.error("Ingestion failed for %s: %s", upload.filename, e)
+        UPLOADS.inc(pipeline="structured", file_type=file_type, outcome="failed")
+        await db.rollback()
+        upload.ingestion_status = "failed"
+        upload.ingestion_errors = [{"error": str(e)}]
+        upload.processing_completed_at = datetime.now(timezone.utc)
+        await db.commit()
+        raise
 
 
 async def _run_dedup_background(
     upload_id: UUID,
     patient_id: UUID,
     user_id: UUID,
+    *,
+    pipeline: str = "structured",
+    session_factory: async_sessionmaker | None = None,
 ) -> None:
-    """Run dedup scanning in the background with its own DB session."""
-    from app.database import async_session_factory
+    """Run dedup scanning in the background with its own DB session.
+
+    ``pipeline`` only labels the stage metric (the unstructured pipeline
+    shares this tail).
+    """
     from app.services.dedup.orchestrator import run_upload_dedup
 
+    if session_factory is None:
+        from app.database import async_session_factory as session_factory
+
     try:
-        async with async_session_factory() as db:
+        async with session_factory() as db:
             upload = await db.get(UploadedFile, upload_id)
             if not upload:
                 logger.error("Background dedup: upload %s not found", upload_id)
                 return
 
-            dedup_summary = await run_upload_dedup(
-                upload_id, patient_id, user_id, db
-            )
+            with stage_timer(pipeline, "dedup"):
+                dedup_summary = await run_upload_dedup(
+                    upload_id, patient_id, user_id, db
+                )
             upload.dedup_summary = dedup_summary.to_dict()
 
             if dedup_summary.needs_review > 0:
@@ -375,7 +583,7 @@ async def _run_dedup_background(
     except Exception:
         logger.exception("Background dedup failed for %s", upload_id)
         try:
-            async with async_session_factory() as db:
+            async with session_factory() as db:
                 upload = await db.get(UploadedFile, upload_id)
                 if upload:
                     upload.ingestion_status = "completed"
@@ -390,13 +598,23 @@ async def _ingest_fhir(
     user_id: UUID,
     patient_id: UUID,
     upload_id: UUID,
-    file_path: Path,
+    file_path: Path | ZipMember,
+    checkpoint: IngestCheckpoint | None = None,
+    *,
+    source: str | None = None,
+    mapped: MappedBundle | None = None,
 ) -> dict:
-    """Ingest a FHIR R4 JSON file."""
-    # SEC-INJ-03: locate the bundle's Patient by streaming (ijson) instead of
-    # json.load-ing the whole (up to 500MB) bundle into RAM, which defeated the
-    # streaming the parser already uses.
-    patient_resource = _find_patient_resource_streaming(file_path)
+    """Ingest a FHIR R4 JSON file, or write one ``mapped`` off the event loop."""
+    source = source or _checkpoint_source("fhir", file_path)
+    if checkpoint is not None and (done := checkpoint.completed(source)) is not None:
+        return done
+    if mapped is not None:
+        patient_resource = mapped.patient
+    else:
+        # SEC-INJ-03: locate the bundle's Patient by streaming (ijson) instead
+        # of json.load-ing the whole (up to 500MB) bundle into RAM, which
+        # defeated the streaming the parser already uses.
+        patient_resource = _find_patient_resource_streaming(file_path)
     if patient_resource is not None:
         patient = await get_or_create_patient(db, user_id, patient_resource)
         patient_id = patient.id
@@ -407,9 +625,18 @@ async def _ingest_fhir(
         patient_id=patient_id,
         source_file_id=upload_id,
         db=db,
+        batch_size=settings.ingestion_batch_size,
+        checkpoint=checkpoint,
+        source=source,
+        mapped=mapped,
     )
 
 
+def _checkpoint_source(kind: str, source: Path | ZipMember) -> str:
+    """Stable checkpoint key of one file of an upload across job runs."""
+    return f"{kind}:{source.name if isinstance(source, ZipMember) else source}"
+
+
 async def _backfill_patient_by_id(
     db: AsyncSession, patient_id: UUID, demo: dict
 ) -> None:
@@ -433,9 +660,12 @@ async def _ingest_epic_dir(
     user_id: UUID,
     patient_id: UUID,
     upload_id: UUID,
-    dir_path: Path,
+    dir_path: Path | list[ZipMember],
+    checkpoint: IngestCheckpoint | None = None,
 ) -> dict:
-    """Ingest an Epic EHI Tables export directory."""
+    """Ingest an Epic EHI Tables export directory (or its TSV ZIP members)."""
+    if checkpoint is not None and (done := checkpoint.completed("epic")) is not None:
+        return done
     # Backfill patient identifiers from PATIENT.tsv before records are inserted.
     await _backfill_patient_by_id(db, patient_id, extract_epic_demographics(dir_path))
     return await parse_epic_export(
@@ -444,6 +674,9 @@ async def _ingest_epic_dir(
         patient_id=patient_id,
         source_file_id=upload_id,
         db=db,
+        batch_size=settings.ingestion_batch_size,
+        checkpoint=checkpoint,
+        source="epic",
     )
 
 
@@ -463,7 +696,7 @@ async def _ingest_cda_standalone(
     }
 
     try:
-        records = parse_cda_document(file_path, manifest_doc=None)
+        records = await asyncio.to_thread(parse_cda_document, file_path, None)
         stats["total_entries"] = len(records)
     except Exception as e:
         stats["errors"].append({"file": file_path.name, "error": str(e)})
@@ -500,10 +733,17 @@ async def _ingest_xdm(
     user_id: UUID,
     patient_id: UUID,
     upload_id: UUID,
-    xdm_dir: Path,
-    metadata_path: Path,
+    xdm_dir: Path | str,
+    metadata_path: Path | ZipMember,
+    members: Mapping[str, ZipMember] | None = None,
 ) -> dict:
-    """Ingest an IHE XDM package containing CDA XML documents."""
+    """Ingest an IHE XDM package containing CDA XML documents.
+
+    With ``members`` (the normalized-name index of an uploaded ZIP) the package
+    is read in place: ``xdm_dir`` is then the archive directory holding
+    METADATA.XML and each document is read into memory only when it is handed
+    to the converter.
+    """
     stats: dict = {
         "total_entries": 0,
         "records_inserted": 0,
@@ -542,27 +782,37 @@ async def _ingest_xdm(
         stats["errors"].append({"error": "No CDA XML documents found in manifest"})
         return stats
 
-    # Parse each CDA document
-    all_records: list[dict] = []
-    for doc in xml_docs:
-        doc_path = xdm_dir / doc.uri
-        if not doc_path.exists():
+    def jobs() -> Iterator[tuple[Path | MemberBytes, object]]:
+        for doc in xml_docs:
+            if members is not None:
+                member = members.get(posixpath.normpath(posixpath.join(xdm_dir, doc.uri)))
+                if member is not None:
+                    yield MemberBytes(member.basename, member.read_bytes()), doc
+                    continue
+            else:
+                doc_path = xdm_dir / doc.uri
+                if doc_path.exists():
+                    yield doc_path, doc
+                    continue
             stats["errors"].append({"file": doc.uri, "error": "File not found"})
-            continue
 
-        try:
-            records = parse_cda_document(doc_path, doc)
-            stats["total_entries"] += len(records)
-            all_records.extend(records)
-        except Exception as e:
-            stats["errors"].append({"file": doc.uri, "error": str(e)})
+    # Convert the CDA documents off the event loop (process pool), folding each
+    # into the intra-upload cross-document dedup as it completes.
+    deduper = CrossDocumentDeduplicator()
+    async for conversion in iter_cda_conversions(jobs(), parse_cda_document):
+        if conversion.error is not None:
+            stats["errors"].append(
+                {"file": conversion.manifest_doc.uri, "error": str(conversion.error)}
+            )
+            continue
+        stats["total_entries"] += len(conversion.records)
+        deduper.add(conversion.records)
 
-    if not all_records:
+    if not deduper.stats.total_parsed:
         stats["errors"].append({"error": "No records extracted from CDA documents"})
         return stats
 
-    # Intra-upload cross-document dedup
-    unique_records, dedup_stats = deduplicate_across_documents(all_records)
+    unique_records, dedup_stats = deduper.finish()
     stats["records_skipped"] += dedup_stats.duplicates_collapsed
 
     # Add user/patient/source_file IDs to each record
@@ -591,19 +841,140 @@ async def _ingest_xdm(
     return stats
 
 
+_UNSTRUCTURED_MIME = {
+    ".pdf": "application/pdf",
+    ".rtf": "application/rtf",
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+}
+
+
+def _store_unstructured(source: Path | ZipMember) -> tuple[Path, int, str]:
+    """Write an unstructured file once into encrypted upload storage.
+
+    CRYPTO-02: the copy is framed AES-256-GCM like a direct upload, hashed and
+    sized on the plaintext in the same pass. Returns ``(dest_path, size,
+    sha256_hex)``; a partial file is removed on error.
+    """
+    suffix = source.suffix
+    dest_path = Path(settings.upload_dir) / f"{uuid4()}{suffix}"
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with open_binary(source) as src, open(dest_path, "wb") as dst:
+            writer = EncryptedFileWriter(dst)
+            for chunk in iter(lambda: src.read(_ZIP_EXTRACT_CHUNK), b""):
+                sha256.update(chunk)
+                size += len(chunk)
+                writer.write_chunk(chunk)
+            writer.finalize()
+    except BaseException:
+        dest_path.unlink(missing_ok=True)
+        raise
+    return dest_path, size, sha256.hexdigest()
+
+
+def _skip_zip_entry(parts: tuple[str, ...] | list[str], stem: str) -> bool:
+    """Schema directories and readme files carry no patient data."""
+    return any("schema" in p.lower() for p in parts) or stem.lower() == "readme"
+
+
 async def _ingest_zip(
     db: AsyncSession,
     user_id: UUID,
     patient_id: UUID,
     upload_id: UUID,
     zip_path: Path,
+    checkpoint: IngestCheckpoint | None = None,
 ) -> dict:
-    """Extract and ingest a ZIP file with mixed content support."""
+    """Ingest a ZIP file with mixed content support."""
+    if settings.zip_streaming_ingest:
+        return await _ingest_zip_streaming(
+            db, user_id, patient_id, upload_id, zip_path, checkpoint
+        )
+    return await _ingest_zip_extracted(db, user_id, patient_id, upload_id, zip_path, checkpoint)
+
+
+async def _ingest_zip_streaming(
+    db: AsyncSession,
+    user_id: UUID,
+    patient_id: UUID,
+    upload_id: UUID,
+    zip_path: Path,
+    checkpoint: IngestCheckpoint | None = None,
+) -> dict:
+    """Ingest a ZIP by reading its members in place — nothing is extracted.
+
+    Structured members (``.tsv`` / ``.json`` / XDM ``.xml``) stream straight
+    from the archive into the parsers; unstructured members are encrypted into
+    upload storage in one pass. Every read is charged to a :class:`ZipBudget`,
+    so the SEC-DOS-02 caps hold on the actual decompressed bytes exactly as
+    they do while extracting.
+    """
+    with open_binary(zip_path) as raw, zipfile.ZipFile(raw, "r") as zf:
+        _check_zip_declared([i for i in zf.infolist() if not i.is_dir()])
+        budget = ZipBudget(_ZIP_MAX_MEMBER_UNCOMPRESSED_BYTES, _ZIP_MAX_TOTAL_UNCOMPRESSED_BYTES)
+        members = list_zip_members(zf, budget)
+
+        # Check for IHE XDM package first
+        for member in members:
+            if member.basename != "METADATA.XML":
+                continue
+            try:
+                with open_text(member) as f:
+                    header = f.read(500)
+            except UnicodeDecodeError:
+                continue
+            if "SubmitObjectsRequest" in header:
+                logger.info("Detected IHE XDM package: %s", member.name)
+                return await _ingest_xdm(
+                    db, user_id, patient_id, upload_id, member.parent, member,
+                    members={m.name: m for m in members},
+                )
+
+        tsv_members: list[ZipMember] = []
+        json_members: list[ZipMember] = []
+        unstructured_members: list[ZipMember] = []
+        for member in members:
+            if _skip_zip_entry(member.name.split("/"), member.stem):
+                continue
+            suffix = member.suffix.lower()
+            if suffix == ".tsv":
+                tsv_members.append(member)
+            elif suffix == ".json":
+                json_members.append(member)
+            elif suffix in _UNSTRUCTURED_MIME:
+                unstructured_members.append(member)
+
+        # Like the extract path: the Epic export is the directory of the first
+        # TSV found, read whole (readme/schema filtering does not apply to it).
+        epic_export = None
+        if tsv_members:
+            tsv_dir = tsv_members[0].parent
+            epic_export = [
+                m for m in members if m.parent == tsv_dir and m.suffix == ".tsv"
+            ]
+        return await _ingest_zip_contents(
+            db, user_id, patient_id, upload_id,
+            epic_export, json_members, unstructured_members, checkpoint,
+        )
+
+
+async def _ingest_zip_extracted(
+    db: AsyncSession,
+    user_id: UUID,
+    patient_id: UUID,
+    upload_id: UUID,
+    zip_path: Path,
+    checkpoint: IngestCheckpoint | None = None,
+) -> dict:
+    """Extract a ZIP to a temp directory, then ingest it (``ZIP_STREAMING_INGEST=false``)."""
     temp_dir = Path(settings.temp_extract_dir) / str(upload_id)
     temp_dir.mkdir(parents=True, exist_ok=True)
 
     try:
-        with zipfile.ZipFile(zip_path, "r") as zf:
+        with open_binary(zip_path) as raw, zipfile.ZipFile(raw, "r") as zf:
             # SEC-DOS-02: bounded, member-by-member extraction (zip-bomb guard).
             _safe_extract_zip(zf, temp_dir)
 
@@ -615,20 +986,14 @@ async def _ingest_zip(
             return await _ingest_xdm(db, user_id, patient_id, upload_id, xdm_dir, metadata_path)
 
         # Collect all files, excluding schema dirs and readme
-        all_files = list(temp_dir.rglob("*"))
-
         tsv_files = []
         json_files = []
         unstructured_files = []
 
-        for f in all_files:
+        for f in temp_dir.rglob("*"):
             if not f.is_file():
                 continue
-            # Skip schema directories and readme files
-            parts_lower = [p.lower() for p in f.parts]
-            if any("schema" in p for p in parts_lower):
-                continue
-            if f.stem.lower() == "readme":
+            if _skip_zip_entry(f.relative_to(temp_dir).parts, f.stem):
                 continue
 
             suffix = f.suffix.lower()
@@ -636,81 +1001,142 @@ async def _ingest_zip(
                 tsv_files.append(f)
             elif suffix == ".json":
                 json_files.append(f)
-            elif suffix in (".pdf", ".rtf", ".tif", ".tiff"):
+            elif suffix in _UNSTRUCTURED_MIME:
                 unstructured_files.append(f)
 
-        stats = {
-            "total_entries": 0,
-            "records_inserted": 0,
-            "records_skipped": 0,
-            "errors": [],
-            "unstructured_files": [],
-        }
+        return await _ingest_zip_contents(
+            db, user_id, patient_id, upload_id,
+            tsv_files[0].parent if tsv_files else None, json_files, unstructured_files,
+            checkpoint,
+        )
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
-        # Process structured content
-        if tsv_files:
-            tsv_dir = tsv_files[0].parent
-            epic_stats = await _ingest_epic_dir(db, user_id, patient_id, upload_id, tsv_dir)
-            stats["total_entries"] += epic_stats.get("total_files", 0)
-            stats["records_inserted"] += epic_stats.get("records_inserted", 0)
-            stats["records_skipped"] += epic_stats.get("records_skipped", 0)
-            stats["errors"].extend(epic_stats.get("errors", []))
-
-        if json_files:
-            for jf in json_files:
-                try:
-                    result = await _ingest_fhir(db, user_id, patient_id, upload_id, jf)
-                    stats["total_entries"] += result.get("total_entries", 0)
-                    stats["records_inserted"] += result.get("records_inserted", 0)
-                    stats["records_skipped"] += result.get("records_skipped", 0)
-                    stats["errors"].extend(result.get("errors", []))
-                except Exception as e:
-                    stats["errors"].append({"file": jf.name, "error": str(e)})
-
-        # Queue unstructured files for extraction
-        if unstructured_files:
-            for uf in unstructured_files:
-                try:
-                    # Copy to upload dir with UUID filename
-                    dest_name = f"{uuid4()}{uf.suffix}"
-                    dest_path = Path(settings.upload_dir) / dest_name
-                    dest_path.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(uf, dest_path)
-
-                    # Determine mime type
-                    suffix = uf.suffix.lower()
-                    mime_map = {
-                        ".pdf": "application/pdf",
-                        ".rtf": "application/rtf",
-                        ".tif": "image/tiff",
-                        ".tiff": "image/tiff",
-                    }
-
-                    unstr_upload = UploadedFile(
-                        id=uuid4(),
-                        user_id=user_id,
-                        filename=uf.name,
-                        mime_type=mime_map.get(suffix, "application/octet-stream"),
-                        file_size_bytes=uf.stat().st_size,
-                        file_hash=compute_file_hash(uf),
-                        storage_path=str(dest_path),
-                        ingestion_status="pending_extraction",
-                        file_category="unstructured",
-                    )
-                    db.add(unstr_upload)
-                    stats["unstructured_files"].append({
-                        "upload_id": str(unstr_upload.id),
-                        "filename": uf.name,
-                        "status": "pending_extraction",
-                    })
-                except Exception as e:
-                    stats["errors"].append({"file": uf.name, "error": str(e)})
 
-            await db.commit()
+async def _ingest_zip_contents(
+    db: AsyncSession,
+    user_id: UUID,
+    patient_id: UUID,
+    upload_id: UUID,
+    epic_export: Path | list[ZipMember] | None,
+    json_files: list[Path] | list[ZipMember],
+    unstructured_files: list[Path] | list[ZipMember],
+    checkpoint: IngestCheckpoint | None = None,
+) -> dict:
+    """Ingest the classified contents of a (non-XDM) ZIP.
 
-        if not tsv_files and not json_files and not unstructured_files:
-            raise ValueError("ZIP contains no processable files")
+    With a ``checkpoint`` each part (the Epic export, every JSON bundle, the
+    unstructured files) is resumed or skipped on its own. JSON bundles are
+    mapped concurrently (``bundle_engine``) and written one after another in
+    name order, each summarized in ``files_detail``.
+    """
+    stats = {
+        "total_entries": 0,
+        "records_inserted": 0,
+        "records_skipped": 0,
+        "errors": [],
+        "unstructured_files": [],
+        "files_detail": [],
+    }
+    json_files = sorted(json_files, key=str)
+
+    def bundle_jobs() -> Iterator[tuple[Path | ZipMember, MemberBytes | Exception | None]]:
+        for jf in json_files:
+            done = checkpoint is not None and checkpoint.completed(
+                _checkpoint_source("fhir", jf)
+            ) is not None
+            if done or source_size(jf) > STREAMING_BUNDLE_BYTES:
+                yield jf, None  # finished earlier, or streamed by the writer
+                continue
+            try:
+                with open_binary(jf) as f:
+                    payload: MemberBytes | Exception = MemberBytes(source_name(jf), f.read())
+            except HTTPException:
+                raise
+            except Exception as e:
+                payload = e
+            yield jf, payload
+
+    # Process structured content
+    if epic_export:
+        epic_stats = await _ingest_epic_dir(
+            db, user_id, patient_id, upload_id, epic_export, checkpoint
+        )
+        stats["total_entries"] += epic_stats.get("total_files", 0)
+        stats["records_inserted"] += epic_stats.get("records_inserted", 0)
+        stats["records_skipped"] += epic_stats.get("records_skipped", 0)
+        stats["errors"].extend(epic_stats.get("errors", []))
 
-        return stats
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
+    async for mapping in iter_bundle_mappings(bundle_jobs()):
+        jf = mapping.source
+        try:
+            if mapping.error is not None:
+                raise mapping.error
+            result = await _ingest_fhir(
+                db, user_id, patient_id, upload_id, jf, checkpoint, mapped=mapping.bundle
+            )
+            stats["total_entries"] += result.get("total_entries", 0)
+            stats["records_inserted"] += result.get("records_inserted", 0)
+            stats["records_skipped"] += result.get("records_skipped", 0)
+            stats["errors"].extend(result.get("errors", []))
+            stats["files_detail"].append({
+                "file": source_name(jf),
+                "entries": result.get("total_entries", 0),
+                "records_inserted": result.get("records_inserted", 0),
+                "records_skipped": result.get("records_skipped", 0),
+                "errors": len(result.get("errors", [])),
+            })
+        except HTTPException:
+            raise
+        except Exception as e:
+            stats["errors"].append({"file": source_name(jf), "error": str(e)})
+            stats["files_detail"].append({"file": source_name(jf), "error": str(e)})
+
+    # Queue unstructured files for extraction
+    queued = checkpoint.completed("unstructured") if checkpoint is not None else None
+    if queued is not None:
+        stats["unstructured_files"] = queued["unstructured_files"]
+        stats["errors"].extend(queued["errors"])
+    elif unstructured_files:
+        errors_before = len(stats["errors"])
+        for uf in unstructured_files:
+            filename = source_name(uf)
+            try:
+                dest_path, size, file_hash = _store_unstructured(uf)
+                unstr_upload = UploadedFile(
+                    id=uuid4(),
+                    user_id=user_id,
+                    filename=filename,
+                    mime_type=_UNSTRUCTURED_MIME.get(
+                        uf.suffix.lower(), "application/octet-stream"
+                    ),
+                    file_size_bytes=size,
+                    file_hash=file_hash,
+                    storage_path=str(dest_path),
+                    ingestion_status="pending_extraction",
+                    file_category="unstructured",
+                )
+                db.add(unstr_upload)
+                stats["unstructured_files"].append({
+                    "upload_id": str(unstr_upload.id),
+                    "filename": filename,
+                    "status": "pending_extraction",
+                })
+            except HTTPException:
+                raise
+            except Exception as e:
+                stats["errors"].append({"file": filename, "error": str(e)})
+
+        if stats["unstructured_files"]:
+            await notify_extraction_queued(db)
+        if checkpoint is not None:
+            await checkpoint.finish(db, "unstructured", {
+                "unstructured_files": stats["unstructured_files"],
+                "errors": stats["errors"][errors_before:],
+            })
+        await db.commit()
+
+    if not epic_export and not json_files and not unstructured_files:
+        raise ValueError("ZIP contains no processable files")
+
+    return stats
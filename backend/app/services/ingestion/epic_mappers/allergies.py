@@ -14,7 +14,7 @@ class AllergyMapper(EpicMapper):
         if not allergen:
             return None
 
-        date_noted = self.parse_epic_date(self.safe_get(row, "DATE_NOTED"))
+        date_noted = self.parse_epic_date(self.safe_get(row, "DATE_NOTED"), "DATE_NOTED")
         severity_raw = self.safe_get(row, "SEVERITY_C_NAME").lower()
         status_raw = self.safe_get(row, "ALRGY_STATUS_C_NAME").lower()
 
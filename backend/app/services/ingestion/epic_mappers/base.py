@@ -4,6 +4,8 @@ from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Any
 
+from app.utils.date_parsing import epic_dates
+
 
 class EpicMapper(ABC):
     """Abstract base class for Epic table → FHIR resource mappers."""
@@ -20,23 +22,13 @@ class EpicMapper(ABC):
         ...
 
     @staticmethod
-    def parse_epic_date(value: str | None) -> datetime | None:
-        """Parse Epic date formats like '5/21/2024 12:00:00 AM'."""
-        if not value or not value.strip():
-            return None
-        formats = [
-            "%m/%d/%Y %I:%M:%S %p",
-            "%m/%d/%Y %H:%M:%S %p",
-            "%m/%d/%Y",
-            "%Y-%m-%d",
-            "%Y-%m-%dT%H:%M:%S",
-        ]
-        for fmt in formats:
-            try:
-                return datetime.strptime(value.strip(), fmt)
-            except ValueError:
-                continue
-        return None
+    def parse_epic_date(value: str | None, column: str | None = None) -> datetime | None:
+        """Parse Epic date formats like '5/21/2024 12:00:00 AM'.
+
+        Pass the source ``column`` so the format that parsed its previous value
+        is tried first (a column almost always uses one format throughout).
+        """
+        return epic_dates.parse(value, column)
 
     @staticmethod
     def safe_get(row: dict, key: str) -> str:
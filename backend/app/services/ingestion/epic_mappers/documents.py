@@ -14,7 +14,7 @@ class DocInformationMapper(EpicMapper):
         if not doc_type:
             return None
 
-        doc_date = self.parse_epic_date(self.safe_get(row, "DOC_RECV_TIME"))
+        doc_date = self.parse_epic_date(self.safe_get(row, "DOC_RECV_TIME"), "DOC_RECV_TIME")
         status_raw = self.safe_get(row, "DOC_STAT_C_NAME").lower()
 
         status = "current"
@@ -14,7 +14,7 @@ class EncounterDxMapper(EpicMapper):
         if not dx_name:
             return None
 
-        contact_date = self.parse_epic_date(self.safe_get(row, "CONTACT_DATE"))
+        contact_date = self.parse_epic_date(self.safe_get(row, "CONTACT_DATE"), "CONTACT_DATE")
         is_primary = self.safe_get(row, "PRIMARY_DX_YN") == "Y"
 
         resource: dict = {
@@ -10,7 +10,7 @@ class PatEncMapper(EpicMapper):
     primary_key_columns = ["PAT_ENC_CSN_ID"]
 
     def to_fhir(self, row: dict[str, str]) -> dict | None:
-        contact_date = self.parse_epic_date(self.safe_get(row, "CONTACT_DATE"))
+        contact_date = self.parse_epic_date(self.safe_get(row, "CONTACT_DATE"), "CONTACT_DATE")
         if not contact_date:
             return None
 
@@ -74,7 +74,7 @@ class PatEncMapper(EpicMapper):
             display = f"{provider}, {title}" if title else provider
             resource["participant"] = [{"individual": {"display": display}}]
 
-        discharge_date = self.parse_epic_date(self.safe_get(row, "HOSP_DISCHRG_TIME"))
+        discharge_date = self.parse_epic_date(self.safe_get(row, "HOSP_DISCHRG_TIME"), "HOSP_DISCHRG_TIME")
         if discharge_date:
             resource["period"]["end"] = discharge_date.isoformat()
 
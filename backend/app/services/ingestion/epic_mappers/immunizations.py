@@ -14,7 +14,7 @@ class ImmuneMapper(EpicMapper):
         if not vaccine_name:
             return None
 
-        immune_date = self.parse_epic_date(self.safe_get(row, "IMMUNE_DATE"))
+        immune_date = self.parse_epic_date(self.safe_get(row, "IMMUNE_DATE"), "IMMUNE_DATE")
         status_raw = self.safe_get(row, "IMMNZTN_STATUS_C_NAME").lower()
 
         status = "completed"
@@ -17,9 +17,9 @@ class OrderMedMapper(EpicMapper):
         if not med_name:
             return None
 
-        start_date = self.parse_epic_date(self.safe_get(row, "START_DATE"))
-        end_date = self.parse_epic_date(self.safe_get(row, "END_DATE"))
-        authored = self.parse_epic_date(self.safe_get(row, "ORDERING_DATE"))
+        start_date = self.parse_epic_date(self.safe_get(row, "START_DATE"), "START_DATE")
+        end_date = self.parse_epic_date(self.safe_get(row, "END_DATE"), "END_DATE")
+        authored = self.parse_epic_date(self.safe_get(row, "ORDERING_DATE"), "ORDERING_DATE")
         status_raw = self.safe_get(row, "ORDER_STATUS_C_NAME").lower()
 
         status = "active"
@@ -15,8 +15,8 @@ class ProblemListMapper(EpicMapper):
         if not description:
             return None
 
-        noted_date = self.parse_epic_date(self.safe_get(row, "NOTED_DATE"))
-        resolved_date = self.parse_epic_date(self.safe_get(row, "RESOLVED_DATE"))
+        noted_date = self.parse_epic_date(self.safe_get(row, "NOTED_DATE"), "NOTED_DATE")
+        resolved_date = self.parse_epic_date(self.safe_get(row, "RESOLVED_DATE"), "RESOLVED_DATE")
         status_raw = self.safe_get(row, "PROBLEM_STATUS_C_NAME").lower()
 
         clinical_status = "active"
@@ -76,7 +76,7 @@ class MedicalHxMapper(EpicMapper):
         if not dx_name:
             return None
 
-        hx_date = self.parse_epic_date(self.safe_get(row, "MEDICAL_HX_DATE"))
+        hx_date = self.parse_epic_date(self.safe_get(row, "MEDICAL_HX_DATE"), "MEDICAL_HX_DATE")
 
         resource = {
             "resourceType": "Condition",
@@ -23,7 +23,8 @@ class OrderProcMapper(EpicMapper):
         order_date = self.parse_epic_date(
             self.safe_get(row, "ORDER_INST")
             or self.safe_get(row, "ORDERING_DATE")
-            or self.safe_get(row, "ORDER_DATE")
+            or self.safe_get(row, "ORDER_DATE"),
+            "ORDER_INST",
         )
         status_raw = self.safe_get(row, "ORDER_STATUS_C_NAME").lower()
 
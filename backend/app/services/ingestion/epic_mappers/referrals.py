@@ -17,8 +17,8 @@ class ReferralMapper(EpicMapper):
         if not reason and not referral_prov:
             return None
 
-        start_date = self.parse_epic_date(self.safe_get(row, "START_DATE"))
-        exp_date = self.parse_epic_date(self.safe_get(row, "EXP_DATE"))
+        start_date = self.parse_epic_date(self.safe_get(row, "START_DATE"), "START_DATE")
+        exp_date = self.parse_epic_date(self.safe_get(row, "EXP_DATE"), "EXP_DATE")
         status_raw = self.safe_get(row, "RFL_STATUS_C_NAME").lower()
 
         status = "active"
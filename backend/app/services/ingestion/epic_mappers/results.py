@@ -14,7 +14,7 @@ class OrderResultsMapper(EpicMapper):
         if not component_name:
             return None
 
-        result_date = self.parse_epic_date(self.safe_get(row, "RESULT_DATE"))
+        result_date = self.parse_epic_date(self.safe_get(row, "RESULT_DATE"), "RESULT_DATE")
         value = self.safe_get(row, "ORD_VALUE")
         num_value = self.safe_get(row, "ORD_NUM_VALUE")
         unit = self.safe_get(row, "REFERENCE_UNIT")
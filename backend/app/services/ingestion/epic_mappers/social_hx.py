@@ -27,7 +27,8 @@ class SocialHxMapper(EpicMapper):
 
         contact_date = self.parse_epic_date(
             self.safe_get(row, "CONTACT_DATE")
-            or self.safe_get(row, "ENTRY_DATE")
+            or self.safe_get(row, "ENTRY_DATE"),
+            "CONTACT_DATE",
         )
 
         resource: dict = {
@@ -21,7 +21,8 @@ class VitalsMapper(EpicMapper):
 
         recorded_date = self.parse_epic_date(
             self.safe_get(row, "RECORDED_TIME")
-            or self.safe_get(row, "ENTRY_TIME")
+            or self.safe_get(row, "ENTRY_TIME"),
+            "RECORDED_TIME",
         )
 
         resource: dict = {
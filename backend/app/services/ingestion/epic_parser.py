@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import Any
 from uuid import UUID
 
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.ingestion.epic_mappers.base import EpicMapper
@@ -23,8 +24,9 @@ from app.services.ingestion.epic_mappers.results import OrderResultsMapper
 from app.services.ingestion.epic_mappers.social_hx import SocialHxMapper
 from app.services.ingestion.epic_mappers.vitals import VitalsMapper
 from app.services.ingestion.fhir_parser import build_display_text
-from app.services.ingestion.idempotent_inserter import idempotent_insert_records
+from app.services.ingestion.checkpoint import BatchWriter, IngestCheckpoint
 from app.services.ingestion.identity import epic_identity
+from app.services.ingestion.zip_members import ZipMember, open_text
 
 logger = logging.getLogger(__name__)
 
@@ -64,20 +66,30 @@ RECORD_TYPE_MAP = {
 
 
 async def parse_epic_export(
-    export_dir: Path,
+    export_dir: Path | list[ZipMember],
     user_id: UUID,
     patient_id: UUID,
     source_file_id: UUID | None,
     db: AsyncSession,
     batch_size: int = 100,
     progress_callback: Any = None,
+    checkpoint: IngestCheckpoint | None = None,
+    source: str = "epic",
 ) -> dict:
     """Process an Epic EHI Tables export directory.
 
     Files are processed one at a time, rows streamed row-by-row.
-    Returns detailed stats including per-file breakdown.
+    ``export_dir`` may instead be the TSV members of an uploaded ZIP, read in
+    place. With a ``checkpoint`` the table and row index reached are saved as
+    ``source`` with every committed batch, and a resumed job continues from
+    there. Returns detailed stats including per-file breakdown.
     """
-    tsv_files = sorted(export_dir.glob("*.tsv"))
+    if checkpoint is not None and (done := checkpoint.completed(source)) is not None:
+        return done
+    if isinstance(export_dir, Path):
+        tsv_files = sorted(export_dir.glob("*.tsv"))
+    else:
+        tsv_files = sorted(export_dir, key=lambda m: m.name)
     total_files = len(tsv_files)
     stats: dict[str, Any] = {
         "total_files": total_files,
@@ -88,9 +100,27 @@ async def parse_epic_export(
         "files_detail": [],
         "files_skipped": [],
     }
+    resume_at: dict | None = None
+    if checkpoint is not None and (resumed := checkpoint.resume(source)) is not None:
+        resume_at, stats = resumed
+        logger.info("Resuming Epic export at %s row %s", resume_at["table"], resume_at.get("row"))
+    writer = BatchWriter(db, stats, checkpoint, source)
 
     for file_idx, tsv_path in enumerate(tsv_files):
         table_name = tsv_path.stem.upper()
+        start_row = rows_skipped = 0
+        inserted_before = stats["records_inserted"]
+        if resume_at is not None:
+            # Tables before the checkpoint are already in the saved stats.
+            if table_name != resume_at["table"]:
+                continue
+            position, resume_at = resume_at, None
+            if position.get("done"):
+                continue
+            start_row = position["row"]
+            rows_skipped = position["skipped"]
+            inserted_before = position["inserted_before"]
+
         mapper = EPIC_TABLE_MAPPERS.get(table_name)
         if not mapper:
             stats["files_skipped"].append(table_name)
@@ -99,14 +129,14 @@ async def parse_epic_export(
 
         logger.info("Processing Epic table: %s (%d/%d)", table_name, file_idx + 1, total_files)
         batch = []
-        row_count = 0
-        rows_inserted = 0
-        rows_skipped = 0
+        row_count = start_row
 
         try:
-            with open(tsv_path, "r", encoding="utf-8-sig") as f:
+            with open_text(tsv_path, encoding="utf-8-sig") as f:
                 reader = csv.DictReader(f, delimiter="\t")
                 for row_idx, row in enumerate(reader):
+                    if row_idx < start_row:
+                        continue  # committed by an earlier run of this job
                     row_count += 1
                     try:
                         fhir_resource = mapper.to_fhir(row)
@@ -157,17 +187,12 @@ async def parse_epic_export(
                         batch.append(mapped)
 
                         if len(batch) >= batch_size:
-                            result = await idempotent_insert_records(db, batch)
-                            rows_inserted += result["inserted"]
-                            stats["records_inserted"] += result["inserted"]
-                            stats["records_updated"] = (
-                                stats.get("records_updated", 0) + result["updated"]
-                            )
-                            stats["records_unchanged"] = (
-                                stats.get("records_unchanged", 0) + result["unchanged"]
-                            )
-                            batch.clear()
-                            await db.commit()
+                            await writer.write(batch, {
+                                "table": table_name,
+                                "row": row_idx + 1,
+                                "skipped": rows_skipped,
+                                "inserted_before": inserted_before,
+                            })
 
                     except Exception as e:
                         stats["errors"].append(
@@ -176,20 +201,20 @@ async def parse_epic_export(
                         continue
 
             if batch:
-                result = await idempotent_insert_records(db, batch)
-                rows_inserted += result["inserted"]
-                stats["records_inserted"] += result["inserted"]
-                stats["records_updated"] = stats.get("records_updated", 0) + result["updated"]
-                stats["records_unchanged"] = (
-                    stats.get("records_unchanged", 0) + result["unchanged"]
-                )
-                batch.clear()
-                await db.commit()
-
+                await writer.write(batch, {
+                    "table": table_name,
+                    "row": row_count,
+                    "skipped": rows_skipped,
+                    "inserted_before": inserted_before,
+                })
+
+        except HTTPException:
+            raise  # zip-bomb budget breach reading a ZIP member: reject the upload
         except Exception as e:
             stats["errors"].append({"file": table_name, "error": str(e)})
             logger.error("Error processing %s: %s", table_name, e)
 
+        rows_inserted = stats["records_inserted"] - inserted_before
         stats["files_processed"] += 1
         stats["files_detail"].append({
             "table_name": table_name,
@@ -197,11 +222,14 @@ async def parse_epic_export(
             "rows_inserted": rows_inserted,
             "rows_skipped": rows_skipped,
         })
+        if checkpoint is not None:
+            await writer.write([], {"table": table_name, "done": True})
         logger.info("Processed %s: %d rows, %d inserted", table_name, row_count, rows_inserted)
 
         if progress_callback:
             await progress_callback(file_idx + 1, total_files, stats["records_inserted"])
 
+    await writer.write([], None)
     logger.info(
         "Epic export processing complete: %d files, %d records, %d errors",
         stats["files_processed"],
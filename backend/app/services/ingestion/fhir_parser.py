@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import dataclasses
 import json
 import logging
 from collections.abc import Iterable
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -10,11 +12,27 @@ from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services.ingestion.fhir_validation import validate_and_log_fhir
-from app.services.ingestion.idempotent_inserter import idempotent_insert_records
+from app.services.ingestion.checkpoint import BatchWriter, IngestCheckpoint
+from app.services.ingestion.fhir_validation import (
+    ValidationEngine,
+    current_validation,
+    validate_and_log_fhir,
+    validation_scope,
+)
+from app.services.ingestion.zip_members import (
+    MemberBytes,
+    ZipMember,
+    open_binary,
+    open_text,
+    source_size,
+)
+from app.utils.date_parsing import fhir_dates
 
 logger = logging.getLogger(__name__)
 
+# Bundles larger than this are streamed (ijson) instead of loaded whole.
+STREAMING_BUNDLE_BYTES = 10 * 1024 * 1024
+
 SUPPORTED_RESOURCE_TYPES = {
     "Condition": "condition",
     "Observation": "observation",
@@ -51,17 +69,18 @@ def extract_effective_date(resource: dict) -> datetime | None:
         "sent",
         "start",
     ]
+    resource_type = resource.get("resourceType")
     for field in date_fields:
         val = resource.get(field)
         if val:
-            return _parse_fhir_date(val)
+            return _parse_fhir_date(val, f"{resource_type}.{field}")
 
     period = resource.get("effectivePeriod") or resource.get("period")
     if period and period.get("start"):
-        return _parse_fhir_date(period["start"])
+        return _parse_fhir_date(period["start"], f"{resource_type}.period.start")
 
     if resource.get("meta", {}).get("lastUpdated"):
-        return _parse_fhir_date(resource["meta"]["lastUpdated"])
+        return _parse_fhir_date(resource["meta"]["lastUpdated"], "meta.lastUpdated")
 
     return None
 
@@ -70,39 +89,22 @@ def extract_effective_date_end(resource: dict) -> datetime | None:
     """Extract end date from a FHIR resource period."""
     period = resource.get("effectivePeriod") or resource.get("period")
     if period and period.get("end"):
-        return _parse_fhir_date(period["end"])
+        return _parse_fhir_date(period["end"], f"{resource.get('resourceType')}.period.end")
     return None
 
 
-def _parse_fhir_date(value: str) -> datetime | None:
-    """Parse various FHIR date/datetime formats."""
+def _parse_fhir_date(value: str, key: str | None = None) -> datetime | None:
+    """Parse various FHIR date/datetime formats.
+
+    ``key`` names the field the value came from so its format is tried first
+    next time (see ``app.utils.date_parsing``).
+    """
     if not value:
         return None
-    formats = [
-        "%Y-%m-%dT%H:%M:%S%z",
-        "%Y-%m-%dT%H:%M:%S.%f%z",
-        "%Y-%m-%dT%H:%M:%S",
-        "%Y-%m-%dT%H:%M:%S.%f",
-        "%Y-%m-%d",
-        "%Y-%m",
-        "%Y",
-    ]
-    for fmt in formats:
-        try:
-            return datetime.strptime(value, fmt)
-        except ValueError:
-            continue
-    # Handle timezone offsets like -07:00
-    if "T" in value:
-        try:
-            clean = value
-            if clean.endswith("Z"):
-                clean = clean[:-1] + "+00:00"
-            return datetime.fromisoformat(clean)
-        except ValueError:
-            pass
-    logger.debug("Could not parse FHIR date: %s", value)
-    return None
+    parsed = fhir_dates.parse(value, key)
+    if parsed is None:
+        logger.debug("Could not parse FHIR date: %s", value)
+    return parsed
 
 
 def extract_coding(resource: dict) -> tuple[str | None, str | None, str | None]:
@@ -502,30 +504,109 @@ def map_fhir_resource(resource: dict, ref_map: dict[str, str] | None = None) ->
     }
 
 
+@dataclass
+class MappedBundle:
+    """A bundle mapped by :func:`map_bundle`, ready to be written (picklable).
+
+    ``entries`` holds one outcome per bundle entry: the insert dict (without
+    user/patient/source ids), an error message, or None for a skipped entry.
+    ``validation`` is the bundle's FHIR validation report when it was mapped
+    outside the upload's validation scope (in a worker process).
+    """
+
+    total_entries: int
+    patient: dict | None
+    entries: list[dict | str | None]
+    validation: dict | None = dataclasses.field(default=None, compare=False)
+
+
+def map_bundle(file_path: Path | ZipMember | MemberBytes) -> MappedBundle:
+    """Load a bundle that fits in memory and map every entry.
+
+    Pure CPU work with no database access, so it can run in a worker thread or
+    process (``bundle_engine``). Also picks out the bundle's first Patient.
+    """
+    if current_validation() is None:
+        # A worker process: validate into a report the writer merges.
+        with validation_scope(ValidationEngine(run_async=False)) as validation:
+            bundle = map_bundle(file_path)
+        bundle.validation = validation.report()
+        return bundle
+
+    if isinstance(file_path, MemberBytes):
+        data = json.loads(file_path.data.decode("utf-8-sig"))
+    else:
+        with open_text(file_path, encoding="utf-8-sig") as f:
+            data = json.load(f)
+
+    is_bundle = data.get("resourceType") == "Bundle"
+    entries = data.get("entry", []) if is_bundle else [{"resource": data}]
+
+    # Index Practitioner/Organization/Location names so encounters can resolve
+    # reference-only providers/facilities to readable names.
+    ref_map = build_reference_name_map(entries)
+    patient = None
+    outcomes: list[dict | str | None] = []
+    for entry in entries:
+        resource = entry.get("resource")
+        if not resource:
+            outcomes.append(None)
+            continue
+        if resource.get("resourceType") == "Patient":
+            if patient is None and is_bundle:
+                patient = resource
+            outcomes.append(None)
+            continue
+        try:
+            outcomes.append(map_fhir_resource(resource, ref_map))
+        except Exception as e:
+            outcomes.append(str(e))
+    return MappedBundle(len(entries), patient, outcomes)
+
+
 async def parse_fhir_bundle(
-    file_path: Path,
+    file_path: Path | ZipMember,
     user_id: UUID,
     patient_id: UUID,
     source_file_id: UUID | None,
     db: AsyncSession,
     batch_size: int = 100,
     progress_callback: Any = None,
+    checkpoint: IngestCheckpoint | None = None,
+    source: str = "bundle",
+    mapped: MappedBundle | None = None,
 ) -> dict:
     """Parse a FHIR R4 JSON bundle and insert records into the database.
 
+    ``file_path`` may also be a member of an uploaded ZIP, read in place.
+    With a ``checkpoint`` the number of entries consumed is saved as
+    ``source`` with every committed batch, and a resumed job skips them.
+    ``mapped`` is the bundle already mapped by :func:`map_bundle` (off the
+    event loop); only its records are written then.
     Returns a summary dict with counts.
     """
-    file_size = file_path.stat().st_size
+    if checkpoint is not None and (done := checkpoint.completed(source)) is not None:
+        return done
+    if mapped is not None and mapped.validation and (validation := current_validation()):
+        validation.merge(mapped.validation)
+    file_size = source_size(file_path)
     stats = {"total_entries": 0, "records_inserted": 0, "records_skipped": 0, "errors": []}
+    start = 0
+    if checkpoint is not None and (resumed := checkpoint.resume(source)) is not None:
+        start, stats = resumed
+        logger.info("Resuming FHIR bundle %s at entry %d", source, start)
 
-    if file_size > 10 * 1024 * 1024:
+    writer = BatchWriter(db, stats, checkpoint, source)
+    if mapped is None and file_size > STREAMING_BUNDLE_BYTES:
         # Use streaming parser for large files
         stats = await _parse_large_bundle(
-            file_path, user_id, patient_id, source_file_id, db, batch_size, progress_callback
+            file_path, user_id, patient_id, source_file_id, batch_size, progress_callback,
+            writer, start,
         )
     else:
         stats = await _parse_small_bundle(
-            file_path, user_id, patient_id, source_file_id, db, batch_size, progress_callback
+            mapped or map_bundle(file_path), user_id, patient_id, source_file_id, batch_size,
+            progress_callback, writer, start,
         )
 
     logger.info(
@@ -539,101 +620,70 @@ async def parse_fhir_bundle(
 
 
 async def _parse_small_bundle(
-    file_path: Path,
+    bundle: MappedBundle,
     user_id: UUID,
     patient_id: UUID,
     source_file_id: UUID | None,
-    db: AsyncSession,
     batch_size: int,
     progress_callback: Any,
+    writer: BatchWriter,
+    start: int,
 ) -> dict:
-    """Parse a FHIR bundle that fits in memory."""
-    with open(file_path, "r", encoding="utf-8-sig") as f:
-        data = json.load(f)
-
-    stats = {"total_entries": 0, "records_inserted": 0, "records_skipped": 0, "errors": []}
-
-    resource_type = data.get("resourceType")
-    if resource_type == "Bundle":
-        entries = data.get("entry", [])
-    else:
-        entries = [{"resource": data}]
-
-    stats["total_entries"] = len(entries)
-    # Index Practitioner/Organization/Location names so encounters can resolve
-    # reference-only providers/facilities to readable names.
-    ref_map = build_reference_name_map(entries)
+    """Write a FHIR bundle that fits in memory, mapped by :func:`map_bundle`."""
+    stats = writer.stats
+    stats["total_entries"] = bundle.total_entries
     batch = []
 
-    for i, entry in enumerate(entries):
-        resource = entry.get("resource")
-        if not resource:
-            stats["records_skipped"] += 1
+    for i, mapped in enumerate(bundle.entries):
+        if i < start:
+            continue  # committed by an earlier run of this job
+        if isinstance(mapped, str):
+            stats["errors"].append({"entry_index": i, "error": mapped})
             continue
-
-        rt = resource.get("resourceType")
-        if rt == "Patient":
+        if not mapped:
             stats["records_skipped"] += 1
             continue
-
-        try:
-            mapped = map_fhir_resource(resource, ref_map)
-            if mapped:
-                mapped["user_id"] = user_id
-                mapped["patient_id"] = patient_id
-                mapped["source_file_id"] = source_file_id
-                batch.append(mapped)
-            else:
-                stats["records_skipped"] += 1
-        except Exception as e:
-            stats["errors"].append({"entry_index": i, "error": str(e)})
-            continue
+        mapped["user_id"] = user_id
+        mapped["patient_id"] = patient_id
+        mapped["source_file_id"] = source_file_id
+        batch.append(mapped)
 
         if len(batch) >= batch_size:
-            result = await idempotent_insert_records(db, batch)
-            stats["records_inserted"] += result["inserted"]
-            stats["records_updated"] = stats.get("records_updated", 0) + result["updated"]
-            stats["records_unchanged"] = stats.get("records_unchanged", 0) + result["unchanged"]
-            batch.clear()
-            await db.commit()
+            await writer.write(batch, i + 1)
             if progress_callback:
                 await progress_callback(i + 1, stats["total_entries"], stats["records_inserted"])
 
-    if batch:
-        result = await idempotent_insert_records(db, batch)
-        stats["records_inserted"] += result["inserted"]
-        stats["records_updated"] = stats.get("records_updated", 0) + result["updated"]
-        stats["records_unchanged"] = stats.get("records_unchanged", 0) + result["unchanged"]
-        batch.clear()
-        await db.commit()
-
+    await writer.write(batch, None)
     return stats
 
 
 async def _parse_large_bundle(
-    file_path: Path,
+    file_path: Path | ZipMember,
     user_id: UUID,
     patient_id: UUID,
     source_file_id: UUID | None,
-    db: AsyncSession,
     batch_size: int,
     progress_callback: Any,
+    writer: BatchWriter,
+    start: int,
 ) -> dict:
     """Parse a large FHIR bundle using streaming JSON parser."""
     import ijson
 
-    stats = {"total_entries": 0, "records_inserted": 0, "records_skipped": 0, "errors": []}
+    stats = writer.stats
     batch = []
 
     # First streaming pass: index Practitioner/Organization/Location names only
     # (small even in large bundles — just id→name strings) so the main pass can
     # resolve encounter reference-only providers/facilities/locations.
-    with open(file_path, "rb") as f:
+    with open_binary(file_path) as f:
         ref_map = build_reference_name_map(ijson.items(f, "entry.item"))
 
-    with open(file_path, "rb") as f:
+    with open_binary(file_path) as f:
         entries = ijson.items(f, "entry.item")
         for i, entry in enumerate(entries):
+            if i < start:
+                continue  # committed by an earlier run of this job
             stats["total_entries"] += 1
             resource = entry.get("resource")
             if not resource:
@@ -659,12 +709,7 @@ async def _parse_large_bundle(
                 continue
 
             if len(batch) >= batch_size:
-                result = await idempotent_insert_records(db, batch)
-                stats["records_inserted"] += result["inserted"]
-                stats["records_updated"] = stats.get("records_updated", 0) + result["updated"]
-                stats["records_unchanged"] = stats.get("records_unchanged", 0) + result["unchanged"]
-                batch.clear()
-                await db.commit()
+                await writer.write(batch, i + 1)
                 if progress_callback:
                     await progress_callback(
                         stats["total_entries"],
@@ -672,12 +717,5 @@ async def _parse_large_bundle(
                         stats["records_inserted"],
                     )
 
-    if batch:
-        result = await idempotent_insert_records(db, batch)
-        stats["records_inserted"] += result["inserted"]
-        stats["records_updated"] = stats.get("records_updated", 0) + result["updated"]
-        stats["records_unchanged"] = stats.get("records_unchanged", 0) + result["unchanged"]
-        batch.clear()
-        await db.commit()
-
+    await writer.write(batch, None)
     return stats
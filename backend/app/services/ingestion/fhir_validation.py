@@ -27,8 +27,17 @@ Posture (mirrors the existing PHI-NER / medication-refresh design):
 
 from __future__ import annotations
 
+import asyncio
+import copy
+import hashlib
 import importlib
 import logging
+import random
+import threading
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import Any
 
 from pydantic import ValidationError
@@ -128,15 +137,21 @@ def validate_fhir_structure(resource: Any, record_type: str | None = None) -> li
     ``record_type`` is the app's record type (e.g. ``"observation"``); it is
     informational — model selection is driven by ``resourceType``.
     """
+    return _check_structure(resource) or []
+
+
+def _check_structure(resource: Any) -> list[str] | None:
+    """Like :func:`validate_fhir_structure`, but None when the resource was
+    skipped or validation failed open — so only a real pass gets cached."""
     try:
         if not isinstance(resource, dict):
-            return []
+            return None
         resource_type = resource.get("resourceType")
         if not resource_type:
-            return []
+            return None
         model = _get_model(resource_type)
         if model is None:
-            return []
+            return None
         # Strip app-internal, non-FHIR keys so they don't trip extra-field guards.
         cleaned = {k: v for k, v in resource.items() if k not in _APP_INTERNAL_KEYS}
         try:
@@ -148,7 +163,238 @@ def validate_fhir_structure(resource: Any, record_type: str | None = None) -> li
         # Fail-open, non-latching: a library/validation hiccup must never block
         # ingestion, and we keep no "disabled" flag so the next call retries.
         logger.debug("FHIR structural validation crashed; failing open", exc_info=True)
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Validation engine: sampling, shape cache, deferred checks, per-upload report
+# ---------------------------------------------------------------------------
+#
+# Building the pydantic model for every mapped resource costs more than the
+# mapping itself on large bundles. Three levers cut that:
+#
+# * **Sampling** (``fhir_validation_sampling``): ``sample`` checks a random
+#   share of resources, ``first-n-per-type`` only the first N of each
+#   resourceType in an upload. ``all`` checks everything.
+# * **Shape cache**: a resource's *shape* — its keys and value types, nested,
+#   ignoring values and list lengths — decides almost every structural error.
+#   A shape that validated clean is remembered and skipped next time; shapes
+#   with problems are never cached, so drift keeps being reported. Value-level
+#   drift (an unknown ``status`` code) in a resource shaped like a clean one
+#   is the price.
+# * **Deferred checks** (``fhir_validation_async``): validation runs on a small
+#   thread pool while the ingest path carries on. It validates a snapshot, as
+#   ingest keeps mutating the resource dict, and at most ``_ASYNC_QUEUE_MAX``
+#   checks wait in the pool; past that the ingest path validates inline.
+#
+# Structured ingest opens a :func:`validation_scope` per upload; everything
+# validated inside it (including on threads that copy the context) is tallied
+# into one :class:`ValidationEngine`, whose :meth:`~ValidationEngine.report`
+# is stored as ``uploaded_files.validation_report``.
+
+_SHAPE_CACHE_MAX = 10_000
+_valid_shapes: set[bytes] = set()
+
+_ASYNC_WORKERS = 2
+_ASYNC_QUEUE_MAX = 256
+_async_pool: ThreadPoolExecutor | None = None
+_async_slots = threading.BoundedSemaphore(_ASYNC_QUEUE_MAX)
+
+# Problem strings kept per resourceType in a report (the count is exact).
+_REPORT_EXAMPLES = 5
+
+_current_engine: ContextVar[ValidationEngine | None] = ContextVar(
+    "fhir_validation_engine", default=None
+)
+
+
+def shape_fingerprint(resource: Any) -> bytes:
+    """Digest of a value's structure: dict keys and leaf types, recursively;
+    a list contributes the set of its items' shapes, not their number."""
+
+    def shape(value: Any) -> str:
+        if isinstance(value, dict):
+            return "{" + ",".join(f"{k}:{shape(value[k])}" for k in sorted(value)) + "}"
+        if isinstance(value, list):
+            return "[" + "|".join(sorted({shape(item) for item in value})) + "]"
+        return type(value).__name__
+
+    return hashlib.blake2b(shape(resource).encode(), digest_size=16).digest()
+
+
+def clear_shape_cache() -> None:
+    _valid_shapes.clear()
+
+
+def _get_async_pool() -> ThreadPoolExecutor:
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = ThreadPoolExecutor(
+            max_workers=_ASYNC_WORKERS, thread_name_prefix="fhir-validation"
+        )
+    return _async_pool
+
+
+def _log_problems(
+    problems: list[str], resource_type: str, record_type: str | None, ai_built: bool, mode: str
+) -> None:
+    context = f"resourceType={resource_type} record_type={record_type} ai_built={ai_built}"
+    detail = "; ".join(problems)
+
+    # ``strict`` is never applied to AI-built resources -> downgrade severity.
+    if mode == "strict" and not ai_built:
+        logger.error("FHIR structural drift (strict): %s | %s", context, detail)
+    else:
+        logger.warning("FHIR structural drift: %s | %s", context, detail)
+
+
+def _validate_and_log(
+    resource: Any, record_type: str | None, ai_built: bool, mode: str, shape: bytes | None
+) -> list[str]:
+    """Validate (through the shape cache when ``shape`` is given) and log."""
+    if shape is not None and shape in _valid_shapes:
+        return []
+    problems = _check_structure(resource)
+    if problems == [] and shape is not None:
+        if len(_valid_shapes) >= _SHAPE_CACHE_MAX:
+            _valid_shapes.clear()
+        _valid_shapes.add(shape)
+    if not problems:
         return []
+    resource_type = resource.get("resourceType", "?") if isinstance(resource, dict) else "?"
+    _log_problems(problems, resource_type, record_type, ai_built, mode)
+    return problems
+
+
+class ValidationEngine:
+    """Chooses which resources to validate and tallies one upload's drift.
+
+    Thread-safe: bundles mapped on worker threads share their upload's engine.
+    """
+
+    def __init__(self, sampling: str | None = None, *, run_async: bool | None = None) -> None:
+        self.sampling = sampling or settings.fhir_validation_sampling
+        self.run_async = settings.fhir_validation_async if run_async is None else run_async
+        self.checked = 0
+        self.sampled_out = 0
+        self._per_type: dict[str, int] = {}
+        self._drift: dict[str, dict] = {}
+        self._pending: list[Future] = []
+        self._lock = threading.Lock()
+
+    def _selected(self, resource_type: str) -> bool:
+        if self.sampling == "sample":
+            return random.random() < settings.fhir_validation_sample_rate
+        if self.sampling == "first-n-per-type":
+            with self._lock:
+                seen = self._per_type.get(resource_type, 0)
+                self._per_type[resource_type] = seen + 1
+            return seen < settings.fhir_validation_first_n
+        return True
+
+    def check(
+        self, resource: Any, record_type: str | None, ai_built: bool, mode: str
+    ) -> list[str]:
+        """Validate ``resource`` if selected; with ``run_async`` a copy of it
+        is queued (unless the queue is full) and the problems only reach the
+        log and :meth:`report`."""
+        resource_type = resource.get("resourceType", "?") if isinstance(resource, dict) else "?"
+        if not self._selected(resource_type):
+            with self._lock:
+                self.sampled_out += 1
+            return []
+        with self._lock:
+            self.checked += 1
+        shape = shape_fingerprint(resource) if settings.fhir_validation_shape_cache else None
+        if self.run_async and _async_slots.acquire(blocking=False):
+            try:
+                future = _get_async_pool().submit(
+                    self._validate,
+                    copy.deepcopy(resource), resource_type, record_type, ai_built, mode, shape,
+                )
+            except BaseException:
+                _async_slots.release()
+                raise
+            future.add_done_callback(lambda _f: _async_slots.release())
+            with self._lock:
+                self._pending.append(future)
+            return []
+        # Synchronous, or the deferred queue is full: validate here, which
+        # also slows the producer down until the pool catches up.
+        return self._validate(resource, resource_type, record_type, ai_built, mode, shape)
+
+    def _validate(
+        self,
+        resource: Any,
+        resource_type: str,
+        record_type: str | None,
+        ai_built: bool,
+        mode: str,
+        shape: bytes | None,
+    ) -> list[str]:
+        problems = _validate_and_log(resource, record_type, ai_built, mode, shape)
+        self._record(resource_type, problems)
+        return problems
+
+    def _record(self, resource_type: str, problems: list[str]) -> None:
+        if not problems:
+            return
+        with self._lock:
+            drift = self._drift.setdefault(resource_type, {"resources": 0, "examples": []})
+            drift["resources"] += 1
+            room = _REPORT_EXAMPLES - len(drift["examples"])
+            drift["examples"].extend(problems[:max(room, 0)])
+
+    def merge(self, report: dict) -> None:
+        """Fold in the :meth:`report` of a bundle validated in another process."""
+        with self._lock:
+            self.checked += report.get("checked", 0)
+            self.sampled_out += report.get("sampled_out", 0)
+            for resource_type, theirs in report.get("drift", {}).items():
+                drift = self._drift.setdefault(resource_type, {"resources": 0, "examples": []})
+                drift["resources"] += theirs["resources"]
+                room = _REPORT_EXAMPLES - len(drift["examples"])
+                drift["examples"].extend(theirs["examples"][:max(room, 0)])
+
+    def report(self) -> dict:
+        """What was checked and the drift found, once deferred checks finish."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        wait(pending)
+        with self._lock:
+            return {
+                "sampling": self.sampling,
+                "checked": self.checked,
+                "sampled_out": self.sampled_out,
+                "drift": {
+                    resource_type: dict(drift, examples=list(drift["examples"]))
+                    for resource_type, drift in sorted(self._drift.items())
+                },
+            }
+
+    async def areport(self) -> dict:
+        """:meth:`report` without blocking the event loop on deferred checks."""
+        with self._lock:
+            pending = list(self._pending)
+        if pending:
+            await asyncio.gather(*(asyncio.wrap_future(f) for f in pending), return_exceptions=True)
+        return self.report()
+
+
+def current_validation() -> ValidationEngine | None:
+    """The engine of the enclosing :func:`validation_scope`, if any."""
+    return _current_engine.get()
+
+
+@contextmanager
+def validation_scope(engine: ValidationEngine | None = None) -> Iterator[ValidationEngine]:
+    """Route validation in this context (one upload) through ``engine``."""
+    engine = engine or ValidationEngine()
+    token = _current_engine.set(engine)
+    try:
+        yield engine
+    finally:
+        _current_engine.reset(token)
 
 
 def validate_and_log_fhir(
@@ -162,26 +408,26 @@ def validate_and_log_fhir(
       for AI-built resources it is downgraded to WARNING ("strict is never
       applied to AI resources").
 
-    Always returns the problem list (possibly empty) and NEVER raises or blocks
-    — the resource is always still ingested. Production call sites use it purely
+    Inside a :func:`validation_scope` the scope's engine decides whether the
+    resource is checked at all and tallies the result; elsewhere ``sample``
+    still applies, while ``first-n-per-type`` and ``async`` (which need an
+    upload to count against and report to) validate inline.
+
+    Always returns the problem list (possibly empty; always empty when the
+    resource was skipped or deferred) and NEVER raises or blocks — the
+    resource is always still ingested. Production call sites use it purely
     for its logging side-effect.
     """
     mode = getattr(settings, "fhir_validation", "log")
     if mode == "off":
         return []
-
-    problems = validate_fhir_structure(resource, record_type)
-    if not problems:
+    engine = _current_engine.get()
+    if engine is not None:
+        return engine.check(resource, record_type, ai_built, mode)
+    if (
+        settings.fhir_validation_sampling == "sample"
+        and random.random() >= settings.fhir_validation_sample_rate
+    ):
         return []
-
-    resource_type = resource.get("resourceType", "?") if isinstance(resource, dict) else "?"
-    context = f"resourceType={resource_type} record_type={record_type} ai_built={ai_built}"
-    detail = "; ".join(problems)
-
-    # ``strict`` is never applied to AI-built resources -> downgrade severity.
-    if mode == "strict" and not ai_built:
-        logger.error("FHIR structural drift (strict): %s | %s", context, detail)
-    else:
-        logger.warning("FHIR structural drift: %s | %s", context, detail)
-
-    return problems
+    shape = shape_fingerprint(resource) if settings.fhir_validation_shape_cache else None
+    return _validate_and_log(resource, record_type, ai_built, mode, shape)
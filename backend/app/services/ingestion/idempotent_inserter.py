@@ -16,13 +16,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.record import HealthRecord
 from app.models.record_version import RecordVersion
-from app.services.ingestion.content_hash import content_hash
+from app.services.ingestion.content_hash import content_digests, hashes_match
 from app.services.ingestion.identity import Identity, extract_identity
+from app.utils.metrics import RECORDS_WRITTEN, stage_timer
 
 logger = logging.getLogger(__name__)
 
-# existing identity -> (row_id, content_hash, version)
-ExistingMap = dict[tuple[str, str], tuple[Any, str | None, int]]
+# existing identity -> (row_id, content_hash, version[, content_hash_blake3])
+ExistingMap = dict[tuple[str, str], tuple[Any, ...]]
 
 
 @dataclass
@@ -33,6 +34,7 @@ class Plan:
     content_hash: str | None
     existing_id: Any = None
     new_version: int = 1
+    content_hash_blake3: str | None = None
 
 
 def plan_batch(records: list[dict[str, Any]], existing: ExistingMap) -> list[Plan]:
@@ -43,10 +45,12 @@ def plan_batch(records: list[dict[str, Any]], existing: ExistingMap) -> list[Pla
     for rec in records:
         ident = extract_identity(rec)
         resource = rec.get("fhir_resource") or {}
-        chash = content_hash(resource) if isinstance(resource, dict) and resource else None
+        digests = content_digests(resource) if isinstance(resource, dict) and resource else None
+        chash = digests.sha256 if digests else None
+        bhash = digests.blake3 if digests else None
 
         if ident is None:
-            plans.append(Plan(rec, "insert", None, chash))
+            plans.append(Plan(rec, "insert", None, chash, content_hash_blake3=bhash))
             continue
 
         key = (ident.source_system, ident.external_id)
@@ -54,10 +58,10 @@ def plan_batch(records: list[dict[str, Any]], existing: ExistingMap) -> list[Pla
         # Within-batch duplicate identity.
         if key in seen_in_batch:
             prior_idx = seen_in_batch[key]
-            if plans[prior_idx].content_hash == chash:
-                plans.append(Plan(rec, "skip", ident, chash))
+            prior = plans[prior_idx]
+            if hashes_match(prior.content_hash, prior.content_hash_blake3, digests):
+                plans.append(Plan(rec, "skip", ident, chash, content_hash_blake3=bhash))
             else:
-                prior = plans[prior_idx]
                 plans.append(
                     Plan(
                         rec,
@@ -66,6 +70,7 @@ def plan_batch(records: list[dict[str, Any]], existing: ExistingMap) -> list[Pla
                         chash,
                         existing_id=prior_idx,
                         new_version=prior.new_version + 1,
+                        content_hash_blake3=bhash,
                     )
                 )
             continue
@@ -73,15 +78,24 @@ def plan_batch(records: list[dict[str, Any]], existing: ExistingMap) -> list[Pla
         seen_in_batch[key] = len(plans)
 
         if key in existing:
-            row_id, old_hash, old_version = existing[key]
-            if old_hash == chash:
-                plans.append(Plan(rec, "skip", ident, chash, existing_id=row_id, new_version=old_version))
+            row_id, old_hash, old_version, *rest = existing[key]
+            old_blake3 = rest[0] if rest else None
+            if hashes_match(old_hash, old_blake3, digests):
+                plans.append(
+                    Plan(
+                        rec, "skip", ident, chash, existing_id=row_id,
+                        new_version=old_version, content_hash_blake3=bhash,
+                    )
+                )
             else:
                 plans.append(
-                    Plan(rec, "update", ident, chash, existing_id=row_id, new_version=old_version + 1)
+                    Plan(
+                        rec, "update", ident, chash, existing_id=row_id,
+                        new_version=old_version + 1, content_hash_blake3=bhash,
+                    )
                 )
         else:
-            plans.append(Plan(rec, "insert", ident, chash))
+            plans.append(Plan(rec, "insert", ident, chash, content_hash_blake3=bhash))
 
     return plans
 
@@ -97,6 +111,7 @@ async def _load_existing(db: AsyncSession, user_id: Any, identities: list[Identi
             HealthRecord.external_id,
             HealthRecord.content_hash,
             HealthRecord.version,
+            HealthRecord.content_hash_blake3,
         ).where(
             HealthRecord.user_id == user_id,
             HealthRecord.deleted_at.is_(None),
@@ -104,11 +119,19 @@ async def _load_existing(db: AsyncSession, user_id: Any, identities: list[Identi
         )
     )
     return {
-        (r.source_system, r.external_id): (r.id, r.content_hash, r.version) for r in result.all()
+        (r.source_system, r.external_id): (
+            r.id, r.content_hash, r.version, r.content_hash_blake3
+        )
+        for r in result.all()
     }
 
 
-def _build_row(rec: dict[str, Any], ident: Identity | None, chash: str | None) -> HealthRecord:
+def _build_row(
+    rec: dict[str, Any],
+    ident: Identity | None,
+    chash: str | None,
+    bhash: str | None = None,
+) -> HealthRecord:
     return HealthRecord(
         id=uuid.uuid4(),
         patient_id=rec["patient_id"],
@@ -131,6 +154,7 @@ def _build_row(rec: dict[str, Any], ident: Identity | None, chash: str | None) -
         external_id=ident.external_id if ident else None,
         source_system=ident.source_system if ident else None,
         content_hash=chash,
+        content_hash_blake3=bhash,
         version=1,
     )
 
@@ -138,6 +162,15 @@ def _build_row(rec: dict[str, Any], ident: Identity | None, chash: str | None) -
 async def idempotent_insert_records(db: AsyncSession, records: list[dict[str, Any]]) -> dict:
     """Insert new records, update changed ones (snapshotting prior versions),
     skip identical ones. Returns counts + the list of newly inserted record dicts."""
+    with stage_timer("structured", "db_write"):
+        result = await _insert_records(db, records)
+    for action in ("inserted", "updated", "unchanged"):
+        if result[action]:
+            RECORDS_WRITTEN.inc(result[action], pipeline="structured", action=action)
+    return result
+
+
+async def _insert_records(db: AsyncSession, records: list[dict[str, Any]]) -> dict:
     if not records:
         return {"inserted": 0, "updated": 0, "unchanged": 0, "inserted_records": []}
 
@@ -157,7 +190,7 @@ async def idempotent_insert_records(db: AsyncSession, records: list[dict[str, An
 
     for idx, p in enumerate(plans):
         if p.action == "insert":
-            row = _build_row(p.record, p.identity, p.content_hash)
+            row = _build_row(p.record, p.identity, p.content_hash, p.content_hash_blake3)
             db.add(row)
             pending_rows[idx] = row
             inserted += 1
@@ -195,6 +228,7 @@ def _snapshot(db: AsyncSession, row: HealthRecord) -> None:
         RecordVersion(
             id=uuid.uuid4(),
             record_id=row.id,
+            user_id=row.user_id,
             version=row.version,
             fhir_resource=row.fhir_resource,
             content_hash=row.content_hash,
@@ -208,6 +242,7 @@ def _apply_update(row: HealthRecord, p: Plan) -> None:
     rec = p.record
     row.fhir_resource = rec["fhir_resource"]
     row.content_hash = p.content_hash
+    row.content_hash_blake3 = p.content_hash_blake3
     row.version = p.new_version
     row.status = rec.get("status", row.status)
     row.effective_date = rec.get("effective_date", row.effective_date)
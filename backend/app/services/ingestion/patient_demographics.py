@@ -25,6 +25,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.middleware.encryption import encrypt_field
 from app.models.patient import Patient
+from app.services.ingestion.zip_members import ZipMember, open_text
 
 logger = logging.getLogger(__name__)
 
@@ -78,13 +79,21 @@ def extract_fhir_demographics(resource: dict) -> dict[str, str | None]:
     }
 
 
-def extract_epic_demographics(tsv_dir: Path) -> dict[str, str | None]:
-    """Pull demographics from an Epic ``PATIENT.tsv`` in ``tsv_dir`` (first row)."""
-    patient_file = tsv_dir / "PATIENT.tsv"
-    if not patient_file.is_file():
-        return {}
+def extract_epic_demographics(tsv_dir: Path | list[ZipMember]) -> dict[str, str | None]:
+    """Pull demographics from an Epic ``PATIENT.tsv`` in ``tsv_dir`` (first row).
+
+    ``tsv_dir`` may instead be the TSV members of an uploaded ZIP.
+    """
+    if isinstance(tsv_dir, Path):
+        patient_file = tsv_dir / "PATIENT.tsv"
+        if not patient_file.is_file():
+            return {}
+    else:
+        patient_file = next((m for m in tsv_dir if m.basename == "PATIENT.tsv"), None)
+        if patient_file is None:
+            return {}
     try:
-        with open(patient_file, "r", encoding="utf-8-sig", newline="") as f:
+        with open_text(patient_file, encoding="utf-8-sig", newline="") as f:
             reader = csv.DictReader(f, delimiter="\t")
             row = next(reader, None)
     except (OSError, csv.Error):
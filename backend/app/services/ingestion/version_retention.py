@@ -0,0 +1,328 @@
+"""Retention and compaction of ``record_versions``.
+
+``idempotent_insert_records`` snapshots the prior state of a record into
+:class:`RecordVersion` on every content change, as a full copy of its
+``fhir_resource``. A source that re-sends a slightly changed bundle every day
+makes the table grow without bound, so a periodic job (:func:`compact_versions`,
+run from the API lifespan and ``scripts/compact_record_versions.py``) applies
+two measures:
+
+* Retention. A :class:`RetentionPolicy` keeps a record's newest ``keep_last``
+  snapshots and everything younger than ``daily_after_days``; older snapshots
+  thin out to one per UTC day, and past ``weekly_after_days`` to one per ISO
+  week (the newest of each). The rest are deleted.
+* Delta storage. Of the snapshots kept, only the newest stays a full copy.
+  Every older one stores ``delta`` instead: an encrypted patch that turns the
+  next newer kept snapshot into it (:func:`diff`/:func:`patch`). Reads go
+  through :func:`load_versions`, which rebuilds the chain from the full copy.
+
+The chain is anchored on the newest snapshot rather than the live record,
+because dedup merges rewrite the live resource without a snapshot. Ingest
+keeps writing full copies on top of the chain, which never invalidates it; the
+next run converts them. Every plan is checked before it is written: each
+kept snapshot must rebuild to exactly what it read as before (same types,
+same key order).
+
+Compaction works in batches of records, one short transaction each. A
+record's ``health_records`` row is locked ``FOR NO KEY UPDATE SKIP LOCKED``
+first, so a record an ingest (or another compaction) is writing is skipped
+and picked up on the next run instead of waited for.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import Any, NamedTuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.record import HealthRecord
+from app.models.record_version import RecordVersion
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------------------- #
+# JSON patches
+# --------------------------------------------------------------------------- #
+#
+# A patch is a dict of one of these forms:
+#   {}                                   the value is unchanged
+#   {"=": value}                         replace the value
+#   {"{": {key: patch}, "-": [keys],     object: patch or add keys, drop keys,
+#    "o": [keys]}                        and restore the key order if it moved
+#   {"[": [[index, patch], ...]}         array of the same length: patch items
+
+
+def _same(a: Any, b: Any) -> bool:
+    """Equal as JSON documents *and* as serialized: ``1``, ``1.0`` and ``True``
+    differ, and so does the key order of objects."""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return list(a) == list(b) and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def diff(new: Any, old: Any) -> dict:
+    """A patch that turns ``new`` into ``old``."""
+    if _same(new, old):
+        return {}
+    if isinstance(new, dict) and isinstance(old, dict):
+        changes = {k: diff(new[k], v) if k in new else {"=": v} for k, v in old.items()}
+        p: dict = {}
+        if changes := {k: c for k, c in changes.items() if c}:
+            p["{"] = changes
+        if dropped := [k for k in new if k not in old]:
+            p["-"] = dropped
+        order = [k for k in new if k in old] + [k for k in old if k not in new]
+        if order != list(old):
+            p["o"] = list(old)
+        return p
+    if isinstance(new, list) and isinstance(old, list) and len(new) == len(old):
+        return {"[": [[i, diff(n, o)] for i, (n, o) in enumerate(zip(new, old)) if not _same(n, o)]}
+    return {"=": old}
+
+
+def patch(value: Any, p: dict) -> Any:
+    """Apply a patch from :func:`diff`; ``value`` is not modified."""
+    if not p:
+        return value
+    if "=" in p:
+        return p["="]
+    if "[" in p:
+        items = list(value)
+        for i, item_patch in p["["]:
+            items[i] = patch(items[i], item_patch)
+        return items
+    dropped = set(p.get("-", ()))
+    changes = p.get("{", {})
+    obj = {
+        k: patch(v, changes[k]) if k in changes else v
+        for k, v in value.items() if k not in dropped
+    }
+    for k, key_patch in changes.items():
+        if k not in obj:
+            obj[k] = patch(None, key_patch)
+    if "o" in p:
+        obj = {k: obj[k] for k in p["o"]}
+    return obj
+
+
+def rebuild(versions: Sequence[RecordVersion | _Stored]) -> list[dict]:
+    """The resource of each of a record's snapshots, given newest first."""
+    resources: list[dict] = []
+    for v in versions:
+        if v.fhir_resource is not None:
+            resources.append(v.fhir_resource)
+        elif resources:
+            resources.append(patch(resources[-1], v.delta))
+        else:
+            raise ValueError(f"record version {v.id} is a delta with no newer full copy")
+    return resources
+
+
+# --------------------------------------------------------------------------- #
+# Retention policy
+# --------------------------------------------------------------------------- #
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Which of a record's snapshots to keep."""
+
+    keep_last: int = 10
+    daily_after_days: int = 7
+    weekly_after_days: int = 90
+
+    def __post_init__(self) -> None:
+        if self.keep_last < 1:
+            raise ValueError("keep_last must be at least 1")
+
+    @classmethod
+    def from_settings(cls) -> RetentionPolicy:
+        return cls(
+            keep_last=settings.version_retention_keep_last,
+            daily_after_days=settings.version_retention_daily_after_days,
+            weekly_after_days=settings.version_retention_weekly_after_days,
+        )
+
+    def retained(self, versions: Sequence[tuple[UUID, datetime]], now: datetime) -> set[UUID]:
+        """Ids to keep of ``(id, created_at)`` pairs given newest first."""
+        kept: set[UUID] = set()
+        taken: set[tuple] = set()  # days and weeks that already have a snapshot
+        for i, (version_id, created_at) in enumerate(versions):
+            age = now - created_at
+            day = created_at.astimezone(timezone.utc).date()
+            buckets = (("day", day), ("week", *day.isocalendar()[:2]))
+            if i < self.keep_last or age < timedelta(days=self.daily_after_days):
+                keep = True
+            elif age < timedelta(days=self.weekly_after_days):
+                keep = buckets[0] not in taken
+            else:
+                keep = buckets[1] not in taken
+            if keep:
+                kept.add(version_id)
+                taken.update(buckets)
+        return kept
+
+
+def plan_compaction(
+    versions: Sequence[RecordVersion], policy: RetentionPolicy, now: datetime
+) -> tuple[dict[UUID, dict], list[UUID]]:
+    """``(writes, deletes)`` for one record's snapshots, given newest first.
+
+    ``writes`` maps a kept snapshot to its new ``fhir_resource``/``delta``;
+    snapshots already stored the planned way are left out.
+    """
+    resources = rebuild(versions)
+    keep = policy.retained([(v.id, v.created_at) for v in versions], now)
+    kept = [i for i, v in enumerate(versions) if v.id in keep]
+
+    writes: dict[UUID, dict] = {}
+    for n, i in enumerate(kept):
+        v = versions[i]
+        if n == 0:
+            if v.fhir_resource is None:
+                writes[v.id] = {"fhir_resource": resources[i], "delta": None}
+        elif v.fhir_resource is not None or kept[n - 1] != i - 1:
+            # A full copy, or a delta against a snapshot about to be deleted.
+            writes[v.id] = {"fhir_resource": None, "delta": diff(resources[kept[n - 1]], resources[i])}
+
+    planned = [
+        _Stored(versions[i].id, **writes.get(versions[i].id, {
+            "fhir_resource": versions[i].fhir_resource, "delta": versions[i].delta,
+        }))
+        for i in kept
+    ]
+    for i, resource in zip(kept, rebuild(planned)):
+        if not _same(resource, resources[i]):
+            raise RuntimeError(f"compacted record version {versions[i].id} does not rebuild")
+    return writes, [v.id for v in versions if v.id not in keep]
+
+
+class _Stored(NamedTuple):
+    id: UUID
+    fhir_resource: dict | None
+    delta: dict | None
+
+
+# --------------------------------------------------------------------------- #
+# Compaction job
+# --------------------------------------------------------------------------- #
+
+
+@dataclass
+class CompactionStats:
+    records: int = 0
+    rewritten: int = 0
+    deleted: int = 0
+    skipped: int = 0  # locked by a concurrent writer; retried next run
+
+
+def _ordered(query):
+    return query.order_by(
+        RecordVersion.record_id,
+        RecordVersion.version.desc(),
+        RecordVersion.created_at.desc(),
+        RecordVersion.id.desc(),
+    )
+
+
+async def _compact_batch(
+    db: AsyncSession, after: UUID | None, policy: RetentionPolicy, limit: int, now: datetime,
+    stats: CompactionStats,
+) -> UUID | None:
+    """Compact the next ``limit`` records with several snapshots after
+    ``after``; return the last record id seen, or ``None`` when done."""
+    query = (
+        select(RecordVersion.record_id)
+        .group_by(RecordVersion.record_id)
+        .having(func.count() > 1)
+        .order_by(RecordVersion.record_id)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(RecordVersion.record_id > after)
+    record_ids = (await db.execute(query)).scalars().all()
+    if not record_ids:
+        return None
+
+    locked = (await db.execute(
+        select(HealthRecord.id)
+        .where(HealthRecord.id.in_(record_ids))
+        .with_for_update(key_share=True, skip_locked=True)
+    )).scalars().all()
+    stats.skipped += len(record_ids) - len(locked)
+
+    versions = (await db.execute(
+        _ordered(select(RecordVersion).where(RecordVersion.record_id.in_(locked)))
+    )).scalars().all()
+    deletes: list[UUID] = []
+    for _, group in groupby(versions, key=lambda v: v.record_id):
+        group = list(group)
+        writes, dropped = plan_compaction(group, policy, now)
+        for v in group:
+            if v.id in writes:
+                v.fhir_resource = writes[v.id]["fhir_resource"]
+                v.delta = writes[v.id]["delta"]
+        stats.rewritten += len(writes)
+        deletes += dropped
+    if deletes:
+        await db.execute(
+            delete(RecordVersion)
+            .where(RecordVersion.id.in_(deletes))
+            .execution_options(synchronize_session=False)
+        )
+    stats.deleted += len(deletes)
+    stats.records += len(locked)
+    await db.commit()
+    return record_ids[-1]
+
+
+async def compact_versions(
+    session_factory: Callable[[], AsyncSession],
+    policy: RetentionPolicy | None = None,
+    batch: int | None = None,
+    now: datetime | None = None,
+) -> CompactionStats:
+    """Apply ``policy`` (default: from settings) to every record's snapshots."""
+    policy = policy or RetentionPolicy.from_settings()
+    batch = batch or settings.version_compaction_batch
+    now = now or datetime.now(timezone.utc)
+    stats = CompactionStats()
+    after = None
+    while True:
+        async with session_factory() as db:
+            after = await _compact_batch(db, after, policy, batch, now, stats)
+        if after is None:
+            return stats
+        logger.debug("version compaction: %s", stats)
+
+
+async def storage_stats(db: AsyncSession) -> dict[str, int]:
+    """Snapshot counts and their stored size in bytes (after TOAST compression)."""
+    row = (await db.execute(select(
+        func.count(),
+        func.count(RecordVersion.fhir_resource),
+        func.count(RecordVersion.delta),
+        func.coalesce(func.sum(func.pg_column_size(RecordVersion.fhir_resource)), 0)
+        + func.coalesce(func.sum(func.pg_column_size(RecordVersion.delta)), 0),
+    ))).one()
+    return {"versions": row[0], "full_copies": row[1], "deltas": row[2], "bytes": int(row[3])}
+
+
+async def load_versions(db: AsyncSession, record_id: UUID) -> list[tuple[RecordVersion, dict]]:
+    """A record's snapshots, newest first, each with its rebuilt resource."""
+    versions = (await db.execute(
+        _ordered(select(RecordVersion).where(RecordVersion.record_id == record_id))
+    )).scalars().all()
+    return list(zip(versions, rebuild(versions)))
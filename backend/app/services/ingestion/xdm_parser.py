@@ -12,6 +12,8 @@ from pathlib import Path
 
 from lxml import etree
 
+from app.services.ingestion.zip_members import ZipMember
+
 logger = logging.getLogger(__name__)
 
 _SAFE_PARSER = etree.XMLParser(
@@ -139,24 +141,28 @@ def _extract_author_institution(extrinsic: etree._Element) -> str:
     return ""
 
 
-def parse_xdm_metadata(metadata_path: Path) -> XDMManifest | None:
+def parse_xdm_metadata(metadata_path: Path | ZipMember) -> XDMManifest | None:
     """Parse an IHE XDM METADATA.XML file.
 
     Extracts document inventory (URIs, hashes, sizes, mime types) and
     patient demographics from the ebXML registry manifest.
 
     Args:
-        metadata_path: Path to the METADATA.XML file.
+        metadata_path: Path to the METADATA.XML file, or its member in an
+            uploaded ZIP.
 
     Returns:
         Parsed XDMManifest, or None if the file is missing or malformed.
     """
-    if not metadata_path.exists():
-        logger.warning("METADATA.XML not found at %s", metadata_path)
-        return None
-
     try:
-        tree = etree.parse(str(metadata_path), _SAFE_PARSER)
+        if isinstance(metadata_path, ZipMember):
+            with metadata_path.open() as f:
+                tree = etree.parse(f, _SAFE_PARSER)
+        elif not metadata_path.exists():
+            logger.warning("METADATA.XML not found at %s", metadata_path)
+            return None
+        else:
+            tree = etree.parse(str(metadata_path), _SAFE_PARSER)
     except (etree.XMLSyntaxError, OSError):
         logger.warning("Failed to parse METADATA.XML at %s", metadata_path)
         return None
@@ -0,0 +1,214 @@
+"""Chunked, resumable uploads.
+
+A single-request upload of a multi-GB Epic export starts over whenever the
+connection drops, and proxies time out long before it ends. Instead a client
+opens a session announcing the file's size, then PUTs the file in numbered
+chunks of ``chunk_size`` bytes — in any order, retried as often as needed —
+each with the SHA-256 of its plaintext. It can ask which byte ranges have
+arrived at any point and re-send only the rest.
+
+Each chunk is encrypted into ``MTENC1`` frames as it streams in (CRYPTO-02:
+no plaintext at rest) and stored as its own file under
+``<upload_dir>/sessions/<session id>/``, replacing any earlier copy
+atomically. Finalizing concatenates the chunks' frames into one ``MTENC1``
+upload — frames decrypt independently, so nothing is re-encrypted — while
+decrypting once to compute the plaintext ``file_hash`` (and re-verify every
+chunk), then hands the file to the normal ingest path.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.upload_session import UploadSession
+from app.utils.file_utils import ENC_MAGIC, DecryptingReader, PipelinedUploadWriter
+
+logger = logging.getLogger(__name__)
+
+# Plaintext per MTENC1 frame, as the single-request upload path writes them.
+_FRAME_BYTES = 1024 * 1024
+MIN_CHUNK_BYTES = 4 * 1024
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+MAX_CHUNKS = 10_000
+
+
+class ChunkRejected(ValueError):
+    """A chunk whose size or checksum does not match what the session expects."""
+
+
+class ChunkIndexOutOfRange(ChunkRejected):
+    pass
+
+
+class ChunkTooLarge(ChunkRejected):
+    pass
+
+
+def session_dir(session_id: UUID) -> Path:
+    return Path(settings.upload_dir) / "sessions" / str(session_id)
+
+
+def _chunk_path(session_id: UUID, index: int) -> Path:
+    return session_dir(session_id) / f"{index:05d}.part"
+
+
+def chunk_count(session: UploadSession) -> int:
+    return -(-session.total_size // session.chunk_size)
+
+
+def expected_chunk_size(session: UploadSession, index: int) -> int:
+    """Plaintext length chunk ``index`` must have (the last one may be short)."""
+    return min(session.chunk_size, session.total_size - index * session.chunk_size)
+
+
+def received_indexes(session: UploadSession) -> list[int]:
+    return sorted(int(i) for i in session.received)
+
+
+def missing_indexes(session: UploadSession) -> list[int]:
+    received = session.received
+    return [i for i in range(chunk_count(session)) if str(i) not in received]
+
+
+def received_ranges(session: UploadSession) -> list[list[int]]:
+    """Received bytes as merged ``[start, end)`` ranges of the plaintext."""
+    ranges: list[list[int]] = []
+    for index in received_indexes(session):
+        start = index * session.chunk_size
+        end = start + expected_chunk_size(session, index)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return ranges
+
+
+async def _frames(body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Re-cut a request body into frame-sized pieces (the last may be short)."""
+    buffer = bytearray()
+    async for piece in body:
+        buffer += piece
+        while len(buffer) >= _FRAME_BYTES:
+            yield bytes(buffer[:_FRAME_BYTES])
+            del buffer[:_FRAME_BYTES]
+    if buffer:
+        yield bytes(buffer)
+
+
+async def store_chunk(
+    db: AsyncSession,
+    session: UploadSession,
+    index: int,
+    body: AsyncIterator[bytes],
+    checksum: str,
+) -> None:
+    """Encrypt chunk ``index`` to disk as it streams and mark it received.
+
+    The chunk lands in a temp file and replaces any earlier copy only once its
+    size and SHA-256 match, so a broken retry never clobbers a good chunk.
+    Rejects an over-long body as soon as it passes the expected size. Raises
+    :class:`ChunkRejected` (or a subclass) for a chunk that does not fit.
+    """
+    if not 0 <= index < chunk_count(session):
+        raise ChunkIndexOutOfRange("Chunk index out of range")
+    expected = expected_chunk_size(session, index)
+    final = _chunk_path(session.id, index)
+    final.parent.mkdir(parents=True, exist_ok=True)
+    tmp = final.with_name(f"{final.name}.{os.urandom(4).hex()}.tmp")
+
+    total = 0
+    try:
+        with open(tmp, "wb") as f:
+            writer = PipelinedUploadWriter(f)
+            try:
+                async for frame in _frames(body):
+                    total += len(frame)
+                    if total > expected:
+                        raise ChunkTooLarge("Chunk larger than expected")
+                    await writer.write_chunk(frame)
+                await writer.finalize()
+            finally:
+                writer.close()
+        if total != expected:
+            raise ChunkRejected(f"Chunk {index} must be {expected} bytes, got {total}")
+        if writer.hexdigest() != checksum.lower():
+            raise ChunkRejected("Chunk checksum mismatch")
+        os.replace(tmp, final)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    # Merged in SQL so chunks arriving in parallel never drop each other.
+    await db.execute(
+        text(
+            "UPDATE upload_sessions SET updated_at = now(), received = received "
+            "|| jsonb_build_object(CAST(:idx AS text), CAST(:sha AS text)) "
+            "WHERE id = :session_id"
+        ),
+        {"idx": str(index), "sha": writer.hexdigest(), "session_id": session.id},
+    )
+    await db.commit()
+    await db.refresh(session)
+
+
+def assemble(session: UploadSession, dest: Path) -> tuple[int, str]:
+    """Concatenate the chunks into one ``MTENC1`` file at ``dest``.
+
+    Copies each chunk's frames verbatim and decrypts them once to hash the
+    plaintext, re-checking every chunk against the checksum it arrived with.
+    Returns ``(plaintext_size, plaintext_sha256)``. Blocking: run in a thread.
+    """
+    file_hash = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest, "wb") as out:
+            out.write(ENC_MAGIC)
+            for index in range(chunk_count(session)):
+                part = _chunk_path(session.id, index)
+                chunk_hash = hashlib.sha256()
+                with DecryptingReader(part) as reader:
+                    while data := reader.read(_FRAME_BYTES):
+                        chunk_hash.update(data)
+                        file_hash.update(data)
+                        size += len(data)
+                if chunk_hash.hexdigest() != session.received[str(index)]:
+                    raise ValueError(f"Stored chunk {index} no longer matches its checksum")
+                with open(part, "rb") as f:
+                    f.seek(len(ENC_MAGIC))
+                    shutil.copyfileobj(f, out)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+    return size, file_hash.hexdigest()
+
+
+def discard_chunks(session_id: UUID) -> None:
+    shutil.rmtree(session_dir(session_id), ignore_errors=True)
+
+
+async def purge_expired_sessions(db: AsyncSession) -> int:
+    """Delete unfinished sessions past ``expires_at`` and their chunks."""
+    now = datetime.now(timezone.utc)
+    expired = (
+        await db.execute(
+            select(UploadSession.id).where(
+                UploadSession.status == "open", UploadSession.expires_at < now
+            )
+        )
+    ).scalars().all()
+    for session_id in expired:
+        discard_chunks(session_id)
+    if expired:
+        await db.execute(delete(UploadSession).where(UploadSession.id.in_(expired)))
+        await db.commit()
+    return len(expired)
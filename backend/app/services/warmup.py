@@ -0,0 +1,139 @@
+"""Background warm-up of the models and indexes the request path loads lazily.
+
+The spaCy PHI-NER model, the local clinical-NLP pipelines (scispaCy NER +
+medspaCy) and the terminology indexes take seconds to load. Loading them in
+the lifespan before ``yield`` delayed every boot — autoscaled replicas and
+test runs alike — while loading them on first use stalls the first request
+that scrubs or extracts. Instead :func:`start_warmup` loads them in a daemon
+thread as the app starts serving, and :func:`readiness` (``GET
+/api/v1/health/ready``) reports when that is done, so a load balancer can hold
+traffic until then.
+
+Every step is fail-open like the loaders it calls: a model that is missing or
+fails to load is reported ``unavailable``/``failed`` and retried per call, and
+the app still becomes ready. A request that needs a model while it is loading
+waits for the in-progress load rather than starting a second one.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_components: dict[str, str] = {}
+_started_at: float | None = None
+_elapsed: float | None = None
+_done = threading.Event()
+
+
+def _phi_ner() -> bool:
+    from app.services.ai.phi_ner import warm_load_ner
+
+    return warm_load_ner()
+
+
+def _local_ner() -> bool:
+    from app.services.extraction.local_ner import warm_load_local_ner
+
+    return warm_load_local_ner()
+
+
+def _clinical_context() -> bool:
+    from app.services.extraction.clinical_context import warm_load_clinical_context
+
+    return warm_load_clinical_context()
+
+
+def _terminology() -> bool:
+    from app.services.extraction.terminology import warm_load_indexes
+
+    return warm_load_indexes()
+
+
+def planned_components() -> list[tuple[str, Callable[[], bool]]]:
+    """The ``(name, loader)`` steps the current settings call for, in order.
+
+    PHI-NER only when enabled; the local NER/medspaCy pipelines only for the
+    local or hybrid engine, so the default Gemini path never pays their load.
+    """
+    steps: list[tuple[str, Callable[[], bool]]] = []
+    if settings.phi_ner_enabled:
+        steps.append(("phi_ner", _phi_ner))
+    if (settings.extraction_engine or "gemini").lower() in ("local", "hybrid"):
+        steps.append(("local_ner", _local_ner))
+        steps.append(("clinical_context", _clinical_context))
+    steps.append(("terminology", _terminology))
+    return steps
+
+
+def _begin(steps: list[tuple[str, Callable[[], bool]]]) -> None:
+    global _started_at, _elapsed
+    with _lock:
+        _done.clear()
+        _components.clear()
+        _components.update({name: "pending" for name, _ in steps})
+        _started_at, _elapsed = time.monotonic(), None
+
+
+def _run(steps: list[tuple[str, Callable[[], bool]]]) -> dict[str, str]:
+    global _elapsed
+    for name, load in steps:
+        _components[name] = "loading"
+        began = time.monotonic()
+        try:
+            status = "ready" if load() else "unavailable"
+        except Exception:
+            logger.exception("Warm-up of %s raised", name)
+            status = "failed"
+        _components[name] = status
+        logger.info("Warm-up: %s %s in %.2fs", name, status, time.monotonic() - began)
+    _elapsed = time.monotonic() - _started_at
+    if any(status != "ready" for status in _components.values()):
+        logger.warning(
+            "Warm-up finished with components not ready (%s); they load per call",
+            ", ".join(f"{n}={s}" for n, s in _components.items() if s != "ready"),
+        )
+    _done.set()
+    return dict(_components)
+
+
+def run_warmup(steps: list[tuple[str, Callable[[], bool]]] | None = None) -> dict[str, str]:
+    """Run the warm-up steps in this thread; return each one's final status.
+
+    A status is ``ready``, ``unavailable`` (the loader returned False) or
+    ``failed`` (it raised). Readiness is set once every step has finished.
+    """
+    steps = planned_components() if steps is None else steps
+    _begin(steps)
+    return _run(steps)
+
+
+def start_warmup() -> threading.Thread | None:
+    """Start :func:`run_warmup` in a daemon thread (call from the lifespan).
+
+    With ``STARTUP_WARMUP=false`` nothing is preloaded — everything loads on
+    first use — and the app is ready at once; returns None then.
+    """
+    if not settings.startup_warmup:
+        run_warmup([])
+        return None
+    steps = planned_components()
+    _begin(steps)  # not ready from this point, before the thread is scheduled
+    thread = threading.Thread(target=_run, args=(steps,), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness() -> dict:
+    """Snapshot for ``/health/ready``: overall flag, per-component status, timing."""
+    return {
+        "ready": _done.is_set(),
+        "components": dict(_components),
+        "warmup_seconds": round(_elapsed, 3) if _elapsed is not None else None,
+    }
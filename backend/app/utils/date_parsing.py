@@ -0,0 +1,297 @@
+"""Fast structured-date parsing shared by the FHIR, CDA and Epic ingest paths.
+
+Structured sources carry a handful of fixed date layouts, but the old parsers
+ran every value through a list of ``strptime`` formats in order — and Epic's
+``M/D/YYYY h:mm:ss AM`` sits behind a first format that only fails after the
+regex work, so millions of rows paid for several ``strptime`` calls each.
+
+:class:`DateFormatDetector` keeps the old format list (and its exact results)
+but in front of it:
+
+1. a hand-rolled fixed-width fast path for the common layouts (ISO 8601 for
+   FHIR/CDA, ``M/D/YYYY h:mm:ss AM`` for Epic) that slices and ``int()``s
+   instead of calling ``strptime``;
+2. a per-key format hint: callers pass the column / field the value came from,
+   and the format that parsed the last value for that key is tried first.
+
+A fast path only answers when it can produce exactly the ``strptime`` result;
+anything unusual (odd widths, lower-case ``t``, out-of-range fields) falls
+through to the format list. A hinted format is only trusted when no earlier
+format in the list could also match the value (see :func:`_may_overlap`), so
+the result never depends on which values were parsed before.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Sequence
+
+FastPath = Callable[[str], "datetime | None"]
+
+# Upper bound on remembered hint keys (column / field names are a small set;
+# this only guards against a caller keying by value).
+_MAX_HINTS = 4096
+
+# strptime directives that match digits only; anything else is kept verbatim
+# in a format's skeleton.
+_NUMERIC_DIRECTIVES = frozenset("YmdHIMSfjy")
+
+
+def _skeleton(fmt: str) -> str:
+    """``fmt`` with each run of numeric directives collapsed to ``#``."""
+    out: list[str] = []
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == "%" and i + 1 < len(fmt):
+            directive = fmt[i + 1]
+            token = "#" if directive in _NUMERIC_DIRECTIVES else "%" + directive
+            i += 2
+        else:
+            token = fmt[i]
+            i += 1
+        if token == "#" and out and out[-1] == "#":
+            continue
+        out.append(token)
+    return "".join(out)
+
+
+def _may_overlap(a: str, b: str) -> bool:
+    """Conservatively: could some string match both ``a`` and ``b``?
+
+    Two formats whose skeletons differ need different non-digit literals (or a
+    ``%z`` / ``%p``), so no value satisfies both; equal skeletons (e.g. the
+    ``%I ... %p`` / ``%H ... %p`` Epic pair) are assumed to overlap.
+    """
+    return _skeleton(a) == _skeleton(b)
+
+
+class DateFormatDetector:
+    """Parse values against an ordered ``strptime`` format list, fast.
+
+    Results are identical to trying ``formats`` in order (then ``fallback``);
+    see the module docstring for how the fast path and hints stay exact.
+    """
+
+    def __init__(
+        self,
+        formats: Sequence[str],
+        *,
+        fast_path: FastPath | None = None,
+        fallback: FastPath | None = None,
+        strip: bool = False,
+    ) -> None:
+        self.formats = tuple(formats)
+        self._fast_path = fast_path
+        self._fallback = fallback
+        self._strip = strip
+        # Earlier formats that could also match a value matched by format k.
+        self._shadowed_by = tuple(
+            tuple(j for j in range(k) if _may_overlap(self.formats[j], self.formats[k]))
+            for k in range(len(self.formats))
+        )
+        self._hints: dict[str, int] = {}
+
+    def parse(self, value: str | None, key: str | None = None) -> datetime | None:
+        """Parse ``value``; ``key`` names its column / field for the format hint."""
+        if not value:
+            return None
+        if self._strip:
+            value = value.strip()
+            if not value:
+                return None
+        if self._fast_path is not None:
+            parsed = self._fast_path(value)
+            if parsed is not None:
+                return parsed
+        if key is not None:
+            hint = self._hints.get(key)
+            if hint is not None:
+                parsed = self._try_hint(value, hint)
+                if parsed is not None:
+                    return parsed
+        return self._scan(value, key)
+
+    def _try_hint(self, value: str, k: int) -> datetime | None:
+        for j in self._shadowed_by[k]:
+            if _strptime(value, self.formats[j]) is not None:
+                return None  # an earlier format wins; let the full scan decide
+        return _strptime(value, self.formats[k])
+
+    def _scan(self, value: str, key: str | None) -> datetime | None:
+        for i, fmt in enumerate(self.formats):
+            parsed = _strptime(value, fmt)
+            if parsed is not None:
+                if key is not None:
+                    if len(self._hints) >= _MAX_HINTS:
+                        self._hints.clear()
+                    self._hints[key] = i
+                return parsed
+        if self._fallback is not None:
+            return self._fallback(value)
+        return None
+
+
+def _strptime(value: str, fmt: str) -> datetime | None:
+    try:
+        return datetime.strptime(value, fmt)
+    except ValueError:
+        return None
+
+
+def _digits(value: str, start: int, end: int) -> int | None:
+    part = value[start:end]
+    if len(part) != end - start or not part.isdigit():
+        return None
+    return int(part)
+
+
+def _fast_iso(value: str) -> datetime | None:
+    """Fixed-width ISO 8601: ``YYYY``, ``YYYY-MM``, ``YYYY-MM-DD`` and
+    ``YYYY-MM-DDTHH:MM:SS[.ffffff][Z|±HH:MM]``. ``None`` = not handled here."""
+    n = len(value)
+    if n < 4 or not value.isascii():
+        return None
+    year = _digits(value, 0, 4)
+    if year is None:
+        return None
+    try:
+        if n == 4:
+            return datetime(year, 1, 1)
+        if value[4] != "-":
+            return None
+        month = _digits(value, 5, 7)
+        if month is None:
+            return None
+        if n == 7:
+            return datetime(year, month, 1)
+        if value[7] != "-":
+            return None
+        day = _digits(value, 8, 10)
+        if day is None:
+            return None
+        if n == 10:
+            return datetime(year, month, day)
+        if n < 19 or value[10] != "T" or value[13] != ":" or value[16] != ":":
+            return None
+        hour = _digits(value, 11, 13)
+        minute = _digits(value, 14, 16)
+        second = _digits(value, 17, 19)
+        if hour is None or minute is None or second is None:
+            return None
+
+        pos = 19
+        microsecond = 0
+        if pos < n and value[pos] == ".":
+            end = pos + 1
+            while end < n and value[end].isdigit():
+                end += 1
+            frac = value[pos + 1:end]
+            if not 1 <= len(frac) <= 6:
+                return None
+            microsecond = int(frac.ljust(6, "0"))
+            pos = end
+
+        tz = None
+        rest = value[pos:]
+        if rest == "Z":
+            tz = timezone.utc
+        elif rest:
+            if len(rest) != 6 or rest[0] not in "+-" or rest[3] != ":":
+                return None
+            off_h = _digits(rest, 1, 3)
+            off_m = _digits(rest, 4, 6)
+            if off_h is None or off_m is None or off_m > 59:
+                return None
+            offset = timedelta(hours=off_h, minutes=off_m)
+            tz = timezone(-offset if rest[0] == "-" else offset)
+        return datetime(year, month, day, hour, minute, second, microsecond, tzinfo=tz)
+    except ValueError:
+        return None
+
+
+def _short_int(part: str) -> int | None:
+    """A 1-2 digit ASCII field (what ``%m``/``%d``/``%I``/``%M``/``%S`` accept)."""
+    if not 1 <= len(part) <= 2 or not part.isdigit():
+        return None
+    return int(part)
+
+
+def _fast_epic(value: str) -> datetime | None:
+    """``M/D/YYYY h:mm:ss AM|PM`` and ``M/D/YYYY`` (plus the naive ISO shapes).
+
+    Mirrors the format order exactly: hours 1-12 take the ``%I ... %p`` reading;
+    hours 0 and 13-23 only match the following ``%H ... %p`` format, which
+    ignores the AM/PM marker.
+    """
+    if not value.isascii():
+        return None
+    if "/" not in value:
+        return _fast_iso(value) if len(value) in (10, 19) else None
+    parts = value.split(" ")
+    if len(parts) not in (1, 3):
+        return None
+    date_parts = parts[0].split("/")
+    if len(date_parts) != 3 or len(date_parts[2]) != 4 or not date_parts[2].isdigit():
+        return None
+    month = _short_int(date_parts[0])
+    day = _short_int(date_parts[1])
+    if month is None or day is None:
+        return None
+    year = int(date_parts[2])
+    try:
+        if len(parts) == 1:
+            return datetime(year, month, day)
+        meridiem = parts[2]
+        if meridiem not in ("AM", "PM"):
+            return None
+        time_parts = parts[1].split(":")
+        if len(time_parts) != 3:
+            return None
+        hour, minute, second = (_short_int(p) for p in time_parts)
+        if hour is None or minute is None or second is None or minute > 59:
+            return None
+        if 1 <= hour <= 12:
+            hour = hour % 12 + (12 if meridiem == "PM" else 0)
+        elif hour > 23:
+            return None
+        return datetime(year, month, day, hour, minute, second)
+    except ValueError:
+        return None
+
+
+def _fhir_isoformat_fallback(value: str) -> datetime | None:
+    """Timezone offsets ``strptime`` can't express, e.g. ``...T10:00:00.1234567-07:00``."""
+    if "T" not in value:
+        return None
+    clean = value
+    if clean.endswith("Z"):
+        clean = clean[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(clean)
+    except ValueError:
+        return None
+
+
+FHIR_DATE_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%d",
+    "%Y-%m",
+    "%Y",
+)
+
+EPIC_DATE_FORMATS = (
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %H:%M:%S %p",
+    "%m/%d/%Y",
+    "%Y-%m-%d",
+    "%Y-%m-%dT%H:%M:%S",
+)
+
+# FHIR resources — both native bundles and the CDA → FHIR conversion output.
+fhir_dates = DateFormatDetector(
+    FHIR_DATE_FORMATS, fast_path=_fast_iso, fallback=_fhir_isoformat_fallback
+)
+# Epic EHI Tables export (TSV) columns.
+epic_dates = DateFormatDetector(EPIC_DATE_FORMATS, fast_path=_fast_epic, strip=True)
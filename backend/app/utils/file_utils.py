@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import bisect
 import hashlib
+import io
 import logging
 import os
 import struct
+from collections import OrderedDict, deque
 from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import BinaryIO
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
+from app.config import settings
 from app.middleware.encryption import _get_key
 
 logger = logging.getLogger(__name__)
@@ -32,8 +38,20 @@ logger = logging.getLogger(__name__)
 
 ENC_MAGIC = b"MTENC1\n"
 _NONCE_LEN = 12
+_TAG_LEN = 16  # AES-GCM authentication tag appended to each frame's ciphertext
 _LENGTH_PREFIX = 4  # big-endian uint32 frame length
 _COPY_CHUNK = 1024 * 1024  # 1 MiB streaming chunk for legacy pass-through
+# Decrypted frames kept by ``DecryptingReader`` (<=1 MiB each): enough for a
+# reader hopping between a few regions (zip central directory vs. members,
+# pdf xref vs. objects) without re-decrypting, small enough to stay bounded.
+_READER_CACHE_FRAMES = 4
+# ``PipelinedUploadWriter``: frames encrypted ahead of the writer per worker,
+# and the size of each disk write (frames are coalesced into whole multiples).
+_PIPELINE_DEPTH_PER_WORKER = 2
+_ALIGNED_WRITE = 8 * 1024 * 1024
+_AUTO_MAX_ENCRYPT_WORKERS = 8
+
+_encrypt_pool: ThreadPoolExecutor | None = None
 
 # Log the legacy-plaintext warning once per process to avoid spamming when a
 # directory still holds many pre-encryption files (run encrypt_existing_uploads.py).
@@ -97,6 +115,91 @@ class EncryptedFileWriter:
         self._ensure_header()
 
 
+def _encrypt_workers() -> int:
+    configured = settings.upload_encrypt_workers
+    if configured > 0:
+        return configured
+    return max(1, min(_AUTO_MAX_ENCRYPT_WORKERS, os.cpu_count() or 1))
+
+
+def _get_encrypt_pool() -> ThreadPoolExecutor:
+    global _encrypt_pool
+    if _encrypt_pool is None:
+        _encrypt_pool = ThreadPoolExecutor(
+            max_workers=_encrypt_workers(), thread_name_prefix="upload-encrypt"
+        )
+    return _encrypt_pool
+
+
+class PipelinedUploadWriter:
+    """Hash, encrypt and persist an upload stream in one pipelined pass.
+
+    The async counterpart of :class:`EncryptedFileWriter` for the upload path,
+    producing byte-identical ``MTENC1`` output (one frame per chunk, in
+    order). Each chunk is encrypted on the shared ``upload-encrypt`` thread
+    pool — AES-GCM releases the GIL, so frames encrypt in parallel — while a
+    single ordered lane per writer feeds the plaintext SHA-256 and appends
+    finished frames in submission order, writing them out in
+    ``_ALIGNED_WRITE``-sized blocks. At most ``_PIPELINE_DEPTH_PER_WORKER``
+    chunks per worker are in flight, so memory stays bounded and the event
+    loop only awaits when the pipeline is full.
+
+    With ``encrypt=False`` chunks are hashed and written verbatim (legacy
+    plaintext mode).
+    """
+
+    def __init__(self, fileobj: BinaryIO, *, encrypt: bool = True) -> None:
+        self._f = fileobj
+        self._encrypt = encrypt
+        self._hasher = hashlib.sha256()
+        self._buffer = bytearray(ENC_MAGIC if encrypt else b"")
+        self._lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-write")
+        self._pending: deque[Future] = deque()
+        self._max_in_flight = _PIPELINE_DEPTH_PER_WORKER * _encrypt_workers()
+        self.size = 0
+
+    def _commit(self, plaintext: bytes, frame: Future | None) -> None:
+        # Runs on the lane: one chunk at a time, in submission order.
+        self._hasher.update(plaintext)
+        self._buffer += frame.result() if frame is not None else plaintext
+        aligned = len(self._buffer) - len(self._buffer) % _ALIGNED_WRITE
+        if aligned:
+            self._f.write(memoryview(self._buffer)[:aligned])
+            del self._buffer[:aligned]
+
+    def _flush(self) -> None:
+        if self._buffer:
+            self._f.write(self._buffer)
+            self._buffer.clear()
+
+    async def write_chunk(self, plaintext: bytes) -> None:
+        """Queue one plaintext chunk (one frame when encrypting)."""
+        if not plaintext:
+            return
+        self.size += len(plaintext)
+        frame = _get_encrypt_pool().submit(encrypt_chunk, plaintext) if self._encrypt else None
+        self._pending.append(self._lane.submit(self._commit, plaintext, frame))
+        while len(self._pending) > self._max_in_flight:
+            await asyncio.wrap_future(self._pending.popleft())
+
+    async def finalize(self) -> None:
+        """Drain the pipeline and write the tail (the header, for an empty body)."""
+        while self._pending:
+            await asyncio.wrap_future(self._pending.popleft())
+        await asyncio.wrap_future(self._lane.submit(self._flush))
+
+    def hexdigest(self) -> str:
+        """SHA-256 of the plaintext written so far (complete after ``finalize``)."""
+        return self._hasher.hexdigest()
+
+    def close(self) -> None:
+        """Stop the lane, waiting for any queued work (also after an error)."""
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._lane.shutdown(wait=True)
+
+
 def is_encrypted_file(file_path: Path | str) -> bool:
     """Return True when the file begins with the encrypted-format magic header."""
     try:
@@ -200,6 +303,138 @@ def decrypt_file_to(src_path: Path | str, dst_path: Path | str) -> None:
             dst.write(aesgcm.decrypt(nonce, ciphertext, None))
 
 
+class DecryptingReader(io.RawIOBase):
+    """Seekable, read-only plaintext view of an ``MTENC1`` file.
+
+    Every frame carries its own nonce and tag, so any frame decrypts on its
+    own. Opening scans only the 4-byte length prefixes to index where each
+    frame's plaintext starts; reads then decrypt just the frames they touch,
+    keeping the last ``cache_frames`` decrypted frames in an LRU. Memory stays
+    at a few frames whatever the file size, and no plaintext touches disk —
+    ijson, csv, lxml, zipfile and pdfplumber all read it like a regular file
+    (wrapped in a ``BufferedReader`` by :func:`open_decrypted`).
+    """
+
+    def __init__(self, file_path: Path | str, cache_frames: int = _READER_CACHE_FRAMES) -> None:
+        super().__init__()
+        self.name = str(file_path)
+        self._f = open(file_path, "rb")
+        try:
+            if self._f.read(len(ENC_MAGIC)) != ENC_MAGIC:
+                raise ValueError(f"Not an encrypted file: {file_path}")
+            self._index_frames()
+        except BaseException:
+            self._f.close()
+            raise
+        self._aesgcm = AESGCM(_get_key())
+        self._cache: OrderedDict[int, bytes] = OrderedDict()
+        self._cache_frames = max(1, cache_frames)
+        self._pos = 0
+
+    def _index_frames(self) -> None:
+        # Parallel lists: payload offset/length in the file, plaintext start.
+        self._offsets: list[int] = []
+        self._lengths: list[int] = []
+        self._starts: list[int] = []
+        file_size = os.fstat(self._f.fileno()).st_size
+        offset = len(ENC_MAGIC)
+        plaintext = 0
+        while offset < file_size:
+            self._f.seek(offset)
+            len_bytes = self._f.read(_LENGTH_PREFIX)
+            if len(len_bytes) != _LENGTH_PREFIX:
+                raise ValueError("Corrupt encrypted file: truncated frame length")
+            (frame_len,) = struct.unpack(">I", len_bytes)
+            offset += _LENGTH_PREFIX
+            if frame_len < _NONCE_LEN + _TAG_LEN or offset + frame_len > file_size:
+                raise ValueError("Corrupt encrypted file: truncated frame payload")
+            self._offsets.append(offset)
+            self._lengths.append(frame_len)
+            self._starts.append(plaintext)
+            plaintext += frame_len - _NONCE_LEN - _TAG_LEN
+            offset += frame_len
+        self.size = plaintext
+
+    def _frame(self, idx: int) -> bytes:
+        frame = self._cache.get(idx)
+        if frame is not None:
+            self._cache.move_to_end(idx)
+            return frame
+        self._f.seek(self._offsets[idx])
+        payload = self._f.read(self._lengths[idx])
+        frame = self._aesgcm.decrypt(payload[:_NONCE_LEN], payload[_NONCE_LEN:], None)
+        self._cache[idx] = frame
+        if len(self._cache) > self._cache_frames:
+            self._cache.popitem(last=False)
+        return frame
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+        if pos < 0:
+            raise ValueError(f"negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def readinto(self, buffer) -> int:
+        if self._pos >= self.size:
+            return 0
+        idx = bisect.bisect_right(self._starts, self._pos) - 1
+        frame = self._frame(idx)
+        start = self._pos - self._starts[idx]
+        n = min(len(buffer), len(frame) - start)
+        memoryview(buffer)[:n] = memoryview(frame)[start:start + n]
+        self._pos += n
+        return n
+
+    def readall(self) -> bytes:
+        parts = []
+        while chunk := self.read(_COPY_CHUNK):
+            parts.append(chunk)
+        return b"".join(parts)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._f.close()
+            self._cache.clear()
+        super().close()
+
+
+def open_decrypted(file_path: Path | str) -> BinaryIO:
+    """Open an upload for reading as plaintext, without a plaintext temp file.
+
+    An ``MTENC1`` file comes back as a seekable :class:`DecryptingReader`
+    (buffered); anything else — a legacy plaintext upload, or a file the
+    ingest pipeline produced itself — is opened as-is.
+    """
+    if is_encrypted_file(file_path):
+        return io.BufferedReader(DecryptingReader(file_path))
+    return open(file_path, "rb")
+
+
+def plaintext_size(file_path: Path | str) -> int:
+    """Plaintext byte size of an upload (encrypted or legacy)."""
+    if is_encrypted_file(file_path):
+        with DecryptingReader(file_path) as reader:
+            return reader.size
+    return os.path.getsize(file_path)
+
+
 def compute_file_hash(file_path: Path) -> str:
     """Compute SHA-256 hash of a file."""
     sha256 = hashlib.sha256()
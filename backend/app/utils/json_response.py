@@ -0,0 +1,75 @@
+"""orjson-rendered JSON responses.
+
+FastAPI's default path runs a returned value through ``jsonable_encoder`` (a
+pure-Python walk of the whole structure) and then ``json.dumps`` (a second
+walk). For the endpoints that return large nested FHIR dicts — record export,
+``/timeline``, ``/dashboard/*``, ``/observations/*`` — that dominated the
+response time. :class:`FastJSONResponse` renders with ``orjson`` instead and is
+the app's ``default_response_class``; those endpoints also return it directly,
+which skips ``jsonable_encoder`` (and response-model re-validation) entirely.
+
+The JSON is the same, value for value, as the default path produced:
+
+* ``UUID`` → its canonical string, as ``jsonable_encoder`` wrote it.
+* ``datetime``/``date``/``time`` → ``isoformat()``, called explicitly rather
+  than trusting orjson's own RFC 3339 rendering to agree with it.
+* ``Decimal`` → int when integral, else float (``decimal_encoder``).
+* Pydantic models, dataclasses, sets and anything else orjson does not know
+  go through ``jsonable_encoder``; a model at the top level is rendered by
+  pydantic's own JSON serializer (``mode="json"``, by alias), as FastAPI
+  serializes a ``response_model``.
+
+Floats may be spelled differently (``1e16`` vs ``1e+16``) but parse to the
+same number. Integers beyond 64 bits, which orjson rejects, fall back to the
+``json`` module. NaN/Infinity render as ``null`` where ``json.dumps`` (with
+Starlette's ``allow_nan=False``) raised — they do not occur in stored FHIR,
+which Postgres JSONB cannot hold.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.encoders import decimal_encoder, jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+_ORJSON_OPTS = (
+    orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+)
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return decimal_encoder(obj)
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize ``content`` to compact UTF-8 JSON bytes (see module docstring)."""
+    if isinstance(content, BaseModel):
+        return content.model_dump_json(by_alias=True).encode()
+    try:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTS)
+    except orjson.JSONEncodeError:
+        return json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered by :func:`dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
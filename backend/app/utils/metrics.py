@@ -0,0 +1,308 @@
+"""In-process pipeline metrics, rendered in the Prometheus text format.
+
+A deliberately small registry (labelled counters, gauges and histograms)
+instead of a ``prometheus_client`` dependency: the pipelines only need to
+count and time, and ``GET /metrics`` renders exposition format 0.0.4 that any
+Prometheus-compatible scraper reads.
+
+Values live in the process that recorded them. The API process (and the
+embedded extraction worker, when enabled) is what ``/metrics`` exposes; a
+standalone ``python -m app.worker`` keeps its own, unscraped, registry.
+
+Label values must stay low-cardinality: stage names, file types, provider and
+model ids, exception class names — never ids, filenames or record content.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds: sub-10 ms hashes up to multi-minute OCR / extraction runs.
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536, 262144)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(sorted(labels))}"
+            )
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], extra: tuple[tuple[str, str], ...] = ()) -> str:
+        pairs = [*zip(self.labelnames, key), *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic total. Names end in ``_total``."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{self._labels(k)} {_format_value(v)}"
+            for k, v in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """A value that is set (usually at scrape time) rather than accumulated."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{self._labels(k)} {_format_value(v)}"
+            for k, v in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with ``_bucket`` / ``_sum`` / ``_count`` series."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count], sum
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def count(self, **labels: object) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            running = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                running += n
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {running}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{self._labels(key)} {running}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics in registration order; :meth:`render` is the scrape body."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DURATION_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# --- Pipelines -------------------------------------------------------------
+STAGE_SECONDS = REGISTRY.histogram(
+    "medtimeline_stage_duration_seconds",
+    "Wall time of one ingestion/extraction pipeline stage.",
+    ("pipeline", "stage", "outcome"),
+)
+UPLOADS = REGISTRY.counter(
+    "medtimeline_uploads_processed_total",
+    "Uploads that finished a pipeline run, by file type and outcome.",
+    ("pipeline", "file_type", "outcome"),
+)
+RECORDS_WRITTEN = REGISTRY.counter(
+    "medtimeline_records_written_total",
+    "Health records written by ingestion (inserted/updated/unchanged).",
+    ("pipeline", "action"),
+)
+
+# --- LLM providers -----------------------------------------------------------
+LLM_SECONDS = REGISTRY.histogram(
+    "medtimeline_llm_request_duration_seconds",
+    "Latency of one LLMProvider.complete call.",
+    ("provider", "model", "outcome"),
+)
+LLM_TOKENS = REGISTRY.histogram(
+    "medtimeline_llm_tokens",
+    "Tokens per successful LLM call, from the provider's reported usage.",
+    ("provider", "model", "kind"),
+    buckets=TOKEN_BUCKETS,
+)
+LLM_ERRORS = REGISTRY.counter(
+    "medtimeline_llm_errors_total",
+    "Failed LLM calls by exception class.",
+    ("provider", "model", "error"),
+)
+
+# --- Resources (set at scrape time by the /metrics endpoint) -----------------
+DB_POOL = REGISTRY.gauge(
+    "medtimeline_db_pool_connections",
+    "SQLAlchemy connection pool: configured size, checked out, checked in, overflow.",
+    ("state",),
+)
+EXTRACTION_QUEUE = REGISTRY.gauge(
+    "medtimeline_extraction_queue_depth",
+    "Unstructured uploads waiting for or undergoing extraction (all processes).",
+    ("status",),
+)
+INGEST_QUEUE = REGISTRY.gauge(
+    "medtimeline_ingest_queue_depth",
+    "Structured uploads (FHIR, Epic, ZIP) waiting for or undergoing ingest (all processes).",
+    ("status",),
+)
+EXTRACTION_INFLIGHT = REGISTRY.gauge(
+    "medtimeline_extraction_jobs_inflight",
+    "Extraction jobs running in this process.",
+)
+
+
+@contextmanager
+def stage_timer(pipeline: str, stage: str) -> Iterator[None]:
+    """Time the enclosed block into :data:`STAGE_SECONDS`.
+
+    ``outcome`` is ``ok``, ``cancelled`` (task cancellation) or ``error``; the
+    exception still propagates.
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        STAGE_SECONDS.observe(
+            time.perf_counter() - start, pipeline=pipeline, stage=stage, outcome=outcome
+        )
+
+
+def observe_llm_call(
+    provider: str,
+    model: str,
+    seconds: float,
+    *,
+    usage=None,
+    error: BaseException | None = None,
+) -> None:
+    """Record one provider call: latency always, tokens on success, class on error."""
+    model = model or "default"
+    if error is not None:
+        outcome = "cancelled" if isinstance(error, asyncio.CancelledError) else "error"
+        LLM_SECONDS.observe(seconds, provider=provider, model=model, outcome=outcome)
+        if outcome == "error":
+            LLM_ERRORS.inc(provider=provider, model=model, error=type(error).__name__)
+        return
+    LLM_SECONDS.observe(seconds, provider=provider, model=model, outcome="ok")
+    if usage is not None:
+        for kind in ("prompt", "completion"):
+            LLM_TOKENS.observe(
+                getattr(usage, f"{kind}_tokens", 0) or 0,
+                provider=provider, model=model, kind=kind,
+            )
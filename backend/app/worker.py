@@ -0,0 +1,337 @@
+"""Standalone extraction / ingest worker: ``python -m app.worker``.
+
+Runs the unstructured extraction pipeline outside the API process so extraction
+throughput scales by adding processes instead of being capped by the API's one
+event loop. Any number of these (plus the API's embedded worker, unless
+``EXTRACTION_WORKER_EMBEDDED=false``) can share one database safely: files are
+claimed in batches under a heartbeated lease (see
+``app.services.extraction.job_queue``).
+
+Structured uploads (FHIR, Epic, ZIP) are queued the same way and run by
+:class:`IngestWorker`; a job whose worker died is re-claimed when its lease
+lapses and resumes from its last committed batch.
+
+Workers wake on Postgres ``LISTEN/NOTIFY`` as soon as a file is queued, with a
+slow poll as a safety net for missed notifications and lapsed leases. If the
+LISTEN connection can't be opened the worker degrades to a fast poll. The same
+connection listens for cancel requests and pushes them into running jobs.
+
+Run:
+    cd backend && python -m app.worker [--queue extraction|ingest|all]
+        [--concurrency N] [--batch-size N] [--drain]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import logging
+import os
+import signal
+import socket
+from pathlib import Path
+from typing import Awaitable, Callable
+from uuid import UUID, uuid4
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.services.extraction.job_control import CANCEL_CHANNEL, on_cancel_notification
+from app.services.extraction.job_queue import (
+    EXTRACTION_CHANNEL,
+    INGEST_CHANNEL,
+    ClaimedJob,
+    claim_extraction_jobs,
+    claim_ingest_jobs,
+    release_leases,
+    renew_leases,
+)
+
+logger = logging.getLogger(__name__)
+
+# Poll interval used when LISTEN is unavailable (matches the old polling worker).
+_FALLBACK_POLL_SECONDS = 2.0
+# Back-off after an unexpected error in the claim loop.
+_ERROR_BACKOFF_SECONDS = 5.0
+
+Processor = Callable[[UUID, Path, UUID], Awaitable[None]]
+
+
+def _asyncpg_dsn(database_url: str) -> str:
+    """Turn the SQLAlchemy ``postgresql+asyncpg://`` URL into a plain asyncpg DSN."""
+    return make_url(database_url).set(drivername="postgresql").render_as_string(
+        hide_password=False
+    )
+
+
+async def _default_processor(upload_id: UUID, file_path: Path, user_id: UUID) -> None:
+    from app.api.upload import _process_unstructured
+
+    await _process_unstructured(upload_id, file_path, user_id)
+
+
+class ExtractionWorker:
+    """Claim queued extraction jobs in batches and run up to ``concurrency`` at once.
+
+    Only as many files as there are free slots are claimed, so a busy worker
+    never sits on leases for files another worker could start right away.
+
+    The heartbeat keeps a running job's lease alive, so a job that hangs (a
+    stuck LLM or OCR call) would hold its file forever: each job is cancelled
+    after ``job_timeout`` seconds (``extraction_timeout_minutes``) and its
+    lease released, so the next claim retries it or, once retries are used
+    up, fails it.
+    """
+
+    kind = "extraction"
+    channel = EXTRACTION_CHANNEL
+
+    def __init__(
+        self,
+        *,
+        processor: Processor | None = None,
+        session_factory: async_sessionmaker | None = None,
+        database_url: str | None = None,
+        concurrency: int | None = None,
+        batch_size: int | None = None,
+        lease_seconds: int | None = None,
+        poll_interval: float | None = None,
+        job_timeout: float | None = None,
+    ) -> None:
+        if session_factory is None:
+            from app.database import async_session_factory
+
+            session_factory = async_session_factory
+        self.session_factory = session_factory
+        self.processor = processor or self._default_processor()
+        self.database_url = database_url or settings.database_url
+        self.concurrency = max(1, concurrency or self._default_concurrency())
+        self.batch_size = max(1, batch_size or settings.extraction_claim_batch_size)
+        self.lease_seconds = lease_seconds or settings.extraction_lease_seconds
+        self.poll_interval = float(poll_interval or settings.extraction_poll_interval_seconds)
+        self.job_timeout = job_timeout or self._default_job_timeout()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+        self._inflight: dict[UUID, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._listening = False
+
+    def _default_processor(self) -> Processor:
+        return _default_processor
+
+    def _default_concurrency(self) -> int:
+        return settings.extraction_concurrency
+
+    def _default_job_timeout(self) -> float | None:
+        return settings.extraction_timeout_minutes * 60
+
+    async def _claim_jobs(self, limit: int) -> list[ClaimedJob]:
+        return await claim_extraction_jobs(
+            self.session_factory,
+            self.owner,
+            limit,
+            lease_seconds=self.lease_seconds,
+            max_retries=settings.extraction_max_retries,
+        )
+
+    def stop(self) -> None:
+        """Stop claiming new work; ``run`` returns once in-flight jobs finish."""
+        self._stopping.set()
+        self._wakeup.set()
+
+    async def run(self, *, drain: bool = False) -> None:
+        """Claim and process jobs until stopped (or, with ``drain``, until idle)."""
+        listener = await self._listen()
+        heartbeat = asyncio.create_task(self._heartbeat())
+        logger.info(
+            "%s worker %s started (concurrency=%d, batch=%d, lease=%ds, %s)",
+            self.kind.capitalize(), self.owner, self.concurrency, self.batch_size, self.lease_seconds,
+            "LISTEN" if self._listening else f"poll={_FALLBACK_POLL_SECONDS}s",
+        )
+        try:
+            while not self._stopping.is_set():
+                try:
+                    claimed = await self._claim()
+                except Exception:
+                    logger.exception(
+                        "%s worker %s claim failed, backing off", self.kind.capitalize(), self.owner
+                    )
+                    await asyncio.sleep(_ERROR_BACKOFF_SECONDS)
+                    continue
+                for job in claimed:
+                    self._start(job)
+                if drain and not claimed and not self._inflight:
+                    break
+                if claimed and len(self._inflight) < self.concurrency:
+                    continue  # slots still free — more may be queued, claim again
+                await self._wait_for_wakeup()
+            if self._inflight:
+                await asyncio.gather(*self._inflight.values(), return_exceptions=True)
+        finally:
+            for task in list(self._inflight.values()):
+                task.cancel()
+            heartbeat.cancel()
+            if listener is not None:
+                try:
+                    await listener.close()
+                except Exception:  # noqa: BLE001 - best-effort on shutdown
+                    pass
+
+    async def _claim(self) -> list[ClaimedJob]:
+        free = self.concurrency - len(self._inflight)
+        if free <= 0:
+            return []
+        return await self._claim_jobs(min(free, self.batch_size))
+
+    def _start(self, job: ClaimedJob) -> None:
+        logger.info("Worker %s claimed file %s for %s", self.owner, job.upload_id, self.kind)
+        task = asyncio.create_task(self._process(job))
+        self._inflight[job.upload_id] = task
+
+    async def _process(self, job: ClaimedJob) -> None:
+        try:
+            await asyncio.wait_for(
+                self.processor(job.upload_id, Path(job.storage_path), job.user_id),
+                self.job_timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.error(
+                "%s of %s timed out after %gs; releasing it for a retry",
+                self.kind, job.upload_id, self.job_timeout,
+            )
+        except Exception:
+            logger.exception("%s of %s raised past the pipeline", self.kind, job.upload_id)
+        finally:
+            # Released before the slot opens, so the next claim can see a
+            # job that timed out.
+            try:
+                await release_leases(self.session_factory, self.owner, [job.upload_id])
+            except Exception:
+                logger.warning("Failed to release lease on %s", job.upload_id, exc_info=True)
+            self._inflight.pop(job.upload_id, None)
+            self._wakeup.set()  # a slot just opened
+
+    async def _wait_for_wakeup(self) -> None:
+        timeout = self.poll_interval if self._listening else _FALLBACK_POLL_SECONDS
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _heartbeat(self) -> None:
+        interval = max(self.lease_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await renew_leases(
+                    self.session_factory,
+                    self.owner,
+                    list(self._inflight),
+                    lease_seconds=self.lease_seconds,
+                )
+            except Exception:
+                logger.warning("Lease heartbeat failed for %s", self.owner, exc_info=True)
+
+    async def _listen(self):
+        """Open a dedicated asyncpg connection LISTENing on the job + cancel channels.
+
+        Returns the connection (to close on shutdown) or ``None`` when LISTEN is
+        unavailable, in which case the worker falls back to fast polling.
+        """
+        try:
+            import asyncpg
+
+            conn = await asyncpg.connect(_asyncpg_dsn(self.database_url))
+            await conn.add_listener(self.channel, lambda *_args: self._wakeup.set())
+            await conn.add_listener(CANCEL_CHANNEL, on_cancel_notification)
+        except Exception:
+            logger.warning(
+                "LISTEN %s unavailable; %s worker falling back to polling",
+                self.channel, self.kind, exc_info=True,
+            )
+            self._listening = False
+            return None
+        self._listening = True
+        return conn
+
+
+class IngestWorker(ExtractionWorker):
+    """Claims queued structured uploads and runs
+    :func:`~app.services.ingestion.coordinator.run_ingest_job` on each."""
+
+    kind = "ingest"
+    channel = INGEST_CHANNEL
+
+    def _default_processor(self) -> Processor:
+        from app.services.ingestion.coordinator import run_ingest_job
+
+        return functools.partial(run_ingest_job, session_factory=self.session_factory)
+
+    def _default_concurrency(self) -> int:
+        return settings.ingestion_worker_concurrency
+
+    def _default_job_timeout(self) -> float | None:
+        # No bound: a large export legitimately runs long, and every batch
+        # is checkpointed, so a retry would resume rather than restart.
+        return None
+
+    async def _claim_jobs(self, limit: int) -> list[ClaimedJob]:
+        return await claim_ingest_jobs(
+            self.session_factory,
+            self.owner,
+            limit,
+            lease_seconds=self.lease_seconds,
+            max_retries=settings.extraction_max_retries,
+        )
+
+
+_WORKERS = {"extraction": (ExtractionWorker,), "ingest": (IngestWorker,)}
+_WORKERS["all"] = _WORKERS["extraction"] + _WORKERS["ingest"]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    workers = [
+        cls(concurrency=args.concurrency, batch_size=args.batch_size)
+        for cls in _WORKERS[args.queue]
+    ]
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, lambda: [w.stop() for w in workers])
+        except NotImplementedError:  # pragma: no cover - non-POSIX
+            pass
+    await asyncio.gather(*(w.run(drain=args.drain) for w in workers))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Run a standalone extraction / ingest worker.")
+    ap.add_argument(
+        "--queue", choices=sorted(_WORKERS), default="all",
+        help="Which job queue to work (default: both).",
+    )
+    ap.add_argument(
+        "--concurrency", type=int, default=None,
+        help="Concurrent jobs per queue in this process "
+        "(default: EXTRACTION_CONCURRENCY / INGESTION_WORKER_CONCURRENCY).",
+    )
+    ap.add_argument(
+        "--batch-size", type=int, default=None,
+        help="Max files claimed per transaction (default: EXTRACTION_CLAIM_BATCH_SIZE).",
+    )
+    ap.add_argument(
+        "--drain", action="store_true",
+        help="Exit once the queue is empty and in-flight jobs finish.",
+    )
+    args = ap.parse_args()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(name)s %(levelname)s %(message)s",
+    )
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
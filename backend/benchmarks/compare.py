@@ -0,0 +1,113 @@
+"""Compare a pytest-benchmark JSON run against the stored baseline.
+
+Usage::
+
+    python -m benchmarks.compare RESULTS.json [--baseline benchmarks/baseline.json] [--update]
+
+Each benchmark's median is checked against its baseline median; a run slower
+than ``baseline * (1 + tolerance)`` is a regression and the exit status is 1.
+``tolerance`` is per benchmark in the baseline file, falling back to its
+top-level ``tolerance``. Results whose dataset id differs from the baseline's
+(e.g. Synthea output present on one machine only) are reported but never
+fail. ``--update`` rewrites the baseline from RESULTS, keeping tolerances.
+
+Baselines are machine-specific: re-record them (``just bench-baseline``) on
+the reference machine after an intended performance change.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_TOLERANCE = 0.25
+
+
+def load_results(path: Path) -> dict[str, dict]:
+    """``fullname -> {"median": seconds, "dataset": id | None}``."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {
+        bench["fullname"]: {
+            "median": bench["stats"]["median"],
+            "dataset": (bench.get("extra_info") or {}).get("dataset"),
+        }
+        for bench in data["benchmarks"]
+    }
+
+
+def compare(results: dict[str, dict], baseline: dict) -> tuple[list[str], list[str]]:
+    """Return (report lines, regressed benchmark names)."""
+    default_tol = baseline.get("tolerance", DEFAULT_TOLERANCE)
+    stored = baseline.get("benchmarks", {})
+    lines, regressions = [], []
+    for name in sorted(results):
+        current = results[name]
+        base = stored.get(name)
+        if base is None:
+            lines.append(f"  new       {name}: {current['median'] * 1000:.2f} ms (no baseline)")
+            continue
+        if base.get("dataset") != current["dataset"]:
+            lines.append(
+                f"  skipped   {name}: dataset {current['dataset']} != baseline {base.get('dataset')}"
+            )
+            continue
+        tolerance = base.get("tolerance", default_tol)
+        ratio = current["median"] / base["median"]
+        if ratio > 1 + tolerance:
+            status = "REGRESSED"
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            status = "faster"
+        else:
+            status = "ok"
+        lines.append(
+            f"  {status:<9} {name}: {current['median'] * 1000:.2f} ms vs "
+            f"{base['median'] * 1000:.2f} ms ({ratio:.2f}x, tolerance {tolerance:.0%})"
+        )
+    for name in sorted(set(stored) - set(results)):
+        lines.append(f"  missing   {name}: in baseline, not in this run")
+    return lines, regressions
+
+
+def updated_baseline(results: dict[str, dict], baseline: dict) -> dict:
+    stored = baseline.get("benchmarks", {})
+    benchmarks = {}
+    for name, current in sorted(results.items()):
+        entry = {"median": current["median"], "dataset": current["dataset"]}
+        if "tolerance" in stored.get(name, {}):
+            entry["tolerance"] = stored[name]["tolerance"]
+        benchmarks[name] = entry
+    return {"tolerance": baseline.get("tolerance", DEFAULT_TOLERANCE), "benchmarks": benchmarks}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare benchmark results with the baseline.")
+    parser.add_argument("results", type=Path, help="pytest --benchmark-json output")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update", action="store_true", help="rewrite the baseline from results")
+    args = parser.parse_args(argv)
+
+    results = load_results(args.results)
+    baseline = (
+        json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    )
+    if args.update:
+        args.baseline.write_text(
+            json.dumps(updated_baseline(results, baseline), indent=2) + "\n", encoding="utf-8"
+        )
+        print(f"Baseline written: {args.baseline} ({len(results)} benchmarks)")
+        return 0
+
+    lines, regressions = compare(results, baseline)
+    print(f"Benchmarks vs {args.baseline}:")
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond tolerance.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Fixtures for the benchmark suite (``just bench``).
+
+Benchmarks are plain synchronous pytest-benchmark tests; the async paths run
+on one session-wide event loop (:class:`asyncio.Runner`) so the engine and its
+asyncpg connections outlive a single round. DB benchmarks use the test
+database (``tests.conftest.TEST_DB_URL``) and a dedicated benchmark user; the
+record tables are emptied between rounds.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401
+from app.models.base import Base
+from app.models.patient import Patient
+from app.models.user import User
+from benchmarks import datasets
+from tests.conftest import TEST_DB_URL
+
+
+@dataclass(frozen=True)
+class BenchOwner:
+    user_id: UUID
+    patient_id: UUID
+
+
+@pytest.fixture(scope="session")
+def runner() -> Iterator[asyncio.Runner]:
+    with asyncio.Runner() as r:
+        yield r
+
+
+@pytest.fixture(scope="session")
+def session_factory(runner) -> Iterator[async_sessionmaker[AsyncSession]]:
+    engine = create_async_engine(TEST_DB_URL, echo=False)
+
+    async def create_all() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    runner.run(create_all())
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    runner.run(engine.dispose())
+
+
+@pytest.fixture(scope="session")
+def owner(runner, session_factory) -> Iterator[BenchOwner]:
+    """A user + patient that own every row the DB benchmarks write."""
+    user_id, patient_id = uuid4(), uuid4()
+
+    async def create() -> None:
+        async with session_factory() as db:
+            db.add(User(id=user_id, email=f"bench-{user_id.hex}@example.com", password_hash="x"))
+            await db.flush()
+            db.add(Patient(id=patient_id, user_id=user_id, fhir_id="bench-patient", gender="female"))
+            await db.commit()
+
+    async def drop() -> None:
+        async with session_factory() as db:
+            await _truncate_records(db)
+            await db.execute(delete(Patient).where(Patient.id == patient_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+
+    runner.run(create())
+    yield BenchOwner(user_id, patient_id)
+    runner.run(drop())
+
+
+async def _truncate_records(db: AsyncSession) -> None:
+    # The test database is scratch space (tests.conftest truncates it per test);
+    # CASCADE takes provenance, versions and dedup candidates along.
+    await db.execute(text("TRUNCATE health_records, uploaded_files CASCADE"))
+
+
+@pytest.fixture
+def reset_owner(runner, session_factory, owner):
+    """Callable that empties the record tables (a per-round setup)."""
+
+    def reset() -> None:
+        async def run() -> None:
+            async with session_factory() as db:
+                await _truncate_records(db)
+                await db.commit()
+
+        runner.run(run())
+
+    reset()
+    yield reset
+    reset()
+
+
+@pytest.fixture(scope="session")
+def work_dir(tmp_path_factory) -> Path:
+    return tmp_path_factory.mktemp("bench")
+
+
+@pytest.fixture(scope="session")
+def fhir_data(work_dir) -> datasets.FhirDataset:
+    return datasets.fhir_dataset(work_dir)
+
+
+@pytest.fixture(scope="session")
+def fhir_zip(work_dir) -> datasets.FhirDataset:
+    return datasets.fhir_zip_dataset(work_dir)
+
+
+@pytest.fixture(scope="session")
+def epic_dirs(work_dir) -> tuple[Path, Path]:
+    """The Epic export, and a re-keyed copy whose rows all near-duplicate it."""
+    return (
+        datasets.epic_dataset(work_dir / "epic_a"),
+        datasets.epic_dataset(work_dir / "epic_b", id_prefix="B"),
+    )
@@ -0,0 +1,362 @@
+"""Deterministic inputs for the benchmark suite.
+
+FHIR: the largest bundle under ``tests/fixtures/synthea/fhir`` when Synthea
+output is present (``scripts/generate_synthea_fixtures.py`` with its default
+seed), else :func:`synthetic_fhir_bundle` — a seeded stand-in shaped like a
+Synthea bundle, so the suite runs on machines without Java. Epic: the
+``scripts/generate_epic_tsv_fixtures.py`` generator. Every dataset carries an
+id that is recorded with each result, so :mod:`benchmarks.compare` never
+compares timings taken on different inputs.
+"""
+from __future__ import annotations
+
+import json
+import random
+import uuid
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from scripts.generate_epic_tsv_fixtures import DEFAULT_SEED, write_epic_export
+
+BACKEND = Path(__file__).resolve().parent.parent
+SYNTHEA_FHIR_DIR = BACKEND / "tests" / "fixtures" / "synthea" / "fhir"
+
+# Sized so a full ``just bench`` run stays around a minute on a laptop.
+SYNTHETIC_FHIR_ENCOUNTERS = 150
+EPIC_ROWS = 250
+
+_CONDITIONS = [
+    ("44054006", "Diabetes mellitus type 2"), ("38341003", "Hypertension"),
+    ("55822004", "Hyperlipidemia"), ("195967001", "Asthma"),
+    ("40055000", "Chronic sinusitis"), ("10509002", "Acute bronchitis"),
+    ("444814009", "Viral sinusitis"), ("15777000", "Prediabetes"),
+    ("162864005", "Body mass index 30+ - obesity"), ("271737000", "Anemia"),
+]
+# (LOINC, display, unit, low, high)
+_OBSERVATIONS = [
+    ("8302-2", "Body Height", "cm", 150, 190), ("29463-7", "Body Weight", "kg", 50, 110),
+    ("8867-4", "Heart rate", "/min", 55, 100), ("9279-1", "Respiratory rate", "/min", 12, 20),
+    ("4548-4", "Hemoglobin A1c/Hemoglobin.total in Blood", "%", 4.0, 7.5),
+    ("2339-0", "Glucose", "mg/dL", 70, 140), ("2160-0", "Creatinine", "mg/dL", 0.6, 1.3),
+    ("2093-3", "Cholesterol [Mass/volume] in Serum or Plasma", "mg/dL", 150, 260),
+    ("718-7", "Hemoglobin [Mass/volume] in Blood", "g/dL", 12, 17),
+]
+_MEDICATIONS = [
+    ("860975", "24 HR Metformin hydrochloride 500 MG Extended Release Oral Tablet"),
+    ("314076", "lisinopril 10 MG Oral Tablet"), ("259255", "atorvastatin 80 MG Oral Tablet"),
+    ("895994", "120 ACTUAT fluticasone propionate 0.044 MG/ACTUAT Metered Dose Inhaler"),
+    ("313782", "Acetaminophen 325 MG Oral Tablet"), ("308136", "amLODIPine 2.5 MG Oral Tablet"),
+]
+_VACCINES = [("140", "Influenza, seasonal, injectable, preservative free"), ("113", "Td (adult) preservative free")]
+_PROCEDURES = [
+    ("430193006", "Medication Reconciliation (procedure)"),
+    ("710824005", "Assessment of health and social care needs (procedure)"),
+    ("428191000124101", "Documentation of current medications (procedure)"),
+]
+_ENCOUNTER_TYPES = [
+    ("185349003", "Encounter for check up (procedure)", "AMB"),
+    ("410620009", "Well child visit (procedure)", "AMB"),
+    ("185345009", "Encounter for symptom", "AMB"),
+    ("50849002", "Emergency room admission (procedure)", "EMER"),
+]
+
+SNOMED = "http://snomed.info/sct"
+LOINC = "http://loinc.org"
+RXNORM = "http://www.nlm.nih.gov/research/umls/rxnorm"
+CVX = "http://hl7.org/fhir/sid/cvx"
+
+
+@dataclass(frozen=True)
+class FhirDataset:
+    dataset_id: str
+    path: Path
+
+
+def synthetic_fhir_bundle(encounters: int = SYNTHETIC_FHIR_ENCOUNTERS, seed: int = DEFAULT_SEED) -> dict:
+    """A Synthea-shaped transaction bundle: one patient, ``encounters`` visits,
+    each with a few conditions, observations, medications, immunizations and
+    procedures referencing it. Depends only on the arguments."""
+    rng = random.Random(seed)
+
+    def new_id() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def entry(resource: dict) -> dict:
+        return {
+            "fullUrl": f"urn:uuid:{resource['id']}",
+            "resource": resource,
+            "request": {"method": "POST", "url": resource["resourceType"]},
+        }
+
+    patient_id = new_id()
+    patient_ref = {"reference": f"urn:uuid:{patient_id}"}
+    entries = [entry({
+        "resourceType": "Patient",
+        "id": patient_id,
+        "name": [{"use": "official", "family": "Synthetic", "given": ["Alex"]}],
+        "gender": "female",
+        "birthDate": "1968-04-02",
+    })]
+    start = datetime(2010, 1, 1, tzinfo=timezone.utc)
+    for n in range(encounters):
+        when = start + timedelta(days=n * 30 + rng.randrange(20), hours=rng.randrange(8, 17))
+        stamp = when.isoformat()
+        enc_code, enc_display, enc_class = rng.choice(_ENCOUNTER_TYPES)
+        enc_id = new_id()
+        enc_ref = {"reference": f"urn:uuid:{enc_id}"}
+        entries.append(entry({
+            "resourceType": "Encounter",
+            "id": enc_id,
+            "status": "finished",
+            "class": {"system": "http://terminology.hl7.org/CodeSystem/v3-ActCode", "code": enc_class},
+            "type": [{"coding": [{"system": SNOMED, "code": enc_code, "display": enc_display}],
+                      "text": enc_display}],
+            "subject": patient_ref,
+            "period": {"start": stamp, "end": (when + timedelta(minutes=30)).isoformat()},
+        }))
+        if rng.random() < 0.4:
+            code, display = rng.choice(_CONDITIONS)
+            entries.append(entry({
+                "resourceType": "Condition",
+                "id": new_id(),
+                "clinicalStatus": {"coding": [{
+                    "system": "http://terminology.hl7.org/CodeSystem/condition-clinical",
+                    "code": rng.choice(["active", "resolved"]),
+                }]},
+                "code": {"coding": [{"system": SNOMED, "code": code, "display": display}], "text": display},
+                "subject": patient_ref,
+                "encounter": enc_ref,
+                "onsetDateTime": stamp,
+                "recordedDate": stamp,
+            }))
+        for code, display, unit, low, high in rng.sample(_OBSERVATIONS, 4):
+            entries.append(entry({
+                "resourceType": "Observation",
+                "id": new_id(),
+                "status": "final",
+                "category": [{"coding": [{
+                    "system": "http://terminology.hl7.org/CodeSystem/observation-category",
+                    "code": rng.choice(["vital-signs", "laboratory"]),
+                }]}],
+                "code": {"coding": [{"system": LOINC, "code": code, "display": display}], "text": display},
+                "subject": patient_ref,
+                "encounter": enc_ref,
+                "effectiveDateTime": stamp,
+                "issued": stamp,
+                "valueQuantity": {"value": round(rng.uniform(low * 0.9, high * 1.1), 1),
+                                  "unit": unit, "system": "http://unitsofmeasure.org", "code": unit},
+            }))
+        if rng.random() < 0.3:
+            code, display = rng.choice(_MEDICATIONS)
+            entries.append(entry({
+                "resourceType": "MedicationRequest",
+                "id": new_id(),
+                "status": rng.choice(["active", "stopped"]),
+                "intent": "order",
+                "medicationCodeableConcept": {
+                    "coding": [{"system": RXNORM, "code": code, "display": display}], "text": display,
+                },
+                "subject": patient_ref,
+                "encounter": enc_ref,
+                "authoredOn": stamp,
+            }))
+        if rng.random() < 0.2:
+            code, display = rng.choice(_VACCINES)
+            entries.append(entry({
+                "resourceType": "Immunization",
+                "id": new_id(),
+                "status": "completed",
+                "vaccineCode": {"coding": [{"system": CVX, "code": code, "display": display}], "text": display},
+                "patient": patient_ref,
+                "encounter": enc_ref,
+                "occurrenceDateTime": stamp,
+                "primarySource": True,
+            }))
+        if rng.random() < 0.3:
+            code, display = rng.choice(_PROCEDURES)
+            entries.append(entry({
+                "resourceType": "Procedure",
+                "id": new_id(),
+                "status": "completed",
+                "code": {"coding": [{"system": SNOMED, "code": code, "display": display}], "text": display},
+                "subject": patient_ref,
+                "encounter": enc_ref,
+                "performedPeriod": {"start": stamp, "end": stamp},
+            }))
+    return {"resourceType": "Bundle", "type": "transaction", "entry": entries}
+
+
+def fhir_dataset(work_dir: Path) -> FhirDataset:
+    """The FHIR bundle to benchmark: Synthea output if present, else synthetic."""
+    bundles = sorted(SYNTHEA_FHIR_DIR.glob("*.json")) if SYNTHEA_FHIR_DIR.is_dir() else []
+    patients = [p for p in bundles if not p.name.startswith(("hospital", "practitioner"))]
+    if patients:
+        path = max(patients, key=lambda p: (p.stat().st_size, p.name))
+        return FhirDataset(f"synthea:{path.name}", path)
+    path = work_dir / "synthetic_bundle.json"
+    path.write_text(json.dumps(synthetic_fhir_bundle()), encoding="utf-8")
+    return FhirDataset(f"synthetic:{SYNTHETIC_FHIR_ENCOUNTERS}x{DEFAULT_SEED}", path)
+
+
+# A patient-portal export: this many independent bundles in one ZIP.
+ZIP_BUNDLES = 50
+ZIP_BUNDLE_ENCOUNTERS = 30
+
+
+def fhir_zip_dataset(work_dir: Path) -> FhirDataset:
+    """A ZIP of ``ZIP_BUNDLES`` patient bundles: Synthea output if there are
+    that many, else synthetic bundles (one seed each)."""
+    bundles = sorted(SYNTHEA_FHIR_DIR.glob("*.json")) if SYNTHEA_FHIR_DIR.is_dir() else []
+    patients = [p for p in bundles if not p.name.startswith(("hospital", "practitioner"))]
+    path = work_dir / "bundles.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        if len(patients) >= ZIP_BUNDLES:
+            for bundle in patients[:ZIP_BUNDLES]:
+                zf.write(bundle, f"fhir/{bundle.name}")
+            return FhirDataset(f"synthea-zip:{ZIP_BUNDLES}", path)
+        for n in range(ZIP_BUNDLES):
+            bundle = synthetic_fhir_bundle(ZIP_BUNDLE_ENCOUNTERS, DEFAULT_SEED + n)
+            zf.writestr(f"fhir/patient_{n:02d}.json", json.dumps(bundle))
+    return FhirDataset(f"synthetic-zip:{ZIP_BUNDLES}x{ZIP_BUNDLE_ENCOUNTERS}x{DEFAULT_SEED}", path)
+
+
+_NOTE_TEMPLATE = (
+    "Patient Alex Synthetic (DOB 04/02/1968, MRN: {mrn}) seen on {date} at 275 Post Rd E, "
+    "Westport. Phone 203-555-{phone:04d}, email alex.synthetic{n}@example.com. "
+    "{age}-year-old female with {condition}, on {medication}. Reviewed by Dr. Priya Patel; "
+    "follow up with Dr. Okafor in 3 months. Labs: {lab} {value}. Account No: {account}. "
+    "Plan: continue current regimen, repeat labs on {later}.\n"
+)
+
+
+def clinical_notes(count: int = 200, seed: int = DEFAULT_SEED) -> list[str]:
+    """Free-text notes dense in Safe Harbor identifiers (names, dates, MRN,
+    phone, email, address, account), for the PHI scrubber."""
+    rng = random.Random(seed)
+    notes = []
+    for n in range(count):
+        day = datetime(2015, 1, 1) + timedelta(days=rng.randrange(3000))
+        lab = rng.choice(_OBSERVATIONS)
+        notes.append("".join(_NOTE_TEMPLATE.format(
+            n=n,
+            mrn=rng.randrange(10**7, 10**8),
+            date=day.strftime("%m/%d/%Y"),
+            later=(day + timedelta(days=90)).strftime("%B %d, %Y"),
+            phone=rng.randrange(10000),
+            age=rng.choice([47, 55, 91]),
+            condition=rng.choice(_CONDITIONS)[1],
+            medication=rng.choice(_MEDICATIONS)[1],
+            lab=lab[1],
+            value=round(rng.uniform(lab[3], lab[4]), 1),
+            account=rng.randrange(10**8, 10**9),
+        ) for _ in range(3)))
+    return notes
+
+
+def terminology_queries() -> list[tuple[str, str]]:
+    """Labels as they arrive from extraction: exact names, names with trailing
+    form words, casing noise and misses."""
+    queries = []
+    for _code, display in _CONDITIONS:
+        queries += [("condition", display), ("condition", display.upper() + " (disorder)")]
+    for _code, display in _MEDICATIONS:
+        queries += [("medication", display), ("medication", display.split()[0] + " tablet")]
+    for _code, display, *_ in _OBSERVATIONS:
+        queries += [("lab", display), ("lab", display.split()[0] + " serum")]
+    for _code, display in _PROCEDURES:
+        queries.append(("procedure", display))
+    queries += [("condition", "zz unknown finding"), ("medication", "unlisted supplement blend")]
+    return queries
+
+
+def epic_dataset(work_dir: Path, id_prefix: str = "") -> Path:
+    return write_epic_export(work_dir, rows=EPIC_ROWS, seed=DEFAULT_SEED, id_prefix=id_prefix)
+
+
+EPIC_DATASET_ID = f"epic:{EPIC_ROWS}x{DEFAULT_SEED}"
+
+
+# Free-text vocabulary for a long, already-deduplicated record history: the
+# combinations are distinct facts, so exact and near-duplicate matches only
+# arise where an upload restates one of them.
+_SIDES = ["", "left", "right", "bilateral"]
+_SITES = [
+    "knee", "hip", "shoulder", "ankle", "wrist", "elbow", "lower back", "neck",
+    "foot", "hand", "eye", "ear", "chest wall", "abdominal wall", "thumb",
+]
+_FINDINGS = [
+    "pain", "strain", "sprain", "osteoarthritis", "tendinitis", "bursitis", "contusion",
+    "laceration", "fracture", "effusion", "cellulitis", "abscess", "dermatitis", "cyst",
+]
+_COURSES = ["", "acute", "chronic", "recurrent", "post-traumatic"]
+_SITE_PROCEDURES = ["x-ray", "MRI", "injection", "arthroscopy", "ultrasound", "debridement"]
+_DRUGS = [
+    "metformin", "lisinopril", "atorvastatin", "amlodipine", "sertraline", "omeprazole",
+    "levothyroxine", "gabapentin", "losartan", "hydrochlorothiazide", "meloxicam",
+]
+_DOSES = [5, 10, 20, 25, 40, 50, 100, 250, 500, 1000]
+_FORMS = ["oral tablet", "oral capsule", "extended release tablet"]
+
+
+def _free_text_fact(rng: random.Random) -> tuple[str, str]:
+    kind = rng.random()
+    if kind < 0.5:
+        parts = [rng.choice(_COURSES), rng.choice(_SIDES), rng.choice(_SITES), rng.choice(_FINDINGS)]
+        return "condition", " ".join(p for p in parts if p)
+    if kind < 0.75:
+        parts = [rng.choice(_SIDES), rng.choice(_SITES), rng.choice(_SITE_PROCEDURES)]
+        return "procedure", " ".join(p for p in parts if p)
+    return "medication", f"{rng.choice(_DRUGS)} {rng.choice(_DOSES)} mg {rng.choice(_FORMS)}"
+
+
+def _restate(text: str, rng: random.Random) -> str:
+    """How another document words the same fact: reordered, re-punctuated,
+    re-cased or with an extra qualifier."""
+    words = text.split()
+    style = rng.randrange(4)
+    if style == 0 and len(words) > 1:
+        return f"{words[-1].capitalize()}, {' '.join(words[:-1])}"
+    if style == 1:
+        return text.title()
+    if style == 2:
+        return f"{text} ({rng.choice(['unspecified', 'initial encounter', 'as directed'])})"
+    return text.upper()
+
+
+def patient_history(count: int, seed: int = DEFAULT_SEED) -> list[dict]:
+    """One patient's long record history: ~70% coded labs repeated over ten
+    years, the rest distinct free-text conditions, procedures and medications."""
+    rng = random.Random(seed)
+    start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    records = []
+    for _ in range(count):
+        when = start + timedelta(days=rng.randrange(3650))
+        if rng.random() < 0.7:
+            code, display, *_ = rng.choice(_OBSERVATIONS)
+            records.append({"record_type": "observation", "display_text": display,
+                            "code_value": code, "effective_date": when})
+        else:
+            record_type, display = _free_text_fact(rng)
+            records.append({"record_type": record_type, "display_text": display,
+                            "code_value": None, "effective_date": when})
+    return records
+
+
+def upload_restating(history: list[dict], count: int, seed: int = DEFAULT_SEED) -> list[dict]:
+    """A new document's extraction: half restatements of free-text facts in
+    ``history`` (same day), half freshly drawn facts dated after it."""
+    rng = random.Random(seed + 1)
+    free_text = [r for r in history if r["code_value"] is None]
+    visit = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    records = []
+    for i in range(count):
+        if i % 2 == 0:
+            source = rng.choice(free_text)
+            records.append({**source, "display_text": _restate(source["display_text"], rng)})
+        else:
+            record_type, display = _free_text_fact(rng)
+            records.append({"record_type": record_type, "display_text": display,
+                            "code_value": None, "effective_date": visit})
+    return records
@@ -0,0 +1,136 @@
+"""Upload dedup candidate generation: exact bucketing (the patient's whole
+record set loaded and bucketed) vs the MinHash/LSH index, on a 100k-record
+patient; plus both generators' precision/recall on the labelled fixture."""
+from __future__ import annotations
+
+import itertools
+import json
+from types import SimpleNamespace
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.config import settings
+from app.models.record import HealthRecord
+from app.models.uploaded_file import UploadedFile
+from app.services.dedup.detector import _bucket_key, _load_upload_candidates
+from app.services.dedup.minhash_index import lsh_pairs, refresh_patient_index
+from benchmarks import datasets
+from benchmarks.conftest import _truncate_records
+
+HISTORY = 100_000
+UPLOAD = 200
+ROUNDS = 3
+_INSERT_BATCH = 5_000
+LABELED = datasets.BACKEND / "tests" / "fixtures" / "dedup_near_duplicates.json"
+
+# Loading and indexing the 100k-record patient alone takes about a minute.
+pytestmark = pytest.mark.timeout(600)
+
+
+def _rows(records: list[dict], owner, upload_id: UUID, source_format: str) -> list[dict]:
+    return [
+        {
+            **r,
+            "id": uuid4(),
+            "user_id": owner.user_id,
+            "patient_id": owner.patient_id,
+            "source_file_id": upload_id,
+            "fhir_resource_type": "Condition",
+            "fhir_resource": {"resourceType": "Condition"},
+            "source_format": source_format,
+            "status": "active",
+        }
+        for r in records
+    ]
+
+
+@pytest.fixture(scope="module")
+def big_patient(runner, session_factory, owner) -> UUID:
+    """A 100k-record history (indexed) plus one 200-record upload; the upload id."""
+    history = datasets.patient_history(HISTORY)
+    upload_records = datasets.upload_restating(history, UPLOAD)
+
+    async def load() -> UUID:
+        async with session_factory() as db:
+            await _truncate_records(db)
+            uploads = [
+                UploadedFile(
+                    user_id=owner.user_id, filename=name, mime_type="application/pdf",
+                    file_hash=uuid4().hex, storage_path=name, file_category="unstructured",
+                )
+                for name in ("history", "upload")
+            ]
+            db.add_all(uploads)
+            await db.flush()
+            rows = _rows(history, owner, uploads[0].id, "fhir_r4")
+            rows += _rows(upload_records, owner, uploads[1].id, "ai_extracted")
+            for start in range(0, len(rows), _INSERT_BATCH):
+                await db.execute(insert(HealthRecord), rows[start:start + _INSERT_BATCH])
+            await refresh_patient_index(db, owner.user_id, owner.patient_id)
+            await db.commit()
+            return uploads[1].id
+
+    async def drop() -> None:
+        async with session_factory() as db:
+            await _truncate_records(db)
+            await db.commit()
+
+    yield runner.run(load())
+    runner.run(drop())
+
+
+@pytest.mark.parametrize("generator", ["exact", "lsh"])
+def test_upload_candidate_generation(
+    benchmark, runner, session_factory, owner, big_patient, generator
+):
+    benchmark.extra_info["dataset"] = f"patient:{HISTORY}+{UPLOAD}x{datasets.DEFAULT_SEED}"
+
+    async def generate() -> tuple[int, int]:
+        async with session_factory() as db:
+            new_records = (await db.execute(
+                select(HealthRecord).where(HealthRecord.source_file_id == big_patient)
+            )).scalars().all()
+            existing, near = await _load_upload_candidates(
+                db, big_patient, owner.patient_id, owner.user_id, new_records
+            )
+        buckets: dict[tuple, set[UUID]] = {}
+        for r in existing:
+            buckets.setdefault(_bucket_key(r), set()).add(r.id)
+        pairs = sum(
+            len(buckets.get(_bucket_key(r), set()) | near.get(r.id, set())) for r in new_records
+        )
+        return len(existing), pairs
+
+    previous = settings.dedup_minhash_lsh
+    settings.dedup_minhash_lsh = generator == "lsh"
+    try:
+        loaded, pairs = benchmark.pedantic(
+            lambda: runner.run(generate()), rounds=ROUNDS, warmup_rounds=1
+        )
+    finally:
+        settings.dedup_minhash_lsh = previous
+    benchmark.extra_info.update(records_loaded=loaded, candidate_pairs=pairs)
+    print(f"\n{generator}: {loaded} existing records loaded, {pairs} candidate pairs")
+    assert pairs > 0
+
+
+def test_candidate_quality(benchmark):
+    """Precision/recall of each generator against the fixture's labels."""
+    data = json.loads(LABELED.read_text(encoding="utf-8"))
+    records = [SimpleNamespace(code_display=None, **r) for r in data["records"]]
+    benchmark.extra_info["dataset"] = f"labeled:{len(records)}"
+    all_pairs = list(itertools.combinations(range(len(records)), 2))
+    truth = {(i, j) for i, j in all_pairs if records[i].group == records[j].group}
+    exact = {(i, j) for i, j in all_pairs if _bucket_key(records[i]) == _bucket_key(records[j])}
+    lsh = benchmark(lambda: lsh_pairs(records, uuid4()))
+
+    for name, pairs in (("exact", exact), ("lsh", lsh)):
+        hits = len(pairs & truth)
+        precision = hits / len(pairs) if pairs else 0.0
+        recall = hits / len(truth)
+        benchmark.extra_info[f"{name}_precision"] = round(precision, 3)
+        benchmark.extra_info[f"{name}_recall"] = round(recall, 3)
+        print(f"\n{name}: {len(pairs)} pairs, precision {precision:.2f}, recall {recall:.2f}")
+    assert benchmark.extra_info["lsh_recall"] > benchmark.extra_info["exact_recall"]
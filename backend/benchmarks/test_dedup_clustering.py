@@ -0,0 +1,164 @@
+"""Applying auto-merges: the old pairwise path (one UPDATE + Provenance row per
+candidate) vs transitive clustering (every changed cluster in one statement),
+on 10k merged candidates forming chains."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, event, func, insert, select, update
+
+from app.models.deduplication import DedupCandidate
+from app.models.provenance import Provenance
+from app.models.record import HealthRecord
+from app.services.dedup.clustering import cluster_patient_merges
+from benchmarks import datasets
+from benchmarks.conftest import _truncate_records
+
+CLUSTER_SIZE = 5
+CANDIDATES = 10_000
+ROUNDS = 3
+_INSERT_BATCH = 5_000
+_FORMATS = ("ai_extracted", "cda_r2", "fhir_r4", "epic_ehi", "ai_extracted")
+
+pytestmark = pytest.mark.timeout(600)
+
+
+@pytest.fixture(scope="module")
+def chained_candidates(runner, session_factory, owner) -> list[dict]:
+    """``CANDIDATES`` merged auto-candidates: chains of ``CLUSTER_SIZE`` records."""
+    clusters = CANDIDATES // (CLUSTER_SIZE - 1)
+    history = datasets.patient_history(clusters * CLUSTER_SIZE)
+    records = [
+        {
+            **r,
+            "id": uuid4(),
+            "user_id": owner.user_id,
+            "patient_id": owner.patient_id,
+            "fhir_resource_type": "Observation",
+            "fhir_resource": {"resourceType": "Observation"},
+            "source_format": _FORMATS[i % CLUSTER_SIZE],
+        }
+        for i, r in enumerate(history)
+    ]
+    candidates = [
+        {
+            "id": uuid4(),
+            "record_a_id": records[start + k]["id"],
+            "record_b_id": records[start + k + 1]["id"],
+            "similarity_score": 0.97,
+            "match_reasons": {},
+            "status": "merged",
+            "auto_resolved": True,
+        }
+        for start in range(0, len(records), CLUSTER_SIZE)
+        for k in range(CLUSTER_SIZE - 1)
+    ]
+
+    async def load() -> None:
+        async with session_factory() as db:
+            await _truncate_records(db)
+            for start in range(0, len(records), _INSERT_BATCH):
+                await db.execute(insert(HealthRecord), records[start:start + _INSERT_BATCH])
+            for start in range(0, len(candidates), _INSERT_BATCH):
+                await db.execute(insert(DedupCandidate), candidates[start:start + _INSERT_BATCH])
+            await db.commit()
+
+    async def drop() -> None:
+        async with session_factory() as db:
+            await _truncate_records(db)
+            await db.commit()
+
+    runner.run(load())
+    yield candidates
+    runner.run(drop())
+
+
+async def _pairwise_merges(db, candidates: list[dict], upload_id) -> None:
+    """The pre-clustering ``_apply_auto_merges``: record_b merged into record_a."""
+    for c in candidates:
+        await db.execute(
+            update(HealthRecord)
+            .where(HealthRecord.id == c["record_b_id"])
+            .values(
+                is_duplicate=True,
+                merged_into_id=c["record_a_id"],
+                merge_metadata={
+                    "merged_from": str(c["record_b_id"]),
+                    "merged_at": datetime.now(timezone.utc).isoformat(),
+                    "merge_type": "duplicate",
+                    "source_upload_id": str(upload_id),
+                    "auto_resolved": True,
+                },
+            )
+        )
+        db.add(Provenance(
+            record_id=c["record_a_id"],
+            action="merge",
+            agent="system/auto-merge",
+            source_file_id=upload_id,
+            details={
+                "merged_record_id": str(c["record_b_id"]),
+                "similarity_score": c["similarity_score"],
+                "classification": "duplicate",
+            },
+        ))
+    await db.flush()
+
+
+@pytest.mark.parametrize("path", ["pairwise", "clustered"])
+def test_apply_auto_merges(
+    benchmark, runner, session_factory, owner, chained_candidates, path
+):
+    benchmark.extra_info["dataset"] = (
+        f"candidates:{len(chained_candidates)}x{CLUSTER_SIZE}x{datasets.DEFAULT_SEED}"
+    )
+    statements: list[int] = []
+    engine = session_factory.kw["bind"].sync_engine
+
+    def count(*_args) -> None:
+        statements[-1] += 1
+
+    def reset() -> None:
+        async def run() -> None:
+            async with session_factory() as db:
+                await db.execute(delete(Provenance))
+                await db.execute(
+                    update(HealthRecord)
+                    .where(HealthRecord.patient_id == owner.patient_id)
+                    .values(is_duplicate=False, merged_into_id=None, merge_metadata=None)
+                )
+                await db.commit()
+
+        runner.run(run())
+
+    async def apply() -> None:
+        async with session_factory() as db:
+            # Statements issued by the merge itself (executemany counts once).
+            statements.append(0)
+            event.listen(engine, "before_cursor_execute", count)
+            try:
+                if path == "pairwise":
+                    await _pairwise_merges(db, chained_candidates, None)
+                else:
+                    await cluster_patient_merges(db, owner.user_id, owner.patient_id)
+            finally:
+                event.remove(engine, "before_cursor_execute", count)
+            await db.commit()
+
+    async def merged_count() -> int:
+        async with session_factory() as db:
+            return await db.scalar(
+                select(func.count()).select_from(HealthRecord).where(
+                    HealthRecord.patient_id == owner.patient_id,
+                    HealthRecord.is_duplicate.is_(True),
+                )
+            )
+
+    benchmark.pedantic(lambda: runner.run(apply()), setup=reset, rounds=ROUNDS)
+    merged = runner.run(merged_count())
+    reset()
+    benchmark.extra_info.update(merged=merged, statements=statements[-1])
+    print(f"\n{path}: {merged} records merged in {statements[-1]} statements")
+    assert merged == len(chained_candidates)
@@ -0,0 +1,150 @@
+"""CPU-bound per-record hot paths: content hashing, timeline previews,
+structural FHIR validation, terminology lookup, PHI scrubbing and response
+serialization."""
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.config import settings
+from app.services.ai.phi_scrubber import scrub_phi
+from app.services.extraction.terminology import lookup
+from app.services.ingestion.content_hash import content_hash
+from app.services.ingestion.fhir_parser import SUPPORTED_RESOURCE_TYPES
+from app.services.ingestion.fhir_validation import (
+    clear_shape_cache,
+    validate_and_log_fhir,
+    validation_scope,
+)
+from app.schemas.timeline import TimelineResponse
+from app.services.timeline_preview import build_timeline_preview
+from app.utils.json_response import dumps
+from benchmarks import datasets
+
+
+@pytest.fixture(scope="module")
+def resources(fhir_data) -> list[dict]:
+    entries = json.loads(fhir_data.path.read_text(encoding="utf-8"))["entry"]
+    return [e["resource"] for e in entries if e["resource"]["resourceType"] in SUPPORTED_RESOURCE_TYPES]
+
+
+def test_content_hash(benchmark, fhir_data, resources):
+    benchmark.extra_info["dataset"] = fhir_data.dataset_id
+    hashes = benchmark(lambda: [content_hash(r) for r in resources])
+    assert len(set(hashes)) == len(resources)
+
+
+def test_build_timeline_preview(benchmark, fhir_data, resources):
+    benchmark.extra_info["dataset"] = fhir_data.dataset_id
+    typed = [(r, SUPPORTED_RESOURCE_TYPES[r["resourceType"]]) for r in resources]
+    previews = benchmark(lambda: [build_timeline_preview(r, t) for r, t in typed])
+    assert any(previews)
+
+
+_VALIDATION_MODES = {
+    "off": {"fhir_validation": "off"},
+    "all-uncached": {"fhir_validation_shape_cache": False},
+    "all": {},
+    "sample": {"fhir_validation_sampling": "sample"},
+    "first-n-per-type": {"fhir_validation_sampling": "first-n-per-type"},
+    "async": {"fhir_validation_async": True},
+}
+
+
+@pytest.mark.parametrize("mode", list(_VALIDATION_MODES))
+def test_fhir_validation(benchmark, monkeypatch, fhir_data, resources, mode):
+    """One upload's worth of validation from a cold shape cache; ``async``
+    includes waiting for the deferred checks. Also reported per 10k resources."""
+    benchmark.extra_info["dataset"] = fhir_data.dataset_id
+    monkeypatch.setattr(settings, "fhir_validation", "log")
+    for name, value in _VALIDATION_MODES[mode].items():
+        monkeypatch.setattr(settings, name, value)
+    typed = [(r, SUPPORTED_RESOURCE_TYPES[r["resourceType"]]) for r in resources]
+
+    def validate() -> dict:
+        clear_shape_cache()
+        with validation_scope() as engine:
+            for resource, record_type in typed:
+                validate_and_log_fhir(resource, record_type)
+        return engine.report()
+
+    report = benchmark(validate)
+    benchmark.extra_info["per_10k_resources_s"] = (
+        benchmark.stats.stats.median * 10_000 / len(resources)
+    )
+    assert report["checked"] + report["sampled_out"] == (0 if mode == "off" else len(resources))
+
+
+def test_terminology_lookup(benchmark):
+    queries = datasets.terminology_queries()
+    benchmark.extra_info["dataset"] = f"terminology:{len(queries)}"
+    hits = benchmark(lambda: [lookup(category, text) for category, text in queries])
+    assert any(hits) and not all(hits)
+
+
+def test_scrub_phi(benchmark):
+    benchmark.extra_info["dataset"] = f"notes:{datasets.DEFAULT_SEED}"
+    notes = datasets.clinical_notes()
+    names = ["Alex Synthetic", "Alex", "Synthetic"]
+    # Regex passes only: the spaCy NER pass is optional (and model-dependent).
+    scrubbed = benchmark(lambda: [
+        scrub_phi(note, patient_names=names, patient_dob="1968-04-02", enable_ner=False)
+        for note in notes
+    ])
+    assert all("Synthetic" not in text for text, _report in scrubbed)
+
+
+TIMELINE_PAYLOAD_BYTES = 5 * 1024 * 1024
+
+
+@pytest.fixture(scope="module")
+def timeline_payload(resources) -> TimelineResponse:
+    """A ~5 MB ``GET /timeline`` response: the dataset's records, cycled."""
+    typed = [(r, SUPPORTED_RESOURCE_TYPES[r["resourceType"]]) for r in resources]
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    events, size, n = [], 0, 0
+    while size < TIMELINE_PAYLOAD_BYTES:
+        resource, record_type = typed[n % len(typed)]
+        event = {
+            "id": uuid.UUID(int=n),
+            "record_type": record_type,
+            "display_text": f"{resource['resourceType']} {n}",
+            "effective_date": start + timedelta(hours=n),
+            "code_display": (resource.get("code") or {}).get("text"),
+            "category": [record_type],
+            "provider": None,
+            "preview": build_timeline_preview(resource, record_type),
+        }
+        events.append(event)
+        size += len(json.dumps(event, default=str))
+        n += 1
+    return TimelineResponse(events=events, total=len(events))
+
+
+def _default_render(content) -> bytes:
+    # FastAPI's path before orjson: pydantic dumps a response_model, anything
+    # else goes through jsonable_encoder; then Starlette's json.dumps.
+    if isinstance(content, BaseModel):
+        return JSONResponse(content.model_dump(mode="json", by_alias=True)).body
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+@pytest.mark.parametrize("payload", ["model", "dict"])
+@pytest.mark.parametrize("renderer", ["default", "orjson"])
+def test_serialize_timeline(benchmark, fhir_data, timeline_payload, payload, renderer):
+    """Render a 5 MB timeline response: the pydantic model ``/timeline`` returns,
+    or the same content as the plain dicts the dashboard endpoints build."""
+    benchmark.extra_info["dataset"] = f"{fhir_data.dataset_id}:timeline-5mb"
+    content = (
+        timeline_payload if payload == "model"
+        else timeline_payload.model_dump(mode="python")
+    )
+    render = dumps if renderer == "orjson" else _default_render
+    body = benchmark(render, content)
+    assert len(body) > TIMELINE_PAYLOAD_BYTES * 0.9
@@ -0,0 +1,174 @@
+"""Ingestion benchmarks: bundle/export parsing end to end, and the idempotent
+inserter on its own (a fresh load and an unchanged re-ingest)."""
+from __future__ import annotations
+
+import json
+from uuid import uuid4
+
+import pytest
+
+from app.config import settings
+from app.models.uploaded_file import UploadedFile
+from app.services.ingestion.epic_parser import parse_epic_export
+from app.services.ingestion.fhir_parser import map_fhir_resource, parse_fhir_bundle
+from app.services.ingestion.idempotent_inserter import idempotent_insert_records
+from benchmarks.datasets import EPIC_DATASET_ID, ZIP_BUNDLES
+
+ROUNDS = 5
+_BATCH = 100  # the parsers' default batch_size
+
+
+def test_parse_fhir_bundle(benchmark, runner, session_factory, owner, reset_owner, fhir_data):
+    benchmark.extra_info["dataset"] = fhir_data.dataset_id
+
+    async def ingest() -> dict:
+        async with session_factory() as db:
+            return await parse_fhir_bundle(
+                fhir_data.path, owner.user_id, owner.patient_id, None, db
+            )
+
+    stats = benchmark.pedantic(lambda: runner.run(ingest()), setup=reset_owner, rounds=ROUNDS)
+    assert stats["records_inserted"] > 0 and not stats["errors"]
+
+
+def test_parse_epic_export(benchmark, runner, session_factory, owner, reset_owner, epic_dirs):
+    benchmark.extra_info["dataset"] = EPIC_DATASET_ID
+
+    async def ingest() -> dict:
+        async with session_factory() as db:
+            return await parse_epic_export(
+                epic_dirs[0], owner.user_id, owner.patient_id, None, db
+            )
+
+    stats = benchmark.pedantic(lambda: runner.run(ingest()), setup=reset_owner, rounds=ROUNDS)
+    assert stats["records_inserted"] > 0 and not stats["errors"]
+
+
+@pytest.mark.parametrize("workers", ["sequential", 1, 4])
+def test_ingest_zip_of_bundles(
+    benchmark, runner, session_factory, owner, reset_owner, fhir_zip, monkeypatch, workers
+):
+    """A patient-portal export: independent bundles mapped ``workers`` at a
+    time (1 = a thread beside the writer, else the process pool), against
+    mapping each inline right before writing it."""
+    import app.services.ingestion.coordinator as coordinator
+    from app.services.ingestion.bundle_engine import BundleMapping
+    from app.services.ingestion.cda_engine import shutdown_cda_pool
+
+    benchmark.extra_info["dataset"] = fhir_zip.dataset_id
+    if workers == "sequential":
+        async def inline(jobs, **_kwargs):
+            for source, _payload in jobs:
+                yield BundleMapping(source, None)
+
+        monkeypatch.setattr(coordinator, "iter_bundle_mappings", inline)
+    else:
+        monkeypatch.setattr(settings, "cda_conversion_workers", workers)
+
+    async def ingest() -> dict:
+        async with session_factory() as db:
+            upload = UploadedFile(
+                user_id=owner.user_id,
+                filename=fhir_zip.path.name,
+                mime_type="application/zip",
+                file_hash=uuid4().hex,
+                storage_path=str(fhir_zip.path),
+                file_category="structured",
+            )
+            db.add(upload)
+            await db.commit()
+            return await coordinator._ingest_zip(
+                db, owner.user_id, owner.patient_id, upload.id, fhir_zip.path
+            )
+
+    try:
+        stats = benchmark.pedantic(lambda: runner.run(ingest()), setup=reset_owner, rounds=ROUNDS)
+    finally:
+        shutdown_cda_pool()
+    assert len(stats["files_detail"]) == ZIP_BUNDLES and not stats["errors"]
+
+
+@pytest.fixture(scope="module")
+def bundle_records(fhir_data, owner) -> list[dict]:
+    """The bundle's resources mapped to insert-ready record dicts."""
+    entries = json.loads(fhir_data.path.read_text(encoding="utf-8"))["entry"]
+    records = []
+    for entry in entries:
+        resource = entry["resource"]
+        if resource["resourceType"] == "Patient":
+            continue
+        mapped = map_fhir_resource(resource)
+        if mapped:
+            mapped.update(user_id=owner.user_id, patient_id=owner.patient_id, source_file_id=None)
+            records.append(mapped)
+    return records
+
+
+async def _insert_all(session_factory, records: list[dict]) -> dict:
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+    async with session_factory() as db:
+        for start in range(0, len(records), _BATCH):
+            result = await idempotent_insert_records(db, records[start:start + _BATCH])
+            for key in totals:
+                totals[key] += result[key]
+            await db.commit()
+    return totals
+
+
+@pytest.mark.parametrize("scenario", ["fresh", "reingest"])
+def test_idempotent_insert_records(
+    benchmark, runner, session_factory, reset_owner, fhir_data, bundle_records, scenario
+):
+    benchmark.extra_info["dataset"] = fhir_data.dataset_id
+
+    def setup():
+        reset_owner()
+        if scenario == "reingest":
+            runner.run(_insert_all(session_factory, [dict(r) for r in bundle_records]))
+        return ([dict(r) for r in bundle_records],), {}
+
+    totals = benchmark.pedantic(
+        lambda records: runner.run(_insert_all(session_factory, records)),
+        setup=setup,
+        rounds=ROUNDS,
+    )
+    if scenario == "fresh":
+        assert totals["inserted"] > 0
+    else:
+        assert totals["inserted"] == 0 and totals["unchanged"] > 0
+
+
+def test_detect_upload_duplicates(
+    benchmark, runner, session_factory, owner, reset_owner, epic_dirs
+):
+    """The second of two overlapping Epic exports against the first."""
+    from app.services.dedup.detector import detect_upload_duplicates
+
+    benchmark.extra_info["dataset"] = EPIC_DATASET_ID
+
+    async def load() -> object:
+        upload_ids = []
+        async with session_factory() as db:
+            for export_dir in epic_dirs:
+                upload = UploadedFile(
+                    user_id=owner.user_id,
+                    filename=export_dir.name,
+                    mime_type="text/tab-separated-values",
+                    file_hash=uuid4().hex,
+                    storage_path=str(export_dir),
+                    file_category="structured",
+                )
+                db.add(upload)
+                await db.commit()
+                await parse_epic_export(export_dir, owner.user_id, owner.patient_id, upload.id, db)
+                upload_ids.append(upload.id)
+        return upload_ids[1]
+
+    upload_id = runner.run(load())
+
+    async def detect() -> tuple[list[dict], list[dict]]:
+        async with session_factory() as db:
+            return await detect_upload_duplicates(db, upload_id, owner.patient_id, owner.user_id)
+
+    auto_merged, needs_review = benchmark.pedantic(lambda: runner.run(detect()), rounds=ROUNDS)
+    assert auto_merged or needs_review
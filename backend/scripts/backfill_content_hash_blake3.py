@@ -0,0 +1,97 @@
+"""Backfill content_hash_blake3 (v2) for existing health_records.
+
+Step 2 of the hash migration in ``app/services/ingestion/content_hash.py``:
+hashes the same canonical bytes as ``content_hash`` (v1) with BLAKE3. Only
+rows whose v2 column is NULL are touched, so a second run is a clean no-op.
+Rows are walked by primary key (keyset pagination) in batches of ``BATCH``,
+one session per batch.
+
+Refuses to run unless the ``fast-hash`` extra is installed and
+``CONTENT_HASH_BLAKE3`` is enabled — otherwise live ingestion would keep
+writing rows without v2 behind the backfill.
+
+Run:
+    cd backend && .venv/bin/python -m scripts.backfill_content_hash_blake3
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+
+from sqlalchemy import select
+
+from app.database import async_session_factory
+from app.models.record import HealthRecord
+from app.services.ingestion.content_hash import blake3_enabled, content_digests
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+BATCH = 500
+
+
+async def _process_batch(after_id) -> tuple[int, object, int]:
+    """Hash one batch of rows with ``id > after_id``.
+
+    Returns (rows_in_batch, last_id, mismatched_v1). A v1 mismatch means the
+    stored sha256 predates the current canonicalization; v2 is still written
+    from the current bytes and the row is logged for inspection.
+    """
+    async with async_session_factory() as db:
+        query = (
+            select(HealthRecord)
+            .where(
+                HealthRecord.content_hash_blake3.is_(None),
+                HealthRecord.fhir_resource.is_not(None),
+            )
+            .order_by(HealthRecord.id)
+            .limit(BATCH)
+        )
+        if after_id is not None:
+            query = query.where(HealthRecord.id > after_id)
+        rows = (await db.execute(query)).scalars().all()
+        if not rows:
+            return 0, after_id, 0
+
+        mismatched = 0
+        for row in rows:
+            digests = content_digests(row.fhir_resource)
+            if row.content_hash and row.content_hash != digests.sha256:
+                mismatched += 1
+                logger.warning("record %s: stored v1 hash differs from recomputed", row.id)
+            row.content_hash = row.content_hash or digests.sha256
+            row.content_hash_blake3 = digests.blake3
+
+        await db.commit()
+        return len(rows), rows[-1].id, mismatched
+
+
+async def main() -> int:
+    """Backfill the v2 content hash on existing health_records rows."""
+    if not blake3_enabled():
+        logger.error(
+            "BLAKE3 unavailable: install the 'fast-hash' extra and set "
+            "CONTENT_HASH_BLAKE3=true before backfilling"
+        )
+        return 1
+
+    after_id = None
+    total = total_mismatched = 0
+    while True:
+        done, after_id, mismatched = await _process_batch(after_id)
+        if done == 0:
+            break
+        total += done
+        total_mismatched += mismatched
+        logger.info("batch: hashed=%d mismatched_v1=%d (total=%d)", done, mismatched, total)
+
+    logger.info("done; total rows hashed=%d, mismatched_v1=%d", total, total_mismatched)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -15,7 +15,7 @@ from sqlalchemy import select
 
 from app.database import async_session_factory
 from app.models.record import HealthRecord
-from app.services.ingestion.content_hash import content_hash
+from app.services.ingestion.content_hash import content_digests
 from app.services.ingestion.identity import extract_identity
 
 logging.basicConfig(
@@ -131,7 +131,9 @@ async def _process_batch(
             # --- content_hash ---
             # No uniqueness constraint; unconditionally populate if missing.
             if not row.content_hash and row.fhir_resource:
-                row.content_hash = content_hash(row.fhir_resource)
+                digests = content_digests(row.fhir_resource)
+                row.content_hash = digests.sha256
+                row.content_hash_blake3 = digests.blake3
                 assigned_hash += 1
 
         await db.commit()
@@ -0,0 +1,66 @@
+"""Check the encounter graph projection against health_records.
+
+Compares every user's ``encounter_links`` rows with what ``health_records``
+implies (``app/services/encounter_graph.py``): which records are linked, the
+surviving encounter each one resolves to, the copied columns, and — by
+decrypting both sides — the provider/preview summary. Reports the records
+that disagree; with ``--repair`` rebuilds their rows, one transaction per
+user. Exits 1 if drift was found and not repaired.
+
+Run:
+    cd backend && .venv/bin/python -m scripts.check_encounter_links [--repair]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from sqlalchemy import select
+
+from app.database import async_session_factory
+from app.models.encounter_link import EncounterLink
+from app.models.record import HealthRecord
+from app.services.encounter_graph import check_links, repair_links
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+async def main(argv: list[str] | None = None) -> int:
+    """Check (and optionally repair) every user's encounter links."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repair", action="store_true", help="rebuild the rows that disagree")
+    args = parser.parse_args(argv)
+
+    async with async_session_factory() as db:
+        user_ids = (await db.execute(
+            select(HealthRecord.user_id).where(HealthRecord.linked_encounter_id.isnot(None))
+            .union(select(EncounterLink.user_id))
+        )).scalars().all()
+
+    drifted = 0
+    for user_id in user_ids:
+        async with async_session_factory() as db:
+            drift = await check_links(db, user_id, summaries=True)
+            if not drift:
+                continue
+            drifted += 1
+            logger.warning(
+                "user %s: missing=%d stale=%d summaries=%d",
+                user_id, len(drift.missing), len(drift.stale), len(drift.summaries),
+            )
+            if args.repair:
+                await repair_links(db, user_id, drift.record_ids)
+                await db.commit()
+
+    logger.info("done; users=%d drifted=%d repaired=%s", len(user_ids), drifted, args.repair)
+    return 1 if drifted and not args.repair else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
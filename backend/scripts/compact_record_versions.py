@@ -0,0 +1,59 @@
+"""Apply the record version retention policy once, now.
+
+Runs the same compaction the API schedules every
+``VERSION_COMPACTION_INTERVAL_MINUTES`` (``app/services/ingestion/
+version_retention.py``): old ``record_versions`` snapshots are thinned out per
+``VERSION_RETENTION_*`` and the kept ones below each record's newest are
+rewritten as encrypted diffs. Safe to run while the API is ingesting — records
+being written are skipped and counted — and a second run is a no-op. Logs the
+table's storage before and after; Postgres reuses the freed space after the
+next (auto)vacuum.
+
+Run:
+    cd backend && .venv/bin/python -m scripts.compact_record_versions
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+
+from app.database import async_session_factory
+from app.services.ingestion.version_retention import (
+    RetentionPolicy,
+    compact_versions,
+    storage_stats,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+async def _log_storage(label: str) -> None:
+    async with async_session_factory() as db:
+        stats = await storage_stats(db)
+    logger.info(
+        "%s: versions=%d full_copies=%d deltas=%d bytes=%d",
+        label, stats["versions"], stats["full_copies"], stats["deltas"], stats["bytes"],
+    )
+
+
+async def main() -> int:
+    """Compact record_versions under the configured retention policy."""
+    policy = RetentionPolicy.from_settings()
+    logger.info("policy: %s", policy)
+    await _log_storage("before")
+    stats = await compact_versions(async_session_factory, policy)
+    logger.info(
+        "done; records=%d rewritten=%d deleted=%d skipped_locked=%d",
+        stats.records, stats.rewritten, stats.deleted, stats.skipped,
+    )
+    await _log_storage("after")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
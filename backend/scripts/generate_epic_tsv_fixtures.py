@@ -0,0 +1,201 @@
+"""Generate a synthetic Epic EHI Tables export (TSV) of any size.
+
+The committed ``tests/fixtures/sample_epic_tsv/`` export has a handful of rows;
+performance work needs exports shaped like a real multi-year chart. This writes
+one patient's PATIENT, PROBLEM_LIST, ORDER_MED, ORDER_RESULTS, PAT_ENC and
+ALLERGY tables with the columns the Epic mappers read, drawing values from a
+seeded RNG — the same ``--seed`` and ``--rows`` always produce byte-identical
+files, so benchmark runs are comparable. Everything is synthetic (no PHI).
+
+``--id-prefix`` changes every row's Epic ID while keeping the clinical content,
+which gives a second "export" whose records are all near-duplicates of the
+first (what ``detect_upload_duplicates`` is built to find).
+
+Usage::
+
+    python backend/scripts/generate_epic_tsv_fixtures.py [-r ROWS] [-s SEED] [-o DIR]
+
+The default output dir is gitignored; regenerate on demand.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+OUT = BACKEND / "tests" / "fixtures" / "synthetic_epic_tsv"
+
+DEFAULT_SEED = 20260620
+
+_PROBLEMS = [
+    "Type 2 diabetes mellitus", "Essential hypertension", "Hyperlipidemia",
+    "Asthma", "Gastroesophageal reflux disease", "Hypothyroidism",
+    "Major depressive disorder", "Osteoarthritis of knee", "Chronic kidney disease stage 3",
+    "Obesity", "Migraine", "Allergic rhinitis", "Anemia", "Atrial fibrillation",
+    "Sleep apnea", "Vitamin D deficiency", "Prediabetes", "Low back pain",
+]
+_MEDICATIONS = [
+    ("Metformin 500mg", "Metformin", "500mg twice daily", "Oral"),
+    ("Lisinopril 10mg", "Lisinopril", "10mg once daily", "Oral"),
+    ("Atorvastatin 20mg", "Atorvastatin", "20mg at bedtime", "Oral"),
+    ("Levothyroxine 50mcg", "Levothyroxine", "50mcg every morning", "Oral"),
+    ("Albuterol HFA", "Albuterol", "2 puffs every 4 hours as needed", "Inhalation"),
+    ("Omeprazole 20mg", "Omeprazole", "20mg once daily", "Oral"),
+    ("Sertraline 50mg", "Sertraline", "50mg once daily", "Oral"),
+    ("Amlodipine 5mg", "Amlodipine", "5mg once daily", "Oral"),
+    ("Vitamin D3 2000 IU", "Cholecalciferol", "2000 IU once daily", "Oral"),
+    ("Fluticasone nasal spray", "Fluticasone", "1 spray each nostril daily", "Nasal"),
+]
+# (component, unit, low, high, LOINC long name)
+_LABS = [
+    ("Hemoglobin A1c", "%", 4.0, 5.6, "Hemoglobin A1c/Hemoglobin.total in Blood"),
+    ("Glucose", "mg/dL", 70, 100, "Glucose [Mass/volume] in Serum or Plasma"),
+    ("Creatinine", "mg/dL", 0.6, 1.3, "Creatinine [Mass/volume] in Serum or Plasma"),
+    ("Sodium", "mmol/L", 135, 145, "Sodium [Moles/volume] in Serum or Plasma"),
+    ("Potassium", "mmol/L", 3.5, 5.1, "Potassium [Moles/volume] in Serum or Plasma"),
+    ("LDL Cholesterol", "mg/dL", 0, 100, "Cholesterol in LDL [Mass/volume] in Serum or Plasma"),
+    ("TSH", "mIU/L", 0.4, 4.0, "Thyrotropin [Units/volume] in Serum or Plasma"),
+    ("Hemoglobin", "g/dL", 13.5, 17.5, "Hemoglobin [Mass/volume] in Blood"),
+    ("WBC", "K/uL", 4.5, 11.0, "Leukocytes [#/volume] in Blood"),
+    ("Platelets", "K/uL", 150, 400, "Platelets [#/volume] in Blood"),
+]
+_DEPARTMENTS = ["Internal Medicine", "Family Medicine", "Cardiology", "Endocrinology", "Urgent Care"]
+_PROVIDERS = ["Dr. Smith", "Dr. Patel", "Dr. Nguyen", "Dr. Garcia", "Dr. Okafor"]
+_ALLERGENS = [
+    ("Penicillin", "Rash"), ("Sulfa Drugs", "Hives"), ("Peanut", "Anaphylaxis"),
+    ("Latex", "Itching"), ("Shellfish", "Swelling"), ("Codeine", "Nausea"),
+]
+
+_START = datetime(2012, 1, 1)
+_SPAN_DAYS = 12 * 365
+
+
+def _epic_date(dt: datetime) -> str:
+    return dt.strftime("%m/%d/%Y 12:00:00 AM")
+
+
+def _write(path: Path, header: list[str], rows: list[list[str]]) -> None:
+    lines = ["\t".join(header)] + ["\t".join(row) for row in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def write_epic_export(
+    out_dir: Path, rows: int = 200, seed: int = DEFAULT_SEED, id_prefix: str = ""
+) -> Path:
+    """Write the export under ``out_dir`` and return it.
+
+    ``rows`` is per clinical table (allergies get a tenth). Output depends only
+    on the arguments.
+    """
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    def day() -> datetime:
+        return _START + timedelta(days=rng.randrange(_SPAN_DAYS))
+
+    _write(
+        out_dir / "PATIENT.tsv",
+        ["PAT_ID", "PAT_FIRST_NAME", "PAT_LAST_NAME", "BIRTH_DATE", "SEX", "PAT_MRN_ID"],
+        [["1001", "Alex", "Synthetic", "04/02/1968", "Female", "MRN-90001"]],
+    )
+
+    problems = []
+    for i in range(rows):
+        name = rng.choice(_PROBLEMS)
+        resolved = _epic_date(day()) if rng.random() < 0.2 else ""
+        problems.append([
+            "1001", f"{id_prefix}PL{i:06d}", f"DX{_PROBLEMS.index(name):03d}", name, name,
+            _epic_date(day()), resolved, "Resolved" if resolved else "Active",
+            rng.choice(["Y", "N"]), "",
+        ])
+    _write(
+        out_dir / "PROBLEM_LIST.tsv",
+        ["PAT_ID", "PROBLEM_LIST_ID", "DX_ID", "DX_ID_DX_NAME", "DESCRIPTION", "NOTED_DATE",
+         "RESOLVED_DATE", "PROBLEM_STATUS_C_NAME", "CHRONIC_YN", "PROBLEM_CMT"],
+        problems,
+    )
+
+    meds = []
+    for i in range(rows):
+        display, generic, dosage, route = rng.choice(_MEDICATIONS)
+        start = day()
+        meds.append([
+            "1001", f"{id_prefix}OM{i:06d}", display, generic, dosage, f"{display} {route.lower()}",
+            route, _epic_date(start), "", _epic_date(start - timedelta(days=1)),
+            rng.choice(["Active", "Completed", "Discontinued"]), str(rng.choice([30, 60, 90])),
+            str(rng.randrange(6)), rng.choice(_PROVIDERS),
+        ])
+    _write(
+        out_dir / "ORDER_MED.tsv",
+        ["PAT_ID", "ORDER_MED_ID", "DISPLAY_NAME", "MEDICATION_ID_MEDICATION_NAME", "DOSAGE",
+         "DESCRIPTION", "MED_ROUTE_C_NAME", "START_DATE", "END_DATE", "ORDERING_DATE",
+         "ORDER_STATUS_C_NAME", "QUANTITY", "REFILLS", "MED_PRESC_PROV_ID_PROV_NAME"],
+        meds,
+    )
+
+    results = []
+    for i in range(rows):
+        component, unit, low, high, loinc = rng.choice(_LABS)
+        value = round(rng.uniform(low * 0.8, high * 1.2), 1)
+        flag = "High" if value > high else "Low" if value < low else ""
+        results.append([
+            "1001", f"{id_prefix}OP{i // 4:06d}", str(i % 4 + 1), component, str(value), str(value),
+            str(low), str(high), unit, _epic_date(day()), "Final", flag, loinc,
+        ])
+    _write(
+        out_dir / "ORDER_RESULTS.tsv",
+        ["PAT_ID", "ORDER_PROC_ID", "LINE", "COMPONENT_ID_NAME", "ORD_VALUE", "ORD_NUM_VALUE",
+         "REFERENCE_LOW", "REFERENCE_HIGH", "REFERENCE_UNIT", "RESULT_DATE",
+         "RESULT_STATUS_C_NAME", "RESULT_FLAG_C_NAME", "COMPON_LNC_ID_LNC_LONG_NAME"],
+        results,
+    )
+
+    encounters = []
+    for i in range(rows):
+        encounters.append([
+            "1001", f"{id_prefix}CSN{i:06d}", _epic_date(day()), "Completed",
+            rng.choice(["Outpatient", "Office Visit", "Telehealth"]), rng.choice(_DEPARTMENTS),
+            rng.choice(_PROVIDERS), "MD", "", rng.choice(["Annual checkup", "Follow-up visit", ""]),
+        ])
+    _write(
+        out_dir / "PAT_ENC.tsv",
+        ["PAT_ID", "PAT_ENC_CSN_ID", "CONTACT_DATE", "APPT_STATUS_C_NAME", "FIN_CLASS_C_NAME",
+         "DEPARTMENT_ID_EXTERNAL_NAME", "VISIT_PROV_ID_PROV_NAME", "VISIT_PROV_TITLE_NAME",
+         "HOSP_DISCHRG_TIME", "CONTACT_COMMENT"],
+        encounters,
+    )
+
+    allergies = []
+    for i in range(max(1, rows // 10)):
+        allergen, reaction = rng.choice(_ALLERGENS)
+        allergies.append([
+            "1001", f"{id_prefix}ALG{i:06d}", allergen, reaction, _epic_date(day()),
+            rng.choice(["Mild", "Moderate", "Severe"]), "Active",
+        ])
+    _write(
+        out_dir / "ALLERGY.tsv",
+        ["PAT_ID", "ALLERGY_ID", "ALLERGEN_ID_ALLERGEN_NAME", "REACTION", "DATE_NOTED",
+         "SEVERITY_C_NAME", "ALRGY_STATUS_C_NAME"],
+        allergies,
+    )
+    return out_dir
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Epic EHI Tables export.")
+    parser.add_argument("-r", "--rows", type=int, default=200, help="rows per clinical table")
+    parser.add_argument("-s", "--seed", type=int, default=DEFAULT_SEED, help="RNG seed (reproducible)")
+    parser.add_argument("-o", "--out", type=Path, default=OUT, help="output directory")
+    parser.add_argument("--id-prefix", default="", help="prefix for every Epic row ID")
+    args = parser.parse_args()
+
+    out = write_epic_export(args.out, args.rows, args.seed, args.id_prefix)
+    print(f"Epic TSV export written under: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,422 @@
+"""Move health_records and record_versions onto hash partitions of user_id.
+
+Every query the app issues against these tables is scoped to one user, so
+``PARTITION BY HASH (user_id)`` lets Postgres prune to a single partition and
+keeps each partition's indexes small. The conversion runs online, in phases
+that can each be re-run or resumed:
+
+``prepare``
+    Creates ``<table>_partitioned`` with ``--partitions`` hash partitions.
+    Each gets the same columns, defaults and checks, outgoing foreign keys,
+    and a copy of every index, created partition-local. The primary key
+    becomes ``(id, user_id)``, since a partitioned table's unique keys must
+    contain the partition key. A trigger on the live table then mirrors every
+    insert, update and delete into the shadow table (dual writes).
+``copy``
+    Walks the live table by primary key (keyset pagination) in batches of
+    ``--batch`` rows and inserts them into the shadow table, one transaction
+    per batch. Progress is kept in ``partition_migration_progress``, so an
+    interrupted copy resumes where it stopped. Rows are copied with
+    ``ON CONFLICT DO NOTHING`` under ``FOR KEY SHARE``, so a row already
+    mirrored by the trigger is never overwritten with an older copy, and a
+    concurrent delete waits for the batch and is then mirrored.
+``switch``
+    One short transaction under ``ACCESS EXCLUSIVE`` locks drops the
+    triggers and swaps the names. The partitioned tables and their indexes
+    take the original names, and the old tables stay behind as
+    ``<table>_unpartitioned``.
+``drop-old``
+    Drops the ``_unpartitioned`` tables once the switch has been checked.
+``abort``
+    Before ``switch``, removes the shadow tables and triggers again.
+
+Foreign keys that point *at* these tables (dedup candidates, provenance,
+cross references, minhashes, summary items, the self references of merged and
+linked records) cannot target a hash-partitioned table, because ``id`` alone is
+no longer unique. ``switch`` replaces each with triggers that enforce the
+same thing. On the referencing table, an insert or update has to name an
+existing row; the check holds that row ``FOR KEY SHARE``, as a foreign key
+does. On the new table, a delete runs the key's ``ON DELETE`` action:
+``CASCADE`` and ``SET NULL`` are carried out, and ``NO ACTION`` /
+``RESTRICT`` reject deleting a row that is still referenced. Violations raise
+``foreign_key_violation``. Row ids never change, so updates of the referenced
+side are not checked.
+
+``record_versions`` gets ``user_id`` through its parent record wherever a row
+predates that column.
+
+Run:
+    cd backend && .venv/bin/python -m scripts.partition_health_records prepare --partitions 16
+    cd backend && .venv/bin/python -m scripts.partition_health_records copy
+    cd backend && .venv/bin/python -m scripts.partition_health_records switch
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database import engine
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Parents first: record_versions rows take user_id from health_records.
+TABLES = ("health_records", "record_versions")
+PARTITION_KEY = "user_id"
+PROGRESS_TABLE = "partition_migration_progress"
+BATCH = 2000
+PARTITIONS = 16
+
+_NIL = UUID(int=0)
+# Partition key for rows written before record_versions had the column.
+_KEY_EXPR = {
+    "record_versions": (
+        "COALESCE({row}.user_id, "
+        "(SELECT h.user_id FROM health_records h WHERE h.id = {row}.record_id))"
+    ),
+}
+
+
+def _shadow(table: str) -> str:
+    return f"{table}_partitioned"
+
+
+async def _exists(conn: AsyncConnection, name: str) -> bool:
+    return await conn.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+
+
+async def _columns(conn: AsyncConnection, table: str) -> list[str]:
+    rows = await conn.execute(
+        text(
+            "SELECT attname FROM pg_attribute "
+            "WHERE attrelid = CAST(:table AS regclass) AND attnum > 0 AND NOT attisdropped "
+            "ORDER BY attnum"
+        ),
+        {"table": table},
+    )
+    return [r.attname for r in rows]
+
+
+def _values(table: str, columns: list[str], row: str) -> str:
+    """Column expressions of ``row`` with the partition key filled in."""
+    key = _KEY_EXPR.get(table, "{row}.user_id").format(row=row)
+    return ", ".join(key if c == PARTITION_KEY else f"{row}.{c}" for c in columns)
+
+
+async def _indexes(conn: AsyncConnection, table: str) -> list[tuple[str, str]]:
+    """``(name, definition)`` of the table's indexes other than the primary key."""
+    rows = await conn.execute(
+        text(
+            "SELECT i.relname AS name, pg_get_indexdef(x.indexrelid) AS definition "
+            "FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+            "WHERE x.indrelid = CAST(:table AS regclass) AND NOT x.indisprimary "
+            "ORDER BY i.relname"
+        ),
+        {"table": table},
+    )
+    return [(r.name, r.definition) for r in rows]
+
+
+async def _referencing_keys(conn: AsyncConnection, table: str):
+    """Foreign keys pointing at ``table``: (owner, name, column, on_delete, width)."""
+    return (await conn.execute(
+        text(
+            "SELECT c.conrelid::regclass::text AS owner, c.conname AS name, "
+            "a.attname AS column, c.confdeltype::text AS on_delete, "
+            "cardinality(c.conkey) AS width "
+            "FROM pg_constraint c "
+            "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1] "
+            "WHERE c.contype = 'f' AND c.confrelid = CAST(:table AS regclass) "
+            "ORDER BY 1, 2"
+        ),
+        {"table": table},
+    )).all()
+
+
+_ON_DELETE = {"a": "no action", "r": "restrict", "c": "cascade", "n": "set null", "d": "set default"}
+
+
+def _on_delete(fk, table: str) -> str:
+    """The delete trigger's statement for one dropped key."""
+    if fk.on_delete == "c":
+        return f"DELETE FROM {fk.owner} WHERE {fk.column} = OLD.id;"
+    if fk.on_delete == "n":
+        return f"UPDATE {fk.owner} SET {fk.column} = NULL WHERE {fk.column} = OLD.id;"
+    if fk.on_delete == "d":
+        return f"UPDATE {fk.owner} SET {fk.column} = DEFAULT WHERE {fk.column} = OLD.id;"
+    return (
+        f"IF EXISTS (SELECT 1 FROM {fk.owner} WHERE {fk.column} = OLD.id) THEN "
+        f"RAISE foreign_key_violation USING MESSAGE = format("
+        f"'{table} %s is still referenced from {fk.owner}.{fk.column}', OLD.id); "
+        "END IF;"
+    )
+
+
+async def _check_references(conn: AsyncConnection, fk, table: str) -> None:
+    """Reject rows of ``fk.owner`` whose ``fk.column`` names no row of ``table``."""
+    function = f"{fk.name[:57]}_check"
+    await conn.execute(text(f"""
+        CREATE FUNCTION {function}() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF NEW.{fk.column} IS NOT NULL THEN
+                PERFORM 1 FROM {table} WHERE id = NEW.{fk.column} FOR KEY SHARE;
+                IF NOT FOUND THEN
+                    RAISE foreign_key_violation USING MESSAGE = format(
+                        '{fk.owner}.{fk.column} %s is not present in {table}', NEW.{fk.column});
+                END IF;
+            END IF;
+            RETURN NULL;
+        END $$
+    """))
+    await conn.execute(text(
+        f'CREATE TRIGGER "{fk.name}" AFTER INSERT OR UPDATE OF {fk.column} ON {fk.owner} '
+        f"FOR EACH ROW EXECUTE FUNCTION {function}()"
+    ))
+
+
+async def prepare(conn: AsyncConnection, partitions: int = PARTITIONS) -> None:
+    """Create the partitioned shadow tables and start dual writes."""
+    await conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} ("
+        "table_name text PRIMARY KEY, partitions integer NOT NULL, "
+        "last_id uuid NOT NULL, copied bigint NOT NULL DEFAULT 0, "
+        "copy_finished_at timestamptz, switched_at timestamptz)"
+    ))
+    for table in TABLES:
+        shadow = _shadow(table)
+        if await _exists(conn, shadow):
+            logger.info("%s already prepared", table)
+            continue
+        # Only outgoing keys can be kept; keys between the two tables go too.
+        outgoing = (await conn.execute(
+            text(
+                "SELECT conname AS name, pg_get_constraintdef(oid) AS definition "
+                "FROM pg_constraint WHERE contype = 'f' "
+                "AND conrelid = CAST(:table AS regclass) "
+                "AND confrelid::regclass::text <> ALL(CAST(:tables AS text[]))"
+            ),
+            {"table": table, "tables": list(TABLES)},
+        )).all()
+        indexes = await _indexes(conn, table)
+
+        await conn.execute(text(
+            f"CREATE TABLE {shadow} (LIKE {table} INCLUDING DEFAULTS "
+            f"INCLUDING CONSTRAINTS INCLUDING STORAGE) PARTITION BY HASH ({PARTITION_KEY})"
+        ))
+        await conn.execute(text(
+            f"ALTER TABLE {shadow} ALTER COLUMN {PARTITION_KEY} SET NOT NULL, "
+            f"ADD CONSTRAINT {shadow}_pkey PRIMARY KEY (id, {PARTITION_KEY})"
+        ))
+        for remainder in range(partitions):
+            await conn.execute(text(
+                f"CREATE TABLE {table}_p{remainder} PARTITION OF {shadow} "
+                f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+            ))
+        for name, definition in indexes:
+            if definition.startswith("CREATE UNIQUE") and PARTITION_KEY not in definition:
+                raise RuntimeError(
+                    f"unique index {name} does not include {PARTITION_KEY}; "
+                    "a hash-partitioned table cannot enforce it"
+                )
+            await conn.execute(text(
+                definition.replace(f"INDEX {name} ON", f"INDEX {name}_part ON", 1)
+                .replace(f" public.{table} ", f" public.{shadow} ", 1)
+            ))
+        for fk in outgoing:
+            await conn.execute(text(
+                f"ALTER TABLE {shadow} ADD CONSTRAINT {fk.name} {fk.definition}"
+            ))
+
+        columns = await _columns(conn, table)
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c not in ("id", PARTITION_KEY))
+        # user_id never changes on a row, so an UPDATE is an upsert of the
+        # same (id, user_id); the upsert also waits out a concurrent copy batch.
+        await conn.execute(text(f"""
+            CREATE OR REPLACE FUNCTION {table}_dual_write() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    DELETE FROM {shadow} WHERE id = OLD.id;
+                ELSE
+                    INSERT INTO {shadow} ({", ".join(columns)})
+                    VALUES ({_values(table, columns, "NEW")})
+                    ON CONFLICT (id, {PARTITION_KEY}) DO UPDATE SET {updates};
+                END IF;
+                RETURN NULL;
+            END $$
+        """))
+        await conn.execute(text(
+            f"CREATE TRIGGER {table}_dual_write AFTER INSERT OR UPDATE OR DELETE "
+            f"ON {table} FOR EACH ROW EXECUTE FUNCTION {table}_dual_write()"
+        ))
+        await conn.execute(
+            text(
+                f"INSERT INTO {PROGRESS_TABLE} (table_name, partitions, last_id) "
+                "VALUES (:table, :partitions, :nil)"
+            ),
+            {"table": table, "partitions": partitions, "nil": _NIL},
+        )
+        logger.info("%s: %d partitions, %d indexes, dual writes on", table, partitions, len(indexes))
+
+
+async def copy_batch(conn: AsyncConnection, table: str, batch: int = BATCH) -> int:
+    """Copy the next ``batch`` rows of ``table``; returns rows read (0 when done)."""
+    progress = (await conn.execute(
+        text(f"SELECT last_id, copy_finished_at FROM {PROGRESS_TABLE} WHERE table_name = :table"),
+        {"table": table},
+    )).one()
+    if progress.copy_finished_at is not None:
+        return 0
+    columns = await _columns(conn, table)
+    row = (await conn.execute(
+        text(f"""
+            WITH batch AS (
+                SELECT * FROM {table} WHERE id > :after ORDER BY id LIMIT :batch FOR KEY SHARE
+            ), copied AS (
+                INSERT INTO {_shadow(table)} ({", ".join(columns)})
+                SELECT {_values(table, columns, "batch")} FROM batch
+                ON CONFLICT DO NOTHING
+            )
+            SELECT count(*) AS rows, (SELECT id FROM batch ORDER BY id DESC LIMIT 1) AS last_id
+            FROM batch
+        """),
+        {"after": progress.last_id, "batch": batch},
+    )).one()
+    if row.rows:
+        await conn.execute(
+            text(
+                f"UPDATE {PROGRESS_TABLE} SET last_id = :last_id, copied = copied + :rows "
+                "WHERE table_name = :table"
+            ),
+            {"last_id": row.last_id, "rows": row.rows, "table": table},
+        )
+    else:
+        await conn.execute(
+            text(f"UPDATE {PROGRESS_TABLE} SET copy_finished_at = now() WHERE table_name = :table"),
+            {"table": table},
+        )
+    return row.rows
+
+
+async def switch(conn: AsyncConnection) -> None:
+    """Swap the partitioned tables in for the live ones (one transaction)."""
+    pending = (await conn.execute(text(
+        f"SELECT table_name FROM {PROGRESS_TABLE} "
+        "WHERE copy_finished_at IS NULL OR switched_at IS NOT NULL"
+    ))).scalars().all()
+    if pending:
+        raise RuntimeError(f"copy not finished or already switched: {', '.join(pending)}")
+    await conn.execute(text(f"LOCK TABLE {', '.join(TABLES)} IN ACCESS EXCLUSIVE MODE"))
+
+    referencing = {table: await _referencing_keys(conn, table) for table in TABLES}
+    composite = [fk.name for keys in referencing.values() for fk in keys if fk.width > 1]
+    if composite:
+        raise RuntimeError(f"cannot replace multi-column foreign keys: {', '.join(composite)}")
+    for table, keys in referencing.items():
+        for fk in keys:
+            await conn.execute(text(f'ALTER TABLE {fk.owner} DROP CONSTRAINT "{fk.name}"'))
+
+    for table in TABLES:
+        shadow, old = _shadow(table), f"{table}_unpartitioned"
+        await conn.execute(text(f"DROP TRIGGER {table}_dual_write ON {table}"))
+        await conn.execute(text(f"DROP FUNCTION {table}_dual_write()"))
+        indexes = [name for name, _ in await _indexes(conn, table)]
+        await conn.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+        await conn.execute(text(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey"))
+        for name in indexes:
+            await conn.execute(text(f"ALTER INDEX {name} RENAME TO {name}_unpartitioned"))
+        await conn.execute(text(f"ALTER TABLE {shadow} RENAME TO {table}"))
+        await conn.execute(text(f"ALTER TABLE {table} RENAME CONSTRAINT {shadow}_pkey TO {table}_pkey"))
+        for name in indexes:
+            await conn.execute(text(f"ALTER INDEX {name}_part RENAME TO {name}"))
+    # After the renames, so a key of one of TABLES lands on its new table.
+    for table, keys in referencing.items():
+        for fk in keys:
+            await _check_references(conn, fk, table)
+            logger.info(
+                "%s.%s: foreign key %s (on delete %s) replaced by triggers",
+                fk.owner, fk.column, fk.name, _ON_DELETE[fk.on_delete],
+            )
+        if keys:
+            await conn.execute(text(f"""
+                CREATE FUNCTION {table}_delete_dependents() RETURNS trigger
+                LANGUAGE plpgsql AS $$
+                BEGIN
+                    {" ".join(_on_delete(fk, table) for fk in keys)}
+                    RETURN NULL;
+                END $$
+            """))
+            await conn.execute(text(
+                f"CREATE TRIGGER {table}_delete_dependents AFTER DELETE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION {table}_delete_dependents()"
+            ))
+    await conn.execute(text(f"UPDATE {PROGRESS_TABLE} SET switched_at = now()"))
+    logger.info("switched %s to hash partitions", ", ".join(TABLES))
+
+
+async def drop_old(conn: AsyncConnection) -> None:
+    """Drop the pre-partitioning tables left behind by :func:`switch`."""
+    for table in reversed(TABLES):
+        await conn.execute(text(f"DROP TABLE IF EXISTS {table}_unpartitioned"))
+
+
+async def abort(conn: AsyncConnection) -> None:
+    """Undo :func:`prepare` (only before :func:`switch`)."""
+    if await _exists(conn, PROGRESS_TABLE) and await conn.scalar(
+        text(f"SELECT count(*) FROM {PROGRESS_TABLE} WHERE switched_at IS NOT NULL")
+    ):
+        raise RuntimeError("already switched; nothing to abort")
+    for table in TABLES:
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_dual_write ON {table}"))
+        await conn.execute(text(f"DROP FUNCTION IF EXISTS {table}_dual_write()"))
+        await conn.execute(text(f"DROP TABLE IF EXISTS {_shadow(table)}"))
+    await conn.execute(text(f"DROP TABLE IF EXISTS {PROGRESS_TABLE}"))
+
+
+async def main() -> int:
+    """Run one phase of the conversion."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("phase", choices=("prepare", "copy", "switch", "drop-old", "abort"))
+    parser.add_argument("--partitions", type=int, default=PARTITIONS)
+    parser.add_argument("--batch", type=int, default=BATCH)
+    args = parser.parse_args()
+
+    try:
+        if args.phase == "copy":
+            for table in TABLES:
+                total = 0
+                while True:
+                    async with engine.begin() as conn:
+                        done = await copy_batch(conn, table, args.batch)
+                    if done == 0:
+                        break
+                    total += done
+                    logger.info("%s: copied %d rows", table, total)
+                logger.info("%s: copy finished", table)
+        else:
+            phase = {"prepare": prepare, "switch": switch, "drop-old": drop_old, "abort": abort}
+            async with engine.begin() as conn:
+                if args.phase == "prepare":
+                    await prepare(conn, args.partitions)
+                else:
+                    await phase[args.phase](conn)
+    except RuntimeError as exc:
+        logger.error("%s", exc)
+        return 1
+    finally:
+        await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -187,7 +187,7 @@ def reset_extraction_worker():
     ``start_extraction_worker`` sees a "not done" task and refuses to spawn a
     fresh one. Extraction then never runs and any test that waits on it hangs
     forever (the whole-suite hang). Nulling the global before each test — and
-    clearing the per-loop semaphore caches — guarantees each test gets a worker
+    clearing the per-loop semaphore cache — guarantees each test gets a worker
     bound to its own loop.
     """
     import app.api.upload as upload_module
@@ -200,7 +200,7 @@ def reset_extraction_worker():
             except Exception:
                 pass
         upload_module._worker_task = None
-        upload_module._extraction_semaphores.clear()
+        upload_module._ingest_worker_task = None
         upload_module._gemini_semaphores.clear()
 
     _reset()
@@ -228,6 +228,23 @@ async def auth_headers(client: AsyncClient, email: str = "test@example.com") ->
     return {"Authorization": f"Bearer {token}"}, user_id
 
 
+async def run_ingest_jobs(db_session: AsyncSession) -> None:
+    """Run every queued structured upload to completion on an ingest worker.
+
+    The upload endpoints only queue the job; the worker uses its own sessions
+    on the test DB, so ``db_session``'s cached rows are expired afterwards.
+    """
+    from app.worker import IngestWorker
+
+    session_factory = async_sessionmaker(
+        db_session.bind, class_=AsyncSession, expire_on_commit=False
+    )
+    await IngestWorker(
+        session_factory=session_factory, database_url=TEST_DB_URL, poll_interval=0.1
+    ).run(drain=True)
+    db_session.expire_all()
+
+
 async def create_test_patient(db_session: AsyncSession, user_id: str | UUID) -> Patient:
     """Insert a Patient row and return it."""
     uid = UUID(user_id) if isinstance(user_id, str) else user_id
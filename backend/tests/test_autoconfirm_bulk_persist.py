@@ -0,0 +1,160 @@
+"""Set-based persistence in ``_autoconfirm_and_finish``.
+
+A 500-entity document must produce the same records, encounter links and A&P
+cross-references through the bulk INSERT path as through the per-row ORM path;
+the timing of both is reported (``pytest -s``).
+"""
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.api.upload import _persist_extracted_bulk, _persist_extracted_orm, _plan_extracted_rows
+from app.models.cross_reference import RecordCrossReference
+from app.models.patient import Patient
+from app.models.record import HealthRecord
+from app.models.uploaded_file import UploadedFile
+from app.models.user import User
+
+N_ENTITIES = 500
+N_ASSESSMENT_PLANS = 10
+_CLASSES = (
+    "condition", "medication", "lab_result", "vital", "procedure",
+    "allergy", "imaging_result", "social_history", "family_history",
+)
+
+
+def _fixture_document(user_id, patient_id, upload_id) -> list[tuple]:
+    """``(entity, record_dict)`` pairs shaped like ``_build_record_dicts`` output:
+    one encounter, a handful of A&P notes, the rest clinical entities, plus an
+    unmappable entity (``None`` dict) that must be skipped."""
+    classes = ["encounter"] + ["assessment_plan"] * N_ASSESSMENT_PLANS
+    classes += [_CLASSES[i % len(_CLASSES)] for i in range(N_ENTITIES - len(classes))]
+    built = []
+    for i, cls in enumerate(classes):
+        entity = SimpleNamespace(
+            entity_class=cls, attributes={"_source_section": f"section-{i % 7}"}
+        )
+        built.append((entity, {
+            "id": uuid4(),
+            "patient_id": patient_id,
+            "user_id": user_id,
+            "record_type": cls,
+            "fhir_resource_type": "Observation",
+            "fhir_resource": {"resourceType": "Observation", "id": str(i)},
+            "content_hash": f"hash-{i}",
+            "source_format": "ai_extracted",
+            "source_file_id": upload_id,
+            "effective_date": None,
+            "status": "active",
+            "category": [cls],
+            "code_system": None,
+            "code_value": None,
+            "code_display": f"{cls} {i}",
+            "display_text": f"{cls} {i}",
+            "is_duplicate": False,
+            "confidence_score": 0.9,
+            "ai_extracted": True,
+        }))
+    built.insert(3, (SimpleNamespace(entity_class="unknown", attributes={}), None))
+    return built
+
+
+async def _seed(db: AsyncSession):
+    user = User(email=f"bulk-{uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    await db.flush()
+    patient = Patient(user_id=user.id)
+    upload = UploadedFile(
+        user_id=user.id, filename="summary.txt", mime_type="text/plain",
+        file_size_bytes=1, file_hash=f"h_{uuid4().hex}", storage_path="/tmp/x",
+        ingestion_status="processing", file_category="unstructured",
+    )
+    db.add_all([patient, upload])
+    await db.flush()
+    return user.id, patient.id, upload.id
+
+
+async def _snapshot(db: AsyncSession, upload_id):
+    """Id-free view of what was persisted for ``upload_id``."""
+    enc = aliased(HealthRecord)
+    rows = (
+        await db.execute(
+            select(
+                HealthRecord.display_text, HealthRecord.record_type,
+                HealthRecord.source_section, HealthRecord.fhir_resource, enc.display_text,
+            )
+            .outerjoin(enc, enc.id == HealthRecord.linked_encounter_id)
+            .where(HealthRecord.source_file_id == upload_id)
+        )
+    ).all()
+    doc, ref = aliased(HealthRecord), aliased(HealthRecord)
+    links = (
+        await db.execute(
+            select(doc.display_text, ref.display_text, RecordCrossReference.reference_type)
+            .join(doc, doc.id == RecordCrossReference.document_record_id)
+            .join(ref, ref.id == RecordCrossReference.referenced_record_id)
+            .where(doc.source_file_id == upload_id)
+        )
+    ).all()
+    return (
+        {(r[0], r[1], r[2], r[3]["id"], r[4]) for r in rows},
+        sorted(tuple(link) for link in links),
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_and_orm_paths_persist_identical_records_and_links(db_session: AsyncSession):
+    timings = {}
+    snapshots = {}
+    for name, persist in (("orm", _persist_extracted_orm), ("bulk", _persist_extracted_bulk)):
+        user_id, patient_id, upload_id = await _seed(db_session)
+        built = _fixture_document(user_id, patient_id, upload_id)
+        t0 = time.perf_counter()
+        count = await persist(db_session, built)
+        await db_session.commit()
+        timings[name] = time.perf_counter() - t0
+        assert count == N_ENTITIES
+        snapshots[name] = await _snapshot(db_session, upload_id)
+
+    print(
+        f"\n_autoconfirm persistence, {N_ENTITIES} entities: "
+        f"orm={timings['orm'] * 1000:.0f} ms bulk={timings['bulk'] * 1000:.0f} ms"
+    )
+    assert timings["bulk"] < timings["orm"]
+    orm_records, orm_links = snapshots["orm"]
+    bulk_records, bulk_links = snapshots["bulk"]
+    assert len(orm_records) == N_ENTITIES
+    assert bulk_records == orm_records
+    assert len(orm_links) == N_ASSESSMENT_PLANS * (N_ENTITIES - 1 - N_ASSESSMENT_PLANS)
+    assert bulk_links == orm_links
+
+
+def test_plan_links_every_record_to_the_encounter_without_a_flush():
+    user_id, patient_id, upload_id = uuid4(), uuid4(), uuid4()
+    records, xrefs = _plan_extracted_rows(_fixture_document(user_id, patient_id, upload_id))
+
+    encounter = next(r for r in records if r["record_type"] == "encounter")
+    assert encounter["linked_encounter_id"] is None
+    assert all(
+        r["linked_encounter_id"] == encounter["id"] for r in records if r is not encounter
+    )
+    by_id = {r["id"]: r for r in records}
+    assert {by_id[x["document_record_id"]]["record_type"] for x in xrefs} == {"assessment_plan"}
+    assert {
+        (by_id[x["referenced_record_id"]]["record_type"], x["reference_type"]) for x in xrefs
+    } >= {("medication", "prescribes"), ("lab_result", "supports"), ("condition", "addresses")}
+
+
+def test_plan_without_encounter_or_assessment_plan():
+    entity = SimpleNamespace(entity_class="condition", attributes={})
+    records, xrefs = _plan_extracted_rows([(entity, {"record_type": "condition"})])
+    assert records[0]["linked_encounter_id"] is None
+    assert records[0]["id"] is not None
+    assert xrefs == []
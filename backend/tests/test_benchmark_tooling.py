@@ -0,0 +1,83 @@
+"""Tests for the benchmark suite's inputs and its baseline comparison
+(``benchmarks/``, ``just bench``)."""
+from __future__ import annotations
+
+import csv
+import json
+
+from app.services.ingestion.epic_parser import EPIC_TABLE_MAPPERS
+from benchmarks import compare
+from benchmarks.datasets import synthetic_fhir_bundle
+from scripts.generate_epic_tsv_fixtures import write_epic_export
+
+
+def test_epic_generator_is_deterministic_and_mappable(tmp_path):
+    a = write_epic_export(tmp_path / "a", rows=40, seed=7)
+    b = write_epic_export(tmp_path / "b", rows=40, seed=7)
+    rekeyed = write_epic_export(tmp_path / "c", rows=40, seed=7, id_prefix="B")
+    names = sorted(p.name for p in a.glob("*.tsv"))
+    assert names == sorted(p.name for p in b.glob("*.tsv"))
+    for name in names:
+        assert (a / name).read_bytes() == (b / name).read_bytes()
+        table = name.removesuffix(".tsv")
+        mapper = EPIC_TABLE_MAPPERS.get(table)
+        if mapper is None:
+            assert table == "PATIENT"
+            continue
+        with (a / name).open(newline="") as f:
+            rows = list(csv.DictReader(f, delimiter="\t"))
+        assert rows and all(mapper.to_fhir(row) for row in rows)
+        with (rekeyed / name).open(newline="") as f:
+            other = list(csv.DictReader(f, delimiter="\t"))
+        pk = mapper.primary_key_columns[0]
+        assert all(r[pk] != o[pk] for r, o in zip(rows, other))
+        assert [r.get("RESULT_DATE") for r in rows] == [o.get("RESULT_DATE") for o in other]
+
+
+def test_synthetic_bundle_is_deterministic():
+    assert synthetic_fhir_bundle(5, seed=1) == synthetic_fhir_bundle(5, seed=1)
+    assert synthetic_fhir_bundle(5, seed=1) != synthetic_fhir_bundle(5, seed=2)
+
+
+def _results(tmp_path, medians: dict[str, float], dataset: str = "d1"):
+    path = tmp_path / "results.json"
+    path.write_text(json.dumps({"benchmarks": [
+        {"fullname": name, "stats": {"median": median}, "extra_info": {"dataset": dataset}}
+        for name, median in medians.items()
+    ]}))
+    return path
+
+
+def test_compare_flags_regressions_beyond_tolerance(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"tolerance": 0.2, "benchmarks": {
+        "a": {"median": 1.0, "dataset": "d1"},
+        "b": {"median": 1.0, "dataset": "d1", "tolerance": 0.5},
+        "c": {"median": 1.0, "dataset": "d1"},
+    }}))
+    ok = _results(tmp_path, {"a": 1.1, "b": 1.4, "c": 0.5})
+    assert compare.main([str(ok), "--baseline", str(baseline)]) == 0
+
+    slow = _results(tmp_path, {"a": 1.3, "b": 1.4, "c": 1.0})
+    lines, regressed = compare.compare(
+        compare.load_results(slow), json.loads(baseline.read_text())
+    )
+    assert regressed == ["a"]
+    assert compare.main([str(slow), "--baseline", str(baseline)]) == 1
+
+    # A different dataset is reported, never failed.
+    other = _results(tmp_path, {"a": 9.0}, dataset="d2")
+    assert compare.main([str(other), "--baseline", str(baseline)]) == 0
+
+
+def test_compare_update_keeps_tolerances(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"tolerance": 0.2, "benchmarks": {
+        "b": {"median": 1.0, "dataset": "d1", "tolerance": 0.5},
+    }}))
+    results = _results(tmp_path, {"a": 2.0, "b": 3.0})
+    assert compare.main([str(results), "--baseline", str(baseline), "--update"]) == 0
+    assert json.loads(baseline.read_text()) == {"tolerance": 0.2, "benchmarks": {
+        "a": {"median": 2.0, "dataset": "d1"},
+        "b": {"median": 3.0, "dataset": "d1", "tolerance": 0.5},
+    }}
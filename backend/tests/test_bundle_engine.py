@@ -0,0 +1,120 @@
+"""Tests for concurrent FHIR bundle mapping in ZIP ingestion
+(``app.services.ingestion.bundle_engine``).
+
+A ZIP of independent bundles ingested with bundles mapped in the process pool
+must insert exactly the records, stats, errors and ``files_detail`` of the
+one-at-a-time path, whatever order the bundles sit in the archive.
+"""
+from __future__ import annotations
+
+import json
+import zipfile
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.services.ingestion.coordinator as coord
+from app.config import settings
+from app.models.record import HealthRecord
+from app.models.uploaded_file import UploadedFile
+from app.models.user import User
+from app.services.ingestion.bundle_engine import BundleMapping, iter_bundle_mappings
+from app.services.ingestion.cda_engine import shutdown_cda_pool
+from app.services.ingestion.fhir_parser import map_bundle
+from app.services.ingestion.zip_members import MemberBytes
+from benchmarks.datasets import synthetic_fhir_bundle
+from tests.conftest import create_test_patient
+
+N_BUNDLES = 8
+
+
+@pytest.fixture(autouse=True)
+def _storage_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "temp_extract_dir", str(tmp_path / "extract"))
+
+
+def _bundles_zip(path: Path, reverse: bool = False) -> Path:
+    """``N_BUNDLES`` distinct patient bundles plus one malformed one."""
+    names = [f"fhir/patient_{n:02d}.json" for n in range(N_BUNDLES)]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for n, name in sorted(enumerate(names), reverse=reverse):
+            zf.writestr(name, json.dumps(synthetic_fhir_bundle(encounters=4, seed=n)))
+        zf.writestr("fhir/patient_03b.json", '{"resourceType": "Bundle", "entry": [')
+    return path
+
+
+async def _ingest_zip(db: AsyncSession, zip_path: Path) -> tuple[dict, list[tuple]]:
+    user = User(id=uuid4(), email=f"zip-{uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    await db.flush()
+    patient = await create_test_patient(db, user.id)
+    upload = UploadedFile(
+        user_id=user.id, filename=zip_path.name, mime_type="application/zip",
+        file_hash=uuid4().hex, storage_path=str(zip_path), file_category="structured",
+    )
+    db.add(upload)
+    await db.commit()
+    user_id: UUID = user.id
+    stats = await coord._ingest_zip(db, user_id, patient.id, upload.id, zip_path)
+    rows = await db.execute(
+        select(HealthRecord.record_type, HealthRecord.external_id, HealthRecord.content_hash)
+        .where(HealthRecord.user_id == user_id)
+    )
+    return stats, sorted(rows.all())
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+async def test_concurrent_zip_matches_sequential(
+    db_session: AsyncSession, tmp_path, monkeypatch, workers
+):
+    # Reference: every bundle mapped and written inline, one after another.
+    async def inline(jobs, **_kwargs):
+        for source, _payload in jobs:
+            yield BundleMapping(source, None)
+
+    with monkeypatch.context() as m:
+        m.setattr(coord, "iter_bundle_mappings", inline)
+        expected_stats, expected_rows = await _ingest_zip(
+            db_session, _bundles_zip(tmp_path / "a.zip")
+        )
+    monkeypatch.setattr(settings, "cda_conversion_workers", workers)
+
+    try:
+        stats, rows = await _ingest_zip(db_session, _bundles_zip(tmp_path / "b.zip", reverse=True))
+    finally:
+        shutdown_cda_pool()
+
+    assert rows == expected_rows and len(rows) > N_BUNDLES
+    assert stats == expected_stats
+    detail = stats["files_detail"]
+    assert [d["file"] for d in detail] == [
+        "patient_00.json", "patient_01.json", "patient_02.json", "patient_03.json",
+        "patient_03b.json", "patient_04.json", "patient_05.json", "patient_06.json",
+        "patient_07.json",
+    ]
+    assert "error" in detail[4] and stats["errors"] == [
+        {"file": "patient_03b.json", "error": detail[4]["error"]}
+    ]
+    assert sum(d.get("records_inserted", 0) for d in detail) == stats["records_inserted"]
+
+
+async def test_mappings_yield_in_job_order_with_errors(tmp_path):
+    small = json.dumps(synthetic_fhir_bundle(encounters=2, seed=1)).encode()
+    jobs = [
+        ("a", MemberBytes("a.json", small)),
+        ("b", None),
+        ("c", MemberBytes("c.json", b"not json")),
+        ("d", OSError("unreadable")),
+        ("e", MemberBytes("e.json", small)),
+    ]
+    got = [m async for m in iter_bundle_mappings(jobs, workers=1)]
+    assert [m.source for m in got] == ["a", "b", "c", "d", "e"]
+    assert got[0].bundle == got[4].bundle == map_bundle(MemberBytes("x", small))
+    assert got[0].bundle.patient["resourceType"] == "Patient"
+    assert got[1].bundle is None and got[1].error is None
+    assert isinstance(got[2].error, ValueError)
+    assert isinstance(got[3].error, OSError)
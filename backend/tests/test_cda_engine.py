@@ -0,0 +1,252 @@
+"""Tests for parallel CDA conversion (``app.services.ingestion.cda_engine``)
+and header-based template detection.
+
+A generated 200-document XDM package must yield exactly the records of the
+sequential ``parse_cda_document`` + ``deduplicate_across_documents`` path; the
+benchmark reports documents/sec for the previous converter (fresh renderer,
+ordered template trial, one document at a time) and the engine (``pytest -s``).
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.services.ingestion import cda_engine, cda_parser
+from app.services.ingestion.cda_dedup import (
+    CrossDocumentDeduplicator,
+    deduplicate_across_documents,
+)
+from app.services.ingestion.cda_engine import (
+    iter_cda_conversions,
+    run_in_conversion_pool,
+    shutdown_cda_pool,
+)
+from app.services.ingestion.cda_parser import (
+    CDA_TEMPLATES,
+    detect_cda_template,
+    parse_cda_document,
+)
+from app.services.ingestion.xdm_parser import XDMDocument
+
+SYNTHETIC_CDA_DIR = Path(__file__).parent / "fixtures" / "synthetic_cda"
+N_DOCUMENTS = 200
+
+_CCD_HEADER = (
+    '<templateId root="2.16.840.1.113883.10.20.22.1.2"/>',
+    'code="34133-9" displayName="Summarization of Episode Note"',
+)
+_DISCHARGE_HEADER = (
+    '<templateId root="2.16.840.1.113883.10.20.22.1.8"/>',
+    'code="18842-5" displayName="Discharge Summary"',
+)
+
+
+def _make_xdm_package(root: Path, n: int = N_DOCUMENTS) -> list[tuple[Path, XDMDocument]]:
+    """Write ``n`` CDA documents plus their manifest entries: variants of the
+    synthetic fixtures where one clinical date cycles through 60 values (so
+    some records collapse across documents and some do not) and every fifth
+    document is typed as a discharge summary."""
+    bases = [
+        (SYNTHETIC_CDA_DIR / name).read_text() for name in ("DOC0001.XML", "DOC0002.XML")
+    ]
+    jobs = []
+    for i in range(n):
+        variant = i % 60
+        xml = bases[i % 2].replace("20230301", f"2023{variant % 12 + 1:02d}{variant // 12 + 1:02d}")
+        if i % 5 == 0:
+            for old, new in zip(_CCD_HEADER, _DISCHARGE_HEADER):
+                xml = xml.replace(old, new)
+        path = root / f"DOC{i:04d}.XML"
+        raw = xml.encode("utf-8")
+        path.write_bytes(raw)
+        doc = XDMDocument(
+            uri=path.name,
+            hash=hashlib.sha1(raw).hexdigest(),
+            size=len(raw),
+            creation_time="20240115120000",
+            mime_type="text/xml",
+            author_institution="Synthetic Health Clinic",
+        )
+        jobs.append((path, doc))
+    return jobs
+
+
+def _sequential(jobs) -> tuple[list[dict], int]:
+    records = []
+    for path, doc in jobs:
+        records.extend(parse_cda_document(path, doc))
+    unique, stats = deduplicate_across_documents(records)
+    return unique, stats.total_parsed
+
+
+async def _engine(jobs, workers: int) -> list[dict]:
+    deduper = CrossDocumentDeduplicator()
+    async for conversion in iter_cda_conversions(jobs, workers=workers):
+        assert conversion.error is None, conversion.error
+        deduper.add(conversion.records)
+    unique, _stats = deduper.finish()
+    return unique
+
+
+def _stable(records: list[dict]) -> list[dict]:
+    """Drop DocumentReferences: the converter stamps their date (and so their
+    dedup key) with the wall-clock render time, which differs between any two
+    runs. Every other record must match exactly, provenance included."""
+    return [r for r in records if r["fhir_resource_type"] != "DocumentReference"]
+
+
+@pytest.fixture
+def xdm_jobs(tmp_path):
+    return _make_xdm_package(tmp_path)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+async def test_engine_output_matches_sequential_path(xdm_jobs, workers):
+    try:
+        got = await _engine(xdm_jobs, workers)
+    finally:
+        shutdown_cda_pool()
+    expected, total_parsed = _sequential(xdm_jobs)
+    assert 10 < len(expected) < total_parsed  # some, not all, records collapse
+    assert _stable(got) == _stable(expected)
+
+
+async def test_conversion_errors_are_reported_per_document(tmp_path):
+    jobs = _make_xdm_package(tmp_path, n=3)
+
+    def flaky(path, doc):
+        if path.name == "DOC0001.XML":
+            raise ValueError("boom")
+        return parse_cda_document(path, doc)
+
+    results = [c async for c in iter_cda_conversions(jobs, flaky, workers=2)]
+    assert [c.path.name for c in results] == ["DOC0000.XML", "DOC0001.XML", "DOC0002.XML"]
+    assert isinstance(results[1].error, ValueError)
+    assert results[0].records and results[2].records
+
+
+def _crash_on_first(path, doc):
+    """Kills its pool worker on DOC0000 (module-level, so it runs in the pool)."""
+    if path.name == "DOC0000.XML":
+        os._exit(1)
+    return parse_cda_document(path, doc)
+
+
+async def test_broken_pool_fails_only_the_jobs_it_held(tmp_path):
+    """Every job in flight on the broken pool fails; the jobs submitted after
+    it run on one fresh pool, which the stale failures must not shut down."""
+    jobs = _make_xdm_package(tmp_path, n=10)
+    pools = []
+
+    class CountingPool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+    try:
+        with patch.object(cda_engine, "ProcessPoolExecutor", CountingPool):
+            results = [
+                c async for c in iter_cda_conversions(jobs, _crash_on_first, workers=2)
+            ]
+    finally:
+        shutdown_cda_pool()
+    assert len(pools) == 2
+    assert [c.path.name for c in results] == [p.name for p, _ in jobs]
+    assert isinstance(results[0].error, BrokenProcessPool)
+    assert all(c.error is None or isinstance(c.error, BrokenProcessPool) for c in results)
+    assert all(c.error is None and c.records for c in results[4:])
+
+
+async def test_jobs_cancelled_by_a_pool_shutdown_raise_broken_pool():
+    try:
+        futures = [run_in_conversion_pool(2, time.sleep, 0.2) for _ in range(8)]
+        await asyncio.sleep(0)
+    finally:
+        shutdown_cda_pool()
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    assert any(isinstance(r, BrokenProcessPool) for r in results)
+    assert all(r is None or isinstance(r, BrokenProcessPool) for r in results)
+
+
+def test_detect_cda_template_from_header():
+    ccd = (SYNTHETIC_CDA_DIR / "DOC0001.XML").read_text()
+    assert detect_cda_template(ccd) == "CCD"
+    discharge = ccd
+    for old, new in zip(_CCD_HEADER, _DISCHARGE_HEADER):
+        discharge = discharge.replace(old, new)
+    assert detect_cda_template(discharge) == "DischargeSummary"
+    # No document-type templateId: fall back to the LOINC document code.
+    by_code = discharge.replace(_DISCHARGE_HEADER[0], "")
+    assert detect_cda_template(by_code) == "DischargeSummary"
+    assert detect_cda_template("<ClinicalDocument><code code='x'/></ClinicalDocument>") is None
+
+
+def test_detected_template_is_rendered_first():
+    xml = (SYNTHETIC_CDA_DIR / "DOC0002.XML").read_text()
+    for old, new in zip(_CCD_HEADER, _DISCHARGE_HEADER):
+        xml = xml.replace(old, new)
+    renderer = cda_parser._renderer()
+    with patch.object(renderer, "render_to_fhir", wraps=renderer.render_to_fhir) as render:
+        assert cda_parser._render_cda_to_fhir(xml) is not None
+    assert [c.args[0] for c in render.call_args_list] == ["DischargeSummary"]
+
+
+# ---------------------------------------------------------------------------
+# Benchmark (documents/sec, reported with -s)
+# ---------------------------------------------------------------------------
+
+
+def _legacy_render(xml_content: str, filename: str = "<unknown>") -> dict | None:
+    """The previous ``_render_cda_to_fhir``: a fresh renderer per document and
+    every template tried in order."""
+    from fhir_converter.renderers import CcdaRenderer
+
+    renderer = CcdaRenderer()
+    for template in CDA_TEMPLATES:
+        try:
+            result = renderer.render_to_fhir(template, xml_content)
+            if result and result.get("entry"):
+                return result
+        except Exception:
+            continue
+    return None
+
+
+async def test_benchmark_xdm_conversion(xdm_jobs):
+    t0 = time.perf_counter()
+    with patch.object(cda_parser, "_render_cda_to_fhir", _legacy_render):
+        for path, doc in xdm_jobs:
+            parse_cda_document(path, doc)
+    legacy = N_DOCUMENTS / (time.perf_counter() - t0)
+
+    loop_lag = 0.0
+
+    async def probe():
+        nonlocal loop_lag
+        while True:
+            t = time.perf_counter()
+            await asyncio.sleep(0.01)
+            loop_lag = max(loop_lag, time.perf_counter() - t - 0.01)
+
+    prober = asyncio.create_task(probe())
+    t0 = time.perf_counter()
+    try:
+        await _engine(xdm_jobs, workers=0)
+    finally:
+        prober.cancel()
+        shutdown_cda_pool()
+    engine = N_DOCUMENTS / (time.perf_counter() - t0)
+
+    print(
+        f"\nXDM {N_DOCUMENTS} docs: legacy {legacy:,.1f} docs/s  engine {engine:,.1f} docs/s "
+        f"({engine / legacy:.1f}x), max event-loop stall {loop_lag * 1000:.0f} ms"
+    )
+    assert engine > legacy
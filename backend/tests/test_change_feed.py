@@ -0,0 +1,213 @@
+"""Change feed (``GET /records/changes``, ``app.services.change_feed``).
+
+A replica that applies the feed — from scratch or incrementally from a saved
+token, in pages of any size — must end up holding exactly what
+``/records/export`` returns.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.deduplication import DedupCandidate
+from app.models.record import HealthRecord
+from app.services.change_feed import ChangeToken
+from app.services.ingestion.idempotent_inserter import idempotent_insert_records
+from tests.conftest import auth_headers, create_test_patient
+
+
+def _cond(patient, rid: str, status: str = "active") -> dict:
+    return {
+        "user_id": patient.user_id,
+        "patient_id": patient.id,
+        "source_file_id": None,
+        "record_type": "condition",
+        "fhir_resource_type": "Condition",
+        "fhir_resource": {
+            "resourceType": "Condition",
+            "id": rid,
+            "clinicalStatus": {"coding": [{"code": status}]},
+        },
+        "source_format": "fhir_r4",
+        "display_text": f"Cond {rid}",
+        "status": status,
+    }
+
+
+async def _duplicate_pair(db: AsyncSession, patient) -> DedupCandidate:
+    records = [
+        HealthRecord(
+            id=uuid4(), patient_id=patient.id, user_id=patient.user_id,
+            record_type="medication", fhir_resource_type="MedicationRequest",
+            fhir_resource={"resourceType": "MedicationRequest", "id": f"med-{source}"},
+            source_format=source, display_text="Lisinopril 10 MG", code_value="197361",
+            effective_date=datetime(2024, 1, 15, tzinfo=timezone.utc),
+        )
+        for source in ("fhir_r4", "epic_ehi")
+    ]
+    db.add_all(records)
+    await db.flush()
+    candidate = DedupCandidate(
+        id=uuid4(), record_a_id=records[0].id, record_b_id=records[1].id,
+        similarity_score=0.95, match_reasons={}, status="pending",
+    )
+    db.add(candidate)
+    await db.commit()
+    return candidate
+
+
+async def _sync(
+    client: AsyncClient, headers: dict, replica: dict, token: str | None = None, limit: int = 3
+) -> tuple[str | None, list[dict]]:
+    """Apply the feed to ``replica`` page by page; return the token to resume
+    from and every entry applied."""
+    applied: list[dict] = []
+    while True:
+        params = {"limit": limit, **({"since": token} if token else {})}
+        resp = await client.get("/api/v1/records/changes", headers=headers, params=params)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        entries = [json.loads(line) for line in resp.text.splitlines()]
+        assert len(entries) <= limit
+        for entry in entries:
+            if entry["op"] == "upsert":
+                replica[entry["id"]] = entry["resource"]
+            else:
+                replica.pop(entry["id"], None)
+        applied += entries
+        token = resp.headers.get("x-change-token", token)
+        if entries:
+            assert token == entries[-1]["token"]
+        if resp.headers["x-more-changes"] == "false":
+            return token, applied
+
+
+def _canonical(resources) -> list[str]:
+    return sorted(json.dumps(r, sort_keys=True) for r in resources)
+
+
+async def _assert_converged(client: AsyncClient, headers: dict, replica: dict) -> None:
+    export = (await client.get("/api/v1/records/export", headers=headers)).json()
+    assert _canonical(replica.values()) == _canonical(e["resource"] for e in export["entry"])
+
+
+@pytest.mark.asyncio
+async def test_replica_converges_to_full_export(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    await idempotent_insert_records(db_session, [_cond(patient, f"c{i}") for i in range(7)])
+    await db_session.commit()
+    merge = await _duplicate_pair(db_session, patient)
+    undone = await _duplicate_pair(db_session, patient)
+
+    incremental: dict = {}
+    token, first = await _sync(client, headers, incremental)
+    assert len(first) == 11 and {e["op"] for e in first} == {"upsert"}
+    await _assert_converged(client, headers, incremental)
+
+    # A correction (new RecordVersion), a soft delete, a merge, a merge undone
+    # and a new record.
+    corrected = [_cond(patient, "c0", "resolved")] + [_cond(patient, f"c{i}") for i in range(1, 7)]
+    summary = await idempotent_insert_records(db_session, corrected)
+    await db_session.commit()
+    assert summary["updated"] == 1
+    deleted = next(e["id"] for e in first if e["resource"]["id"] == "c3")
+    assert (await client.delete(f"/api/v1/records/{deleted}", headers=headers)).status_code == 204
+    for candidate in (merge, undone):
+        resp = await client.post(
+            "/api/v1/dedup/merge", headers=headers, json={"candidate_id": str(candidate.id)}
+        )
+        assert resp.status_code == 200
+    resp = await client.post(
+        "/api/v1/dedup/undo-merge", headers=headers, json={"candidate_id": str(undone.id)}
+    )
+    assert resp.status_code == 200
+    await idempotent_insert_records(db_session, [_cond(patient, "c7")])
+    await db_session.commit()
+
+    token, delta = await _sync(client, headers, incremental, token)
+    # Only what changed is sent, each record once, in its latest state.
+    changed = {e["id"] for e in delta}
+    assert len(changed) == len(delta)
+    assert deleted in changed and len(changed) < 12
+    assert {e["op"] for e in delta if e["id"] == deleted} == {"delete"}
+    assert any(
+        e.get("resource", {}).get("clinicalStatus") == {"coding": [{"code": "resolved"}]}
+        for e in delta
+    )
+    await _assert_converged(client, headers, incremental)
+
+    # A replica built from scratch in one page agrees.
+    fresh: dict = {}
+    await _sync(client, headers, fresh, limit=100)
+    assert fresh == incremental
+
+    # Nothing new: an empty page that keeps the token.
+    resp = await client.get("/api/v1/records/changes", headers=headers, params={"since": token})
+    assert resp.text == ""
+    assert resp.headers["x-change-token"] == token
+    assert resp.headers["x-more-changes"] == "false"
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_monotonic_and_resumable(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    for i in range(3):
+        await idempotent_insert_records(db_session, [_cond(patient, f"c{i}-{j}") for j in range(2)])
+        await db_session.commit()
+
+    _, entries = await _sync(client, headers, {}, limit=100)
+    positions = [ChangeToken.decode(e["token"]) for e in entries]
+    assert positions == sorted(positions, key=lambda p: (p.seq, p.record_id))
+    # One sequence number per committed transaction.
+    assert len({p.seq for p in positions}) == 3
+
+    # Resuming after any entry yields exactly the entries after it.
+    for i, entry in enumerate(entries):
+        _, rest = await _sync(client, headers, {}, token=entry["token"], limit=100)
+        assert rest == entries[i + 1:]
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_writes_are_not_in_the_feed(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    await idempotent_insert_records(db_session, [_cond(patient, "discarded")])
+    await db_session.rollback()
+
+    _, entries = await _sync(client, headers, {})
+    assert entries == []
+
+
+@pytest.mark.asyncio
+async def test_feed_is_per_user_and_audited(client: AsyncClient, db_session: AsyncSession):
+    headers_a, uid_a = await auth_headers(client, email="feed_a@test.com")
+    headers_b, uid_b = await auth_headers(client, email="feed_b@test.com")
+    patient_a = await create_test_patient(db_session, uid_a)
+    patient_b = await create_test_patient(db_session, uid_b)
+    await idempotent_insert_records(db_session, [_cond(patient_a, "a")])
+    await idempotent_insert_records(db_session, [_cond(patient_b, "b")])
+    await db_session.commit()
+
+    replica: dict = {}
+    await _sync(client, headers_a, replica)
+    assert [r["id"] for r in replica.values()] == ["a"]
+
+    audit = (await client.get("/api/v1/audit-log", headers=headers_a)).json()
+    assert any(i["action"] == "records.changes" for i in audit["items"])
+    _, entries_b = await _sync(client, headers_b, {})
+    assert [e["resource"]["id"] for e in entries_b] == ["b"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("token", ["nonsense", "12", "x.abc", "-1." + "0" * 32])
+async def test_malformed_token_is_rejected(client: AsyncClient, db_session: AsyncSession, token):
+    headers, _ = await auth_headers(client)
+    resp = await client.get("/api/v1/records/changes", headers=headers, params={"since": token})
+    assert resp.status_code == 400
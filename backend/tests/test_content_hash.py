@@ -1,6 +1,25 @@
 from __future__ import annotations
 
-from app.services.ingestion.content_hash import canonicalize, content_hash
+import copy
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services.ingestion import content_hash as content_hash_module
+from app.services.ingestion.content_hash import (
+    ContentDigests,
+    canonical_bytes,
+    canonicalize,
+    content_digests,
+    content_hash,
+    hashes_match,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SYNTHEA_FHIR_DIR = FIXTURES / "synthea" / "fhir"
 
 
 def _base_resource() -> dict:
@@ -65,3 +84,162 @@ def test_hash_is_hex_sha256():
     h = content_hash(_base_resource())
     assert len(h) == 64
     assert all(c in "0123456789abcdef" for c in h)
+
+
+# ---------------------------------------------------------------------------
+# Golden v1 hashes: every value below was produced by the original encoder,
+# sha256(json.dumps(canonicalize(r), sort_keys=True, separators=(",", ":"),
+# ensure_ascii=False)). Stored hashes must never change.
+# ---------------------------------------------------------------------------
+
+
+def _legacy_hash(resource: dict) -> str:
+    encoded = json.dumps(
+        canonicalize(resource), sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _bundle_resources(path: Path) -> list[dict]:
+    data = json.loads(path.read_text())
+    return [e["resource"] for e in data.get("entry", []) if isinstance(e.get("resource"), dict)]
+
+
+_GOLDEN = {
+    "exponent": (
+        {"resourceType": "Observation", "valueQuantity": {"value": 1e16}},
+        "523d8fca9c075b312f08c99e1ab8a28a344874a73b44a12a111aace11849206b",
+    ),
+    "tiny_float": (
+        {"resourceType": "Observation", "valueQuantity": {"value": 0.00005}},
+        "744624a9ed3aa6c9ace7f519a44447f2d9772838dc9506347ee959e5130dd21b",
+    ),
+    "long_float": (
+        {"resourceType": "Observation", "valueQuantity": {"value": 12345678901234567.0}},
+        "b1565735d8d5af141fae83b2476259d4fec8f2554e6791239b93cf630dfcb489",
+    ),
+    "unicode": (
+        {"resourceType": "Condition", "code": {"text": "Ménière’s disease — 梅尼埃"}},
+        "d8657d4f38240eb1cb690a6add15c23660a979e6103af1c679729cbefc9e7414",
+    ),
+    "big_int": (
+        {"resourceType": "Observation", "valueInteger": 2**70},
+        "aea3ccc72ccf02eb1fcf5821a6aa723489089eca2acd01d5dc33f3d8c6ef9caa",
+    ),
+    "null": (
+        {"resourceType": "Observation", "note": None, "valueString": "null"},
+        "299939e0e03f450b621b78810582abaa57139378d9c8a8ae64d161eab4ab6fc5",
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(_GOLDEN))
+def test_golden_sha256_for_tricky_values(name):
+    resource, expected = _GOLDEN[name]
+    assert content_hash(resource) == expected
+    assert content_digests(resource).sha256 == expected
+
+
+def test_golden_sha256_for_sample_bundle():
+    resources = _bundle_resources(FIXTURES / "sample_fhir_bundle.json")
+    hashes = [content_hash(r) for r in resources]
+    assert hashes[:3] == [
+        "9bf5dc7a129ccd5ca92932713136376481a9671275c14f20884e565678fd8386",
+        "acaa3246027f8854074c111a37ab2200d066220e723dfeef982f61d141ad9e5b",
+        "259b041e37705e7f30b9c792c608c0c2fb811015f90c192e3f7162dc90c2f42f",
+    ]
+    combined = hashlib.sha256("".join(hashes).encode()).hexdigest()
+    assert combined == "3423b6ba8f80d45b8b6e7cd805985bc204cb4ff26c81a300d1116117d9ba679d"
+
+
+def test_matches_legacy_encoder_on_synthea_corpus():
+    bundles = sorted(SYNTHEA_FHIR_DIR.glob("*.json")) if SYNTHEA_FHIR_DIR.is_dir() else []
+    if not bundles:
+        pytest.skip("No Synthea fixtures — run backend/scripts/generate_synthea_fixtures.py")
+    for path in bundles[:5]:
+        for resource in _bundle_resources(path):
+            assert content_hash(resource) == _legacy_hash(resource), resource.get("id")
+
+
+def test_canonical_bytes_does_not_mutate_input():
+    res = _base_resource()
+    res["text"] = {"div": "<div/>"}
+    before = copy.deepcopy(res)
+    canonical_bytes(res)
+    assert res == before
+
+
+def test_unserializable_values_still_raise():
+    with pytest.raises(TypeError):
+        content_hash({"resourceType": "Observation", "value": {1, 2}})
+
+
+# ---------------------------------------------------------------------------
+# v2 (blake3) + comparison across versions
+# ---------------------------------------------------------------------------
+
+
+def test_hashes_match_prefers_v2_when_both_sides_have_it():
+    new = ContentDigests("sha-a", "b3-a")
+    assert hashes_match("sha-a", "b3-a", new)
+    assert not hashes_match("sha-a", "b3-other", new)  # v2 decides
+    assert hashes_match("sha-a", None, new)  # row predates v2: fall back to v1
+    assert not hashes_match("sha-b", None, new)
+    assert hashes_match("sha-a", "b3-a", ContentDigests("sha-a"))  # v2 disabled now
+    assert hashes_match(None, None, None)
+    assert not hashes_match("sha-a", None, None)
+
+
+def test_digests_are_v1_only_when_blake3_disabled(monkeypatch):
+    monkeypatch.setattr(content_hash_module.settings, "content_hash_blake3", False)
+    digests = content_digests(_base_resource())
+    assert digests == ContentDigests(content_hash(_base_resource()))
+
+
+def test_blake3_hashes_the_same_canonical_bytes(monkeypatch):
+    blake3 = pytest.importorskip("blake3")
+    monkeypatch.setattr(content_hash_module.settings, "content_hash_blake3", True)
+    res = _base_resource()
+    digests = content_digests(res)
+    assert digests.sha256 == content_hash(res)
+    assert digests.blake3 == blake3.blake3(canonical_bytes(res)).hexdigest()
+    noisy = _base_resource()
+    noisy["meta"]["lastUpdated"] = "2030-01-01T00:00:00Z"
+    assert content_digests(noisy) == digests
+
+
+# ---------------------------------------------------------------------------
+# Benchmark (resources/sec, reported with -s)
+# ---------------------------------------------------------------------------
+
+
+def _benchmark_corpus() -> list[dict]:
+    bundles = sorted(SYNTHEA_FHIR_DIR.glob("*.json")) if SYNTHEA_FHIR_DIR.is_dir() else []
+    resources = [r for path in bundles[:5] for r in _bundle_resources(path)]
+    if not resources:  # no Synthea corpus: replicate the committed sample bundle
+        sample = _bundle_resources(FIXTURES / "sample_fhir_bundle.json")
+        resources = []
+        for i in range(500):
+            for r in sample:
+                r = copy.deepcopy(r)
+                r["id"] = f"{r.get('id')}-{i}"
+                resources.append(r)
+    return resources
+
+
+def _rate(fn, resources) -> float:
+    t0 = time.perf_counter()
+    for r in resources:
+        fn(r)
+    return len(resources) / (time.perf_counter() - t0)
+
+
+def test_benchmark_hash_throughput():
+    resources = _benchmark_corpus()
+    legacy = _rate(_legacy_hash, resources)
+    fast = _rate(content_hash, resources)
+    print(
+        f"\ncontent_hash over {len(resources)} resources: legacy {legacy:,.0f}/s  "
+        f"orjson {fast:,.0f}/s  ({fast / legacy:.1f}x)"
+    )
+    assert fast > legacy
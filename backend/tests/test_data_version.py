@@ -0,0 +1,352 @@
+"""Per-user data version and conditional GETs (``app.services.data_version``).
+
+The heavy read endpoints answer ``If-None-Match`` with 304 while the user's
+data is unchanged — without querying ``health_records``, but still writing
+their audit row — and every write path bumps the version so the next read is
+a fresh 200.
+"""
+from __future__ import annotations
+
+import io
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.upload import _persist_extracted_bulk
+from app.models.audit import AuditLog
+from app.models.deduplication import DedupCandidate
+from app.models.record import HealthRecord
+from app.models.uploaded_file import UploadedFile
+from app.services.data_version import get_data_version, mark_data_changed
+from tests.conftest import (
+    FIXTURES_DIR,
+    auth_headers,
+    create_test_patient,
+    run_ingest_jobs,
+    seed_test_records,
+)
+
+HEAVY_READS = {
+    "/api/v1/timeline": "timeline.view",
+    "/api/v1/dashboard/overview": "dashboard.overview",
+    "/api/v1/records/stats": "records.stats",
+}
+
+
+async def _etag(client: AsyncClient, headers: dict, path: str) -> str:
+    resp = await client.get(path, headers=headers)
+    assert resp.status_code == 200, path
+    return resp.headers["etag"]
+
+
+async def _is_fresh(client: AsyncClient, headers: dict, path: str, etag: str) -> bool:
+    """True when revalidating ``etag`` yields 304 (the cached body is current)."""
+    resp = await client.get(path, headers={**headers, "If-None-Match": etag})
+    assert resp.status_code in (200, 304), path
+    return resp.status_code == 304
+
+
+def _record(uid: UUID, patient_id, **overrides) -> HealthRecord:
+    fields = dict(
+        id=uuid4(), patient_id=patient_id, user_id=uid, record_type="medication",
+        fhir_resource_type="MedicationRequest",
+        fhir_resource={"resourceType": "MedicationRequest"}, source_format="fhir_r4",
+        display_text="Lisinopril 10 MG Oral Tablet", code_value="197361",
+        effective_date=datetime(2024, 1, 15, tzinfo=timezone.utc),
+    )
+    return HealthRecord(**{**fields, **overrides})
+
+
+async def _duplicate_pair(db: AsyncSession, uid: str, patient_id) -> DedupCandidate:
+    a = _record(UUID(uid), patient_id)
+    b = _record(UUID(uid), patient_id, source_format="epic_ehi", display_text="LISINOPRIL 10MG TAB")
+    db.add_all([a, b])
+    await db.flush()
+    candidate = DedupCandidate(
+        id=uuid4(), record_a_id=a.id, record_b_id=b.id, similarity_score=0.92,
+        match_reasons={"code_match": True}, status="pending",
+    )
+    db.add(candidate)
+    await db.commit()
+    return candidate
+
+
+# ---------------------------------------------------------------------------
+# Conditional GETs
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_unchanged_reads_revalidate_with_304(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    records = await seed_test_records(db_session, uid, patient.id)
+    paths = {**HEAVY_READS, f"/api/v1/records/{records[0].id}/fhir": "records.fhir_export"}
+
+    for path in paths:
+        first = await client.get(path, headers=headers)
+        assert first.status_code == 200, path
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"')
+
+        again = await client.get(path, headers={**headers, "If-None-Match": etag})
+        assert again.status_code == 304, path
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+        # Still never stored by the browser: the frontend keeps bodies in memory.
+        assert again.headers["cache-control"] == "no-store"
+
+        # A list of tags and the strong form of the same tag match too.
+        listed = f'"other", {etag.removeprefix("W/")}'
+        assert await _is_fresh(client, headers, path, listed)
+
+
+@pytest.mark.asyncio
+async def test_not_modified_is_still_audited(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    records = await seed_test_records(db_session, uid, patient.id)
+    fhir = f"/api/v1/records/{records[0].id}/fhir"
+    paths = {**HEAVY_READS, fhir: "records.fhir_export"}
+
+    for path in paths:
+        etag = await _etag(client, headers, path)
+        assert await _is_fresh(client, headers, path, etag)
+
+    rows = (await db_session.execute(
+        select(AuditLog).where(AuditLog.user_id == UUID(uid), AuditLog.action.in_(paths.values()))
+    )).scalars().all()
+    for path, action in paths.items():
+        logged = [r for r in rows if r.action == action]
+        assert len(logged) == 2, action
+        assert sum(bool((r.details or {}).get("not_modified")) for r in logged) == 1, action
+    assert {r.resource_id for r in rows if r.action == "records.fhir_export"} == {records[0].id}
+
+
+@pytest.mark.asyncio
+async def test_not_modified_skips_health_records(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    await seed_test_records(db_session, uid, patient.id)
+    etag = await _etag(client, headers, "/api/v1/timeline")
+
+    statements: list[str] = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert await _is_fresh(client, headers, "/api/v1/timeline", etag)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert any("user_data_versions" in s for s in statements)
+    assert not any("health_records" in s for s in statements)
+
+
+@pytest.mark.asyncio
+async def test_etag_varies_with_query_and_user(client: AsyncClient, db_session: AsyncSession):
+    headers_a, uid_a = await auth_headers(client, email="etag_a@test.com")
+    headers_b, _ = await auth_headers(client, email="etag_b@test.com")
+    patient = await create_test_patient(db_session, uid_a)
+    await seed_test_records(db_session, uid_a, patient.id)
+
+    everything = await _etag(client, headers_a, "/api/v1/timeline")
+    conditions = await _etag(client, headers_a, "/api/v1/timeline?record_type=condition")
+    assert everything != conditions
+    assert not await _is_fresh(client, headers_a, "/api/v1/timeline?limit=5", everything)
+    # Parameter order does not matter.
+    assert (
+        await _etag(client, headers_a, "/api/v1/timeline?limit=5&record_type=condition")
+        == await _etag(client, headers_a, "/api/v1/timeline?record_type=condition&limit=5")
+    )
+    # Another user's tag never validates, even at the same version.
+    assert not await _is_fresh(client, headers_b, "/api/v1/timeline", everything)
+
+
+# ---------------------------------------------------------------------------
+# Invalidation on every write path
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_structured_ingest_invalidates(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    before = {path: await _etag(client, headers, path) for path in HEAVY_READS}
+
+    resp = await client.post(
+        "/api/v1/upload",
+        headers=headers,
+        files={"file": ("bundle.json", (FIXTURES_DIR / "sample_fhir_bundle.json").read_bytes(),
+                        "application/json")},
+    )
+    assert resp.status_code == 202
+    await run_ingest_jobs(db_session)
+
+    for path, etag in before.items():
+        assert not await _is_fresh(client, headers, path, etag), path
+
+
+@pytest.mark.asyncio
+async def test_extraction_confirmation_invalidates(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    with patch("app.api.upload._process_unstructured", new_callable=AsyncMock):
+        upload = await client.post(
+            "/api/v1/upload/unstructured",
+            files={"file": ("note.rtf", io.BytesIO(rb"{\rtf1\ansi Test note.}"), "application/rtf")},
+            headers=headers,
+        )
+    etag = await _etag(client, headers, "/api/v1/timeline")
+
+    resp = await client.post(
+        f"/api/v1/upload/{upload.json()['upload_id']}/confirm-extraction",
+        json={
+            "confirmed_entities": [{
+                "entity_class": "condition", "text": "Hypertension",
+                "attributes": {"status": "active"}, "confidence": 0.85,
+            }],
+            "patient_id": str(patient.id),
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert not await _is_fresh(client, headers, "/api/v1/timeline", etag)
+
+
+@pytest.mark.asyncio
+async def test_bulk_extracted_insert_bumps_version(client: AsyncClient, db_session: AsyncSession):
+    """The auto-confirm path writes with a bulk ``insert`` the ORM never sees."""
+    _, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    before = await get_data_version(db_session, UUID(uid))
+
+    row = {
+        column.key: getattr(_record(UUID(uid), patient.id), column.key)
+        for column in HealthRecord.__table__.columns
+        if column.key in {
+            "id", "patient_id", "user_id", "record_type", "fhir_resource_type",
+            "fhir_resource", "source_format", "display_text", "effective_date",
+        }
+    }
+    entity = type("Entity", (), {"entity_class": "medication", "attributes": {}})()
+    await _persist_extracted_bulk(db_session, [(entity, {**row, "linked_encounter_id": None})])
+    await db_session.commit()
+
+    assert await get_data_version(db_session, UUID(uid)) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_merge_and_undo_invalidate(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    candidate = await _duplicate_pair(db_session, uid, patient.id)
+
+    etag = await _etag(client, headers, "/api/v1/records/stats")
+    merge = await client.post(
+        "/api/v1/dedup/merge", headers=headers, json={"candidate_id": str(candidate.id)}
+    )
+    assert merge.status_code == 200
+    assert not await _is_fresh(client, headers, "/api/v1/records/stats", etag)
+
+    etag = await _etag(client, headers, "/api/v1/records/stats")
+    undo = await client.post(
+        "/api/v1/dedup/undo-merge", headers=headers, json={"candidate_id": str(candidate.id)}
+    )
+    assert undo.status_code == 200
+    assert not await _is_fresh(client, headers, "/api/v1/records/stats", etag)
+
+
+@pytest.mark.asyncio
+async def test_bulk_resolution_invalidates(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    candidate = await _duplicate_pair(db_session, uid, patient.id)
+
+    etag = await _etag(client, headers, "/api/v1/dashboard/overview")
+    resp = await client.post(
+        "/api/v1/dedup/resolve-bulk",
+        headers=headers,
+        json={"action": "merge", "candidate_ids": [str(candidate.id)]},
+    )
+    assert resp.status_code == 200
+    assert not await _is_fresh(client, headers, "/api/v1/dashboard/overview", etag)
+
+
+@pytest.mark.asyncio
+async def test_record_delete_invalidates(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    records = await seed_test_records(db_session, uid, patient.id)
+    fhir = f"/api/v1/records/{records[0].id}/fhir"
+    before = {path: await _etag(client, headers, path) for path in (*HEAVY_READS, fhir)}
+
+    resp = await client.delete(f"/api/v1/records/{records[0].id}", headers=headers)
+    assert resp.status_code == 204
+
+    for path in HEAVY_READS:
+        assert not await _is_fresh(client, headers, path, before[path]), path
+    # The stale tag must not resurrect the deleted record.
+    resp = await client.get(fhir, headers={**headers, "If-None-Match": before[fhir]})
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_upload_delete_invalidates(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    upload = UploadedFile(
+        id=uuid4(), user_id=UUID(uid), filename="export.zip", mime_type="application/zip",
+        file_hash=uuid4().hex, storage_path=f"/tmp/{uuid4().hex}", ingestion_status="completed",
+    )
+    db_session.add(upload)
+    await db_session.flush()
+    db_session.add(_record(UUID(uid), patient.id, source_file_id=upload.id))
+    await db_session.commit()
+
+    etag = await _etag(client, headers, "/api/v1/timeline")
+    resp = await client.delete(f"/api/v1/upload/{upload.id}", headers=headers)
+    assert resp.status_code == 204
+    assert not await _is_fresh(client, headers, "/api/v1/timeline", etag)
+
+
+@pytest.mark.asyncio
+async def test_reads_and_other_users_writes_do_not_invalidate(
+    client: AsyncClient, db_session: AsyncSession
+):
+    headers_a, uid_a = await auth_headers(client, email="quiet_a@test.com")
+    _, uid_b = await auth_headers(client, email="quiet_b@test.com")
+    patient_a = await create_test_patient(db_session, uid_a)
+    await seed_test_records(db_session, uid_a, patient_a.id)
+    etag = await _etag(client, headers_a, "/api/v1/timeline")
+
+    await client.get("/api/v1/records", headers=headers_a)
+    patient_b = await create_test_patient(db_session, uid_b)
+    await seed_test_records(db_session, uid_b, patient_b.id)
+
+    assert await _is_fresh(client, headers_a, "/api/v1/timeline", etag)
+
+
+@pytest.mark.asyncio
+async def test_rollback_does_not_bump(client: AsyncClient, db_session: AsyncSession):
+    _, uid = await auth_headers(client)
+    patient_id = (await create_test_patient(db_session, uid)).id
+    before = await get_data_version(db_session, UUID(uid))
+
+    db_session.add(_record(UUID(uid), patient_id))
+    await db_session.flush()
+    mark_data_changed(db_session, UUID(uid))
+    await db_session.rollback()
+    await db_session.commit()
+    assert await get_data_version(db_session, UUID(uid)) == before
+
+    db_session.add(_record(UUID(uid), patient_id))
+    await db_session.commit()
+    assert await get_data_version(db_session, UUID(uid)) == before + 1
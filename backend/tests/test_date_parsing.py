@@ -0,0 +1,241 @@
+"""Tests for ``app.utils.date_parsing`` (fast-path + hinted date parsing).
+
+The detectors must return exactly what the previous strptime-loop parsers
+returned. ``_legacy_fhir`` / ``_legacy_epic`` below are verbatim copies of the
+old ``fhir_parser._parse_fhir_date`` and ``EpicMapper.parse_epic_date``; the
+property tests compare against them over seeded random values for every format
+(valid, boundary and malformed), in random key/hint order. The benchmark
+reports parses/sec for both (``pytest -s``).
+"""
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime
+
+import pytest
+
+from app.services.ingestion.epic_mappers.base import EpicMapper
+from app.services.ingestion.fhir_parser import _parse_fhir_date, extract_effective_date
+from app.utils.date_parsing import (
+    EPIC_DATE_FORMATS,
+    FHIR_DATE_FORMATS,
+    DateFormatDetector,
+    _fast_epic,
+    _fast_iso,
+    _fhir_isoformat_fallback,
+    _may_overlap,
+)
+
+N_CASES = 20_000
+
+
+def _legacy_fhir(value):
+    if not value:
+        return None
+    formats = [
+        "%Y-%m-%dT%H:%M:%S%z",
+        "%Y-%m-%dT%H:%M:%S.%f%z",
+        "%Y-%m-%dT%H:%M:%S",
+        "%Y-%m-%dT%H:%M:%S.%f",
+        "%Y-%m-%d",
+        "%Y-%m",
+        "%Y",
+    ]
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    if "T" in value:
+        try:
+            clean = value
+            if clean.endswith("Z"):
+                clean = clean[:-1] + "+00:00"
+            return datetime.fromisoformat(clean)
+        except ValueError:
+            pass
+    return None
+
+
+def _legacy_epic(value):
+    if not value or not value.strip():
+        return None
+    formats = [
+        "%m/%d/%Y %I:%M:%S %p",
+        "%m/%d/%Y %H:%M:%S %p",
+        "%m/%d/%Y",
+        "%Y-%m-%d",
+        "%Y-%m-%dT%H:%M:%S",
+    ]
+    for fmt in formats:
+        try:
+            return datetime.strptime(value.strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Value generators
+# ---------------------------------------------------------------------------
+
+
+def _num(rng: random.Random, lo: int, hi: int, pad: bool | None = None) -> str:
+    n = rng.randint(lo, hi)
+    if pad is None:
+        pad = rng.random() < 0.7
+    return f"{n:02d}" if pad else str(n)
+
+
+def _fhir_value(rng: random.Random) -> str:
+    y = f"{rng.choice([rng.randint(1900, 2030), rng.randint(0, 9999)]):04d}"
+    mo = _num(rng, 0, 13, pad=rng.random() < 0.95)
+    d = _num(rng, 0, 32, pad=rng.random() < 0.95)
+    h, mi, s = _num(rng, 0, 25), _num(rng, 0, 61), _num(rng, 0, 61)
+    frac = "." + "".join(rng.choice("0123456789") for _ in range(rng.randint(0, 8)))
+    tz = rng.choice([
+        "", "", "Z", "z", "+00:00", "-00:00", "-07:00", "+05:30", "+14:00",
+        "+24:00", "-0700", "+05:61", "+05",
+    ])
+    sep = rng.choice(["T"] * 18 + ["t", " "])
+    shape = rng.randrange(8)
+    if shape == 0:
+        value = y
+    elif shape == 1:
+        value = f"{y}-{mo}"
+    elif shape == 2:
+        value = f"{y}-{mo}-{d}"
+    elif shape == 3:
+        value = f"{y}-{mo}-{d}{sep}{h}:{mi}:{s}"
+    elif shape == 4:
+        value = f"{y}-{mo}-{d}{sep}{h}:{mi}:{s}{tz}"
+    elif shape == 5:
+        value = f"{y}-{mo}-{d}{sep}{h}:{mi}:{s}{frac}{tz}"
+    elif shape == 6:
+        value = f"{y}-{mo}-{d}{sep}{h}:{mi}"
+    else:
+        value = rng.choice(["", "unknown", "2024/01/02", "20240102", "２０２４"])
+    if rng.random() < 0.03:
+        value = rng.choice([" ", "\t"]) + value
+    return value
+
+
+def _epic_value(rng: random.Random) -> str:
+    mo, d = _num(rng, 0, 13), _num(rng, 0, 32)
+    y = f"{rng.choice([rng.randint(1900, 2030), 0, rng.randint(10000, 10001)]):04d}"
+    h, mi, s = _num(rng, 0, 25), _num(rng, 0, 61), _num(rng, 0, 61)
+    meridiem = rng.choice(["AM", "PM"] * 8 + ["am", "pm", "Pm", "XM", ""])
+    space = rng.choice([" "] * 20 + ["  "])
+    shape = rng.randrange(6)
+    if shape in (0, 1):
+        value = f"{mo}/{d}/{y}{space}{h}:{mi}:{s} {meridiem}".rstrip()
+    elif shape == 2:
+        value = f"{mo}/{d}/{y}"
+    elif shape == 3:
+        value = f"{y}-{_num(rng, 0, 13)}-{_num(rng, 0, 32)}"
+    elif shape == 4:
+        value = f"{y}-{_num(rng, 0, 13)}-{_num(rng, 0, 32)}T{h}:{mi}:{s}"
+    else:
+        value = rng.choice(["", "   ", "N/A", "5/21/24", "2024-05-21T10:00:00Z", "5-21-2024"])
+    if rng.random() < 0.1:
+        value = rng.choice([" ", "\t", "  "]) + value + rng.choice(["", " ", "\n"])
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Property tests
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_fhir_detector_matches_legacy_parser(seed):
+    rng = random.Random(seed)
+    detector = DateFormatDetector(
+        FHIR_DATE_FORMATS, fast_path=_fast_iso, fallback=_fhir_isoformat_fallback
+    )
+    keys = [None, "Observation.effectiveDateTime", "Condition.onsetDateTime", "meta.lastUpdated"]
+    for _ in range(N_CASES):
+        value = _fhir_value(rng)
+        expected = _legacy_fhir(value)
+        got = detector.parse(value, rng.choice(keys))
+        assert got == expected, value
+        if expected is not None:
+            assert got.tzinfo == expected.tzinfo, value
+            assert got.utcoffset() == expected.utcoffset(), value
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_epic_detector_matches_legacy_parser(seed):
+    rng = random.Random(seed)
+    detector = DateFormatDetector(EPIC_DATE_FORMATS, fast_path=_fast_epic, strip=True)
+    keys = [None, "CONTACT_DATE", "START_DATE", "RESULT_DATE"]
+    for _ in range(N_CASES):
+        value = _epic_value(rng)
+        assert detector.parse(value, rng.choice(keys)) == _legacy_epic(value), repr(value)
+
+
+def test_hint_never_changes_the_result_for_overlapping_formats():
+    """A column hinted to the ``%H ... %p`` format must still read a later
+    ``01:00:00 PM`` the legacy way (13:00 via ``%I``), not as 01:00."""
+    detector = DateFormatDetector(EPIC_DATE_FORMATS, strip=True)  # no fast path
+    assert detector.parse("5/21/2024 13:00:00 PM", "COL") == datetime(2024, 5, 21, 13)
+    assert detector._hints["COL"] == 1
+    assert detector.parse("5/21/2024 01:00:00 PM", "COL") == datetime(2024, 5, 21, 13)
+    assert _may_overlap(EPIC_DATE_FORMATS[0], EPIC_DATE_FORMATS[1])
+    assert not any(
+        _may_overlap(a, b)
+        for i, a in enumerate(FHIR_DATE_FORMATS)
+        for b in FHIR_DATE_FORMATS[i + 1:]
+    )
+
+
+def test_hint_is_tried_first_for_strptime_only_values():
+    detector = DateFormatDetector(FHIR_DATE_FORMATS, fast_path=_fast_iso)
+    # Non-padded month: not fixed-width, so the fast path defers to strptime.
+    assert detector.parse("2024-1-05", "Condition.recordedDate") == datetime(2024, 1, 5)
+    assert detector._hints["Condition.recordedDate"] == FHIR_DATE_FORMATS.index("%Y-%m-%d")
+
+
+def test_parsers_route_through_shared_detectors():
+    assert EpicMapper.parse_epic_date(" 5/21/2024 12:00:00 AM ", "CONTACT_DATE") == datetime(
+        2024, 5, 21
+    )
+    assert EpicMapper.parse_epic_date("   ") is None
+    assert _parse_fhir_date("2024-03-01T10:30:00-07:00").utcoffset().total_seconds() == -7 * 3600
+    assert _parse_fhir_date("not a date") is None
+    resource = {"resourceType": "Encounter", "period": {"start": "2023-11-02"}}
+    assert extract_effective_date(resource) == datetime(2023, 11, 2)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark (parses/sec, reported with -s)
+# ---------------------------------------------------------------------------
+
+
+def _rate(fn, values) -> float:
+    t0 = time.perf_counter()
+    for v in values:
+        fn(v)
+    return len(values) / (time.perf_counter() - t0)
+
+
+def test_benchmark_parses_per_second():
+    rng = random.Random(42)
+    epic = [
+        f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/{rng.randint(2000, 2024)} "
+        f"{rng.randint(1, 12)}:{rng.randint(0, 59):02d}:00 {rng.choice(['AM', 'PM'])}"
+        for _ in range(20_000)
+    ]
+    fhir = [
+        f"{rng.randint(2000, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        f"T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00{rng.choice(['Z', '-07:00', ''])}"
+        for _ in range(20_000)
+    ]
+    results = {
+        "epic": (_rate(_legacy_epic, epic), _rate(lambda v: EpicMapper.parse_epic_date(v, "COL"), epic)),
+        "fhir": (_rate(_legacy_fhir, fhir), _rate(lambda v: _parse_fhir_date(v, "F"), fhir)),
+    }
+    for name, (legacy, fast) in results.items():
+        print(f"\n{name}: legacy {legacy:,.0f}/s  fast {fast:,.0f}/s  ({fast / legacy:.1f}x)")
+        assert fast > legacy
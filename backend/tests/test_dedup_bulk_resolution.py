@@ -0,0 +1,287 @@
+"""Set-based dedup resolution (``app.services.dedup.bulk_resolution``)."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.deduplication import DedupCandidate
+from app.models.patient import Patient
+from app.models.provenance import Provenance
+from app.models.record import HealthRecord
+from app.models.uploaded_file import UploadedFile
+from app.models.user import User
+from app.services.dedup.bulk_resolution import Resolution, resolve_candidates
+from app.services.dedup.field_merger import apply_field_update
+from app.services.ingestion.content_hash import content_digests
+
+# (record_a, record_b, action, field_overrides); a3 is the primary of two
+# field updates, which must compose in order.
+_PLAN = [
+    ("a0", "b0", "merge", None),
+    ("a1", "b1", "update", None),
+    ("a2", "b2", "update", ["dosageInstruction"]),
+    ("a3", "b3", "update", ["dosageInstruction"]),
+    ("a3", "b4", "update", None),
+    ("a5", "b5", "dismiss", None),
+    ("a6", "b6", "keep_both", None),
+    ("a7", "b7", "frobnicate", None),
+]
+
+
+def _resource(role: str) -> dict:
+    if role.startswith("a"):
+        return {
+            "resourceType": "MedicationRequest",
+            "status": "active",
+            "medicationCodeableConcept": {"text": "Lisinopril 10 MG Oral Tablet"},
+            "dosageInstruction": [{"text": "10 mg daily"}],
+        }
+    return {
+        "resourceType": "MedicationRequest",
+        "status": "completed",
+        "medicationCodeableConcept": {"text": "Lisinopril 20 MG Oral Tablet"},
+        "dosageInstruction": [{"text": f"20 mg daily ({role})"}],
+        "note": [{"text": f"restated in {role}"}],
+    }
+
+
+async def _user(db: AsyncSession) -> UUID:
+    user = User(id=uuid4(), email=f"bulk-{uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    await db.flush()
+    return user.id
+
+
+async def _scenario(db: AsyncSession, user_id: UUID, plan=_PLAN):
+    """A patient + upload with one pending candidate per plan entry, plus a
+    candidate of another upload; returns (upload_id, roles, resolutions)."""
+    patient = Patient(id=uuid4(), user_id=user_id, fhir_id="p-bulk", gender="female")
+    uploads = [
+        UploadedFile(
+            id=uuid4(), user_id=user_id, filename=name, mime_type="application/json",
+            file_hash=uuid4().hex, storage_path=name, ingestion_status="awaiting_review",
+        )
+        for name in ("review.json", "other.json")
+    ]
+    db.add_all([patient, *uploads])
+    await db.flush()
+    roles: dict[str, UUID] = {}
+    for role in sorted({r for a, b, *_ in plan for r in (a, b)} | {"a9", "b9"}):
+        roles[role] = uuid4()
+        db.add(HealthRecord(
+            id=roles[role], user_id=user_id, patient_id=patient.id, record_type="medication",
+            fhir_resource_type="MedicationRequest", fhir_resource=_resource(role),
+            source_format="fhir_r4", display_text=f"Lisinopril ({role})",
+        ))
+    await db.flush()
+    resolutions = []
+    for (a, b, action, overrides), upload in [
+        *((entry, uploads[0]) for entry in plan), (("a9", "b9", "merge", None), uploads[1]),
+    ]:
+        candidate = DedupCandidate(
+            id=uuid4(), record_a_id=roles[a], record_b_id=roles[b], similarity_score=0.8,
+            match_reasons={}, status="pending", source_upload_id=upload.id,
+        )
+        db.add(candidate)
+        roles[f"{a}~{b}"] = candidate.id
+        resolutions.append(Resolution(candidate.id, action, overrides))
+    resolutions.append(Resolution(uuid4(), "merge"))  # unknown candidate: skipped
+    await db.commit()
+    return uploads[0].id, roles, resolutions
+
+
+async def _resolve_one_by_one(
+    db: AsyncSession, upload_id: UUID, user_id: UUID, resolutions: list[Resolution]
+) -> int:
+    """The per-item review path this service replaced: ``db.get`` per candidate
+    and record, attribute writes, one Provenance row per merge."""
+    resolved = 0
+    for resolution in resolutions:
+        candidate = await db.get(DedupCandidate, resolution.candidate_id)
+        if not candidate or candidate.source_upload_id != upload_id:
+            continue
+        rec_a = await db.get(HealthRecord, candidate.record_a_id)
+        rec_b = await db.get(HealthRecord, candidate.record_b_id)
+        now = datetime.now(timezone.utc)
+        if resolution.action == "merge":
+            rec_b.is_duplicate = True
+            rec_b.merged_into_id = rec_a.id
+            rec_b.merge_metadata = {
+                "merged_from": str(rec_b.id),
+                "merged_at": now.isoformat(),
+                "merge_type": "duplicate",
+                "source_upload_id": str(upload_id),
+            }
+            candidate.status = "merged"
+            candidate.resolved_by = user_id
+            candidate.resolved_at = now
+            db.add(Provenance(
+                record_id=rec_a.id, action="merge", agent=f"user/{user_id}",
+                source_file_id=upload_id,
+                details={"merged_record_id": str(rec_b.id), "action": "merge"},
+            ))
+        elif resolution.action == "update":
+            merge_result = apply_field_update(rec_a, rec_b, resolution.field_overrides)
+            rec_a.fhir_resource = merge_result["updated_resource"]
+            digests = content_digests(rec_a.fhir_resource)
+            rec_a.content_hash = digests.sha256
+            rec_a.content_hash_blake3 = digests.blake3
+            rec_a.display_text = merge_result["display_text"]
+            rec_a.merge_metadata = merge_result["merge_metadata"]
+            rec_b.is_duplicate = True
+            rec_b.merged_into_id = rec_a.id
+            candidate.status = "merged"
+            candidate.resolved_by = user_id
+            candidate.resolved_at = now
+            db.add(Provenance(
+                record_id=rec_a.id, action="field_update", agent=f"user/{user_id}",
+                source_file_id=upload_id,
+                details={
+                    "merged_record_id": str(rec_b.id),
+                    "fields_updated": merge_result["merge_metadata"].get("fields_updated", []),
+                },
+            ))
+        elif resolution.action in ("dismiss", "keep_both"):
+            candidate.status = "dismissed"
+            candidate.resolved_by = user_id
+            candidate.resolved_at = now
+        resolved += 1
+    await db.commit()
+    return resolved
+
+
+async def _snapshot(db: AsyncSession, upload_id: UUID, roles: dict[str, UUID]) -> dict:
+    """Resolution outcome with ids replaced by roles and timestamps dropped."""
+    name = {v: k for k, v in roles.items()}
+    name[upload_id] = "upload"
+
+    def named(value):
+        if isinstance(value, dict):
+            return {k: named(v) for k, v in value.items() if k != "merged_at"}
+        if isinstance(value, list):
+            return [named(v) for v in value]
+        if isinstance(value, str):
+            try:
+                return name.get(UUID(value), value)
+            except ValueError:
+                return value
+        return name.get(value, value)
+
+    records = (await db.execute(
+        select(HealthRecord).where(HealthRecord.id.in_(roles.values()))
+        .execution_options(populate_existing=True)
+    )).scalars().all()
+    candidates = (await db.execute(
+        select(DedupCandidate).where(DedupCandidate.id.in_(roles.values()))
+        .execution_options(populate_existing=True)
+    )).scalars().all()
+    provenance = (await db.execute(
+        select(Provenance).where(Provenance.record_id.in_(roles.values()))
+    )).scalars().all()
+    return {
+        "records": {
+            name[r.id]: (
+                r.is_duplicate, named(r.merged_into_id), r.fhir_resource, r.display_text,
+                r.content_hash, named(r.merge_metadata),
+            )
+            for r in records
+        },
+        "candidates": {name[c.id]: (c.status, c.resolved_by) for c in candidates},
+        "provenance": sorted(
+            repr((named(p.record_id), p.action, p.agent, named(p.source_file_id), named(p.details)))
+            for p in provenance
+        ),
+    }
+
+
+async def test_bulk_resolution_matches_per_item_path(db_session: AsyncSession):
+    user_id = await _user(db_session)
+    one_by_one = await _scenario(db_session, user_id)
+    bulk = await _scenario(db_session, user_id)
+
+    resolved = await _resolve_one_by_one(db_session, one_by_one[0], user_id, one_by_one[2])
+    outcome = await resolve_candidates(db_session, user_id, bulk[2], upload_id=bulk[0])
+    await db_session.commit()
+
+    assert outcome.resolved == resolved == len(_PLAN)
+    assert (outcome.merged, outcome.dismissed, outcome.conflicts) == (5, 2, [])
+    expected = await _snapshot(db_session, *one_by_one[:2])
+    actual = await _snapshot(db_session, *bulk[:2])
+    assert actual == expected
+    # The two field updates of a3 composed: the second saw the first's result.
+    a3 = actual["records"]["a3"]
+    assert a3[2]["dosageInstruction"] == [{"text": "20 mg daily (b4)"}]
+    assert a3[5]["previous_values"]["dosageInstruction"] == [{"text": "20 mg daily (b3)"}]
+    assert actual["candidates"]["a9~b9"] == ("pending", None)
+
+
+async def test_statement_count_does_not_grow_with_batch(db_session: AsyncSession):
+    user_id = await _user(db_session)
+    engine = db_session.bind.sync_engine
+    counts = []
+
+    def count(*_args) -> None:
+        counts[-1] += 1
+
+    for size in (2, 20):
+        plan = [(f"a{i}", f"b{i}", ("merge", "update", "dismiss")[i % 3], None)
+                for i in range(size * 3)]
+        upload_id, _, resolutions = await _scenario(db_session, user_id, plan)
+        counts.append(0)
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            outcome = await resolve_candidates(
+                db_session, user_id, resolutions, upload_id=upload_id
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        await db_session.commit()
+        assert outcome.resolved == len(plan)
+
+    # Includes the three reads that check merges against dismissed pairs.
+    assert counts[0] == counts[1] <= 13
+
+
+async def test_progress_is_reported_per_chunk(db_session: AsyncSession):
+    user_id = await _user(db_session)
+    upload_id, _, resolutions = await _scenario(db_session, user_id)
+    seen = []
+
+    outcome = await resolve_candidates(
+        db_session, user_id, resolutions, upload_id=upload_id, chunk_size=4,
+        progress_callback=lambda done, total: seen.append((done, total)),
+    )
+
+    total = len(resolutions)
+    assert seen == [(4, total), (8, total), (total, total)]
+    assert outcome.resolved == len(_PLAN)
+
+
+async def test_conflicting_merge_changes_nothing(db_session: AsyncSession):
+    """A field update between records already dismissed as distinct goes back
+    to review without touching record_a, record_b or the Provenance log."""
+    user_id = await _user(db_session)
+    plan = [
+        ("a1", "b1", "dismiss", None),
+        ("a1", "b1", "update", None),
+        ("a0", "b0", "merge", None),
+    ]
+    upload_id, roles, resolutions = await _scenario(db_session, user_id, plan)
+    await resolve_candidates(db_session, user_id, resolutions[:1], upload_id=upload_id)
+    await db_session.commit()
+    before = await _snapshot(db_session, upload_id, roles)
+
+    outcome = await resolve_candidates(db_session, user_id, resolutions[1:], upload_id=upload_id)
+    await db_session.commit()
+
+    assert outcome.conflicts == [resolutions[1].candidate_id]
+    assert (outcome.resolved, outcome.merged) == (2, 1)
+    after = await _snapshot(db_session, upload_id, roles)
+    assert after["records"]["a1"] == before["records"]["a1"]
+    assert after["records"]["b1"] == before["records"]["b1"]
+    assert after["candidates"]["a1~b1"] == ("pending", None)
+    added = sorted(set(after["provenance"]) - set(before["provenance"]))
+    assert len(added) == 1 and added[0].startswith("('a0', 'merge'")
@@ -0,0 +1,266 @@
+"""Transitive duplicate clustering (``app.services.dedup.clustering``)."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.deduplication import DedupCandidate
+from app.models.patient import Patient
+from app.models.provenance import Provenance
+from app.models.record import HealthRecord
+from app.models.user import User
+from app.services.dedup.clustering import (
+    UnionFind,
+    cluster_patient_merges,
+    elect_canonical,
+)
+from tests.conftest import auth_headers, create_test_patient
+
+
+def _fake(source_format: str = "fhir_r4", **kw) -> SimpleNamespace:
+    fields = dict(
+        id=uuid4(), source_format=source_format, is_duplicate=False, merged_into_id=None,
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc), updated_at=None,
+        code_system=None, code_value=None, code_display=None, effective_date=None,
+        effective_date_end=None, status=None, category=None, source_section=None,
+        linked_encounter_id=None,
+    )
+    fields.update(kw)
+    return SimpleNamespace(**fields)
+
+
+def test_union_find_merges_chains():
+    forest = UnionFind()
+    forest.union("a", "b")
+    forest.union("c", "d")
+    assert forest.find("a") != forest.find("c")
+    forest.union("b", "c")
+    assert len({forest.find(x) for x in "abcd"}) == 1
+    assert forest.find("e") == "e"
+
+
+def test_election_order():
+    extracted = _fake("ai_extracted", code_value="1", status="active", effective_date=1)
+    structured = _fake("fhir_r4")
+    assert elect_canonical([extracted, structured]) is structured
+
+    sparse = _fake("fhir_r4")
+    complete = _fake("epic_ehi", code_value="1", status="active")
+    assert elect_canonical([sparse, complete]) is complete
+
+    older = _fake("cda_r2", created_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+    newer = _fake("cda_r2", created_at=datetime(2025, 6, 1, tzinfo=timezone.utc))
+    assert elect_canonical([older, newer]) is newer
+    # A user's explicit primary beats everything.
+    assert elect_canonical([older, newer], preferred={older.id}) is older
+    # The current survivor keeps its place against an equally ranked record.
+    archived = _fake("cda_r2", is_duplicate=True, merged_into_id=older.id)
+    assert elect_canonical([older, newer, archived]) is older
+
+
+async def _patient(db: AsyncSession):
+    user = User(id=uuid4(), email=f"cluster-{uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    await db.flush()
+    patient = Patient(id=uuid4(), user_id=user.id, fhir_id="p-cluster", gender="female")
+    db.add(patient)
+    await db.flush()
+    return user.id, patient.id
+
+
+def _record(user_id: UUID, patient_id: UUID, source_format: str, **kw) -> HealthRecord:
+    return HealthRecord(
+        id=uuid4(), user_id=user_id, patient_id=patient_id, record_type="condition",
+        fhir_resource_type="Condition", fhir_resource={"resourceType": "Condition"},
+        source_format=source_format, display_text=kw.pop("text", "Essential hypertension"),
+        effective_date=datetime(2025, 3, 15, tzinfo=timezone.utc), **kw,
+    )
+
+
+def _pair(a: HealthRecord, b: HealthRecord, status: str = "merged", score: float = 0.97,
+          auto: bool = True) -> DedupCandidate:
+    return DedupCandidate(
+        id=uuid4(), record_a_id=a.id, record_b_id=b.id, similarity_score=score,
+        match_reasons={}, status=status, auto_resolved=auto,
+    )
+
+
+async def _state(db: AsyncSession, *records: HealthRecord) -> dict[UUID, UUID | None]:
+    rows = await db.execute(
+        select(HealthRecord.id, HealthRecord.is_duplicate, HealthRecord.merged_into_id)
+        .where(HealthRecord.id.in_([r.id for r in records]))
+    )
+    state = {}
+    for record_id, is_duplicate, merged_into_id in rows.all():
+        assert is_duplicate == (merged_into_id is not None)
+        state[record_id] = merged_into_id
+    return state
+
+
+@pytest.mark.parametrize("edge_order", ["ab_first", "bc_first"])
+async def test_chain_folds_into_one_canonical(db_session: AsyncSession, edge_order):
+    """A≈B, B≈C: every member points at the elected canonical, whatever the order."""
+    user_id, patient_id = await _patient(db_session)
+    a = _record(user_id, patient_id, "ai_extracted")
+    b = _record(user_id, patient_id, "cda_r2")
+    c = _record(user_id, patient_id, "fhir_r4", code_value="59621000")
+    db_session.add_all([a, b, c])
+    await db_session.flush()
+    edges = [_pair(a, b), _pair(b, c)]
+    if edge_order == "bc_first":
+        edges.reverse()
+    db_session.add_all(edges)
+    await db_session.commit()
+
+    result = await cluster_patient_merges(db_session, user_id, patient_id)
+    await db_session.commit()
+
+    assert await _state(db_session, a, b, c) == {a.id: c.id, b.id: c.id, c.id: None}
+    assert result.clusters == 1 and result.merged == 2 and not result.conflicts
+    provenance = (await db_session.execute(
+        select(Provenance).where(Provenance.record_id == c.id)
+    )).scalars().all()
+    assert {p.details["merged_record_id"] for p in provenance} == {str(a.id), str(b.id)}
+
+    # Re-running is a no-op: the cluster is already consistent.
+    again = await cluster_patient_merges(db_session, user_id, patient_id)
+    assert again.clusters == 0
+
+
+async def test_new_member_with_higher_priority_takes_over(db_session: AsyncSession):
+    """A cluster absorbing a better record re-points the old members to it."""
+    user_id, patient_id = await _patient(db_session)
+    a = _record(user_id, patient_id, "ai_extracted")
+    b = _record(user_id, patient_id, "ai_extracted")
+    db_session.add_all([a, b])
+    await db_session.flush()
+    db_session.add(_pair(a, b))
+    await db_session.commit()
+    await cluster_patient_merges(db_session, user_id, patient_id)
+    await db_session.commit()
+    first = await _state(db_session, a, b)
+    survivor = a if first[a.id] is None else b
+
+    c = _record(user_id, patient_id, "fhir_r4")
+    db_session.add(c)
+    await db_session.flush()
+    db_session.add(_pair(survivor, c))
+    await db_session.commit()
+    await cluster_patient_merges(db_session, user_id, patient_id)
+    await db_session.commit()
+
+    assert await _state(db_session, a, b, c) == {a.id: c.id, b.id: c.id, c.id: None}
+
+
+async def test_conflicting_pair_goes_back_to_review(db_session: AsyncSession):
+    """A≈B and B≈C merged but A/C dismissed: the weaker edge is not applied."""
+    user_id, patient_id = await _patient(db_session)
+    a = _record(user_id, patient_id, "fhir_r4")
+    b = _record(user_id, patient_id, "cda_r2")
+    c = _record(user_id, patient_id, "ai_extracted")
+    db_session.add_all([a, b, c])
+    await db_session.flush()
+    strong, weak = _pair(a, b, score=0.99), _pair(b, c, score=0.96)
+    db_session.add_all([strong, weak, _pair(a, c, status="dismissed", auto=False)])
+    await db_session.commit()
+
+    result = await cluster_patient_merges(db_session, user_id, patient_id)
+    await db_session.commit()
+
+    assert result.conflicts == [weak.id]
+    assert await _state(db_session, a, b, c) == {a.id: None, b.id: a.id, c.id: None}
+    await db_session.refresh(weak)
+    assert weak.status == "pending" and weak.auto_resolved is False
+
+
+async def test_user_confirmation_beats_auto_merge_in_conflict(db_session: AsyncSession):
+    user_id, patient_id = await _patient(db_session)
+    a = _record(user_id, patient_id, "fhir_r4")
+    b = _record(user_id, patient_id, "cda_r2")
+    c = _record(user_id, patient_id, "ai_extracted")
+    db_session.add_all([a, b, c])
+    await db_session.flush()
+    auto, confirmed = _pair(a, b, score=0.99), _pair(b, c, score=0.7, auto=False)
+    db_session.add_all([auto, confirmed, _pair(a, c, status="dismissed", auto=False)])
+    await db_session.commit()
+
+    result = await cluster_patient_merges(db_session, user_id, patient_id)
+    assert result.conflicts == [auto.id]
+
+
+async def _api_chain(db_session: AsyncSession, uid: str):
+    patient = await create_test_patient(db_session, uid)
+    a = _record(UUID(uid), patient.id, "fhir_r4")
+    b = _record(UUID(uid), patient.id, "cda_r2")
+    c = _record(UUID(uid), patient.id, "ai_extracted")
+    db_session.add_all([a, b, c])
+    await db_session.flush()
+    ab, bc = _pair(a, b), _pair(b, c)
+    db_session.add_all([ab, bc])
+    await db_session.commit()
+    await cluster_patient_merges(db_session, UUID(uid), patient.id)
+    await db_session.commit()
+    return a, b, c, ab, bc
+
+
+async def test_undo_one_pair_splits_only_that_link(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    a, b, c, ab, bc = await _api_chain(db_session, uid)
+
+    resp = await client.post(
+        "/api/v1/dedup/undo-merge", headers=headers, json={"candidate_id": str(bc.id)}
+    )
+    assert resp.status_code == 200
+
+    # C only reached the cluster through B; A≈B still holds.
+    assert await _state(db_session, a, b, c) == {a.id: None, b.id: a.id, c.id: None}
+
+
+async def test_undo_cluster_restores_every_member(client: AsyncClient, db_session: AsyncSession):
+    headers, uid = await auth_headers(client)
+    a, b, c, ab, bc = await _api_chain(db_session, uid)
+
+    resp = await client.post(
+        "/api/v1/dedup/undo-cluster", headers=headers, json={"record_id": str(c.id)}
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "dismissed", "restored": 2}
+    assert await _state(db_session, a, b, c) == {a.id: None, b.id: None, c.id: None}
+    for candidate in (ab, bc):
+        await db_session.refresh(candidate)
+        assert candidate.status == "dismissed"
+
+    other_headers, _ = await auth_headers(client, email="cluster_other@test.com")
+    resp = await client.post(
+        "/api/v1/dedup/undo-cluster", headers=other_headers, json={"record_id": str(a.id)}
+    )
+    assert resp.status_code == 404
+
+
+async def test_manual_merge_conflicting_with_dismissal_is_rejected(
+    client: AsyncClient, db_session: AsyncSession
+):
+    headers, uid = await auth_headers(client)
+    a, b, c, ab, bc = await _api_chain(db_session, uid)
+    await db_session.refresh(a)
+    d = _record(UUID(uid), a.patient_id, "fhir_r4")
+    db_session.add(d)
+    await db_session.flush()
+    dismissed, pending = _pair(a, d, status="dismissed", auto=False), _pair(c, d, "pending", 0.8)
+    db_session.add_all([dismissed, pending])
+    await db_session.commit()
+    d_id = d.id
+
+    resp = await client.post(
+        "/api/v1/dedup/merge", headers=headers, json={"candidate_id": str(pending.id)}
+    )
+    assert resp.status_code == 409
+    await db_session.refresh(pending)
+    assert pending.status == "pending"
+    assert (await db_session.get(HealthRecord, d_id, populate_existing=True)).is_duplicate is False
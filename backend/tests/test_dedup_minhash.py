@@ -0,0 +1,139 @@
+"""MinHash/LSH near-duplicate index (``app.services.dedup.minhash_index``)."""
+from __future__ import annotations
+
+import itertools
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.patient import Patient
+from app.models.record import HealthRecord
+from app.models.record_minhash import RecordMinHash
+from app.models.uploaded_file import UploadedFile
+from app.models.user import User
+from app.services.dedup import minhash_index
+from app.services.dedup.detector import _bucket_key, detect_upload_duplicates
+from tests.conftest import FIXTURES_DIR
+
+
+def _labeled() -> list[SimpleNamespace]:
+    data = json.loads((FIXTURES_DIR / "dedup_near_duplicates.json").read_text())
+    return [SimpleNamespace(code_display=None, **r) for r in data["records"]]
+
+
+def _precision_recall(pairs: set, truth: set) -> tuple[float, float]:
+    hits = len(pairs & truth)
+    return (hits / len(pairs) if pairs else 0.0), hits / len(truth)
+
+
+def test_lsh_beats_exact_bucketing_on_labeled_fixture():
+    records = _labeled()
+    truth = {
+        (i, j) for i, j in itertools.combinations(range(len(records)), 2)
+        if records[i].group == records[j].group
+    }
+    exact = {
+        (i, j) for i, j in itertools.combinations(range(len(records)), 2)
+        if _bucket_key(records[i]) == _bucket_key(records[j])
+    }
+    lsh = minhash_index.lsh_pairs(records, uuid4())
+
+    exact_p, exact_r = _precision_recall(exact, truth)
+    lsh_p, lsh_r = _precision_recall(lsh, truth)
+    assert exact_r < 0.2
+    assert lsh_r >= 0.9 and lsh_p >= 0.6
+    # Candidates are scoped to one record type.
+    assert all(records[i].record_type == records[j].record_type for i, j in lsh)
+
+
+def test_signature_is_order_and_case_insensitive_and_stable():
+    a = minhash_index.signature(minhash_index.shingles("Essential hypertension"))
+    b = minhash_index.signature(minhash_index.shingles("HYPERTENSION, essential"))
+    assert a == b
+    packed = minhash_index.pack_signature(a)
+    assert minhash_index.unpack_signature(packed) == a
+    # Persisted values must not depend on the process (no PYTHONHASHSEED).
+    assert minhash_index.estimate_jaccard(
+        a, minhash_index.signature(minhash_index.shingles("Type 2 diabetes"))
+    ) < 0.2
+    keys = minhash_index.band_keys(a, uuid4(), "condition")
+    assert len(keys) == minhash_index.BANDS
+    assert all(-(1 << 63) <= k < (1 << 63) for k in keys)
+
+
+async def _owner(db: AsyncSession):
+    user = User(id=uuid4(), email=f"lsh-{uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    await db.flush()
+    patient = Patient(id=uuid4(), user_id=user.id, fhir_id="p-lsh", gender="female")
+    db.add(patient)
+    uploads = []
+    for name in ("old.pdf", "new.pdf"):
+        upload = UploadedFile(
+            id=uuid4(), user_id=user.id, filename=name, mime_type="application/pdf",
+            file_hash=uuid4().hex, storage_path=f"/tmp/{name}", file_category="unstructured",
+        )
+        db.add(upload)
+        uploads.append(upload)
+    await db.flush()
+    return user, patient, uploads
+
+
+def _record(user, patient, upload, text: str, **kw) -> HealthRecord:
+    return HealthRecord(
+        id=uuid4(), user_id=user.id, patient_id=patient.id, source_file_id=upload.id,
+        record_type=kw.get("record_type", "condition"), fhir_resource_type="Condition",
+        fhir_resource={"resourceType": "Condition"},
+        source_format=kw.get("source_format", "ai_extracted"),
+        display_text=text, status="active",
+        effective_date=datetime(2025, 3, 15, tzinfo=timezone.utc),
+    )
+
+
+@pytest.mark.parametrize("lsh_enabled", [True, False])
+async def test_upload_dedup_finds_free_text_variant(db_session, monkeypatch, lsh_enabled):
+    monkeypatch.setattr(settings, "dedup_minhash_lsh", lsh_enabled)
+    user, patient, (old, new) = await _owner(db_session)
+    # Structured import vs a note's extraction: cross-source, same day.
+    existing = _record(user, patient, old, "Essential hypertension", source_format="fhir_r4")
+    unrelated = _record(user, patient, old, "Type 2 diabetes mellitus")
+    incoming = _record(user, patient, new, "Primary essential hypertension")
+    db_session.add_all([existing, unrelated, incoming])
+    await db_session.commit()
+
+    auto, review = await detect_upload_duplicates(db_session, new.id, patient.id, user.id)
+    pairs = {(c["record_a_id"], c["record_b_id"]) for c in auto + review}
+    if lsh_enabled:
+        assert pairs == {(existing.id, incoming.id)}
+        assert await minhash_index.upload_candidate_pairs(
+            db_session, new.id, patient.id, user.id
+        ) == {(incoming.id, existing.id)}
+        signed = (await db_session.execute(select(RecordMinHash.record_id))).scalars().all()
+        assert set(signed) == {existing.id, unrelated.id, incoming.id}
+    else:
+        assert pairs == set()
+
+
+async def test_refresh_resigns_only_changed_records(db_session):
+    user, patient, (old, _new) = await _owner(db_session)
+    record = _record(user, patient, old, "Asthma, mild intermittent")
+    db_session.add(record)
+    await db_session.commit()
+
+    assert await minhash_index.refresh_patient_index(db_session, user.id, patient.id) == 1
+    assert await minhash_index.refresh_patient_index(db_session, user.id, patient.id) == 0
+
+    record.display_text = "Chronic obstructive pulmonary disease"
+    record.version = 2
+    await db_session.commit()
+    assert await minhash_index.refresh_patient_index(db_session, user.id, patient.id) == 1
+    row = await db_session.get(RecordMinHash, record.id)
+    await db_session.refresh(row)
+    assert row.record_version == 2
+    assert minhash_index.unpack_signature(row.signature) == minhash_index.record_signature(record)
@@ -0,0 +1,230 @@
+"""Encounter graph projection (``encounter_links``, ``app.services.encounter_graph``).
+
+Whatever writes the records — ORM, bulk statements, merges and their undo,
+deletes — the projection must agree with ``health_records`` (checked by
+``check_links``), and the linked views must be served from it alone.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, event, insert, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.deduplication import DedupCandidate
+from app.models.encounter_link import EncounterLink
+from app.models.record import HealthRecord
+from app.services.data_version import mark_records_changed
+from app.services.encounter_graph import check_links, repair_links
+from tests.conftest import auth_headers, create_test_patient
+
+
+def _record(patient, record_type: str, text: str, *, linked=None, day: int = 1, **fields) -> dict:
+    resource = {"resourceType": "Observation", "status": "final",
+                "valueQuantity": {"value": day, "unit": "mg/dL"},
+                "performer": [{"display": "Dr. Rivera"}]}
+    return {
+        "id": uuid4(), "patient_id": patient.id, "user_id": patient.user_id,
+        "record_type": record_type, "fhir_resource_type": "Observation",
+        "fhir_resource": resource, "source_format": "ai_extracted", "display_text": text,
+        "effective_date": datetime(2025, 3, day, tzinfo=timezone.utc),
+        "linked_encounter_id": linked, **fields,
+    }
+
+
+async def _visit(db: AsyncSession, patient, children: int, *, source_format="ai_extracted"):
+    """An encounter and ``children`` linked labs, written as the bulk
+    extraction path writes them: statements plus explicit marks."""
+    encounter = _record(patient, "encounter", "Office visit", source_format=source_format)
+    rows = [encounter] + [
+        _record(patient, "observation" if i % 3 else "condition", f"result {i}",
+                linked=encounter["id"], day=1 + i % 28)
+        for i in range(children)
+    ]
+    await db.execute(insert(HealthRecord), rows)
+    mark_records_changed(db, patient.user_id, [r["id"] for r in rows])
+    await db.commit()
+    return encounter["id"], [r["id"] for r in rows[1:]]
+
+
+async def _linked(client: AsyncClient, headers: dict, encounter_id) -> list[dict]:
+    resp = await client.get(f"/api/v1/records/{encounter_id}/linked", headers=headers)
+    assert resp.status_code == 200
+    return resp.json()
+
+
+async def _assert_consistent(db: AsyncSession, user_id) -> None:
+    assert not await check_links(db, UUID(str(user_id)), summaries=True)
+
+
+@pytest.mark.asyncio
+async def test_linked_view_and_counts_come_from_the_projection(
+    client: AsyncClient, db_session: AsyncSession
+):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    encounter_id, children = await _visit(db_session, patient, 30)
+    await _assert_consistent(db_session, uid)
+
+    statements: list[str] = []
+    engine = db_session.bind.sync_engine
+
+    def capture(_conn, _cursor, statement, *_args) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        linked = await _linked(client, headers, encounter_id)
+        resp = await client.get(f"/api/v1/records/{encounter_id}/linked/summary", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert not [s for s in statements if "health_records" in s]
+    assert {e["id"] for e in linked} == {str(c) for c in children}
+    dates = [e["effective_date"] for e in linked]
+    assert dates == sorted(dates, reverse=True)
+    lab = next(e for e in linked if e["record_type"] == "observation")
+    assert lab["provider"] == "Dr. Rivera"
+    assert lab["preview"]["unit"] == "mg/dL"
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "encounter_id": str(encounter_id), "total": 30, "by_type": {"condition": 10, "observation": 20},
+    }
+    audit = (await client.get("/api/v1/audit-log", headers=headers)).json()
+    assert {"records.linked", "records.visit_summary"} <= {i["action"] for i in audit["items"]}
+
+
+@pytest.mark.asyncio
+async def test_merge_repoints_children_and_undo_restores_them(
+    client: AsyncClient, db_session: AsyncSession
+):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    kept, kept_children = await _visit(db_session, patient, 4, source_format="fhir_r4")
+    merged, merged_children = await _visit(db_session, patient, 3)
+    candidate = DedupCandidate(
+        id=uuid4(), record_a_id=kept, record_b_id=merged,
+        similarity_score=0.97, match_reasons={}, status="pending",
+    )
+    db_session.add(candidate)
+    await db_session.commit()
+
+    resp = await client.post(
+        "/api/v1/dedup/merge", headers=headers, json={"candidate_id": str(candidate.id)}
+    )
+    assert resp.status_code == 200
+    assert {e["id"] for e in await _linked(client, headers, kept)} == {
+        str(c) for c in kept_children + merged_children
+    }
+    assert await _linked(client, headers, merged) == []
+    await _assert_consistent(db_session, uid)
+
+    resp = await client.post(
+        "/api/v1/dedup/undo-merge", headers=headers, json={"candidate_id": str(candidate.id)}
+    )
+    assert resp.status_code == 200
+    assert {e["id"] for e in await _linked(client, headers, kept)} == {str(c) for c in kept_children}
+    assert {e["id"] for e in await _linked(client, headers, merged)} == {str(c) for c in merged_children}
+    await _assert_consistent(db_session, uid)
+
+
+@pytest.mark.asyncio
+async def test_orm_writes_deletes_and_rollbacks_are_reflected(
+    client: AsyncClient, db_session: AsyncSession
+):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    encounter_id, children = await _visit(db_session, patient, 3)
+
+    # ORM insert and edit.
+    added = HealthRecord(**_record(patient, "medication", "omeprazole", linked=encounter_id))
+    db_session.add(added)
+    await db_session.commit()
+    added.display_text = "omeprazole 20 mg"
+    await db_session.commit()
+    by_id = {e["id"]: e for e in await _linked(client, headers, encounter_id)}
+    assert by_id[str(added.id)]["display_text"] == "omeprazole 20 mg"
+
+    # Soft delete through the API.
+    assert (await client.delete(f"/api/v1/records/{children[0]}", headers=headers)).status_code == 204
+    assert str(children[0]) not in {e["id"] for e in await _linked(client, headers, encounter_id)}
+
+    # A rolled back link leaves no trace.
+    db_session.add(HealthRecord(**_record(patient, "condition", "discarded", linked=encounter_id)))
+    await db_session.flush()
+    await db_session.rollback()
+
+    summary = (await client.get(
+        f"/api/v1/records/{encounter_id}/linked/summary", headers=headers
+    )).json()
+    assert summary["total"] == 3
+    await _assert_consistent(db_session, uid)
+
+
+@pytest.mark.asyncio
+async def test_checker_finds_and_repairs_drift(client: AsyncClient, db_session: AsyncSession):
+    _, uid = await auth_headers(client)
+    user_id = UUID(uid)
+    patient = await create_test_patient(db_session, uid)
+    encounter_id, children = await _visit(db_session, patient, 6)
+    other, _ = await _visit(db_session, patient, 1)
+
+    # Writes that bypass the marks.
+    await db_session.execute(delete(EncounterLink).where(EncounterLink.record_id == children[0]))
+    await db_session.execute(
+        update(EncounterLink).where(EncounterLink.record_id == children[1]).values(encounter_id=other)
+    )
+    await db_session.execute(
+        update(EncounterLink).where(EncounterLink.record_id == children[2]).values(summary=None)
+    )
+    await db_session.execute(
+        update(HealthRecord).where(HealthRecord.id == children[3])
+        .values(deleted_at=datetime.now(timezone.utc))
+    )
+    await db_session.commit()
+
+    drift = await check_links(db_session, user_id)
+    assert set(drift.missing) == {children[0], children[1]}
+    assert set(drift.stale) == {children[1], children[3]}
+    assert drift.summaries == []
+    drift = await check_links(db_session, user_id, summaries=True)
+    assert drift.summaries == [children[2]]
+
+    await repair_links(db_session, user_id, drift.record_ids)
+    await db_session.commit()
+    await _assert_consistent(db_session, uid)
+
+
+@pytest.mark.asyncio
+async def test_linked_queries_use_the_encounter_index(client: AsyncClient, db_session: AsyncSession):
+    _, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    encounter_id, _ = await _visit(db_session, patient, 40)
+    params = {"u": uid, "e": str(encounter_id)}
+
+    async def explain(query: str) -> str:
+        await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = (await db_session.execute(text("EXPLAIN " + query), params)).all()
+        await db_session.rollback()
+        return "\n".join(r[0] for r in rows)
+
+    plan = await explain(
+        "SELECT * FROM encounter_links WHERE user_id = :u AND encounter_id = :e "
+        "ORDER BY effective_date DESC, record_id"
+    )
+    assert "idx_encounter_links_encounter" in plan, plan
+    assert "Sort" not in plan, plan
+    plan = await explain(
+        "SELECT record_type, count(*) FROM encounter_links "
+        "WHERE user_id = :u AND encounter_id = :e GROUP BY record_type"
+    )
+    assert "Index Only Scan using idx_encounter_links_encounter" in plan, plan
+    assert "health_records" not in plan
+    # The links the projection re-points on a merge are found by index too.
+    plan = await explain(
+        "SELECT id FROM health_records WHERE linked_encounter_id = :e"
+    )
+    assert "ix_health_records_linked_encounter" in plan, plan
@@ -0,0 +1,267 @@
+"""Tests for push-based extraction cancel and coalesced progress writes
+(``app.services.extraction.job_control``).
+
+Covers cancel latency (a pushed cancel aborts in-flight chunk extraction well
+under the old one-chunk granularity), a bound on the number of
+``UPDATE uploaded_files`` statements per document, and the status/cancel
+endpoints talking to the in-process job registry.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models.uploaded_file import UploadedFile
+from app.models.user import User
+from app.services.extraction.job_control import (
+    ProgressReporter,
+    get_job,
+    register_job,
+    request_cancel,
+    unregister_job,
+)
+from tests.conftest import TEST_DB_URL, auth_headers
+
+N_CHUNKS = 300
+
+
+def _mk_upload(user_id, status: str = "processing", **kw) -> UploadedFile:
+    return UploadedFile(
+        id=uuid4(),
+        user_id=user_id,
+        filename=f"f_{uuid4().hex[:8]}.rtf",
+        mime_type="application/rtf",
+        file_size_bytes=500,
+        file_hash=f"hash_{uuid4().hex}",
+        storage_path=f"/tmp/{uuid4().hex}.rtf",
+        ingestion_status=status,
+        file_category="unstructured",
+        **kw,
+    )
+
+
+async def _seed(db: AsyncSession) -> UploadedFile:
+    user = User(email=f"jobctl-{uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    await db.flush()
+    upload = _mk_upload(user.id)
+    db.add(upload)
+    await db.commit()
+    return upload
+
+
+def _count_upload_updates(engine) -> list[str]:
+    statements: list[str] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE UPLOADED_FILES"):
+            statements.append(statement)
+
+    return statements
+
+
+def _engine_patches(extract_stub, parsed_doc=None):
+    """Patch the Gemini engine's collaborators (no LLM, no scrubber models)."""
+    patches = [
+        patch("app.services.ai.llm.load_llm_config", new=AsyncMock(return_value=None)),
+        patch(
+            "app.services.ai.phi_scrubber.scrub_phi_async",
+            new=AsyncMock(side_effect=lambda text, **_kw: (text, {})),
+        ),
+        patch(
+            "app.services.extraction.entity_extractor.extract_entities_async",
+            side_effect=extract_stub,
+        ),
+    ]
+    if parsed_doc is not None:
+        patches.append(
+            patch("app.api.upload.parse_sections", new=AsyncMock(return_value=parsed_doc))
+        )
+    return patches
+
+
+@pytest.mark.asyncio
+async def test_pushed_cancel_aborts_inflight_extraction_within_100ms(db_session: AsyncSession):
+    from contextlib import ExitStack
+
+    from app.api import upload as upload_module
+
+    seeded = await _seed(db_session)
+    engine = create_async_engine(TEST_DB_URL)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    started = asyncio.Event()
+
+    async def slow_extract(text, source_file, api_key, progress_callback=None, config=None):
+        started.set()
+        await asyncio.sleep(30)  # a slow LLM call the cancel must not wait out
+
+    try:
+        async with factory() as db:
+            upload = (
+                await db.execute(select(UploadedFile).where(UploadedFile.id == seeded.id))
+            ).scalar_one()
+            register_job(upload)
+            with ExitStack() as stack:
+                for p in _engine_patches(slow_extract):
+                    stack.enter_context(p)
+                run = asyncio.create_task(
+                    upload_module._run_gemini_extraction_engine(
+                        db, upload, upload.id, upload.user_id,
+                        "Patient has hypertension.", asyncio.Semaphore(5),
+                    )
+                )
+                await asyncio.wait_for(started.wait(), timeout=10)
+                t0 = time.monotonic()
+                assert request_cancel(upload.id)
+                result = await asyncio.wait_for(run, timeout=5)
+                elapsed = time.monotonic() - t0
+    finally:
+        unregister_job(seeded.id)
+        await engine.dispose()
+
+    assert result == (None, None)
+    assert elapsed < 0.1, f"cancel took {elapsed * 1000:.0f} ms"
+    await db_session.refresh(seeded)
+    assert seeded.ingestion_status == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_progress_reporter_coalesces_section_writes(db_session: AsyncSession):
+    """Advancing through every section writes only a handful of UPDATEs."""
+    seeded = await _seed(db_session)
+    engine = create_async_engine(TEST_DB_URL)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    updates = _count_upload_updates(engine)
+
+    try:
+        async with factory() as db:
+            upload = (
+                await db.execute(select(UploadedFile).where(UploadedFile.id == seeded.id))
+            ).scalar_one()
+            job = register_job(upload)
+            reporter = ProgressReporter(db, upload, job)
+            for i in range(1, N_CHUNKS + 1):
+                await reporter.advance(i, N_CHUNKS)
+            assert job.progress_detail == {"section_index": N_CHUNKS, "section_total": N_CHUNKS}
+    finally:
+        unregister_job(seeded.id)
+        await engine.dispose()
+
+    assert len(updates) <= 12, len(updates)  # every 10% + the final section
+    await db_session.refresh(seeded)
+    assert seeded.progress_detail == {"section_index": N_CHUNKS, "section_total": N_CHUNKS}
+
+
+@pytest.mark.asyncio
+async def test_gemini_engine_update_count_per_document(db_session: AsyncSession):
+    from contextlib import ExitStack
+
+    from app.api import upload as upload_module
+    from app.services.extraction.entity_extractor import ExtractionResult
+    from app.services.extraction.section_parser import (
+        ParsedDocument,
+        ParsedSection,
+        SectionType,
+    )
+
+    seeded = await _seed(db_session)
+    section_text = "Patient seen for follow up. " * 55  # ~1.5k chars: one chunk each
+    doc_text = section_text * N_CHUNKS
+    parsed = ParsedDocument(
+        sections=[
+            ParsedSection(
+                section_type=SectionType.OTHER, title=f"S{i}", text=section_text,
+                char_range=(0, len(section_text)),
+            )
+            for i in range(N_CHUNKS)
+        ],
+        document_type="clinical_note",
+        primary_visit_date=None,
+        provider=None,
+        facility=None,
+    )
+
+    async def fast_extract(text, source_file, api_key, progress_callback=None, config=None):
+        await asyncio.sleep(0)
+        return ExtractionResult(source_file=source_file, source_text=text)
+
+    engine = create_async_engine(TEST_DB_URL)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    updates = _count_upload_updates(engine)
+    try:
+        async with factory() as db:
+            upload = (
+                await db.execute(select(UploadedFile).where(UploadedFile.id == seeded.id))
+            ).scalar_one()
+            with ExitStack() as stack:
+                for p in _engine_patches(fast_extract, parsed):
+                    stack.enter_context(p)
+                entities, _doc = await upload_module._run_gemini_extraction_engine(
+                    db, upload, upload.id, upload.user_id, doc_text, asyncio.Semaphore(50),
+                )
+    finally:
+        await engine.dispose()
+
+    assert entities == []
+    # N_CHUNKS sections, yet only the coalesced progress writes reach the DB.
+    assert len(updates) <= 15, len(updates)
+    await db_session.refresh(seeded)
+    assert seeded.progress_detail == {"section_index": N_CHUNKS, "section_total": N_CHUNKS}
+
+
+@pytest.mark.asyncio
+async def test_status_served_from_live_job(client: AsyncClient, db_session: AsyncSession):
+    headers, user_id = await auth_headers(client)
+    upload = _mk_upload(UUID(user_id), progress_stage="extracting_entities")
+    db_session.add(upload)
+    await db_session.commit()
+
+    job = register_job(upload)
+    try:
+        job.progress_detail = {"section_index": 7, "section_total": 20}  # not yet written
+        resp = await client.get(f"/api/v1/upload/{upload.id}/status", headers=headers)
+    finally:
+        unregister_job(upload.id)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["ingestion_status"] == "processing"
+    assert data["progress_stage"] == "extracting_entities"
+    assert data["progress_detail"] == {"section_index": 7, "section_total": 20}
+
+    other_headers, _ = await auth_headers(client, email=f"other-{uuid4().hex[:6]}@example.com")
+    register_job(upload)
+    try:
+        resp = await client.get(f"/api/v1/upload/{upload.id}/status", headers=other_headers)
+    finally:
+        unregister_job(upload.id)
+    assert resp.status_code == 404, "the registry never bypasses ownership"
+
+
+@pytest.mark.asyncio
+async def test_cancel_endpoint_pushes_to_running_job(client: AsyncClient, db_session: AsyncSession):
+    headers, user_id = await auth_headers(client)
+    upload = _mk_upload(UUID(user_id))
+    db_session.add(upload)
+    await db_session.commit()
+
+    job = register_job(upload)
+    try:
+        resp = await client.post(
+            "/api/v1/upload/cancel", json={"upload_ids": [str(upload.id)]}, headers=headers
+        )
+        assert resp.status_code == 200
+        assert resp.json()["cancelled"] == [str(upload.id)]
+        assert job.cancelled.is_set()
+        assert get_job(upload.id) is job
+    finally:
+        unregister_job(upload.id)
+    await db_session.refresh(upload)
+    assert upload.cancel_requested is True
@@ -0,0 +1,276 @@
+"""Tests for the lease-based extraction worker (``app.worker``).
+
+Covers the multi-process exactly-once guarantee (100 queued files drained by 3
+worker processes), NOTIFY wake-up of an idle worker, and lease lapse handling
+(re-claim with a retry, fail once retries are exhausted, heartbeat renewal,
+a hung job timing out).
+The extraction pipeline itself is replaced by a stub processor so no LLM
+provider is involved.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.models.uploaded_file import UploadedFile
+from app.models.user import User
+from app.services.extraction.job_queue import (
+    claim_extraction_jobs,
+    notify_extraction_queued,
+    renew_leases,
+)
+from app.worker import ExtractionWorker
+from tests.conftest import TEST_DB_URL
+
+N_FILES = 100
+N_WORKERS = 3
+
+
+async def _seed_user(db: AsyncSession) -> UUID:
+    user = User(email=f"worker-{uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    await db.flush()
+    return user.id
+
+
+def _queued_file(user_id: UUID, **kw) -> UploadedFile:
+    return UploadedFile(
+        id=uuid4(),
+        user_id=user_id,
+        filename=f"f_{uuid4().hex[:8]}.rtf",
+        mime_type="application/rtf",
+        file_size_bytes=100,
+        file_hash=f"hash_{uuid4().hex}",
+        storage_path=f"/tmp/{uuid4().hex}.rtf",
+        ingestion_status=kw.pop("ingestion_status", "pending_extraction"),
+        file_category="unstructured",
+        **kw,
+    )
+
+
+def _stub_processor(factory: async_sessionmaker, processed: list[str]):
+    """Stand-in for ``_process_unstructured``: bump a counter, mark completed."""
+
+    async def process(upload_id: UUID, file_path: Path, user_id: UUID) -> None:
+        await asyncio.sleep(0.05)
+        async with factory() as db:
+            await db.execute(
+                text(
+                    "UPDATE uploaded_files SET record_count = record_count + 1, "
+                    "ingestion_status = 'completed' WHERE id = :id"
+                ),
+                {"id": upload_id},
+            )
+            await db.commit()
+        processed.append(str(upload_id))
+
+    return process
+
+
+def _worker_process(db_url: str, barrier, results) -> None:
+    """Child-process entry: drain the queue with one ``ExtractionWorker``."""
+
+    async def run() -> list[str]:
+        engine = create_async_engine(db_url)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        processed: list[str] = []
+        worker = ExtractionWorker(
+            processor=_stub_processor(factory, processed),
+            session_factory=factory,
+            database_url=db_url,
+            concurrency=4,
+            batch_size=3,
+            lease_seconds=60,
+        )
+        await worker.run(drain=True)
+        await engine.dispose()
+        return processed
+
+    barrier.wait()
+    results.put(asyncio.run(run()))
+
+
+@pytest.mark.asyncio
+async def test_three_worker_processes_process_each_file_exactly_once(db_session: AsyncSession):
+    user_id = await _seed_user(db_session)
+    files = [_queued_file(user_id) for _ in range(N_FILES)]
+    db_session.add_all(files)
+    await db_session.commit()
+
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(N_WORKERS)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker_process, args=(TEST_DB_URL, barrier, results))
+        for _ in range(N_WORKERS)
+    ]
+    for p in procs:
+        p.start()
+    per_worker = [await asyncio.to_thread(results.get, True, 90) for _ in procs]
+    for p in procs:
+        p.join(timeout=30)
+        assert p.exitcode == 0
+
+    processed = [uid for batch in per_worker for uid in batch]
+    assert len(processed) == N_FILES
+    assert set(processed) == {str(f.id) for f in files}
+    assert all(per_worker), "every worker process should have taken part"
+
+    db_session.expire_all()
+    rows = (
+        await db_session.execute(
+            select(UploadedFile.record_count, UploadedFile.ingestion_status, UploadedFile.lease_owner)
+            .where(UploadedFile.user_id == user_id)
+        )
+    ).all()
+    assert [r.record_count for r in rows] == [1] * N_FILES
+    assert {r.ingestion_status for r in rows} == {"completed"}
+    assert {r.lease_owner for r in rows} == {None}, "finished jobs release their lease"
+
+
+@pytest.mark.asyncio
+async def test_notify_wakes_idle_worker_before_poll(db_session: AsyncSession):
+    user_id = await _seed_user(db_session)
+    await db_session.commit()
+
+    engine = create_async_engine(TEST_DB_URL)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    processed: list[str] = []
+    done = asyncio.Event()
+    stub = _stub_processor(factory, processed)
+
+    async def processor(upload_id, file_path, uid):
+        await stub(upload_id, file_path, uid)
+        done.set()
+
+    # A 60 s poll: only the NOTIFY can get the file picked up within the test.
+    worker = ExtractionWorker(
+        processor=processor, session_factory=factory, database_url=TEST_DB_URL,
+        poll_interval=60,
+    )
+    task = asyncio.create_task(worker.run())
+    try:
+        await asyncio.sleep(0.5)  # worker is idle, LISTENing
+        assert worker._listening
+
+        queued = _queued_file(user_id)
+        db_session.add(queued)
+        await notify_extraction_queued(db_session)
+        started = time.monotonic()
+        await db_session.commit()
+        await asyncio.wait_for(done.wait(), timeout=10)
+        assert time.monotonic() - started < 5
+        assert processed == [str(queued.id)]
+    finally:
+        worker.stop()
+        await asyncio.wait_for(task, timeout=10)
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_lapsed_lease_is_reclaimed_with_retry_and_exhausted_lease_fails(
+    db_session: AsyncSession,
+):
+    user_id = await _seed_user(db_session)
+    past = datetime.now(timezone.utc) - timedelta(minutes=5)
+    lapsed = _queued_file(
+        user_id, ingestion_status="processing", lease_owner="dead-worker",
+        lease_expires_at=past, retry_count=0,
+    )
+    exhausted = _queued_file(
+        user_id, ingestion_status="processing", lease_owner="dead-worker",
+        lease_expires_at=past, retry_count=3,
+    )
+    live = _queued_file(
+        user_id, ingestion_status="processing", lease_owner="live-worker",
+        lease_expires_at=datetime.now(timezone.utc) + timedelta(minutes=5),
+    )
+    db_session.add_all([lapsed, exhausted, live])
+    await db_session.commit()
+
+    engine = create_async_engine(TEST_DB_URL)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        claimed = await claim_extraction_jobs(
+            factory, "new-worker", 10, lease_seconds=60, max_retries=3
+        )
+    finally:
+        await engine.dispose()
+
+    assert [j.upload_id for j in claimed] == [lapsed.id]
+    for row in (lapsed, exhausted, live):
+        await db_session.refresh(row)
+    assert lapsed.lease_owner == "new-worker"
+    assert lapsed.retry_count == 1
+    assert exhausted.ingestion_status == "failed"
+    assert exhausted.ingestion_errors[0]["error_type"] == "TimeoutError"
+    assert live.lease_owner == "live-worker", "an unexpired lease is never stolen"
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_renews_only_own_processing_leases(db_session: AsyncSession):
+    user_id = await _seed_user(db_session)
+    soon = datetime.now(timezone.utc) + timedelta(seconds=5)
+    mine = _queued_file(
+        user_id, ingestion_status="processing", lease_owner="me", lease_expires_at=soon
+    )
+    theirs = _queued_file(
+        user_id, ingestion_status="processing", lease_owner="other", lease_expires_at=soon
+    )
+    db_session.add_all([mine, theirs])
+    await db_session.commit()
+
+    engine = create_async_engine(TEST_DB_URL)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        renewed = await renew_leases(factory, "me", [mine.id, theirs.id], lease_seconds=300)
+    finally:
+        await engine.dispose()
+
+    assert renewed == 1
+    await db_session.refresh(mine)
+    await db_session.refresh(theirs)
+    assert mine.lease_expires_at > soon + timedelta(seconds=60)
+    assert theirs.lease_expires_at == soon
+
+
+@pytest.mark.asyncio
+async def test_hanging_job_times_out_is_retried_then_fails(db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(settings, "extraction_max_retries", 1)
+    user_id = await _seed_user(db_session)
+    queued = _queued_file(user_id)
+    db_session.add(queued)
+    await db_session.commit()
+
+    engine = create_async_engine(TEST_DB_URL)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    attempts: list[UUID] = []
+
+    async def hang(upload_id, file_path, uid):
+        attempts.append(upload_id)
+        await asyncio.Event().wait()  # a stuck LLM / OCR call
+
+    # The heartbeat would keep a lease of 1 s alive for as long as the job ran.
+    worker = ExtractionWorker(
+        processor=hang, session_factory=factory, database_url=TEST_DB_URL,
+        lease_seconds=1, poll_interval=0.1, job_timeout=0.3,
+    )
+    try:
+        await asyncio.wait_for(worker.run(drain=True), timeout=15)
+    finally:
+        await engine.dispose()
+
+    assert attempts == [queued.id, queued.id]
+    await db_session.refresh(queued)
+    assert queued.ingestion_status == "failed"
+    assert queued.ingestion_errors[0]["error_type"] == "TimeoutError"
+    assert queued.lease_owner is None
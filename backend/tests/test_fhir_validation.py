@@ -8,11 +8,15 @@ Covers the four behaviors the design requires:
      (the lenient required-field posture drops patient-binding refs the app
      tracks as columns, and strips the app-internal ``_extraction_metadata``).
   4. Validation raising internally is swallowed (fail-open) — ingestion proceeds.
+
+Plus the validation engine: sampling, the valid-shape cache, deferred checks
+and the per-upload report.
 """
 
 from __future__ import annotations
 
 import logging
+import threading
 
 import pytest
 
@@ -20,8 +24,12 @@ from app.config import settings
 from app.services.ingestion import fhir_validation as fv
 from app.services.ingestion.fhir_parser import map_fhir_resource
 from app.services.ingestion.fhir_validation import (
+    ValidationEngine,
+    clear_shape_cache,
+    shape_fingerprint,
     validate_and_log_fhir,
     validate_fhir_structure,
+    validation_scope,
 )
 
 # ---------------------------------------------------------------------------
@@ -95,6 +103,7 @@ def _partial_ai_lab() -> dict:
 def _log_mode(monkeypatch):
     """Default every test to ``log`` mode unless it overrides."""
     monkeypatch.setattr(settings, "fhir_validation", "log")
+    clear_shape_cache()
 
 
 # ---------------------------------------------------------------------------
@@ -302,3 +311,134 @@ def test_fail_open_is_non_latching(monkeypatch):
     monkeypatch.setattr(settings, "fhir_validation", "log")
     bad = {"resourceType": "Observation", "valueString": "x"}
     assert validate_fhir_structure(bad, "observation"), "validation must recover after a transient failure"
+
+
+# ---------------------------------------------------------------------------
+# 5. Validation engine: shape cache, sampling, deferred checks, report
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def model_calls(monkeypatch) -> list[str]:
+    calls: list[str] = []
+    real = fv._get_model
+
+    def counting(resource_type):
+        calls.append(resource_type)
+        return real(resource_type)
+
+    monkeypatch.setattr(fv, "_get_model", counting)
+    return calls
+
+
+def _observation(n: int, **extra) -> dict:
+    return {**_valid_observation(), "id": f"obs-{n}", "code": {"text": f"Lab {n}"}, **extra}
+
+
+def test_shape_fingerprint_ignores_values_and_list_lengths():
+    one = _observation(1, category=[{"text": "a"}])
+    two = _observation(2, category=[{"text": "b"}, {"text": "c"}])
+    assert shape_fingerprint(one) == shape_fingerprint(two)
+    assert shape_fingerprint(one) != shape_fingerprint(_observation(1, status=1))
+    assert shape_fingerprint(one) != shape_fingerprint(_observation(1))
+
+
+def test_valid_shape_is_validated_once(model_calls):
+    for n in range(5):
+        assert validate_and_log_fhir(_observation(n), "observation") == []
+    assert model_calls == ["Observation"]
+
+
+def test_drifting_shape_is_never_cached(model_calls, monkeypatch):
+    bad = {"resourceType": "Observation", "valueString": "x"}
+    assert validate_and_log_fhir(bad, "observation")
+    assert validate_and_log_fhir(dict(bad), "observation")
+    assert len(model_calls) == 2
+
+    monkeypatch.setattr(settings, "fhir_validation_shape_cache", False)
+    validate_and_log_fhir(_observation(1), "observation")
+    validate_and_log_fhir(_observation(2), "observation")
+    assert len(model_calls) == 4
+
+
+def test_first_n_per_type_sampling(monkeypatch, model_calls):
+    monkeypatch.setattr(settings, "fhir_validation_first_n", 2)
+    bad = {"resourceType": "Observation", "valueString": "x"}
+    with validation_scope(ValidationEngine("first-n-per-type")) as engine:
+        results = [validate_and_log_fhir(dict(bad), "observation") for _ in range(5)]
+        validate_and_log_fhir(_valid_condition(), "condition")
+    assert [bool(r) for r in results] == [True, True, False, False, False]
+    report = engine.report()
+    assert report["checked"] == 3 and report["sampled_out"] == 3
+    assert report["drift"]["Observation"]["resources"] == 2
+    assert model_calls == ["Observation", "Observation", "Condition"]
+
+
+@pytest.mark.parametrize(("rate", "checked"), [(0.0, 0), (1.0, 4)])
+def test_sample_rate(monkeypatch, rate, checked):
+    monkeypatch.setattr(settings, "fhir_validation_sample_rate", rate)
+    with validation_scope(ValidationEngine("sample")) as engine:
+        for n in range(4):
+            validate_and_log_fhir(_observation(n), "observation")
+    assert engine.report()["checked"] == checked
+    assert engine.report()["sampled_out"] == 4 - checked
+
+
+async def test_async_checks_are_reported(caplog):
+    bad = {"resourceType": "Observation", "valueString": "x"}
+    with caplog.at_level(logging.WARNING), validation_scope(ValidationEngine(run_async=True)) as engine:
+        # Deferred: nothing to return on the ingest path.
+        assert validate_and_log_fhir(bad, "observation") == []
+        assert validate_and_log_fhir(_valid_condition(), "condition") == []
+        report = await engine.areport()
+    assert report["checked"] == 2
+    assert report["drift"] == {
+        "Observation": {"resources": 1, "examples": report["drift"]["Observation"]["examples"]}
+    }
+    assert any("code" in p for p in report["drift"]["Observation"]["examples"])
+    assert any("drift" in r.message.lower() for r in caplog.records)
+
+
+def test_worker_process_report_is_merged():
+    bad = {"resourceType": "Observation", "valueString": "x"}
+    worker = ValidationEngine()
+    with validation_scope(worker):
+        validate_and_log_fhir(bad, "observation")
+    upload = ValidationEngine()
+    with validation_scope(upload):
+        validate_and_log_fhir(dict(bad), "observation")
+    upload.merge(worker.report())
+    report = upload.report()
+    assert report["checked"] == 2
+    assert report["drift"]["Observation"]["resources"] == 2
+
+
+async def test_async_checks_validate_a_snapshot_and_are_bounded(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    seen: list[tuple[str, dict]] = []
+
+    def slow_check(resource):
+        thread = threading.current_thread().name
+        seen.append((thread, resource))
+        if thread.startswith("fhir-validation"):
+            started.set()
+            release.wait(5)
+        return []
+
+    monkeypatch.setattr(fv, "_check_structure", slow_check)
+    monkeypatch.setattr(fv, "_async_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(settings, "fhir_validation_shape_cache", False)
+    with validation_scope(ValidationEngine(run_async=True)) as engine:
+        queued = _observation(1)
+        validate_and_log_fhir(queued, "observation")
+        queued["status"] = "mutated by ingest"
+        assert started.wait(5)
+        # The only slot is taken: the next check runs inline on this thread.
+        validate_and_log_fhir(_observation(2), "observation")
+        release.set()
+        report = await engine.areport()
+    assert report["checked"] == 2
+    (pool_thread, snapshot), (inline_thread, _) = seen
+    assert pool_thread.startswith("fhir-validation")
+    assert inline_thread == threading.current_thread().name
+    assert snapshot is not queued and snapshot["status"] != "mutated by ingest"
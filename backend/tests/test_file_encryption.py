@@ -12,16 +12,27 @@ from __future__ import annotations
 
 import hashlib
 import io
+import itertools
+import json
+import os
+import random
+import resource
+import struct
+import time
 
 import pytest
 
+from app.config import settings
 from app.utils.file_utils import (
     ENC_MAGIC,
+    DecryptingReader,
     EncryptedFileWriter,
     decrypt_file,
     encrypt_chunk,
     encrypt_stream,
     is_encrypted_file,
+    open_decrypted,
+    plaintext_size,
 )
 
 PLAINTEXT_MARKER = b"SECRET_PHI_MARKER_Jane_Q_Public_MRN_0001234567"
@@ -218,6 +229,153 @@ async def test_stream_upload_to_disk_encrypt_aborts_over_budget(tmp_path):
     assert not dest.exists()
 
 
+def _frames(raw: bytes) -> list[bytes]:
+    """Split an MTENC1 file into its raw frame payloads."""
+    assert raw.startswith(ENC_MAGIC)
+    pos, frames = len(ENC_MAGIC), []
+    while pos < len(raw):
+        (n,) = struct.unpack(">I", raw[pos : pos + 4])
+        frames.append(raw[pos + 4 : pos + 4 + n])
+        pos += 4 + n
+    return frames
+
+
+@pytest.mark.asyncio
+async def test_pipelined_writer_keeps_frame_order_and_decrypt_file_format(tmp_path, monkeypatch):
+    """Frames that finish encrypting out of order are still written in order,
+    one per chunk, exactly as ``EncryptedFileWriter`` lays them out."""
+    from app.api import upload
+    from app.utils import file_utils
+    from starlette.datastructures import UploadFile as StarletteUploadFile
+
+    monkeypatch.setattr(upload, "UPLOAD_CHUNK_SIZE", 4096)
+    monkeypatch.setattr(file_utils, "_ALIGNED_WRITE", 10_000)  # not a frame multiple
+    monkeypatch.setattr(settings, "upload_encrypt_workers", 4)
+    monkeypatch.setattr(file_utils, "_encrypt_pool", None)
+    rng = random.Random(3)
+    real_encrypt = file_utils.encrypt_chunk
+
+    def jittery_encrypt(chunk):
+        time.sleep(rng.random() * 0.003)
+        return real_encrypt(chunk)
+
+    monkeypatch.setattr(file_utils, "encrypt_chunk", jittery_encrypt)
+    data = os.urandom(4096 * 150 + 123)
+    dest = tmp_path / "x.pdf"
+    try:
+        total, header, digest = await upload._stream_upload_to_disk(
+            StarletteUploadFile(file=io.BytesIO(data), filename="x.pdf"), dest, max_bytes=len(data)
+        )
+    finally:
+        file_utils._encrypt_pool.shutdown()
+        monkeypatch.setattr(file_utils, "_encrypt_pool", None)
+
+    assert (total, header, digest) == (len(data), data[:16], hashlib.sha256(data).hexdigest())
+    assert decrypt_file(dest) == data
+    frames = _frames(dest.read_bytes())
+    assert len(frames) == 151
+    key = file_utils.AESGCM(file_utils._get_key())
+    for i, frame in enumerate(frames):
+        assert key.decrypt(frame[:12], frame[12:], None) == data[i * 4096 : (i + 1) * 4096]
+
+
+@pytest.mark.asyncio
+async def test_pipelined_writer_empty_body_and_plaintext_mode(tmp_path):
+    from app.utils.file_utils import PipelinedUploadWriter
+
+    for encrypt, expected in ((True, ENC_MAGIC), (False, b"")):
+        dest = tmp_path / f"empty-{encrypt}"
+        with open(dest, "wb") as f:
+            writer = PipelinedUploadWriter(f, encrypt=encrypt)
+            await writer.finalize()
+            writer.close()
+        assert dest.read_bytes() == expected
+        assert writer.hexdigest() == hashlib.sha256(b"").hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_pipelined_writer_encrypt_failure_unlinks_partial_file(tmp_path, monkeypatch):
+    from app.api.upload import _stream_upload_to_disk
+    from app.utils import file_utils
+    from starlette.datastructures import UploadFile as StarletteUploadFile
+
+    calls = []
+
+    def failing_encrypt(chunk):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError("hsm unavailable")
+        return encrypt_chunk(chunk)
+
+    monkeypatch.setattr(file_utils, "encrypt_chunk", failing_encrypt)
+    dest = tmp_path / "x.bin"
+    uf = StarletteUploadFile(file=io.BytesIO(b"z" * (40 * 1024 * 1024)), filename="x.bin")
+    with pytest.raises(RuntimeError, match="hsm unavailable"):
+        await _stream_upload_to_disk(uf, dest, max_bytes=1 << 30)
+    assert not dest.exists()
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: pipelined vs serial upload write path (MB/s, reported with -s)
+# ---------------------------------------------------------------------------
+
+
+class _RepeatingUpload:
+    """An UploadFile stand-in serving ``size`` bytes of a repeated random block."""
+
+    def __init__(self, size: int, block: bytes) -> None:
+        self._left = size
+        self._block = block
+
+    async def read(self, n: int) -> bytes:
+        n = min(n, self._left, len(self._block))
+        self._left -= n
+        return self._block[:n]
+
+
+async def _serial_upload(file, file_path) -> str:
+    """The previous write path: hash + one frame at a time on the event loop,
+    then the structured ingest entry re-read the file to hash it."""
+    from app.services.ingestion.coordinator import compute_file_hash
+
+    with open(file_path, "wb") as f:
+        writer = EncryptedFileWriter(f)
+        hasher = hashlib.sha256()
+        while chunk := await file.read(1024 * 1024):
+            hasher.update(chunk)
+            writer.write_chunk(chunk)
+        writer.finalize()
+    return compute_file_hash(file_path)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("gib", [1, 5])
+async def test_benchmark_upload_throughput(tmp_path, gib):
+    from app.api.upload import _stream_upload_to_disk
+
+    size = gib * 1024**3
+    block = os.urandom(1024 * 1024)
+    serial_path, piped_path = tmp_path / "serial.bin", tmp_path / "piped.bin"
+
+    t0 = time.perf_counter()
+    serial_hash = await _serial_upload(_RepeatingUpload(size, block), serial_path)
+    serial = size / (time.perf_counter() - t0) / 1e6
+    serial_path.unlink()
+
+    t0 = time.perf_counter()
+    _, _, piped_hash = await _stream_upload_to_disk(
+        _RepeatingUpload(size, block), piped_path, size
+    )
+    piped = size / (time.perf_counter() - t0) / 1e6
+
+    print(f"\n{gib} GiB upload: serial {serial:,.0f} MB/s  pipelined {piped:,.0f} MB/s "
+          f"({piped / serial:.1f}x, {os.cpu_count()} CPU)")
+    assert piped_hash == serial_hash
+    with open_decrypted(piped_path) as f:  # byte-compatible with the reader path
+        assert hashlib.file_digest(f, "sha256").hexdigest() == serial_hash
+    assert piped > serial
+
+
 # ---------------------------------------------------------------------------
 # Read-side wiring: text_extractor decrypts (and tolerates legacy plaintext)
 # ---------------------------------------------------------------------------
@@ -249,6 +407,211 @@ def test_text_extractor_rtf_reads_legacy_plaintext(tmp_path):
     assert "Legacy plaintext note." in text
 
 
+# ---------------------------------------------------------------------------
+# Seekable decrypting reader (no plaintext temp files)
+# ---------------------------------------------------------------------------
+
+
+def _encrypt_to(path, data: bytes, sizes) -> None:
+    """Write ``data`` as MTENC1 with frame sizes cycling through ``sizes``."""
+    with open(path, "wb") as f:
+        writer = EncryptedFileWriter(f)
+        i = 0
+        for size in itertools.cycle(sizes):
+            if i >= len(data):
+                break
+            writer.write_chunk(data[i : i + size])
+            i += size
+        writer.finalize()
+
+
+def _text_pdf(pages: list[str]) -> bytes:
+    """A minimal valid PDF with one line of Helvetica text per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode() + b") Tj ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (n, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref
+    )
+    return bytes(out)
+
+
+def test_decrypting_reader_random_seeks_across_frame_boundaries(tmp_path):
+    rng = random.Random(7)
+    data = rng.randbytes(300_000)
+    dest = tmp_path / "blob.bin"
+    _encrypt_to(dest, data, [4096, 1, 70_000, 333])  # uneven frames, incl. 1-byte
+
+    with open_decrypted(dest) as f:
+        assert f.seekable()
+        for _ in range(3000):
+            offset = rng.randrange(len(data) + 100)
+            length = rng.choice([1, 2, 4095, 4097, rng.randrange(150_000)])
+            assert f.seek(offset) == offset
+            assert f.read(length) == data[offset : offset + length]
+            assert f.tell() == min(offset + length, max(offset, len(data)))
+        f.seek(-10, io.SEEK_END)
+        assert f.read() == data[-10:]
+        f.seek(4090)
+        f.seek(10, io.SEEK_CUR)
+        assert f.read(3) == data[4100:4103]
+        with pytest.raises(ValueError):
+            f.seek(-1)
+
+    with DecryptingReader(dest) as reader:
+        assert reader.size == len(data)
+        assert reader.readall() == data
+
+
+def test_decrypting_reader_keeps_a_bounded_frame_cache(tmp_path):
+    data = os.urandom(64 * 1024)
+    dest = tmp_path / "blob.bin"
+    _encrypt_to(dest, data, [1024])
+
+    with DecryptingReader(dest, cache_frames=3) as reader:
+        calls = []
+        real_decrypt = reader._aesgcm.decrypt
+        reader._aesgcm = type("Spy", (), {
+            "decrypt": staticmethod(lambda *a: calls.append(1) or real_decrypt(*a))
+        })()
+        assert reader.readall() == data
+        assert len(calls) == 64
+        assert len(reader._cache) == 3
+        reader.seek(len(data) - 10)  # last frame is cached: no new decrypt
+        reader.read(10)
+        assert len(calls) == 64
+        reader.seek(0)
+        reader.read(1)
+        assert len(calls) == 65
+
+
+def test_decrypting_reader_rejects_truncated_file(tmp_path):
+    dest = tmp_path / "blob.bin"
+    _encrypt_to(dest, b"x" * 5000, [1000])
+    dest.write_bytes(dest.read_bytes()[:-7])
+    with pytest.raises(ValueError, match="truncated"):
+        DecryptingReader(dest)
+
+
+def test_open_decrypted_passes_legacy_plaintext_through(tmp_path):
+    legacy = tmp_path / "legacy.json"
+    legacy.write_bytes(b'{"a": 1}')
+    with open_decrypted(legacy) as f:
+        assert f.read() == b'{"a": 1}'
+    assert plaintext_size(legacy) == 8
+
+
+def test_parsers_consume_the_decrypting_reader(tmp_path):
+    """ijson, csv, lxml, zipfile and pdfplumber read straight from it."""
+    import csv
+    import zipfile
+
+    import ijson
+    import pdfplumber
+    from lxml import etree
+
+    small_frames = [512, 3000, 17]
+
+    bundle = {"entry": [{"resource": {"id": str(i), "pad": "x" * 50}} for i in range(500)]}
+    enc_json = tmp_path / "bundle.json"
+    _encrypt_to(enc_json, json.dumps(bundle).encode(), small_frames)
+    with open_decrypted(enc_json) as f:
+        assert [e["resource"]["id"] for e in ijson.items(f, "entry.item")] == [
+            str(i) for i in range(500)
+        ]
+
+    rows = "".join(f"{i}\tname-{i}\n" for i in range(2000))
+    enc_tsv = tmp_path / "T.tsv"
+    _encrypt_to(enc_tsv, ("\ufeffID\tNAME\n" + rows).encode(), small_frames)
+    with io.TextIOWrapper(open_decrypted(enc_tsv), encoding="utf-8-sig") as f:
+        parsed = list(csv.DictReader(f, delimiter="\t"))
+    assert len(parsed) == 2000 and parsed[-1] == {"ID": "1999", "NAME": "name-1999"}
+
+    xml = b"<root>" + b"".join(b"<item n='%d'/>" % i for i in range(3000)) + b"</root>"
+    enc_xml = tmp_path / "doc.xml"
+    _encrypt_to(enc_xml, xml, small_frames)
+    with open_decrypted(enc_xml) as f:
+        assert len(etree.parse(f).getroot()) == 3000
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(20):
+            zf.writestr(f"m{i}.bin", os.urandom(5000))
+    enc_zip = tmp_path / "a.zip"
+    _encrypt_to(enc_zip, buf.getvalue(), small_frames)
+    with open_decrypted(enc_zip) as f, zipfile.ZipFile(f) as zf:
+        with zipfile.ZipFile(io.BytesIO(buf.getvalue())) as plain:
+            for name in reversed(plain.namelist()):  # members out of file order
+                assert zf.read(name) == plain.read(name)
+
+    enc_pdf = tmp_path / "note.pdf"
+    _encrypt_to(enc_pdf, _text_pdf(["Page one vitals", "Page two labs"]), small_frames)
+    with open_decrypted(enc_pdf) as f, pdfplumber.open(f) as pdf:
+        assert [p.extract_text() for p in pdf.pages] == ["Page one vitals", "Page two labs"]
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: streaming reader vs decrypt_file_to (reported with -s)
+# ---------------------------------------------------------------------------
+
+BENCH_BYTES = int(os.environ.get("MTENC_BENCH_BYTES", 2 * 1024**3))
+
+
+@pytest.mark.slow
+def test_benchmark_decrypting_reader_vs_decrypt_file_to(tmp_path):
+    """Hash a BENCH_BYTES (default 2 GiB) upload's plaintext both ways."""
+    from app.utils.file_utils import decrypt_file_to
+
+    src = tmp_path / "big.bin"
+    block = os.urandom(1024 * 1024)
+    with open(src, "wb") as f:
+        writer = EncryptedFileWriter(f)
+        for _ in range(BENCH_BYTES // len(block)):
+            writer.write_chunk(block)
+        writer.finalize()
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    tmp = tmp_path / "plain.bin"
+    decrypt_file_to(src, tmp)
+    with open(tmp, "rb") as f:
+        legacy_hash = hashlib.file_digest(f, "sha256").hexdigest()
+    temp_bytes = tmp.stat().st_size
+    tmp.unlink()
+    legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with open_decrypted(src) as f:
+        stream_hash = hashlib.file_digest(f, "sha256").hexdigest()
+    streaming = time.perf_counter() - t0
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak_rss
+
+    print(
+        f"\n{BENCH_BYTES / 1024**3:.1f} GiB: decrypt_file_to+read {legacy:.1f}s "
+        f"({temp_bytes / 1024**3:.1f} GiB plaintext temp)  |  reader {streaming:.1f}s "
+        f"(no temp); peak RSS +{rss_growth / 1024:.0f} MiB across both"
+    )
+    assert stream_hash == legacy_hash
+    assert streaming < legacy
+
+
 # ---------------------------------------------------------------------------
 # Re-encryption migration script
 # ---------------------------------------------------------------------------
@@ -266,3 +266,23 @@ async def test_third_ingest_after_update_is_unchanged(client, db_session):
 
     versions = (await db_session.execute(select(RecordVersion))).scalars().all()
     assert len(versions) == 1
+
+
+def test_existing_blake3_hash_decides_when_both_sides_have_it(monkeypatch):
+    pytest.importorskip("blake3")
+    from app.services.ingestion import content_hash as content_hash_module
+    from app.services.ingestion.content_hash import content_digests
+
+    monkeypatch.setattr(content_hash_module.settings, "content_hash_blake3", True)
+    rec = _rec(rid="c1", code="active")
+    digests = content_digests(rec["fhir_resource"])
+    key = ("fhir", "Condition/c1")
+
+    plan = plan_batch([rec], existing={key: ("row-uuid", digests.sha256, 1, digests.blake3)})
+    assert plan[0].action == "skip"
+    assert plan[0].content_hash_blake3 == digests.blake3
+    # A pre-v2 row (blake3 NULL) is still compared on sha256.
+    plan = plan_batch([rec], existing={key: ("row-uuid", digests.sha256, 1, None)})
+    assert plan[0].action == "skip"
+    plan = plan_batch([rec], existing={key: ("row-uuid", digests.sha256, 1, "stale")})
+    assert plan[0].action == "update"
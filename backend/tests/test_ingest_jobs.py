@@ -0,0 +1,183 @@
+"""Structured ingest jobs: a worker killed mid-ingest resumes from its checkpoint
+(``app.services.ingestion.checkpoint``) and ends with exactly the records of a
+clean run."""
+from __future__ import annotations
+
+import asyncio
+import json
+import shutil
+import zipfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+import app.services.ingestion.checkpoint as checkpoint_module
+import app.services.ingestion.coordinator as coordinator
+from app.config import settings
+from app.models.record import HealthRecord
+from app.models.uploaded_file import UploadedFile
+from app.models.user import User
+from app.services.extraction.job_queue import claim_ingest_jobs
+from app.services.ingestion.coordinator import queue_ingest, run_ingest_job
+from benchmarks.datasets import synthetic_fhir_bundle
+from tests.conftest import FIXTURES_DIR, run_ingest_jobs
+
+_KILL_AT_BATCH = 3
+
+
+class _WorkerKilled(BaseException):
+    """Stands in for the process dying: nothing below catches a BaseException."""
+
+
+def _fhir_source(tmp_path: Path) -> Path:
+    path = tmp_path / "bundle.json"
+    shutil.copy(FIXTURES_DIR / "sample_fhir_bundle.json", path)
+    return path
+
+
+def _epic_source(tmp_path: Path) -> Path:
+    return shutil.copytree(FIXTURES_DIR / "sample_epic_tsv", tmp_path / "epic")
+
+
+def _zip_source(tmp_path: Path) -> Path:
+    path = tmp_path / "bundles.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        for seed in range(3):
+            zf.writestr(f"patient_{seed}.json", json.dumps(synthetic_fhir_bundle(2, seed)))
+    return path
+
+
+async def _queue(db: AsyncSession, source: Path) -> UUID:
+    user = User(id=uuid4(), email=f"ingest-{uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    await db.commit()
+    return (await queue_ingest(db, user.id, source, source.name)).id
+
+
+async def _snapshot(db: AsyncSession, upload_id: UUID) -> list[tuple]:
+    rows = await db.execute(
+        select(
+            HealthRecord.record_type, HealthRecord.display_text, HealthRecord.external_id,
+            HealthRecord.content_hash, HealthRecord.effective_date, HealthRecord.version,
+            HealthRecord.is_duplicate,
+        ).where(HealthRecord.source_file_id == upload_id)
+    )
+    return sorted(rows.all(), key=repr)
+
+
+# Batch sizes that put the kill mid-bundle / mid-table of the small fixtures
+# (the ZIP's bundles are mapped concurrently).
+@pytest.mark.parametrize(
+    ("make_source", "batch_size"),
+    [(_fhir_source, 3), (_epic_source, 1), (_zip_source, 3)],
+    ids=["fhir", "epic", "zip"],
+)
+async def test_killed_ingest_resumes_to_clean_result(
+    db_session: AsyncSession, monkeypatch, tmp_path, make_source, batch_size
+):
+    monkeypatch.setattr(settings, "ingestion_batch_size", batch_size)
+    session_factory = async_sessionmaker(
+        db_session.bind, class_=AsyncSession, expire_on_commit=False
+    )
+    source = make_source(tmp_path)
+
+    batches: list[int] = []
+    real_insert = checkpoint_module.idempotent_insert_records
+
+    async def insert_or_die(db, batch):
+        if kill and len(batches) == _KILL_AT_BATCH - 1:
+            raise _WorkerKilled
+        batches.append(len(batch))
+        return await real_insert(db, batch)
+
+    monkeypatch.setattr(checkpoint_module, "idempotent_insert_records", insert_or_die)
+
+    # Reference: one uninterrupted run.
+    kill = False
+    clean = await _queue(db_session, source)
+    await run_ingest_jobs(db_session)
+    clean_rows = sum(batches)
+    batches.clear()
+
+    # The worker dies while writing its third batch...
+    kill = True
+    killed = await _queue(db_session, source)
+    [job] = await claim_ingest_jobs(
+        session_factory, "doomed", 1, lease_seconds=60, max_retries=3
+    )
+    with pytest.raises(_WorkerKilled):
+        await run_ingest_job(job.upload_id, Path(job.storage_path), job.user_id,
+                             session_factory=session_factory)
+    committed_rows = sum(batches)
+    db_session.expire_all()
+    assert len(await _snapshot(db_session, killed)) == committed_rows > 0
+
+    # ...its lease lapses and another worker picks the job up.
+    kill = False
+    batches.clear()
+    await db_session.execute(
+        update(UploadedFile).where(UploadedFile.id == killed)
+        .values(lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+    )
+    await db_session.commit()
+    await run_ingest_jobs(db_session)
+
+    # Already committed entries were not parsed or written again.
+    assert committed_rows + sum(batches) == clean_rows
+    resumed_upload = await db_session.get(UploadedFile, killed)
+    clean_upload = await db_session.get(UploadedFile, clean)
+    assert resumed_upload.ingestion_status == clean_upload.ingestion_status == "completed"
+    assert resumed_upload.retry_count == 1
+    assert resumed_upload.record_count == clean_upload.record_count > 0
+    assert resumed_upload.ingestion_progress == clean_upload.ingestion_progress
+    assert await _snapshot(db_session, killed) == await _snapshot(db_session, clean)
+
+
+async def test_inline_ingest_renews_its_lease(db_session: AsyncSession, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "extraction_lease_seconds", 1)
+    session_factory = async_sessionmaker(
+        db_session.bind, class_=AsyncSession, expire_on_commit=False
+    )
+    user = User(id=uuid4(), email=f"inline-{uuid4().hex[:8]}@example.com", password_hash="x")
+    db_session.add(user)
+    await db_session.commit()
+    stolen: list = []
+
+    async def slow_ingest(db, upload, file_path, checkpoint):
+        # Well past the first lease: a worker must still not claim the row.
+        await asyncio.sleep(2.5)
+        stolen.extend(await claim_ingest_jobs(
+            session_factory, "worker", 10, lease_seconds=60, max_retries=3
+        ))
+        return {"upload_id": str(upload.id)}, uuid4()
+
+    async def no_dedup(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(coordinator, "_run_ingest", slow_ingest)
+    monkeypatch.setattr(coordinator, "_run_dedup_background", no_dedup)
+    await coordinator.ingest_file(
+        db_session, user.id, _fhir_source(tmp_path), "bundle.json",
+        session_factory=session_factory,
+    )
+    assert stolen == []
+
+
+async def test_setup_error_marks_the_upload_failed(
+    db_session: AsyncSession, monkeypatch, tmp_path
+):
+    async def no_patient(db, user_id):
+        raise RuntimeError("patients table unavailable")
+
+    monkeypatch.setattr(coordinator, "get_or_create_patient", no_patient)
+    upload_id = await _queue(db_session, _fhir_source(tmp_path))
+    await run_ingest_jobs(db_session)
+
+    db_session.expire_all()
+    upload = await db_session.get(UploadedFile, upload_id)
+    assert upload.ingestion_status == "failed"
+    assert upload.ingestion_errors == [{"error": "patients table unavailable"}]
@@ -0,0 +1,103 @@
+"""orjson response rendering (``app.utils.json_response``) against the default
+FastAPI path it replaced: ``jsonable_encoder`` (or the response model's pydantic
+dump) followed by Starlette's ``json.dumps``."""
+from __future__ import annotations
+
+import enum
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from httpx import AsyncClient
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.timeline import TimelineEvent, TimelineResponse
+from app.utils.json_response import FastJSONResponse, dumps
+from tests.conftest import auth_headers, create_test_patient, seed_test_records
+
+
+def _reference(content) -> bytes:
+    if isinstance(content, BaseModel):
+        content = content.model_dump(mode="json", by_alias=True)
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+class _Color(str, enum.Enum):
+    RED = "red"
+
+
+@dataclass
+class _Point:
+    x: int
+    when: datetime
+
+
+_ID = UUID("12345678-1234-5678-1234-567812345678")
+_AWARE = datetime(2024, 3, 1, 8, 30, 15, 250000, tzinfo=timezone(timedelta(hours=-5)))
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        {"id": _ID, "ids": [_ID, uuid4()]},
+        {"aware": _AWARE, "utc": datetime(2024, 1, 1, tzinfo=timezone.utc),
+         "naive": datetime(2024, 1, 1, 12, 0), "day": date(2024, 2, 29), "at": time(7, 5)},
+        {"whole": Decimal("3"), "scaled": Decimal("3E+2"), "fraction": Decimal("2.50")},
+        {"text": "Ünïcødé — “quoted”  ", "nested": {"a": [1, 2.5, None, True, {}]}},
+        {1: "int key", None: "none key", 2.5: "float key"},
+        {"color": _Color.RED, "tags": {"only"}, "point": _Point(1, _AWARE)},
+        {"big": 2**70, "id": _ID},
+        {"event": TimelineEvent(
+            id=_ID, record_type="observation", display_text="A1c", effective_date=_AWARE,
+            code_display=None, category=["laboratory"],
+        )},
+        TimelineResponse(events=[TimelineEvent(
+            id=_ID, record_type="condition", display_text="Dx",
+            effective_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            code_display="Dx", category=None, preview={"value": "6.8", "facets": ["x"]},
+        )], total=1),
+    ],
+    ids=["uuid", "datetime", "decimal", "text", "non-str-keys", "fallbacks", "big-int",
+         "nested-model", "response-model"],
+)
+def test_dumps_matches_default_path(content):
+    assert dumps(content) == _reference(content)
+
+
+def test_float_spelling_may_differ_but_values_do_not():
+    content = {"values": [1e16, 0.00005, 1.5e-7, 123456789.12345678]}
+    assert json.loads(dumps(content)) == json.loads(_reference(content))
+
+
+async def test_heavy_endpoints_match_default_rendering(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    headers, uid = await auth_headers(client)
+    patient = await create_test_patient(db_session, uid)
+    records = await seed_test_records(db_session, uid, patient.id, count=12)
+    paths = [
+        f"/api/v1/records/{records[1].id}/fhir",
+        "/api/v1/records/export",
+        "/api/v1/timeline",
+        "/api/v1/dashboard/overview",
+        "/api/v1/dashboard/labs",
+        "/api/v1/dashboard/sources",
+        "/api/v1/dashboard/patients",
+        "/api/v1/observations/by-code",
+    ]
+
+    fast = [await client.get(path, headers=headers) for path in paths]
+    monkeypatch.setattr(FastJSONResponse, "render", lambda self, content: _reference(content))
+    default = [await client.get(path, headers=headers) for path in paths]
+
+    for path, new, old in zip(paths, fast, default):
+        assert new.status_code == old.status_code == 200, path
+        assert new.headers["content-type"] == old.headers["content-type"] == "application/json"
+        assert new.content == old.content, path
+        assert new.json()
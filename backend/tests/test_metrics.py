@@ -0,0 +1,183 @@
+"""Pipeline metrics (``app.utils.metrics``) and the ``GET /metrics`` scrape."""
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.services.ai.llm.base import LLMProvider
+from app.services.ai.llm.types import (
+    LLMMessage,
+    LLMRateLimitError,
+    LLMRequest,
+    LLMResponse,
+    LLMUsage,
+)
+from app.utils import metrics
+from tests.conftest import FIXTURES_DIR, TEST_DB_URL, auth_headers, run_ingest_jobs
+
+TOKEN = "scrape-me"
+
+
+def test_registry_renders_prometheus_text():
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("t_events_total", "Events.", ("kind",))
+    hist = registry.histogram("t_seconds", "Latency.", buckets=(0.1, 1.0))
+    counter.inc(kind='a"b')
+    counter.inc(2, kind='a"b')
+    hist.observe(0.05)
+    hist.observe(5)
+
+    text = registry.render()
+    assert "# TYPE t_events_total counter" in text
+    assert 't_events_total{kind="a\\"b"} 3' in text
+    assert 't_seconds_bucket{le="0.1"} 1' in text
+    assert 't_seconds_bucket{le="1"} 1' in text
+    assert 't_seconds_bucket{le="+Inf"} 2' in text
+    assert "t_seconds_count 2" in text
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+
+
+class _StubProvider(LLMProvider):
+    name = "stub"
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        if request.model == "boom":
+            raise LLMRateLimitError("slow down")
+        return LLMResponse(
+            text="ok", finish_reason="stop", model=request.model,
+            usage=LLMUsage(prompt_tokens=120, completion_tokens=30, total_tokens=150),
+        )
+
+
+async def test_provider_calls_are_instrumented():
+    provider = _StubProvider()
+    ok = LLMRequest(messages=[LLMMessage("user", "hi")], model="stub-1")
+    before = metrics.LLM_SECONDS.count(provider="stub", model="stub-1", outcome="ok")
+
+    await provider.complete(ok)
+    with pytest.raises(LLMRateLimitError):
+        await provider.complete(LLMRequest(messages=ok.messages, model="boom"))
+
+    assert metrics.LLM_SECONDS.count(provider="stub", model="stub-1", outcome="ok") == before + 1
+    assert metrics.LLM_TOKENS.count(provider="stub", model="stub-1", kind="prompt") >= 1
+    assert metrics.LLM_ERRORS.value(
+        provider="stub", model="boom", error="LLMRateLimitError"
+    ) >= 1
+
+
+async def test_metrics_endpoint_requires_token(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", "")
+    assert (await client.get("/metrics")).status_code == 404
+
+    monkeypatch.setattr(settings, "metrics_token", TOKEN)
+    assert (await client.get("/metrics")).status_code == 401
+    resp = await client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    assert resp.status_code == 401
+    # A user's JWT is not a metrics credential either.
+    headers, _ = await auth_headers(client)
+    assert (await client.get("/metrics", headers=headers)).status_code == 401
+
+
+async def test_scrape_after_stubbed_uploads(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    """A structured upload and a stubbed unstructured extraction both show up."""
+    from app.api import upload as upload_module
+    from app.models.patient import Patient
+    from app.models.uploaded_file import UploadedFile
+    from app.services.extraction.entity_extractor import ExtractedEntity, ExtractionResult
+
+    monkeypatch.setattr(settings, "metrics_token", TOKEN)
+    headers, uid = await auth_headers(client)
+
+    with patch(
+        "app.services.ingestion.coordinator._run_dedup_background", new_callable=AsyncMock
+    ):
+        resp = await client.post(
+            "/api/v1/upload",
+            headers=headers,
+            files={"file": ("bundle.json", (FIXTURES_DIR / "sample_fhir_bundle.json").read_bytes(),
+                            "application/json")},
+        )
+        assert resp.status_code == 202
+        await run_ingest_jobs(db_session)
+
+    # Unstructured: the real pipeline with entity extraction stubbed out.
+    db_session.add(Patient(id=uuid4(), user_id=UUID(uid), fhir_id="p-metrics", gender="female"))
+    rtf_path = Path("/tmp") / f"metrics_{uuid4().hex}.rtf"
+    rtf_path.write_bytes(rb"{\rtf1\ansi Office visit. Lisinopril 10 mg daily.}")
+    upload = UploadedFile(
+        id=uuid4(), user_id=UUID(uid), filename="note.rtf", mime_type="application/rtf",
+        file_size_bytes=64, file_hash=f"hash_{uuid4().hex}", storage_path=str(rtf_path),
+        ingestion_status="pending_extraction", file_category="unstructured",
+    )
+    db_session.add(upload)
+    await db_session.commit()
+
+    async def fake_extract(text, source_file, api_key, progress_callback=None, config=None):
+        return ExtractionResult(
+            source_file=source_file,
+            source_text=text,
+            entities=[ExtractedEntity("medication", "Lisinopril", {"dosage": "10 mg"})],
+        )
+
+    engine = create_async_engine(TEST_DB_URL)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        with patch.object(upload_module, "async_session_factory", factory), patch(
+            "app.services.extraction.entity_extractor.extract_entities_async",
+            side_effect=fake_extract,
+        ), patch(
+            "app.services.ingestion.coordinator._run_dedup_background",
+            new_callable=AsyncMock,
+        ):
+            await upload_module._process_unstructured(upload.id, rtf_path, UUID(uid))
+    finally:
+        await engine.dispose()
+        rtf_path.unlink(missing_ok=True)
+
+    resp = await client.get("/metrics", headers={"Authorization": f"Bearer {TOKEN}"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = resp.text
+    for series in (
+        'medtimeline_stage_duration_seconds_count{pipeline="structured",stage="parse",outcome="ok"}',
+        'medtimeline_stage_duration_seconds_count{pipeline="structured",stage="db_write",outcome="ok"}',
+        'medtimeline_stage_duration_seconds_count{pipeline="unstructured",stage="extract_text",outcome="ok"}',
+        'medtimeline_stage_duration_seconds_count{pipeline="unstructured",stage="extract_entities",outcome="ok"}',
+        'medtimeline_stage_duration_seconds_count{pipeline="unstructured",stage="db_write",outcome="ok"}',
+        'medtimeline_uploads_processed_total{pipeline="structured",file_type="fhir_r4",outcome="ok"}',
+        'medtimeline_uploads_processed_total{pipeline="unstructured",file_type="rtf",outcome="ok"}',
+        'medtimeline_records_written_total{pipeline="structured",action="inserted"}',
+        'medtimeline_db_pool_connections{state="checked_out"}',
+        'medtimeline_extraction_queue_depth{status="pending_extraction"}',
+        "medtimeline_extraction_jobs_inflight 0",
+        "# TYPE medtimeline_llm_request_duration_seconds histogram",
+    ):
+        assert series in body, series
+
+
+async def test_scrape_reports_ingest_queue_depth(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch, tmp_path
+):
+    """Queued structured uploads count on their own gauge, not the extraction one."""
+    from app.services.ingestion.coordinator import queue_ingest
+
+    monkeypatch.setattr(settings, "metrics_token", TOKEN)
+    _, uid = await auth_headers(client)
+    for i in range(2):
+        source = tmp_path / f"bundle_{i}.json"
+        source.write_bytes((FIXTURES_DIR / "sample_fhir_bundle.json").read_bytes())
+        await queue_ingest(db_session, UUID(uid), source, source.name)
+
+    body = (await client.get("/metrics", headers={"Authorization": f"Bearer {TOKEN}"})).text
+    assert 'medtimeline_ingest_queue_depth{status="pending"} 2' in body
+    assert 'medtimeline_ingest_queue_depth{status="processing"} 0' in body
+    assert 'medtimeline_extraction_queue_depth{status="pending_extraction"} 0' in body
@@ -0,0 +1,152 @@
+"""Hash partitioning of health_records / record_versions
+(``scripts/partition_health_records.py``), run inside a rolled-back transaction."""
+from __future__ import annotations
+
+import json
+import re
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from app.api.timeline import get_timeline
+from app.models.deduplication import DedupCandidate
+from app.models.patient import Patient
+from app.models.record import HealthRecord
+from app.models.record_version import RecordVersion
+from app.models.user import User
+from app.services.dedup.clustering import cluster_patient_merges
+from scripts.partition_health_records import TABLES, copy_batch, prepare, switch
+
+_PARTITION = re.compile(r"\b(?:health_records|record_versions)_p\d+\b")
+
+
+async def _seed(db: AsyncSession, user_id, patient_id, n: int) -> list[HealthRecord]:
+    records = [
+        HealthRecord(
+            id=uuid4(), user_id=user_id, patient_id=patient_id, record_type="condition",
+            fhir_resource_type="Condition", fhir_resource={"resourceType": "Condition"},
+            source_format=("fhir_r4", "cda_r2")[i % 2], display_text=f"Condition {i}",
+            effective_date=datetime(2025, 1, 1 + i, tzinfo=timezone.utc),
+        )
+        for i in range(n)
+    ]
+    db.add_all(records)
+    await db.flush()
+    return records
+
+
+def _timeline_request() -> Request:
+    return Request({"type": "http", "path": "/api/v1/timeline", "query_string": b"", "headers": []})
+
+
+async def test_partitioned_queries_touch_one_partition(db_session: AsyncSession):
+    async with db_session.bind.connect() as conn:
+        trans = await conn.begin()
+        db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint",
+                          expire_on_commit=False)
+        owners = []
+        for n in range(3):
+            user = User(id=uuid4(), email=f"part-{n}-{uuid4().hex[:6]}@example.com",
+                        password_hash="x")
+            db.add(user)
+            await db.flush()
+            patient = Patient(id=uuid4(), user_id=user.id, fhir_id=f"p-{n}", gender="female")
+            db.add(patient)
+            await db.flush()
+            owners.append((user.id, patient.id, await _seed(db, user.id, patient.id, 5)))
+        user_id, patient_id, records = owners[0]
+        # A version row from before record_versions carried user_id.
+        db.add(RecordVersion(id=uuid4(), record_id=records[0].id, version=1,
+                             fhir_resource={"resourceType": "Condition"}))
+        db.add(RecordVersion(id=uuid4(), record_id=records[2].id, user_id=user_id, version=1,
+                             fhir_resource={"resourceType": "Condition"}))
+        await db.flush()
+
+        await prepare(conn, partitions=4)
+        # Written after prepare: mirrored by the dual-write triggers.
+        late = (await _seed(db, user_id, patient_id, 1))[0]
+        records[1].display_text = "Renamed while copying"
+        db.add(DedupCandidate(
+            id=uuid4(), record_a_id=records[0].id, record_b_id=records[1].id,
+            similarity_score=0.97, match_reasons={}, status="merged", auto_resolved=True,
+        ))
+        await db.flush()
+        for table in TABLES:
+            while await copy_batch(conn, table, batch=4):
+                pass
+        await switch(conn)
+
+        counts = dict((await conn.execute(text(
+            "SELECT 'health_records', count(*) FROM health_records "
+            "UNION ALL SELECT 'record_versions', count(*) FROM record_versions "
+            "UNION ALL SELECT 'versions_without_owner', count(*) FROM record_versions "
+            "WHERE user_id IS NULL"
+        ))).all())
+        assert counts == {"health_records": 16, "record_versions": 2, "versions_without_owner": 0}
+        assert await conn.scalar(
+            text("SELECT display_text FROM health_records WHERE id = :id"), {"id": records[1].id}
+        ) == "Renamed while copying"
+        assert await conn.scalar(text(
+            "SELECT count(*) FROM pg_inherits WHERE inhparent = 'health_records'::regclass"
+        )) == 4
+
+        statements: list[tuple[str, object]] = []
+
+        def capture(_conn, _cursor, statement, parameters, _context, executemany) -> None:
+            if "health_records" in statement and not executemany:
+                statements.append((statement, parameters))
+
+        event.listen(conn.sync_connection, "before_cursor_execute", capture)
+        try:
+            timeline = await get_timeline(
+                request=_timeline_request(), record_type=None, limit=200,
+                user_id=user_id, db=db,
+            )
+            result = await cluster_patient_merges(db, user_id, patient_id)
+        finally:
+            event.remove(conn.sync_connection, "before_cursor_execute", capture)
+        timeline = json.loads(timeline.body)
+        assert timeline["total"] == 6 and str(late.id) in {e["id"] for e in timeline["events"]}
+        assert result.merged == 1
+
+        explained = 0
+        for statement, parameters in statements:
+            plan = "\n".join(
+                r[0] for r in await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            )
+            partitions = set(_PARTITION.findall(plan))
+            if "health_records" in plan:
+                assert len(partitions) == 1, f"{statement}\n{plan}"
+                explained += 1
+        # Timeline count + page, cluster edges + records + merge write.
+        assert explained >= 5
+
+        # The dropped foreign keys live on as triggers: ON DELETE CASCADE ...
+        delete = text("DELETE FROM health_records WHERE id = :id AND user_id = :user_id")
+        await conn.execute(delete, {"id": records[2].id, "user_id": user_id})
+        assert await conn.scalar(text(
+            "SELECT count(*) FROM record_versions WHERE record_id = :id"
+        ), {"id": records[2].id}) == 0
+        # ... NO ACTION: a referenced record cannot be deleted ...
+        with pytest.raises(IntegrityError, match="still referenced from dedup_candidates"):
+            async with conn.begin_nested():
+                await conn.execute(delete, {"id": records[0].id, "user_id": user_id})
+        # ... and a reference must name an existing record.
+        with pytest.raises(IntegrityError, match="not present in health_records"):
+            async with conn.begin_nested():
+                await conn.execute(text(
+                    "UPDATE dedup_candidates SET record_b_id = :missing "
+                    "WHERE record_a_id = :id"
+                ), {"missing": uuid4(), "id": records[0].id})
+        with pytest.raises(IntegrityError, match="not present in health_records"):
+            async with conn.begin_nested():
+                await conn.execute(text(
+                    "UPDATE health_records SET linked_encounter_id = :missing "
+                    "WHERE id = :id AND user_id = :user_id"
+                ), {"missing": uuid4(), "id": records[3].id, "user_id": user_id})
+        await trans.rollback()
@@ -6,14 +6,15 @@ ZIP / standalone CDA XML / XDM ZIP) historically wrote PLAINTEXT because the
 ingestion coordinator reads them via streaming (``ijson`` for big bundles,
 member-by-member ``zipfile`` extraction with the W9 zip-bomb caps).
 
-This suite covers the decrypt-to-temp approach: the coordinator stream-decrypts
-an encrypted source to a temp plaintext file at the ingest entry, runs ALL the
-existing streaming logic (including the W9 caps) on that temp, and keeps the
-ORIGINAL encrypted path as ``storage_path`` so future reads decrypt again.
-
-Key OOM-safety property: ``decrypt_file_to`` streams the decrypt frame-by-frame
-(never loading the whole file into memory), so a 5 GB file decrypts with bounded
-memory — preserving the W9 streaming guarantees.
+The coordinator reads an encrypted source through a seekable decrypting view
+(``file_utils.DecryptingReader``), so ALL the existing streaming logic
+(including the W9 caps) runs on plaintext without a plaintext temp file ever
+being written, and keeps the ORIGINAL encrypted path as ``storage_path`` so
+future reads decrypt again.
+
+Key OOM-safety property: frames are decrypted on demand (never the whole file
+in memory), so a 5 GB file ingests with bounded memory — preserving the W9
+streaming guarantees. ``decrypt_file_to`` remains for operator tooling.
 """
 
 from __future__ import annotations
@@ -147,7 +148,7 @@ def test_same_content_encrypted_twice_yields_same_plaintext_hash(tmp_path):
 
 
 # ---------------------------------------------------------------------------
-# coordinator.ingest_file — decrypt-to-temp at the ingest entry
+# coordinator.ingest_file — decrypt on read, no plaintext temp
 # ---------------------------------------------------------------------------
 
 
@@ -305,3 +306,38 @@ async def test_reupload_dedup_hash_matches_for_encrypted_copies(
     assert row_a.file_hash == plaintext_hash
     assert row_b.file_hash == plaintext_hash
     assert row_a.file_hash == row_b.file_hash
+
+
+@pytest.mark.asyncio
+async def test_encrypted_zip_ingests_without_plaintext_temp_files(
+    client: AsyncClient, db_session: AsyncSession, tmp_path, monkeypatch
+):
+    """Nothing is decrypted to disk: the ZIP is read through the decrypting view."""
+    from app.config import settings
+    from app.services.ingestion.coordinator import ingest_file
+
+    temp_dir = tmp_path / "extract"
+    monkeypatch.setattr(settings, "temp_extract_dir", str(temp_dir))
+    monkeypatch.setattr(settings, "zip_streaming_ingest", True)
+    _, uid = await auth_headers(client, "enczip@example.com")
+
+    enc_zip = tmp_path / "export.zip"
+    _encrypt_bytes_to(enc_zip, _make_zip({"fhir/bundle.json": _sample_bundle_bytes()}), chunk=4096)
+
+    created = []
+    real_open = open
+
+    def spy_open(file, mode="r", *args, **kwargs):
+        if "w" in mode:
+            created.append(str(file))
+        return real_open(file, mode, *args, **kwargs)
+
+    with patch(PATCH_DEDUP_BG, new_callable=AsyncMock), patch("builtins.open", spy_open):
+        result = await ingest_file(
+            db=db_session, user_id=UUID(uid),
+            file_path=enc_zip, original_filename="export.zip",
+        )
+
+    assert result["records_inserted"] > 0
+    assert created == []
+    assert not temp_dir.exists()
@@ -7,7 +7,7 @@ import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from tests.conftest import auth_headers, FIXTURES_DIR
+from tests.conftest import auth_headers, run_ingest_jobs, FIXTURES_DIR
 
 
 @pytest.mark.asyncio
@@ -27,7 +27,7 @@ async def test_upload_no_file(client: AsyncClient, db_session: AsyncSession):
 
 @pytest.mark.asyncio
 async def test_upload_synthetic_fhir(client: AsyncClient, db_session: AsyncSession):
-    """Upload synthetic FHIR bundle, verify records inserted."""
+    """Upload synthetic FHIR bundle: queued at once, records inserted by the worker."""
     headers, _ = await auth_headers(client)
     fhir_path = FIXTURES_DIR / "sample_fhir_bundle.json"
     fhir_data = fhir_path.read_bytes()
@@ -40,11 +40,16 @@ async def test_upload_synthetic_fhir(client: AsyncClient, db_session: AsyncSessi
     assert resp.status_code == 202
     data = resp.json()
     assert "upload_id" in data
-    assert data["status"] in ("completed", "dedup_scanning")
-    # Sample bundle has 1 Patient (skipped) + 17 clinical resources = 17 records
-    assert data["records_inserted"] == 17
+    assert data["status"] == "pending"
+    assert data["records_inserted"] == 0
     assert isinstance(data["errors"], list)
 
+    await run_ingest_jobs(db_session)
+    status_resp = await client.get(f"/api/v1/upload/{data['upload_id']}/status", headers=headers)
+    assert status_resp.json()["ingestion_status"] == "completed"
+    # Sample bundle has 1 Patient (skipped) + 17 clinical resources = 17 records
+    assert status_resp.json()["record_count"] == 17
+
 
 @pytest.mark.asyncio
 async def test_upload_creates_patient(client: AsyncClient, db_session: AsyncSession):
@@ -58,6 +63,7 @@ async def test_upload_creates_patient(client: AsyncClient, db_session: AsyncSess
         headers=headers,
         files={"file": ("test.json", fhir_data, "application/json")},
     )
+    await run_ingest_jobs(db_session)
 
     # Verify patient exists via dashboard
     overview = await client.get("/api/v1/dashboard/overview", headers=headers)
@@ -76,6 +82,7 @@ async def test_upload_records_appear_in_records(client: AsyncClient, db_session:
         headers=headers,
         files={"file": ("test.json", fhir_data, "application/json")},
     )
+    await run_ingest_jobs(db_session)
 
     resp = await client.get("/api/v1/records", headers=headers)
     data = resp.json()
@@ -100,6 +107,7 @@ async def test_upload_status(client: AsyncClient, db_session: AsyncSession):
         files={"file": ("test.json", fhir_data, "application/json")},
     )
     upload_id = upload_resp.json()["upload_id"]
+    await run_ingest_jobs(db_session)
 
     status_resp = await client.get(f"/api/v1/upload/{upload_id}/status", headers=headers)
     assert status_resp.status_code == 200
@@ -110,6 +118,10 @@ async def test_upload_status(client: AsyncClient, db_session: AsyncSession):
     # Fix 4: total_file_count must be present
     assert "total_file_count" in data
     assert data["total_file_count"] >= 1
+    # Every mapped resource went through structural validation (default "all").
+    report = data["validation_report"]
+    assert report["sampling"] == "all" and report["sampled_out"] == 0
+    assert report["checked"] == 17
 
 
 @pytest.mark.asyncio
@@ -147,10 +159,10 @@ async def test_upload_history(client: AsyncClient, db_session: AsyncSession):
 
 
 @pytest.mark.asyncio
-async def test_zip_upload_returns_unstructured_uploads(
+async def test_zip_upload_queues_unstructured_files(
     client: AsyncClient, db_session: AsyncSession
 ):
-    """Uploading a ZIP with unstructured files returns them in unstructured_uploads."""
+    """Ingesting a ZIP with unstructured files queues them for extraction."""
     headers, user_id = await auth_headers(client)
 
     import zipfile
@@ -168,14 +180,19 @@ async def test_zip_upload_returns_unstructured_uploads(
         headers=headers,
     )
     assert resp.status_code == 202
-    data = resp.json()
-    assert "unstructured_uploads" in data
-    assert len(data["unstructured_uploads"]) >= 1
-    # Check structure of each entry
-    entry = data["unstructured_uploads"][0]
-    assert "upload_id" in entry
-    assert "filename" in entry
-    assert entry["status"] == "pending_extraction"
+    await run_ingest_jobs(db_session)
+
+    pending = await client.get("/api/v1/upload/pending-extraction", headers=headers)
+    files = pending.json()["files"]
+    assert [f["filename"] for f in files] == ["doc.pdf"]
+    assert files[0]["ingestion_status"] == "pending_extraction"
+    # The upload's status lists them for the client that is polling it.
+    status_resp = await client.get(
+        f"/api/v1/upload/{resp.json()['upload_id']}/status", headers=headers
+    )
+    assert status_resp.json()["ingestion_progress"]["unstructured_uploads"] == [
+        {"upload_id": files[0]["id"], "filename": "doc.pdf", "status": "pending_extraction"}
+    ]
 
 
 @pytest.mark.asyncio
@@ -21,9 +21,11 @@ from uuid import uuid4
 import pytest
 from fastapi import HTTPException
 from httpx import AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
+from app.models.uploaded_file import UploadedFile
 from tests.conftest import auth_headers
 
 # Avoid kicking off the real background extraction worker / processor in the
@@ -51,13 +53,15 @@ def _make_zip(members: dict[str, bytes]) -> bytes:
 
 @pytest.mark.asyncio
 async def test_zip_bomb_rejected_by_upload_endpoint(
-    client: AsyncClient, db_session: AsyncSession, monkeypatch
+    client: AsyncClient, db_session: AsyncSession, monkeypatch, tmp_path
 ):
-    """A small zip declaring a large uncompressed size is rejected (413/400)."""
+    """A small zip declaring a large uncompressed size is rejected before it
+    is queued, and nothing of it is kept."""
     import app.services.ingestion.coordinator as coord
 
     # Tighten the uncompressed budget so the test stays fast/deterministic.
     monkeypatch.setattr(coord, "_ZIP_MAX_TOTAL_UNCOMPRESSED_BYTES", 1024 * 1024, raising=False)
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
 
     headers, _ = await auth_headers(client)
     bomb = _make_zip({"bomb.txt": b"\x00" * (5 * 1024 * 1024)})  # 5 MiB of zeros
@@ -67,7 +71,9 @@ async def test_zip_bomb_rejected_by_upload_endpoint(
         headers=headers,
         files={"file": ("bomb.zip", bomb, "application/zip")},
     )
-    assert resp.status_code in (400, 413), resp.text
+    assert resp.status_code == 413, resp.text
+    assert (await db_session.execute(select(UploadedFile))).scalars().all() == []
+    assert not any(p.is_file() for p in tmp_path.rglob("*"))
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,184 @@
+"""Chunked, resumable uploads: POST/GET/PUT/finalize under /upload/sessions."""
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.uploaded_file import UploadedFile
+from app.services.upload_session_service import session_dir
+from app.utils.file_utils import decrypt_file, is_encrypted_file
+from tests.conftest import FIXTURES_DIR, auth_headers, run_ingest_jobs
+
+CHUNK = 4096
+
+
+@pytest.fixture(autouse=True)
+def _upload_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+
+
+async def _open(client: AsyncClient, headers: dict, data: bytes, **extra) -> dict:
+    resp = await client.post(
+        "/api/v1/upload/sessions",
+        headers=headers,
+        json={"filename": "bundle.json", "size": len(data), "chunk_size": CHUNK,
+              "mime_type": "application/json", **extra},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()
+
+
+async def _put(client: AsyncClient, headers: dict, session_id: str, index: int,
+               chunk: bytes, checksum: str | None = None):
+    return await client.put(
+        f"/api/v1/upload/sessions/{session_id}/chunks/{index}",
+        headers={**headers, "X-Chunk-SHA256": checksum or hashlib.sha256(chunk).hexdigest()},
+        content=chunk,
+    )
+
+
+def _chunks(data: bytes) -> list[bytes]:
+    return [data[i:i + CHUNK] for i in range(0, len(data), CHUNK)]
+
+
+async def test_out_of_order_and_retried_chunks_finalize_to_same_hash(
+    client: AsyncClient, db_session: AsyncSession
+):
+    headers, _ = await auth_headers(client)
+    data = (FIXTURES_DIR / "sample_fhir_bundle.json").read_bytes()
+    chunks = _chunks(data)
+    assert len(chunks) == 4
+    session = await _open(client, headers, data)
+    sid = session["session_id"]
+    assert session["chunk_count"] == 4 and session["received_chunks"] == []
+
+    # Last chunk first; a corrupted send is rejected and leaves nothing behind.
+    assert (await _put(client, headers, sid, 3, chunks[3])).status_code == 200
+    bad = await _put(client, headers, sid, 1, chunks[1][:-1] + b"#", hashlib.sha256(chunks[1]).hexdigest())
+    assert bad.status_code == 400
+    assert (await _put(client, headers, sid, 1, chunks[1])).status_code == 200
+    # A retry of a chunk that already arrived simply replaces it.
+    resp = await _put(client, headers, sid, 1, chunks[1])
+    assert resp.json()["received_chunks"] == [1, 3]
+    assert resp.json()["received_ranges"] == [[CHUNK, 2 * CHUNK], [3 * CHUNK, len(data)]]
+
+    early = await client.post(f"/api/v1/upload/sessions/{sid}/finalize", headers=headers)
+    assert early.status_code == 409
+    assert early.json()["detail"]["missing_chunks"] == [0, 2]
+
+    for index in (2, 0):
+        assert (await _put(client, headers, sid, index, chunks[index])).status_code == 200
+    state = (await client.get(f"/api/v1/upload/sessions/{sid}", headers=headers)).json()
+    assert state["received_ranges"] == [[0, len(data)]]
+
+    # Chunks are encrypted at rest as they arrive.
+    parts = sorted(session_dir(UUID(sid)).glob("*.part"))
+    assert len(parts) == 4 and all(is_encrypted_file(p) for p in parts)
+
+    resp = await client.post(f"/api/v1/upload/sessions/{sid}/finalize", headers=headers)
+    assert resp.status_code == 202, resp.text
+    assert resp.json()["status"] == "pending"
+    upload_id = resp.json()["upload_id"]
+    upload = await db_session.get(UploadedFile, UUID(upload_id))
+    assert upload.file_hash == hashlib.sha256(data).hexdigest()
+    assert upload.file_size_bytes == len(data)
+    assert decrypt_file(Path(upload.storage_path)) == data
+    assert not session_dir(UUID(sid)).exists()
+
+    again = await client.post(f"/api/v1/upload/sessions/{sid}/finalize", headers=headers)
+    assert again.status_code == 202 and again.json()["upload_id"] == upload_id
+    late = await _put(client, headers, sid, 0, chunks[0])
+    assert late.status_code == 409
+
+    # Handed to the normal ingest path.
+    await run_ingest_jobs(db_session)
+    upload = await db_session.get(UploadedFile, UUID(upload_id))
+    assert upload.ingestion_status == "completed"
+    assert upload.record_count == 17
+
+
+async def test_chunk_and_session_limits(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    headers, _ = await auth_headers(client)
+    data = b"x" * (CHUNK + 10)
+    sid = (await _open(client, headers, data))["session_id"]
+
+    assert (await _put(client, headers, sid, 2, b"x")).status_code == 416
+    # The short last chunk must have exactly the remaining length.
+    assert (await _put(client, headers, sid, 1, b"x" * 9)).status_code == 400
+    assert (await _put(client, headers, sid, 0, b"x" * (CHUNK + 1))).status_code == 413
+
+    monkeypatch.setattr(settings, "max_file_size_mb", 1)
+    too_big = await client.post(
+        "/api/v1/upload/sessions", headers=headers,
+        json={"filename": "big.json", "size": 2 * 1024 * 1024},
+    )
+    assert too_big.status_code == 413
+    epic = await client.post(
+        "/api/v1/upload/sessions", headers=headers,
+        json={"filename": "epic.zip", "size": 2 * 1024 * 1024, "kind": "epic_export"},
+    )
+    assert epic.status_code == 201
+    assert epic.json()["chunk_size"] == settings.upload_session_chunk_mb * 1024 * 1024
+
+
+async def test_sessions_are_private_and_abortable(client: AsyncClient, db_session: AsyncSession):
+    owner, _ = await auth_headers(client)
+    other, _ = await auth_headers(client, email="other@example.com")
+    data = b"y" * 100
+    sid = (await _open(client, owner, data))["session_id"]
+    assert (await _put(client, owner, sid, 0, data)).status_code == 200
+
+    assert (await client.get(f"/api/v1/upload/sessions/{sid}", headers=other)).status_code == 404
+    assert (await _put(client, other, sid, 0, data)).status_code == 404
+
+    resp = await client.delete(f"/api/v1/upload/sessions/{sid}", headers=owner)
+    assert resp.status_code == 204
+    assert not session_dir(UUID(sid)).exists()
+    assert (await client.get(f"/api/v1/upload/sessions/{sid}", headers=owner)).status_code == 404
+
+
+async def test_crash_after_finalize_commit_still_returns_the_upload(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    headers, _ = await auth_headers(client)
+    data = (FIXTURES_DIR / "sample_fhir_bundle.json").read_bytes()
+    sid = (await _open(client, headers, data))["session_id"]
+    for index, chunk in enumerate(_chunks(data)):
+        assert (await _put(client, headers, sid, index, chunk)).status_code == 200
+
+    # The process dies right after finalize's first commit.
+    real_commit = db_session.commit
+
+    async def commit_then_crash():
+        await real_commit()
+        monkeypatch.setattr(db_session, "commit", real_commit)
+        raise RuntimeError("worker killed")
+
+    monkeypatch.setattr(db_session, "commit", commit_then_crash)
+    with pytest.raises(RuntimeError):
+        await client.post(f"/api/v1/upload/sessions/{sid}/finalize", headers=headers)
+    await db_session.rollback()
+
+    resp = await client.post(f"/api/v1/upload/sessions/{sid}/finalize", headers=headers)
+    assert resp.status_code == 202, resp.text
+    upload = await db_session.get(UploadedFile, UUID(resp.json()["upload_id"]))
+    assert upload.filename == "bundle.json"
+
+
+async def test_chunk_checksum_header_passes_cors_preflight(client: AsyncClient):
+    resp = await client.options(
+        "/api/v1/upload/sessions/00000000-0000-0000-0000-000000000000/chunks/0",
+        headers={
+            "Origin": "http://localhost:3000",
+            "Access-Control-Request-Method": "PUT",
+            "Access-Control-Request-Headers": "content-type,x-chunk-sha256",
+        },
+    )
+    assert resp.status_code == 200
+    assert "x-chunk-sha256" in resp.headers["Access-Control-Allow-Headers"].lower()
@@ -0,0 +1,231 @@
+"""Record version retention and compaction
+(``app.services.ingestion.version_retention``).
+
+Every snapshot the policy keeps must read back exactly as it did before
+compaction — compared as serialized JSON, so types and key order count.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.record import HealthRecord
+from app.models.record_version import RecordVersion
+from app.services.data_version import get_data_version
+from app.services.ingestion.idempotent_inserter import idempotent_insert_records
+from app.services.ingestion.version_retention import (
+    RetentionPolicy,
+    compact_versions,
+    diff,
+    load_versions,
+    patch,
+    storage_stats,
+)
+from tests.conftest import auth_headers, create_test_patient
+
+NOW = datetime(2025, 6, 1, 12, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    ("new", "old"),
+    [
+        ({"a": 1, "b": [1, 2]}, {"a": 1, "b": [1, 2]}),
+        ({"a": 1, "b": 2}, {"b": 2, "a": 1}),
+        ({"v": 1}, {"v": 1.0}),
+        ({"v": 1}, {"v": True}),
+        ({"v": None}, {"v": 0}),
+        ({"v": {}}, {"v": []}),
+        ({"a": 1, "gone": {"x": 1}}, {"added": [None], "a": 2}),
+        ({"l": [1, 2, 3]}, {"l": [1, 2]}),
+        ({"l": [{"k": 1}, {"k": 2}]}, {"l": [{"k": 1}, {"k": 2, "j": "é"}]}),
+        ([{"a": [1, {"b": 2}]}], [{"a": [1, {"b": 2.5, "c": None}]}]),
+        ("text", {"obj": 1}),
+        ({"nested": {"deep": {"x": 1, "y": 2}}}, {"nested": {"deep": {"y": 2, "z": 3}}}),
+    ],
+)
+def test_patch_rebuilds_exactly(new, old):
+    p = diff(new, old)
+    before = json.dumps(new)
+    assert json.dumps(patch(new, p)) == json.dumps(old)
+    assert json.dumps(new) == before  # the newer value is not modified
+    # Patches are stored as JSON.
+    assert json.dumps(patch(json.loads(before), json.loads(json.dumps(p)))) == json.dumps(old)
+
+
+def test_patch_is_small_for_a_small_change():
+    new = {"resourceType": "Observation", "component": [{"code": f"c{i}", "value": i} for i in range(200)]}
+    old = json.loads(json.dumps(new))
+    old["component"][7]["value"] = 7.5
+    assert diff(new, old) == {"{": {"component": {"[": [[7, {"{": {"value": {"=": 7.5}}}]]}}}
+
+
+def _history(ages_in_days: list[float]) -> list[tuple]:
+    return [(i, NOW - timedelta(days=age)) for i, age in enumerate(ages_in_days)]
+
+
+def test_policy_keeps_recent_then_daily_then_weekly():
+    policy = RetentionPolicy(keep_last=3, daily_after_days=2, weekly_after_days=30)
+    # Four snapshots a day for 60 days, newest first.
+    history = _history([i / 4 for i in range(240)])
+    kept = [t for i, t in history if i in policy.retained(history, NOW)]
+    recent = [t for t in kept if NOW - t < timedelta(days=2)]
+    daily = [t.date() for t in kept if timedelta(days=2) <= NOW - t < timedelta(days=30)]
+    weekly = [t.isocalendar()[:2] for t in kept if NOW - t >= timedelta(days=30)]
+
+    assert recent == [t for _, t in history[:8]]
+    # One a day, newest first, on every day not already covered...
+    assert daily == sorted(set(daily), reverse=True)
+    month = {t.date() for _, t in history if NOW - t < timedelta(days=30)}
+    assert set(daily) | {t.date() for t in recent} == month
+    # ...then one a week.
+    assert weekly == sorted(set(weekly), reverse=True)
+    assert 4 <= len(weekly) <= 6
+
+
+def test_policy_always_keeps_the_newest():
+    policy = RetentionPolicy(keep_last=2, daily_after_days=0, weekly_after_days=0)
+    history = _history([400, 400.1, 400.2, 900])
+    assert policy.retained(history, NOW) == {0, 1, 3}
+    with pytest.raises(ValueError):
+        RetentionPolicy(keep_last=0)
+
+
+def _observation(day: int) -> dict:
+    """A sizeable lab panel a source re-sends daily with a few values moved."""
+    resource = {
+        "resourceType": "Observation",
+        "id": "panel-1",
+        "meta": {"lastUpdated": f"2025-01-01T00:00:{day % 60:02d}Z", "versionId": str(day)},
+        "status": "final",
+        "code": {"coding": [{"system": "http://loinc.org", "code": "24323-8",
+                             "display": "Comprehensive metabolic panel"}]},
+        "component": [
+            {
+                "code": {"coding": [{"system": "http://loinc.org", "code": f"{1000 + i}-{i % 10}",
+                                     "display": f"Analyte number {i} in serum or plasma"}]},
+                "valueQuantity": {"value": 4 + i + (day % 3) * 0.25 * (i == day % 40),
+                                  "unit": "mmol/L", "system": "http://unitsofmeasure.org"},
+                "referenceRange": [{"low": {"value": 3 + i}, "high": {"value": 6 + i}}],
+            }
+            for i in range(40)
+        ],
+        "note": [{"text": f"Reviewed on day {d}"} for d in range(day // 20)],
+    }
+    if day % 7 == 0:
+        resource["interpretation"] = [{"text": "weekly review"}]
+    if day % 11 == 0:  # a source that serializes keys in another order
+        resource = dict(reversed(list(resource.items())))
+    return resource
+
+
+async def _ingest(db: AsyncSession, patient, day: int) -> None:
+    await idempotent_insert_records(db, [{
+        "user_id": patient.user_id, "patient_id": patient.id, "source_file_id": None,
+        "record_type": "observation", "fhir_resource_type": "Observation",
+        "fhir_resource": _observation(day), "source_format": "fhir_r4",
+        "display_text": "Metabolic panel", "status": "final",
+    }])
+    await db.commit()
+
+
+async def _snapshots(db: AsyncSession) -> dict:
+    rows = (await db.execute(
+        select(RecordVersion).execution_options(populate_existing=True)
+    )).scalars().all()
+    return {v.id: json.dumps(v.fhir_resource) for v in rows}
+
+
+def _factory(db: AsyncSession):
+    return async_sessionmaker(db.bind, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _load(db: AsyncSession, record_id) -> list:
+    async with _factory(db)() as reader:
+        return await load_versions(reader, record_id)
+
+
+async def _churn(client, db: AsyncSession, resends: int):
+    """Ingest ``resends`` changed copies of one record, backdated to two a
+    day up to ``NOW``; return the patient and the record."""
+    _, uid = await auth_headers(client)
+    patient = await create_test_patient(db, uid)
+    for day in range(resends + 1):
+        await _ingest(db, patient, day)
+    # The snapshot of version v was taken when version v + 1 arrived.
+    for v in (await db.execute(select(RecordVersion))).scalars().all():
+        await db.execute(
+            update(RecordVersion).where(RecordVersion.id == v.id)
+            .values(created_at=NOW - timedelta(hours=12 * (resends - v.version)))
+        )
+    await db.commit()
+    record = (await db.execute(select(HealthRecord))).scalars().one()
+    await db.refresh(record)
+    return patient, record
+
+
+@pytest.mark.asyncio
+async def test_churn_compacts_and_every_kept_version_rebuilds(client, db_session: AsyncSession):
+    patient, record = await _churn(client, db_session, resends=200)
+    live = json.dumps(record.fhir_resource)
+    originals = await _snapshots(db_session)
+    before = await storage_stats(db_session)
+    data_version = await get_data_version(db_session, record.user_id)
+
+    stats = await compact_versions(_factory(db_session), RetentionPolicy(), now=NOW)
+    after = await storage_stats(db_session)
+    print(f"\nrecord_versions before: {before}\nrecord_versions after:  {after}")
+
+    assert stats.records == 1 and stats.skipped == 0
+    assert stats.deleted == before["versions"] - after["versions"] > 0
+    assert after["full_copies"] == 1 and after["deltas"] == after["versions"] - 1
+    assert after["bytes"] < before["bytes"] / 10
+
+    loaded = await _load(db_session, record.id)
+    assert len(loaded) == after["versions"]
+    for version, resource in loaded:
+        assert json.dumps(resource) == originals[version.id]
+    # The live record and the user's data (and so the change feed) are untouched.
+    await db_session.refresh(record)
+    assert json.dumps(record.fhir_resource) == live
+    assert await get_data_version(db_session, record.user_id) == data_version
+
+    # Ingest keeps writing full copies on top; the chain stays readable, and
+    # the next run folds the new copy in.
+    await _ingest(db_session, patient, 201)
+    originals = {**await _snapshots(db_session), **originals}
+    for version, resource in await _load(db_session, record.id):
+        assert json.dumps(resource) == originals[version.id]
+    stats = await compact_versions(_factory(db_session), RetentionPolicy(), now=NOW)
+    # The new copy stays full; the one before it becomes a delta.
+    assert (stats.rewritten, stats.deleted) == (1, 0)
+    for version, resource in await _load(db_session, record.id):
+        assert json.dumps(resource) == originals[version.id]
+
+    # Nothing left to do.
+    stats = await compact_versions(_factory(db_session), RetentionPolicy(), now=NOW)
+    assert (stats.rewritten, stats.deleted) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_record_being_written_is_skipped_until_next_run(client, db_session: AsyncSession):
+    _, record = await _churn(client, db_session, resends=20)
+    originals = await _snapshots(db_session)
+    policy = RetentionPolicy(keep_last=3, daily_after_days=1, weekly_after_days=5)
+
+    async with _factory(db_session)() as writer:
+        await writer.execute(
+            select(HealthRecord).where(HealthRecord.id == record.id).with_for_update()
+        )
+        stats = await compact_versions(_factory(db_session), policy, batch=1, now=NOW)
+        assert (stats.records, stats.skipped, stats.deleted) == (0, 1, 0)
+        await writer.rollback()
+
+    assert await _snapshots(db_session) == originals
+    stats = await compact_versions(_factory(db_session), policy, batch=1, now=NOW)
+    assert (stats.records, stats.skipped) == (1, 0) and stats.deleted > 0
+    for version, resource in await _load(db_session, record.id):
+        assert json.dumps(resource) == originals[version.id]
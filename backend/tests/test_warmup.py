@@ -0,0 +1,107 @@
+"""Cold start: lazy heavy imports, background warm-up and /health/ready."""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.services import warmup
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# ``import app.main`` loads ~800 modules in ~2s; the LLM SDKs alone added ~2100
+# modules and ~2.5s. Generous headroom, but a heavy eager import trips these.
+IMPORT_MODULE_BUDGET = 1200
+IMPORT_SECONDS_BUDGET = 5.0
+LAZY_MODULES = (
+    "anthropic", "openai", "google.genai", "langextract", "spacy", "medspacy",
+    "fhir.resources", "fhir_converter", "pdfplumber", "PIL",
+)
+
+_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "modules": len(sys.modules),
+    "heavy": [m for m in {LAZY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+@pytest.fixture(autouse=True)
+def _reset_warmup():
+    yield
+    warmup.run_warmup([])
+
+
+def test_import_app_main_stays_within_budget():
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=BACKEND_DIR,
+        capture_output=True, text=True, timeout=120, check=True,
+    )
+    probe = json.loads(out.stdout.strip().splitlines()[-1])
+    assert probe["heavy"] == []
+    assert probe["modules"] < IMPORT_MODULE_BUDGET, probe
+    assert probe["seconds"] < IMPORT_SECONDS_BUDGET, probe
+
+
+def test_planned_components_follow_settings(monkeypatch):
+    monkeypatch.setattr(settings, "phi_ner_enabled", True)
+    monkeypatch.setattr(settings, "extraction_engine", "gemini")
+    assert [n for n, _ in warmup.planned_components()] == ["phi_ner", "terminology"]
+    monkeypatch.setattr(settings, "phi_ner_enabled", False)
+    monkeypatch.setattr(settings, "extraction_engine", "hybrid")
+    assert [n for n, _ in warmup.planned_components()] == [
+        "local_ner", "clinical_context", "terminology",
+    ]
+
+
+async def test_ready_endpoint_waits_for_warmup(client: AsyncClient, monkeypatch):
+    release = threading.Event()
+
+    def slow_model() -> bool:
+        release.wait(10)
+        return True
+
+    def broken() -> bool:
+        raise RuntimeError("model file corrupt")
+
+    steps = [("phi_ner", slow_model), ("local_ner", lambda: False), ("terminology", broken)]
+    monkeypatch.setattr(settings, "startup_warmup", True)
+    monkeypatch.setattr(warmup, "planned_components", lambda: steps)
+    thread = warmup.start_warmup()
+
+    resp = await client.get("/api/v1/health/ready")
+    assert resp.status_code == 503
+    assert resp.json()["ready"] is False
+    assert resp.json()["components"]["phi_ner"] in ("pending", "loading")
+    # Liveness is unaffected while models load.
+    assert (await client.get("/api/v1/health")).status_code == 200
+
+    release.set()
+    thread.join(10)
+    resp = await client.get("/api/v1/health/ready")
+    assert resp.status_code == 200
+    body = resp.json()
+    # Fail-open: unavailable or broken components never hold readiness back.
+    assert body["ready"] is True
+    assert body["components"] == {
+        "phi_ner": "ready", "local_ner": "unavailable", "terminology": "failed",
+    }
+    assert body["warmup_seconds"] >= 0
+
+
+async def test_warmup_disabled_is_ready_at_once(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "startup_warmup", False)
+    assert warmup.start_warmup() is None
+    resp = await client.get("/api/v1/health/ready")
+    assert resp.status_code == 200 and resp.json()["components"] == {}
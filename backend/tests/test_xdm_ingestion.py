@@ -5,6 +5,7 @@ import io
 import json
 import zipfile
 from pathlib import Path
+from uuid import UUID
 from unittest.mock import AsyncMock, patch
 
 import pytest
@@ -13,15 +14,30 @@ from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.record import HealthRecord
+from app.models.uploaded_file import UploadedFile
 from app.services.dedup.orchestrator import DedupSummary
-from tests.conftest import FIXTURES_DIR, auth_headers
+from tests.conftest import FIXTURES_DIR, auth_headers, run_ingest_jobs
 
 SYNTHETIC_CDA_DIR = FIXTURES_DIR / "synthetic_cda"
 
-# Patch path for dedup (local import inside ingest_file)
+# Patch path for dedup (local import inside the ingest job)
 PATCH_DEDUP = "app.services.dedup.orchestrator.run_upload_dedup"
 
 
+async def _upload(
+    client: AsyncClient, headers: dict, db_session: AsyncSession, filename: str, data: bytes
+) -> UploadedFile:
+    """POST ``data`` to /upload and run the queued ingest job."""
+    resp = await client.post(
+        "/api/v1/upload",
+        headers=headers,
+        files={"file": (filename, data, "application/zip")},
+    )
+    assert resp.status_code == 202
+    await run_ingest_jobs(db_session)
+    return await db_session.get(UploadedFile, UUID(resp.json()["upload_id"]))
+
+
 def _create_xdm_zip() -> bytes:
     """Create a ZIP with IHE XDM structure from synthetic CDA fixtures."""
     buf = io.BytesIO()
@@ -91,19 +107,13 @@ async def test_coordinator_detects_xdm_in_zip(
             }
         ]
 
-        resp = await client.post(
-            "/api/v1/upload",
-            headers=headers,
-            files={"file": ("xdm_export.zip", zip_data, "application/zip")},
-        )
+        upload = await _upload(client, headers, db_session, "xdm_export.zip", zip_data)
 
-    assert resp.status_code == 202
-    data = resp.json()
-    assert data["status"] in ("completed", "dedup_scanning")
+    assert upload.ingestion_status == "completed"
     # parse_cda_document called once per XML doc (2 docs in manifest)
     assert mock_parse.call_count == 2
     # 1 record per doc x 2 docs = 2 records, dedup may collapse some
-    assert data["records_inserted"] >= 1
+    assert upload.record_count >= 1
 
 
 @pytest.mark.asyncio
@@ -143,23 +153,20 @@ async def test_xdm_skips_pdf_in_package(
             }
         ]
 
-        resp = await client.post(
-            "/api/v1/upload",
-            headers=headers,
-            files={"file": ("xdm_export.zip", zip_data, "application/zip")},
-        )
+        upload = await _upload(client, headers, db_session, "xdm_export.zip", zip_data)
 
-    assert resp.status_code == 202
-    data = resp.json()
     # The PDF should show up in errors with structured_preferred reason
     pdf_errors = [
-        e for e in data.get("errors", [])
+        e for e in upload.ingestion_errors or []
         if e.get("reason") == "structured_preferred"
     ]
     assert len(pdf_errors) == 1
     assert "SCAN0001.PDF" in pdf_errors[0]["file"]
     # No unstructured uploads created for XDM path
-    assert data.get("unstructured_uploads", []) == []
+    unstructured = await db_session.scalar(
+        select(UploadedFile.id).where(UploadedFile.file_category == "unstructured")
+    )
+    assert unstructured is None
 
 
 @pytest.mark.asyncio
@@ -201,18 +208,12 @@ async def test_xdm_creates_cda_records(
             }
         ]
 
-        resp = await client.post(
-            "/api/v1/upload",
-            headers=headers,
-            files={"file": ("xdm_export.zip", zip_data, "application/zip")},
-        )
-
-    assert resp.status_code == 202
+        upload = await _upload(client, headers, db_session, "xdm_export.zip", zip_data)
 
+    assert upload.ingestion_status == "completed"
     # Query DB for inserted records
-    from uuid import UUID as _UUID
     result = await db_session.execute(
-        select(HealthRecord).where(HealthRecord.user_id == _UUID(uid))
+        select(HealthRecord).where(HealthRecord.user_id == UUID(uid))
     )
     records = result.scalars().all()
     assert len(records) >= 1
@@ -279,16 +280,10 @@ async def test_xdm_intra_upload_dedup(
          ):
         mock_dedup.return_value = DedupSummary()
 
-        resp = await client.post(
-            "/api/v1/upload",
-            headers=headers,
-            files={"file": ("xdm_export.zip", zip_data, "application/zip")},
-        )
+        upload = await _upload(client, headers, db_session, "xdm_export.zip", zip_data)
 
-    assert resp.status_code == 202
-    data = resp.json()
     # 2 docs parsed, but dedup collapses the identical record
-    assert data["records_inserted"] == 1
+    assert upload.record_count == 1
 
 
 @pytest.mark.asyncio
@@ -302,14 +297,8 @@ async def test_non_xdm_zip_uses_existing_pipeline(
     with patch(PATCH_DEDUP, new_callable=AsyncMock) as mock_dedup:
         mock_dedup.return_value = DedupSummary()
 
-        resp = await client.post(
-            "/api/v1/upload",
-            headers=headers,
-            files={"file": ("fhir_bundle.zip", zip_data, "application/zip")},
-        )
+        upload = await _upload(client, headers, db_session, "fhir_bundle.zip", zip_data)
 
-    assert resp.status_code == 202
-    data = resp.json()
-    assert data["status"] in ("completed", "dedup_scanning")
+    assert upload.ingestion_status == "completed"
     # The sample FHIR bundle has 17 clinical resources
-    assert data["records_inserted"] == 17
+    assert upload.record_count == 17
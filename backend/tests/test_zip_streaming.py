@@ -0,0 +1,275 @@
+"""Tests for member-streaming ZIP ingestion (``ZIP_STREAMING_INGEST``).
+
+The streaming path must insert exactly what the extract-to-disk path inserts,
+enforce the SEC-DOS-02 caps on the bytes actually read (a member whose header
+lies is stopped mid-stream) and write unstructured members once, encrypted,
+with the plaintext hash. The benchmark reports wall time and peak disk usage
+(temp extract dir + upload dir) of both paths on a large synthetic ZIP
+(``pytest -s``).
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+import zipfile
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.services.ingestion.coordinator as coord
+from app.config import settings
+from app.models.record import HealthRecord
+from app.models.uploaded_file import UploadedFile
+from app.services.ingestion.zip_members import ZipBudget, list_zip_members
+from app.utils.file_utils import decrypt_file, is_encrypted_file
+from tests.conftest import FIXTURES_DIR, auth_headers, create_test_patient
+
+EPIC_DIR = FIXTURES_DIR / "sample_epic_tsv"
+FHIR_BUNDLE = FIXTURES_DIR / "sample_fhir_bundle.json"
+SYNTHETIC_CDA_DIR = FIXTURES_DIR / "synthetic_cda"
+
+
+@pytest.fixture(autouse=True)
+def _storage_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "temp_extract_dir", str(tmp_path / "extract"))
+
+
+def _mixed_zip(path: Path, pdf: bytes = b"%PDF-1.4 synthetic\n") -> Path:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for tsv in sorted(EPIC_DIR.glob("*.tsv")):
+            zf.write(tsv, f"export/EHITables/{tsv.name}")
+        zf.writestr("export/EHITables/schema/PATIENT.htm", "<html></html>")
+        zf.write(FHIR_BUNDLE, "export/fhir/bundle.json")
+        zf.writestr("export/README.txt", "readme")
+        zf.writestr("export/notes/scan.pdf", pdf)
+    return path
+
+
+def _xdm_zip(path: Path) -> Path:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for f in sorted(SYNTHETIC_CDA_DIR.iterdir()):
+            if f.is_file() and f.suffix.upper() == ".XML":
+                zf.write(f, f"IHE_XDM/Patient1/{f.name}")
+    return path
+
+
+async def _make_upload(db: AsyncSession, user_id: UUID) -> UUID:
+    uf = UploadedFile(
+        user_id=user_id,
+        filename="export.zip",
+        mime_type="application/zip",
+        file_hash=uuid4().hex + uuid4().hex,
+        storage_path=f"/tmp/{uuid4().hex}.zip",
+        file_category="structured",
+    )
+    db.add(uf)
+    await db.flush()
+    return uf.id
+
+
+async def _ingest(client, db, zip_path: Path, email: str, streaming: bool, monkeypatch):
+    monkeypatch.setattr(settings, "zip_streaming_ingest", streaming)
+    _, uid = await auth_headers(client, email)
+    user_id = UUID(uid)
+    patient = await create_test_patient(db, user_id)
+    upload_id = await _make_upload(db, user_id)
+    stats = await coord._ingest_zip(db, user_id, patient.id, upload_id, zip_path)
+    records = (
+        await db.execute(select(HealthRecord).where(HealthRecord.user_id == user_id))
+    ).scalars().all()
+    return stats, records
+
+
+def _record_keys(records) -> list[tuple]:
+    return sorted(
+        (r.record_type, r.fhir_resource_type, r.content_hash, r.source_format)
+        for r in records
+    )
+
+
+@pytest.mark.parametrize("builder", [_mixed_zip, _xdm_zip])
+async def test_streaming_matches_extract_path(
+    client: AsyncClient, db_session: AsyncSession, tmp_path, monkeypatch, builder
+):
+    zip_path = builder(tmp_path / "upload.zip")
+    extracted, extracted_records = await _ingest(
+        client, db_session, zip_path, "extract@example.com", False, monkeypatch
+    )
+    streamed, streamed_records = await _ingest(
+        client, db_session, zip_path, "stream@example.com", True, monkeypatch
+    )
+    assert streamed["records_inserted"] == extracted["records_inserted"] > 0
+    assert streamed["total_entries"] == extracted["total_entries"]
+    assert len(streamed["unstructured_files"]) == len(extracted["unstructured_files"])
+    if builder is _xdm_zip:
+        # DocumentReferences carry the wall-clock render time; compare the rest.
+        extracted_records = [r for r in extracted_records if r.fhir_resource_type != "DocumentReference"]
+        streamed_records = [r for r in streamed_records if r.fhir_resource_type != "DocumentReference"]
+    assert _record_keys(streamed_records) == _record_keys(extracted_records)
+    assert not any(Path(settings.temp_extract_dir).glob("*/*"))
+
+
+async def test_unstructured_member_is_encrypted_with_plaintext_hash(
+    client: AsyncClient, db_session: AsyncSession, tmp_path, monkeypatch
+):
+    pdf = b"%PDF-1.4\n" + os.urandom(3 * 1024 * 1024)
+    zip_path = _mixed_zip(tmp_path / "upload.zip", pdf=pdf)
+    stats, _ = await _ingest(client, db_session, zip_path, "pdf@example.com", True, monkeypatch)
+
+    [queued] = stats["unstructured_files"]
+    assert queued["filename"] == "scan.pdf"
+    upload = await db_session.get(UploadedFile, UUID(queued["upload_id"]))
+    assert upload.file_hash == hashlib.sha256(pdf).hexdigest()
+    assert upload.file_size_bytes == len(pdf)
+    assert upload.mime_type == "application/pdf"
+    assert is_encrypted_file(upload.storage_path)
+    assert decrypt_file(upload.storage_path) == pdf
+    assert not Path(settings.temp_extract_dir).exists()
+
+
+async def test_budget_is_enforced_mid_stream(db_session: AsyncSession, tmp_path, monkeypatch):
+    """With the up-front header checks out of the way (as if the headers lied),
+    the real-byte budget still stops the read inside the member, before
+    anything is written anywhere."""
+    monkeypatch.setattr(settings, "zip_streaming_ingest", True)
+    monkeypatch.setattr(coord, "_ZIP_MAX_TOTAL_UNCOMPRESSED_BYTES", 1024 * 1024)
+    monkeypatch.setattr(coord, "_check_zip_declared", lambda infos: None)
+
+    body = b'{"resourceType": "Bundle", "entry": [' + b" " * (8 * 1024 * 1024) + b"]}"
+    zip_path = tmp_path / "bomb.zip"
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("bundle.json", body)
+
+    read_sizes = []
+    real_charge = ZipBudget.charge
+
+    def spy(self, name, bytes_read):
+        read_sizes.append(bytes_read)
+        return real_charge(self, name, bytes_read)
+
+    monkeypatch.setattr(ZipBudget, "charge", spy)
+    with pytest.raises(HTTPException) as exc:
+        await coord._ingest_zip(db_session, uuid4(), uuid4(), uuid4(), zip_path)
+    assert exc.value.status_code == 413
+    assert max(read_sizes) <= 2 * 1024 * 1024  # stopped within a chunk of the cap
+    assert not Path(settings.temp_extract_dir).exists()
+    assert not Path(settings.upload_dir).exists()
+
+
+def test_list_zip_members_skips_zip_slip(tmp_path):
+    zip_path = tmp_path / "slip.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("../evil.json", "{}")
+        zf.writestr("/abs.json", "{}")
+        zf.writestr("a/./b/../ok.json", "{}")
+    with zipfile.ZipFile(zip_path) as zf:
+        members = list_zip_members(zf, ZipBudget(1 << 20, 1 << 20))
+        assert [m.name for m in members] == ["a/ok.json"]
+        assert members[0].read_bytes() == b"{}"
+
+
+def test_budget_charges_rereads_once(tmp_path):
+    zip_path = tmp_path / "twice.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("bundle.json", b"x" * 1000)
+    budget = ZipBudget(max_member_bytes=1500, max_total_bytes=1500)
+    with zipfile.ZipFile(zip_path) as zf:
+        [member] = list_zip_members(zf, budget)
+        member.read_bytes()
+        member.read_bytes()  # e.g. the reference-name pass, then the main pass
+    assert budget.total_bytes == 1000
+
+
+# ---------------------------------------------------------------------------
+# Benchmark (wall time + peak disk, reported with -s)
+# ---------------------------------------------------------------------------
+
+
+def _large_zip(path: Path) -> Path:
+    """The sample Epic export plus a 32 MiB table it does not map (real EHI
+    exports carry hundreds), the FHIR bundle and 8 MiB of incompressible PDFs."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for tsv in sorted(EPIC_DIR.glob("*.tsv")):
+            zf.write(tsv, f"EHITables/{tsv.name}")
+        with zf.open("EHITables/ACCESS_LOG.tsv", "w", force_zip64=True) as f:
+            for _ in range(32):  # 1 MiB of hex "columns" per block
+                hexed = os.urandom(512 * 1024).hex()
+                f.write("\n".join(
+                    "\t".join(hexed[i:i + 4096][j:j + 16] for j in range(0, 4096, 16))
+                    for i in range(0, len(hexed), 4096)
+                ).encode() + b"\n")
+        zf.write(FHIR_BUNDLE, "fhir/bundle.json")
+        for i in range(4):
+            zf.writestr(f"notes/scan{i}.pdf", b"%PDF-1.4\n" + os.urandom(2 * 1024 * 1024))
+    return path
+
+
+def _dir_size(root: Path) -> int:
+    total = 0
+    for dirpath, _dirs, files in os.walk(root):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+class _DiskSampler:
+    def __init__(self, *roots: Path) -> None:
+        self.roots = roots
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, sum(_dir_size(r) for r in self.roots))
+            self._stop.wait(0.005)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, sum(_dir_size(r) for r in self.roots))
+
+
+async def test_benchmark_streaming_vs_extract(
+    client: AsyncClient, db_session: AsyncSession, tmp_path, monkeypatch
+):
+    zip_path = _large_zip(tmp_path / "large.zip")
+    uncompressed = sum(i.file_size for i in zipfile.ZipFile(zip_path).infolist())
+    results = {}
+    for label, streaming in (("extract", False), ("stream", True)):
+        roots = (tmp_path / label / "extract", tmp_path / label / "uploads")
+        for root in roots:
+            root.mkdir(parents=True)
+        monkeypatch.setattr(settings, "temp_extract_dir", str(roots[0]))
+        monkeypatch.setattr(settings, "upload_dir", str(roots[1]))
+        with _DiskSampler(*roots) as sampler:
+            t0 = time.perf_counter()
+            stats, _ = await _ingest(
+                client, db_session, zip_path, f"{label}@example.com", streaming, monkeypatch
+            )
+            elapsed = time.perf_counter() - t0
+        results[label] = (elapsed, sampler.peak, stats["records_inserted"])
+
+    (t_ex, disk_ex, n_ex), (t_st, disk_st, n_st) = results["extract"], results["stream"]
+    print(
+        f"\nZIP {uncompressed / 2**20:.0f} MiB uncompressed: "
+        f"extract {t_ex:.2f}s peak disk {disk_ex / 2**20:.1f} MiB  |  "
+        f"stream {t_st:.2f}s peak disk {disk_st / 2**20:.1f} MiB"
+    )
+    assert n_st == n_ex
+    assert disk_st < disk_ex
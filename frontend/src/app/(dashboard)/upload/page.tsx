@@ -18,6 +18,7 @@ import { getFilesFromDrop } from "@/lib/getFilesFromDrop";
 import { api, type OcrNotice } from "@/lib/api";
 import type {
   UploadResponse,
+  UploadStatusResponse,
   UnstructuredUploadResponse,
   TriggerExtractionResponse,
 } from "@/types/api";
@@ -153,10 +154,42 @@ function formatUploadError(err: unknown): string {
 interface UploadResult {
   type: "structured" | "unstructured";
   filename: string;
-  response?: UploadResponse | UnstructuredUploadResponse;
+  // Structured: the upload's status once its ingest job has run.
+  response?: UploadStatusResponse | UnstructuredUploadResponse;
   error?: string;
 }
 
+// A structured upload is ingested by a worker job after POST /upload answers
+// 202; until it leaves these statuses its counts and ZIP children are unknown.
+const INGESTING_STATUSES = new Set(["pending", "processing"]);
+const INGEST_POLL_MS = 1500;
+// Stop waiting after this long (e.g. no ingest worker is running); the job
+// still runs server-side and the upload shows as still processing.
+const INGEST_MAX_WAIT_MS = 5 * 60 * 1000;
+
+async function waitForIngest(uploadId: string): Promise<UploadStatusResponse> {
+  const deadline = Date.now() + INGEST_MAX_WAIT_MS;
+  for (;;) {
+    const status = await api.get<UploadStatusResponse>(`/upload/${uploadId}/status`);
+    if (!INGESTING_STATUSES.has(status.ingestion_status) || Date.now() >= deadline) {
+      return status;
+    }
+    await new Promise((resolve) => setTimeout(resolve, INGEST_POLL_MS));
+  }
+}
+
+function stillIngesting(result: UploadResult): boolean {
+  return (
+    !!result.response &&
+    "ingestion_status" in result.response &&
+    INGESTING_STATUSES.has(result.response.ingestion_status)
+  );
+}
+
+function recordsInserted(status: UploadStatusResponse): number {
+  return status.ingestion_progress?.records_inserted ?? status.record_count;
+}
+
 function SecureChip() {
   return (
     <span className="secure">
@@ -344,25 +377,15 @@ export default function UploadPage() {
     const structured = selectedFiles.filter(isStructured);
     const unstructured = selectedFiles.filter(isUnstructured);
 
-    // Upload structured files one at a time
+    // Upload structured files one at a time; each is queued as an ingest job,
+    // so wait for all of them to be ingested together afterwards.
+    const queued: { file: File; uploadId: string }[] = [];
     for (const file of structured) {
       try {
         const formData = new FormData();
         formData.append("file", file);
         const resp = await api.postForm<UploadResponse>("/upload", formData);
-        results.push({ type: "structured", filename: file.name, response: resp });
-        if (resp.unstructured_uploads && resp.unstructured_uploads.length > 0) {
-          for (const u of resp.unstructured_uploads) {
-            // ZIP children are NOT auto-claimed by the worker — they need a
-            // manual Extract, so mark needsTrigger.
-            batchInputs.push({
-              upload_id: u.upload_id,
-              filename: u.filename,
-              status: u.status || "pending_extraction",
-              needsTrigger: true,
-            });
-          }
-        }
+        queued.push({ file, uploadId: resp.upload_id });
       } catch (err) {
         results.push({
           type: "structured",
@@ -371,6 +394,44 @@ export default function UploadPage() {
         });
       }
     }
+    const ingested = await Promise.allSettled(
+      queued.map(({ uploadId }) => waitForIngest(uploadId))
+    );
+    queued.forEach(({ file }, i) => {
+      const outcome = ingested[i];
+      if (outcome.status === "rejected") {
+        results.push({
+          type: "structured",
+          filename: file.name,
+          error:
+            outcome.reason instanceof Error
+              ? outcome.reason.message
+              : "Ingestion status unavailable",
+        });
+        return;
+      }
+      const resp = outcome.value;
+      if (resp.ingestion_status === "failed") {
+        const [first] = resp.ingestion_errors ?? [];
+        results.push({
+          type: "structured",
+          filename: file.name,
+          error: first ? formatUploadError(first) : "Ingestion failed",
+        });
+        return;
+      }
+      results.push({ type: "structured", filename: file.name, response: resp });
+      for (const u of resp.ingestion_progress?.unstructured_uploads ?? []) {
+        // ZIP children are NOT auto-claimed by the worker — they need a
+        // manual Extract, so mark needsTrigger.
+        batchInputs.push({
+          upload_id: u.upload_id,
+          filename: u.filename,
+          status: u.status || "pending_extraction",
+          needsTrigger: true,
+        });
+      }
+    });
 
     // Upload unstructured files (auto-claimed by the extraction worker).
     if (unstructured.length === 1) {
@@ -786,12 +847,17 @@ export default function UploadPage() {
                     <span className="tdot" style={{ background: "var(--danger)" }} />
                     {result.error}
                   </span>
+                ) : stillIngesting(result) ? (
+                  <span className="tag" style={{ flexShrink: 0 }}>
+                    <span className="tdot" style={{ background: "var(--text-muted)" }} />
+                    Still processing, check back later
+                  </span>
                 ) : result.type === "structured" &&
                   result.response &&
-                  "records_inserted" in result.response ? (
+                  "ingestion_status" in result.response ? (
                   <span className="tag" style={{ flexShrink: 0 }}>
                     <span className="tdot" style={{ background: "var(--success)" }} />
-                    {(result.response as UploadResponse).records_inserted} records inserted
+                    {recordsInserted(result.response)} records inserted
                   </span>
                 ) : (
                   // Upload accepted; live extraction status is shown in the
@@ -811,9 +877,9 @@ export default function UploadPage() {
                 (r) =>
                   r.type === "structured" &&
                   r.response &&
-                  "errors" in r.response &&
-                  Array.isArray((r.response as UploadResponse).errors) &&
-                  (r.response as UploadResponse).errors.length > 0
+                  "ingestion_errors" in r.response &&
+                  Array.isArray(r.response.ingestion_errors) &&
+                  r.response.ingestion_errors.length > 0
               )
               .map((r, i) => (
                 <div key={`errs-${i}`} style={{ marginTop: 12 }}>
@@ -829,7 +895,7 @@ export default function UploadPage() {
                       gap: 4,
                     }}
                   >
-                    {(r.response as UploadResponse).errors.map((err, j) => (
+                    {(r.response as UploadStatusResponse).ingestion_errors.map((err, j) => (
                       <p
                         key={j}
                         className="mono dim"
@@ -71,7 +71,19 @@ async function refreshAccessToken(): Promise<string | null> {
   return refreshPromise;
 }
 
+// --- Conditional GETs ---
+// The heavy read endpoints (timeline, dashboard overview, record stats, record
+// FHIR) answer with an ETag that changes whenever the user's data does. Bodies
+// are kept here, in memory only (the responses are no-store: no PHI in the
+// browser cache), and revalidated with If-None-Match; a 304 reuses the body.
+const etagCache = new Map<string, { etag: string; body: unknown }>();
+
+export function clearResponseCache(): void {
+  etagCache.clear();
+}
+
 function endSessionAndRedirect(): void {
+  clearResponseCache();
   try {
     useAuthStore.getState().clearTokens();
   } catch {
@@ -136,6 +148,12 @@ class ApiClient {
       headers["Content-Type"] = "application/json";
     }
 
+    const isGet = (fetchOptions.method ?? "GET").toUpperCase() === "GET";
+    const cached = isGet ? etagCache.get(endpoint) : undefined;
+    if (cached) {
+      headers["If-None-Match"] = cached.etag;
+    }
+
     const response = await fetch(`${this.baseUrl}${endpoint}`, {
       ...fetchOptions,
       headers,
@@ -164,6 +182,10 @@ class ApiClient {
       endSessionAndRedirect();
     }
 
+    if (response.status === 304 && cached) {
+      return cached.body as T;
+    }
+
     if (!response.ok) {
       const error = await response.json().catch(() => ({ detail: "Request failed" }));
       throw new ApiError(response.status, error.detail || "Request failed");
@@ -173,7 +195,12 @@ class ApiClient {
       return undefined as T;
     }
 
-    return response.json();
+    const body = await response.json();
+    const etag = isGet ? response.headers.get("ETag") : null;
+    if (etag) {
+      etagCache.set(endpoint, { etag, body });
+    }
+    return body;
   }
 
   async get<T>(endpoint: string, token?: string): Promise<T> {
@@ -195,6 +222,7 @@ class ApiClient {
    * local state if this throws.
    */
   async logout(): Promise<void> {
+    clearResponseCache();
     const refreshToken = getRefreshToken();
     const accessToken = getToken();
     await this.post<void>(
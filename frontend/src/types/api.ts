@@ -110,12 +110,30 @@ export interface DashboardOverview {
   date_range_end: string | null;
 }
 
+/**
+ * `POST /upload` and `/upload/epic-export` answer 202 once the file is queued
+ * as an ingest job (`status: "pending"`); counts, errors and a ZIP's queued
+ * documents come from `GET /upload/{id}/status` when the job has run.
+ */
 export interface UploadResponse {
   upload_id: string;
   status: string;
-  records_inserted: number;
-  errors: unknown[];
-  unstructured_uploads?: { upload_id: string; filename: string; status: string }[];
+}
+
+export interface UploadStatusResponse {
+  upload_id: string;
+  filename: string;
+  ingestion_status: string;
+  record_count: number;
+  ingestion_progress: {
+    records_inserted?: number;
+    records_updated?: number;
+    records_unchanged?: number;
+    records_skipped?: number;
+    // Unstructured files of a ZIP, queued for extraction by the ingest job.
+    unstructured_uploads?: { upload_id: string; filename: string; status: string }[];
+  };
+  ingestion_errors: unknown[];
 }
 
 export interface PendingExtractionFile {